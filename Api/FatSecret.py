@@ -1,87 +1,236 @@
-# import requests
-# from Cache.FatSecretCache import get_cached_fatsecret_token
-
-# class FatSecretComponent:
-#     """Handles FatSecret API interactions, including authentication and food recognition."""
-
-#     BASE_URL = "https://platform.fatsecret.com/rest"
-
-#     def __init__(self):
-#         self.token = get_cached_fatsecret_token()  
-
-#     def make_request(self, endpoint, method="GET", params=None):
-#         if not self.token:
-#             self.token = get_cached_fatsecret_token()  
-
-#         url = f"{self.BASE_URL}{endpoint}"
-#         headers = {
-#             "Authorization": f"Bearer {self.token}",
-#             "Content-Type": "application/json"
-#         }
-
-#         try:
-#             response = requests.get(url, headers=headers, params=params) if method.upper() == "GET" else None
-#             response.raise_for_status()
-#             return response.json()
-#         except requests.exceptions.HTTPError as e:
-#             if response.status_code == 401:
-#                 print("Access token expired. Fetching new token")
-#                 self.token = get_cached_fatsecret_token()  
-#                 return self.make_request(endpoint, method, params)
-#             else:
-#                 print(f"FatSecret API Error: {e}")
-#                 return None
-
-#     def search_foods(self, search_expression):
-#         params = {
-#             "search_expression": search_expression,
-#             "include_sub_categories": "true",
-#             "include_food_images": "false",
-#             "max_results": "1",
-#             "format": "json"
-#         }
-        
-#         response = self.make_request("/foods/search/v3", method="GET", params=params)
-#         if not response:
-#             return None
-
-#         try:
-#             food_results = response.get("foods_search", {}).get("results", {}).get("food", [])
-#             if not food_results:
-#                 return None
-
-#             subcategories = food_results[0].get("food_sub_categories", {}).get("food_sub_category", [])
-#             return subcategories if subcategories else None
-#         except Exception as e:
-#             print(f"Error processing response: {e}")
-#             return None
-
-#     def get_food_categories(self):
-#         params = {"format": "json"}  
-
-#         response = self.make_request("/food-categories/v2", method="GET", params=params)
-#         if not response:
-#             return None
-
-#         try:
-#             categories = response.get("food_categories", {}).get("food_category", [])
-#             return [{"id": cat["food_category_id"], "name": cat["food_category_name"]} for cat in categories]
-#         except Exception as e:
-#             print(f"Error processing response: {e}")
-#             return None
-
-#     def get_food_sub_categories(self, food_category_id):
-#         params = {
-#             "format": "json", 
-#             "food_category_id": food_category_id
-#         }
-
-#         response = self.make_request("/food-sub-categories/v2", method="GET", params=params)
-#         if not response:
-#             return None
-
-#         try:
-#             return response.get("food_sub_categories", {}).get("food_sub_category", [])
-#         except Exception as e:
-#             print(f"Error processing response: {e}")
-#             return None
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from Config.Redis import RedisClient
+from Config.Metrics import metrics
+from Cache.FatSecretCache import get_cached_fatsecret_token
+
+BASE_URL = os.getenv("FATSECRET_BASE_URL", "https://platform.fatsecret.com/rest")
+
+# (connect, read) timeouts of one attempt
+CONNECT_TIMEOUT = float(os.getenv("FATSECRET_CONNECT_TIMEOUT", 3))
+READ_TIMEOUT = float(os.getenv("FATSECRET_READ_TIMEOUT", 10))
+
+# Retries after the first attempt, with exponential backoff and full jitter between them
+MAX_RETRIES = int(os.getenv("FATSECRET_MAX_RETRIES", 3))
+BACKOFF_SECONDS = float(os.getenv("FATSECRET_BACKOFF_SECONDS", 0.25))
+BACKOFF_MAX_SECONDS = float(os.getenv("FATSECRET_BACKOFF_MAX_SECONDS", 4))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Keep-alive connections held per host, sized for the category sync's worker threads
+POOL_SIZE = int(os.getenv("FATSECRET_POOL_SIZE", 10))
+
+# Categories change a few times a year, search results drift as the food database is edited
+CATEGORY_TTL = int(os.getenv("FATSECRET_CATEGORY_TTL", 86400))
+SEARCH_TTL = int(os.getenv("FATSECRET_SEARCH_TTL", 3600))
+CACHE_TTLS = {
+    "/food-categories/v2": CATEGORY_TTL,
+    "/food-sub-categories/v2": CATEGORY_TTL,
+    "/foods/search/v3": SEARCH_TTL,
+}
+CACHE_KEY_PREFIX = "fatsecret:"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Process-wide session, so every call reuses a pooled keep-alive connection instead of a new TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def reset_session_after_fork():
+    """
+    Drop the session inherited from the master so the worker opens its own sockets.
+    """
+    global _session
+    _session = None
+
+
+def cache_key(endpoint, params):
+    digest = hashlib.sha1(json.dumps(params or {}, sort_keys=True).encode()).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{endpoint}:{digest}"
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Sleep before retry number attempt (0-based). A Retry-After from a 429 is honoured up to the cap.
+    """
+    if retry_after is not None:
+        try:
+            return min(BACKOFF_MAX_SECONDS, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** attempt))
+
+
+class FatSecretComponent:
+    """Handles FatSecret API interactions, including authentication and food recognition."""
+
+    def __init__(self):
+        # Fetched on the first request that misses the response cache
+        self.token = None
+
+    def make_request(self, endpoint, method="GET", params=None):
+        """
+        GET endpoint, answered from the Redis response cache when the endpoint has a TTL.
+        Returns the decoded body, or None when FatSecret could not answer.
+        """
+        ttl = CACHE_TTLS.get(endpoint)
+        key = cache_key(endpoint, params) if ttl else None
+        if key:
+            cached = self._read_cache(key)
+            if cached is not None:
+                metrics.inc("fatsecret_cache_total", (("endpoint", endpoint), ("result", "hit")))
+                return json.loads(cached)
+            metrics.inc("fatsecret_cache_total", (("endpoint", endpoint), ("result", "miss")))
+
+        body = self._fetch(endpoint, method, params)
+        # FatSecret reports some failures as a 200 with an error object, those are not cached
+        if key and body is not None and not (isinstance(body, dict) and "error" in body):
+            self._write_cache(key, ttl, body)
+        return body
+
+    def _fetch(self, endpoint, method, params):
+        if method.upper() != "GET":
+            logging.error(f"[FatSecret] Unsupported method {method} for {endpoint}")
+            return None
+        if not self.token:
+            self.token = get_cached_fatsecret_token()
+
+        url = f"{BASE_URL}{endpoint}"
+        refreshed = False
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                response = get_session().get(
+                    url,
+                    headers={"Authorization": f"Bearer {self.token}"},
+                    params=params,
+                    timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+                )
+                outcome = str(response.status_code)
+            except requests.exceptions.RequestException as e:
+                response = None
+                outcome = "timeout" if isinstance(e, requests.exceptions.Timeout) else "connection_error"
+                logging.warning("[FatSecret] %s %s failed: %s", method, endpoint, e)
+            metrics.inc("fatsecret_requests_total", (("endpoint", endpoint), ("outcome", outcome)))
+            metrics.observe("fatsecret_request_duration_seconds", (("endpoint", endpoint),), time.perf_counter() - started)
+
+            if response is not None:
+                if response.status_code == 401 and not refreshed:
+                    # One refresh per call, a second 401 means the credentials themselves are wrong
+                    logging.info("[FatSecret] Access token rejected, fetching a new token.")
+                    self.token = get_cached_fatsecret_token(rejected_token=self.token)
+                    refreshed = True
+                    continue
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        response.raise_for_status()
+                        return response.json()
+                    except (requests.exceptions.HTTPError, ValueError) as e:
+                        logging.error(f"[FatSecret] API error for {endpoint}: {str(e)}")
+                        return None
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt >= MAX_RETRIES:
+                logging.error(f"[FatSecret] Giving up on {endpoint} after {attempt + 1} attempts ({outcome})")
+                return None
+            time.sleep(backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    def _read_cache(self, key):
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            return redis_connection.get(key)
+        except Exception as e:
+            logging.error(f"[FatSecret] Redis read error: {str(e)}")
+            return None
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def _write_cache(self, key, ttl, body):
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            redis_connection.setex(key, ttl, json.dumps(body))
+        except Exception as e:
+            logging.error(f"[FatSecret] Redis write error: {str(e)}")
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def search_foods(self, search_expression):
+        params = {
+            "search_expression": search_expression,
+            "include_sub_categories": "true",
+            "include_food_images": "false",
+            "max_results": "1",
+            "format": "json"
+        }
+
+        response = self.make_request("/foods/search/v3", method="GET", params=params)
+        if not response:
+            return None
+
+        try:
+            food_results = response.get("foods_search", {}).get("results", {}).get("food", [])
+            if not food_results:
+                return None
+
+            subcategories = food_results[0].get("food_sub_categories", {}).get("food_sub_category", [])
+            return subcategories if subcategories else None
+        except Exception as e:
+            logging.error(f"[FatSecret] Error processing search response: {str(e)}")
+            return None
+
+    def get_food_categories(self):
+        params = {"format": "json"}
+
+        response = self.make_request("/food-categories/v2", method="GET", params=params)
+        if not response:
+            return None
+
+        try:
+            categories = response.get("food_categories", {}).get("food_category", [])
+            return [{"id": cat["food_category_id"], "name": cat["food_category_name"]} for cat in categories]
+        except Exception as e:
+            logging.error(f"[FatSecret] Error processing categories response: {str(e)}")
+            return None
+
+    def get_food_sub_categories(self, food_category_id):
+        params = {
+            "format": "json",
+            "food_category_id": food_category_id
+        }
+
+        response = self.make_request("/food-sub-categories/v2", method="GET", params=params)
+        if not response:
+            return None
+
+        try:
+            return response.get("food_sub_categories", {}).get("food_sub_category", [])
+        except Exception as e:
+            logging.error(f"[FatSecret] Error processing subcategories response: {str(e)}")
+            return None
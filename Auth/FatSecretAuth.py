@@ -1,62 +1,94 @@
-# import requests
-# import base64
-# import json
-# from Config.SecretManager import get_secret  
-
-# class FatSecretAuth:
-#     """FatSecret authentication using AWS Secrets Manager"""
-
-#     def __init__(self, region_name="us-east-1"):
-#         self.secret_name = "Fat-Secret/Credentials"
-#         self.region_name = region_name
-#         self.credentials = self.load_credentials()
-
-#     def load_credentials(self):
-#         """
-#         Retrieve FatSecret credentials from AWS Secrets Manager.
-#         """
-#         try:
-#             secret_value = get_secret(self.secret_name, self.region_name)
-            
-#             if isinstance(secret_value, str):
-#                 secret_value = json.loads(secret_value) 
-
-#             return secret_value
-#         except Exception as e:
-#             print(f"Failed to load FatSecret credentials: {e}")
-#             return None
-
-#     def fetch_access_token(self):
-#         """
-#         Fetches FatSecret access token using client credentials.
-#         """
-#         if not self.credentials:
-#             print("Error: Missing credentials from AWS Secrets Manager.")
-#             return None
-
-#         token_url = self.credentials.get("Access-Token-URL", "https://oauth.fatsecret.com/connect/token")
-#         client_id = self.credentials.get("Client-ID")
-#         client_secret = self.credentials.get("Client-Secret")
-#         scope = self.credentials.get("Scope", "premier") 
-
-#         if not all([token_url, client_id, client_secret, scope]):
-#             print("Error: Missing required credentials from AWS.")
-#             return None
-
-#         auth_string = f"{client_id}:{client_secret}"
-#         auth_header = base64.b64encode(auth_string.encode()).decode()
-
-#         headers = {
-#             "Authorization": f"Basic {auth_header}",
-#             "Content-Type": "application/x-www-form-urlencoded"
-#         }
-#         payload = f"grant_type=client_credentials&scope={scope}"  
-
-#         try:
-#             response = requests.post(token_url, headers=headers, data=payload)
-#             response.raise_for_status()
-#             return response.json().get("access_token")
-#         except requests.exceptions.HTTPError as e:
-#             print(f"Error fetching FatSecret token: {e}")
-#             print("Response:", response.text)  
-#             return None
+import os
+import base64
+import logging
+import requests
+from Config.SecretManager import get_secret, invalidate_secret
+
+# The token endpoint is only called on a cache miss, but it must not hang the caller either
+TOKEN_TIMEOUT = float(os.getenv("FATSECRET_TOKEN_TIMEOUT", 5))
+
+# Lifetime assumed when the token response leaves out expires_in
+DEFAULT_EXPIRES_IN = 3600
+
+
+class FatSecretAuth:
+    """FatSecret authentication using AWS Secrets Manager"""
+
+    def __init__(self, region_name="us-east-1"):
+        self.secret_name = "Fat-Secret/Credentials"
+        self.region_name = region_name
+        self.credentials = self.load_credentials()
+
+    def load_credentials(self):
+        """
+        Retrieve FatSecret credentials from AWS Secrets Manager.
+        """
+        try:
+            return get_secret(self.secret_name, self.region_name)
+        except Exception as e:
+            logging.error(f"[FatSecretAuth] Failed to load FatSecret credentials: {str(e)}")
+            return None
+
+    def fetch_access_token(self):
+        """
+        Fetches FatSecret access token using client credentials.
+        """
+        return self.fetch_token()[0]
+
+    def fetch_token(self):
+        """
+        Fetches a token and its lifetime in seconds, (None, 0) on failure.
+        Rejected client credentials are reloaded once, in case they were rotated.
+        """
+        try:
+            return self.request_token()
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code not in (400, 401) \
+                    or not invalidate_secret(self.secret_name, self.region_name):
+                logging.error(f"[FatSecretAuth] Error fetching FatSecret token: {str(e)}")
+                return None, 0
+
+        logging.warning("[FatSecretAuth] Credentials rejected, reloading them from AWS Secrets Manager")
+        self.credentials = self.load_credentials()
+        try:
+            return self.request_token()
+        except requests.exceptions.HTTPError as e:
+            logging.error(f"[FatSecretAuth] Error fetching FatSecret token: {str(e)}")
+            return None, 0
+
+    def request_token(self):
+        """
+        One token request, raising HTTPError when the endpoint rejects it.
+        """
+        if not self.credentials:
+            logging.error("[FatSecretAuth] Missing credentials from AWS Secrets Manager.")
+            return None, 0
+
+        token_url = self.credentials.get("Access-Token-URL", "https://oauth.fatsecret.com/connect/token")
+        client_id = self.credentials.get("Client-ID")
+        client_secret = self.credentials.get("Client-Secret")
+        scope = self.credentials.get("Scope", "premier")
+
+        if not all([token_url, client_id, client_secret, scope]):
+            logging.error("[FatSecretAuth] Missing required credentials from AWS.")
+            return None, 0
+
+        auth_string = f"{client_id}:{client_secret}"
+        auth_header = base64.b64encode(auth_string.encode()).decode()
+
+        headers = {
+            "Authorization": f"Basic {auth_header}",
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+        payload = f"grant_type=client_credentials&scope={scope}"
+
+        try:
+            response = requests.post(token_url, headers=headers, data=payload, timeout=TOKEN_TIMEOUT)
+            response.raise_for_status()
+            body = response.json()
+            return body.get("access_token"), int(body.get("expires_in", DEFAULT_EXPIRES_IN))
+        except requests.exceptions.HTTPError:
+            raise
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.error(f"[FatSecretAuth] Error fetching FatSecret token: {str(e)}")
+            return None, 0
@@ -0,0 +1,81 @@
+import time
+import json
+import asyncio
+import argparse
+import statistics
+import httpx
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def drive(base_url, path, token, concurrency, total):
+    """
+    Fire total GETs at base_url + path with at most concurrency in flight.
+    """
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30, verify=False) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers={"Authorization": token})
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+    }
+
+
+def main():
+    """
+    Compare the threaded (gunicorn/Flask) and async (hypercorn/Quart) apps under the same load.
+
+    Start both against the same database and Redis, e.g.
+        gunicorn -c gunicorn.conf.py -b 127.0.0.1:5000
+        hypercorn -w 4 -b 127.0.0.1:8000 "asgi:create_async_app()"
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threaded-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--async-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/user_ingredients/all")
+    parser.add_argument("--token", required=True, help="Firebase ID token of a benchmark user")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256, 512])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = []
+    for concurrency in args.concurrency:
+        for mode, url in (("threaded", args.threaded_url), ("async", args.async_url)):
+            result = asyncio.run(drive(url, args.path, args.token, concurrency, args.requests))
+            result.update(mode=mode, concurrency=concurrency)
+            results.append(result)
+            print(f"{mode:>8} c={concurrency:<4} {result['throughput_rps']:>8} req/s  "
+                  f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
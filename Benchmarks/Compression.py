@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Benchmarks.StreamingJson import pantry_rows
+from Config.JsonStream import iter_json_array
+from Config import Compression
+from Config.Compression import gzip_compress, compress_chunks, CompressedBodyCache
+
+LEVELS = [("gzip", 1), ("gzip", 3), ("gzip", 6), ("gzip", 9),
+          ("br", 1), ("br", 4), ("br", 5), ("br", 9), ("br", 11)]
+
+
+def cpu_ms(function, repeat):
+    """
+    Mean process CPU time of one call, which is what a worker spends per request.
+    """
+    started = time.process_time()
+    for _ in range(repeat):
+        result = function()
+    return (time.process_time() - started) * 1000 / repeat, result
+
+
+def buffered(body, encoding, level):
+    if encoding == "gzip":
+        return lambda: gzip_compress(body, level)
+    return lambda: Compression.brotli.compress(body, quality=level)
+
+
+def streamed(count, encoding):
+    def run():
+        return b"".join(compress_chunks(iter_json_array(pantry_rows(count)), encoding, "benchmark"))
+    return run
+
+
+def report(label, raw, wire, cpu):
+    print(f"  {label:<22} wire={wire:>10}B ratio={raw / wire:>6.2f} cpu={cpu:>8.3f}ms/request")
+
+
+def main():
+    """
+    Bytes on the wire and CPU per request for /user_ingredients/all sized bodies at each level,
+    the streamed path at the configured levels, and a compress-once cache hit.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.rows:
+        body = b"".join(iter_json_array(pantry_rows(count)))
+        print(f"rows={count} identity={len(body)}B")
+        for encoding, level in LEVELS:
+            if encoding == "br" and Compression.brotli is None:
+                continue
+            cpu, data = cpu_ms(buffered(body, encoding, level), args.repeat)
+            report(f"{encoding}-{level}", len(body), len(data), cpu)
+
+        for encoding in Compression.available_encodings():
+            encode_cpu, _ = cpu_ms(lambda: b"".join(iter_json_array(pantry_rows(count))), args.repeat)
+            cpu, data = cpu_ms(streamed(count, encoding), args.repeat)
+            report(f"stream-{encoding}", len(body), len(data), cpu - encode_cpu)
+
+            cache = CompressedBodyCache()
+            cache.get_or_compress(body, encoding)
+            cpu, data = cpu_ms(lambda: cache.get_or_compress(body, encoding), args.repeat)
+            report(f"cached-{encoding}", len(body), len(data), cpu)
+
+
+if __name__ == "__main__":
+    main()
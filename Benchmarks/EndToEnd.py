@@ -0,0 +1,372 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Benchmarks.AsyncVsThreaded import percentile
+
+SCHEMA_PATH = os.path.join(ROOT, "Benchmarks", "schema.sql")
+TOKEN_PREFIX = "bench-token-"
+UID_PREFIX = "bench-uid-"
+SEARCH_TERMS = ("milk", "chicken", "rice", "apple", "onion", "cheese", "salmon", "pasta", "pepper", "yogurt")
+FIXTURE_FOOD_IDS = 5000
+CATEGORIES = ("Dairy", "Vegetables", "Fruits", "Meat", "Seafood", "Grains", "Spices", "Condiments", "Baking", "Beverages")
+
+
+def local_credentials():
+    """
+    Credentials of the local benchmark MySQL, in the shape get_secret returns.
+    """
+    return {
+        "DB_HOST": os.getenv("BENCH_DB_HOST", "127.0.0.1"),
+        "DB_USER": os.getenv("BENCH_DB_USER", "root"),
+        "DB_PASSWORD": os.getenv("BENCH_DB_PASSWORD", ""),
+        "DB_NAME": os.getenv("BENCH_DB_NAME", "souschef_bench"),
+        "DB_PORT": os.getenv("BENCH_DB_PORT", 3306),
+    }
+
+
+def verify_bench_token(id_token):
+    """
+    Stand-in for Firebase: bench-token-<n> verifies as bench-uid-<n> for an hour.
+    """
+    if not id_token or not id_token.startswith(TOKEN_PREFIX):
+        return None
+    return {"uid": UID_PREFIX + id_token[len(TOKEN_PREFIX):], "exp": time.time() + 3600}
+
+
+def redis_pool(redis_url, max_connections):
+    """
+    Pool for the app's RedisClient: a local Redis when redis_url is given, fakeredis otherwise.
+    """
+    import redis
+    if redis_url:
+        return redis.BlockingConnectionPool.from_url(redis_url, decode_responses=True, max_connections=max_connections)
+
+    import fakeredis
+    return redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection,
+        server=fakeredis.FakeServer(),
+        decode_responses=True,
+        max_connections=max_connections
+    )
+
+
+def stand_ins(redis_url, max_connections):
+    """
+    Patches pointing the app at local MySQL credentials, the benchmark Redis pool and the Firebase stub.
+    """
+    return [
+        patch("Config.Db.get_secret", lambda name, region: local_credentials()),
+        patch("Config.Redis._pool", redis_pool(redis_url, max_connections)),
+        patch("Config.Fb.decode_firebase_token", verify_bench_token),
+        patch("Cache.FbCache.decode_firebase_token", verify_bench_token),
+    ]
+
+
+def apply_schema(connection):
+    with open(SCHEMA_PATH) as handle:
+        statements = [statement.strip() for statement in handle.read().split(";")]
+    with connection.cursor() as cursor:
+        for statement in statements:
+            if statement and not all(line.startswith("--") for line in statement.splitlines()):
+                cursor.execute(statement)
+    connection.commit()
+
+
+def seed(connection, users, ingredients, pantry_size, rng):
+    """
+    Small deterministic fixture: an ingredient catalog, bench users with pantries, and reports.
+    Recipes are left to the /recipes/add scenarios.
+    """
+    now = datetime.now()
+    food_ids = [f"food_bench_{index:05d}" for index in range(ingredients)]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            """
+            INSERT IGNORE INTO InternalIngredients
+                (Edamam_Food_ID, Name, Category, Quantity_Type, Quantity, Expiration_Duration, Image_URL,
+                 Fat, Cholesterol, Sodium, Potassium, Carbohydrate, Protein, Calorie)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            [
+                (food_id, f"bench {SEARCH_TERMS[index % len(SEARCH_TERMS)]} {index}", CATEGORIES[index % len(CATEGORIES)],
+                 "Serving", 100, rng.randint(1, 30), "", *(round(rng.uniform(0, 50), 2) for _ in range(7)))
+                for index, food_id in enumerate(food_ids)
+            ]
+        )
+        cursor.executemany(
+            "INSERT IGNORE INTO Users (firebase_uid, email) VALUES (%s, %s)",
+            [(f"{UID_PREFIX}{index}", f"bench{index}@example.com") for index in range(users)]
+        )
+        cursor.execute("SELECT id FROM Users WHERE firebase_uid LIKE %s", (f"{UID_PREFIX}%",))
+        user_ids = [row["id"] for row in cursor.fetchall()]
+
+        pantry_rows = []
+        for user_id in user_ids:
+            for food_id in rng.sample(food_ids, min(pantry_size, len(food_ids))):
+                pantry_rows.append((user_id, food_id, rng.randint(1, 5), now - timedelta(days=rng.randint(0, 30))))
+        cursor.executemany(
+            "INSERT IGNORE INTO UserIngredients (user_id, edamam_food_id, quantity, date_added) VALUES (%s, %s, %s, %s)",
+            pantry_rows
+        )
+        cursor.executemany(
+            "INSERT INTO Reports (user_id, subject, description, date) VALUES (%s, %s, %s, %s)",
+            [(user_id, "bench", "benchmark report", now) for user_id in user_ids for _ in range(3)]
+        )
+    connection.commit()
+
+
+def load_fixture(connection):
+    """
+    User ids keyed by token index, and food ids, seeded by --setup or Benchmarks/SyntheticDataset.py.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT id, firebase_uid FROM Users WHERE firebase_uid LIKE %s", (f"{UID_PREFIX}%",))
+        user_ids = {int(row["firebase_uid"][len(UID_PREFIX):]): row["id"] for row in cursor.fetchall()}
+        cursor.execute(
+            "SELECT Edamam_Food_ID FROM InternalIngredients ORDER BY Edamam_Food_ID LIMIT %s", (FIXTURE_FOOD_IDS,)
+        )
+        food_ids = [row["Edamam_Food_ID"] for row in cursor.fetchall()]
+    if not user_ids or not food_ids:
+        raise SystemExit("No benchmark fixture found, run with --setup or Benchmarks/SyntheticDataset.py first")
+    return user_ids, food_ids
+
+
+def bench_recipe(rng, food_ids):
+    uri = f"http://www.edamam.com/ontologies/edamam.owl#recipe_bench_{rng.randint(0, 199)}"
+    return {
+        "uri": uri,
+        "label": f"Bench recipe {uri[-3:]}",
+        "calories": round(rng.uniform(100, 900), 1),
+        "total_weight": round(rng.uniform(100, 900), 1),
+        "ingredients": rng.sample(food_ids, 5),
+    }
+
+
+def build_scenarios(food_ids):
+    """
+    One scenario per route: (name, url rule, request builder taking rng and user index).
+    """
+    def auth(user):
+        return {"Authorization": f"{TOKEN_PREFIX}{user}"}
+
+    def get(path):
+        return lambda rng, user: ("GET", path, auth(user), None)
+
+    return [
+        ("user_ingredients_all", "/user_ingredients/all", get("/user_ingredients/all")),
+        ("user_ingredients_get_expiring", "/user_ingredients/get_expiring", get("/user_ingredients/get_expiring")),
+        ("user_ingredients_update", "/user_ingredients/update", lambda rng, user: (
+            "POST", "/user_ingredients/update", auth(user),
+            {"ingredients": [{"edamam_food_id": food_id, "quantity": 1} for food_id in rng.sample(food_ids, 3)]})),
+        ("user_ingredients_bulk", "/user_ingredients/bulk", lambda rng, user: (
+            "POST", "/user_ingredients/bulk", auth(user),
+            {"operations": [
+                {"op": "add", "edamam_food_id": rng.choice(food_ids), "quantity": 2},
+                {"op": "set", "edamam_food_id": rng.choice(food_ids), "quantity": 4},
+                {"op": "remove", "edamam_food_id": rng.choice(food_ids)},
+            ]})),
+        ("user_ingredients_delete", "/user_ingredients/delete", lambda rng, user: (
+            "DELETE", "/user_ingredients/delete", auth(user), {"edamam_food_id": rng.sample(food_ids, 2)})),
+        ("recipes_add", "/recipes/add", lambda rng, user: (
+            "POST", "/recipes/add", auth(user), {"recipe": bench_recipe(rng, food_ids)})),
+        ("recipes_add_batch", "/recipes/add_batch", lambda rng, user: (
+            "POST", "/recipes/add_batch", auth(user), {"recipes": [bench_recipe(rng, food_ids) for _ in range(10)]})),
+        ("recipes_all", "/recipes/all", get("/recipes/all")),
+        ("recipes_cookable", "/recipes/cookable", get("/recipes/cookable?limit=20")),
+        ("recipes_remove", "/recipes/remove", lambda rng, user: (
+            "POST", "/recipes/remove", auth(user), {"recipe": bench_recipe(rng, food_ids)})),
+        ("recipes_remove_batch", "/recipes/remove_batch", lambda rng, user: (
+            "POST", "/recipes/remove_batch", auth(user), {"recipes": [bench_recipe(rng, food_ids) for _ in range(10)]})),
+        ("reports_add", "/reports/add", lambda rng, user: (
+            "POST", "/reports/add", auth(user), {"subject": "bench", "description": "benchmark report"})),
+        ("reports_fetch", "/reports/fetch", get("/reports/fetch")),
+        ("internal_ingredients_search", "/internal_ingredients/search", lambda rng, user: (
+            "GET", f"/internal_ingredients/search?q={rng.choice(SEARCH_TERMS)}&limit=20", auth(user), None)),
+        ("internal_ingredients_nutrition", "/internal_ingredients/get_nutirtion_by_id", lambda rng, user: (
+            "GET", f"/internal_ingredients/get_nutirtion_by_id?edamam_food_id={rng.choice(food_ids)}", auth(user), None)),
+        # Seeded users already exist, so this measures the verify and lookup path of /users/create
+        ("users_create", "/users/create", lambda rng, user: (
+            "POST", "/users/create", {**auth(user), "Email": f"bench{user}@example.com"}, None)),
+    ]
+
+
+async def drive(base_url, requests, concurrency):
+    """
+    Send the prepared requests with at most concurrency in flight.
+    """
+    latencies = []
+    statuses = {}
+    remaining = iter(requests)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker():
+            for method, path, headers, body in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, headers=headers, json=body)
+                    status = str(response.status_code)
+                except httpx.HTTPError:
+                    status = "error"
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+    }
+
+
+def db_queries(snapshot, rule):
+    """
+    SQL statements and requests recorded for a route by the request metrics.
+    """
+    histogram = snapshot["histograms"].get(("http_request_db_queries", (("route", rule),)))
+    if not histogram:
+        return 0.0, 0
+    return histogram[-1], sum(histogram[:-1])
+
+
+def compare(results, baseline, tolerance):
+    """
+    Routes whose p95 or queries per request grew by more than tolerance over the baseline.
+    """
+    regressions = []
+    for name, result in results["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if not previous:
+            continue
+        for field in ("p95_ms", "db_queries_per_request"):
+            if previous[field] and result[field] > previous[field] * (1 + tolerance):
+                regressions.append(f"{name}: {field} {previous[field]} -> {result[field]}")
+    return regressions
+
+
+def serve(app, port):
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    return server
+
+
+def main():
+    """
+    Boot the app against a local MySQL, a local Redis or fakeredis and a stubbed Firebase verifier,
+    drive every route and write throughput, p50/p95/p99 and DB queries per request as a JSON baseline.
+
+    Create an empty database first, then e.g.
+        BENCH_DB_USER=root BENCH_DB_PASSWORD=secret BENCH_DB_NAME=souschef_bench \\
+            python Benchmarks/EndToEnd.py --setup --concurrency 16 --output baseline.json
+        python Benchmarks/EndToEnd.py --compare baseline.json
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--setup", action="store_true", help="apply Benchmarks/schema.sql and seed the fixture")
+    parser.add_argument("--redis-url", default=os.getenv("BENCH_REDIS_URL"), help="local Redis, fakeredis when unset")
+    parser.add_argument("--routes", nargs="+", help="scenario names to run, all by default")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--users", type=int, default=50, help="with --setup")
+    parser.add_argument("--ingredients", type=int, default=500, help="with --setup")
+    parser.add_argument("--pantry-size", type=int, default=25, help="with --setup")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--output", help="write the results here as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed growth over the baseline")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_FILE", os.path.join(ROOT, "benchmark_app.log"))
+    os.environ.setdefault("SQL_PROFILER", "false")
+    os.environ["USER_INGREDIENTS_WRITE_BUFFER"] = "false"
+    rng = random.Random(args.seed)
+
+    patches = stand_ins(args.redis_url, max(args.concurrency * 2, 10))
+    for stand_in in patches:
+        stand_in.start()
+    try:
+        from app import create_app
+        from Config.Db import Database
+        from Config.Metrics import metrics
+
+        connection = Database().connect_write()
+        if args.setup:
+            apply_schema(connection)
+            seed(connection, args.users, args.ingredients, args.pantry_size, rng)
+        user_ids, food_ids = load_fixture(connection)
+        connection.close()
+
+        app = create_app(warm=False)
+        server = serve(app, args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+        results = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "concurrency": args.concurrency,
+                "requests_per_route": args.requests,
+                "users": len(user_ids),
+                "redis": "redis" if args.redis_url else "fakeredis",
+            },
+            "routes": {},
+        }
+        user_indexes = sorted(user_ids)
+        for name, rule, build in build_scenarios(food_ids):
+            if args.routes and name not in args.routes:
+                continue
+            requests = [build(rng, rng.choice(user_indexes)) for _ in range(args.requests)]
+            before = db_queries(metrics.snapshot(), rule)
+            result = asyncio.run(drive(base_url, requests, args.concurrency))
+            after = db_queries(metrics.snapshot(), rule)
+
+            measured = after[1] - before[1]
+            result["db_queries_per_request"] = round((after[0] - before[0]) / measured, 2) if measured else 0.0
+            results["routes"][name] = result
+            print(f"{name:<32} {result['throughput_rps']:>8} req/s  p50={result['p50_ms']}ms "
+                  f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms queries/req={result['db_queries_per_request']} "
+                  f"statuses={result['statuses']}")
+
+        server.shutdown()
+    finally:
+        for stand_in in patches:
+            stand_in.stop()
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Benchmarks.SyntheticDataset import ingredient_rows
+from Cache.IngredientSearchIndex import IngredientSearchIndex, tokenize, edit_budget, edit_distance
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def misspell(rng, word):
+    """
+    One random deletion, insertion, substitution or adjacent swap, the typos a phone keyboard produces.
+    """
+    position = rng.randrange(len(word) - 1)
+    kind = rng.choice(("delete", "insert", "substitute", "swap"))
+    if kind == "delete":
+        return word[:position] + word[position + 1:]
+    if kind == "insert":
+        return word[:position] + rng.choice(LETTERS) + word[position:]
+    if kind == "substitute":
+        return word[:position] + rng.choice(LETTERS) + word[position + 1:]
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+
+def typo_queries(seed, rows, count):
+    """
+    (query, expected id) pairs: a catalog name with one typo in each word long enough to be corrected.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for food_id, name in rng.sample(rows, count):
+        words = [misspell(rng, word) if edit_budget(word) else word for word in tokenize(name)]
+        queries.append((" ".join(words), food_id))
+    return queries
+
+
+def scan_correct(words, token):
+    """
+    The same correction by measuring the distance to every catalog word, what the index avoids.
+    """
+    budget = edit_budget(token)
+    distances = [(edit_distance(token, word, budget), word) for word in words]
+    best = min(distances)[0]
+    return [word for distance, word in distances if distance == best and distance <= budget]
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def main():
+    """
+    Build time, per-query cost and recall of typo-tolerant search over a synthetic catalog,
+    against correcting each query word by scanning the whole vocabulary.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ingredients", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = [(row[0], row[1]) for row in ingredient_rows(args.seed, args.ingredients)]
+    index = IngredientSearchIndex()
+    started = time.perf_counter()
+    index.build({"Edamam_Food_ID": food_id, "Name": name} for food_id, name in rows)
+    catalog = index.catalog
+    print(f"catalog={len(rows)} words={len(catalog.words)} deletes={len(catalog.deletes)} "
+          f"build={(time.perf_counter() - started) * 1000:.0f}ms")
+
+    queries = typo_queries(args.seed, rows, args.queries)
+    timings, found, results = [], 0, 0
+    for query, food_id in queries:
+        started = time.perf_counter()
+        matches = index.search(query, args.limit)
+        timings.append((time.perf_counter() - started) * 1e6)
+        found += food_id in matches
+        results += len(matches)
+    print(f"index  mean={statistics.mean(timings):7.1f}us p50={percentile(timings, 0.5):7.1f}us "
+          f"p99={percentile(timings, 0.99):7.1f}us recall@{args.limit}={found / len(queries):.3f} "
+          f"results={results / len(queries):.1f}")
+
+    timings = []
+    for query, _ in queries:
+        started = time.perf_counter()
+        for token in tokenize(query):
+            scan_correct(catalog.words, token)
+        timings.append((time.perf_counter() - started) * 1e6)
+    print(f"scan   mean={statistics.mean(timings):7.1f}us p50={percentile(timings, 0.5):7.1f}us "
+          f"p99={percentile(timings, 0.99):7.1f}us (word correction only)")
+
+
+if __name__ == "__main__":
+    main()
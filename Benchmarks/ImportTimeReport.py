@@ -0,0 +1,78 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGET = "import app; app.create_app(warm=False)"
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def capture(target=DEFAULT_TARGET):
+    """
+    Run target in a fresh interpreter under -X importtime and parse the breakdown.
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", target],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            modules.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2,
+            })
+    return {"wall_ms": round(wall_ms, 1), "modules": modules}
+
+
+def report(capture_result, top=15):
+    """
+    Summarize total import cost, the heaviest packages and the heaviest single modules.
+    """
+    modules = capture_result["modules"]
+    top_level = [module for module in modules if module["depth"] == 0]
+    return {
+        "wall_ms": capture_result["wall_ms"],
+        "import_ms": round(sum(module["cumulative_ms"] for module in top_level), 1),
+        "module_count": len(modules),
+        "top_cumulative": sorted(top_level, key=lambda module: -module["cumulative_ms"])[:top],
+        "top_self": sorted(modules, key=lambda module: -module["self_ms"])[:top],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown of app startup.")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="Python statement to time")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    summary = report(capture(args.target), args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"Startup wall time: {summary['wall_ms']} ms, imports: {summary['import_ms']} ms "
+          f"across {summary['module_count']} modules")
+    print("\nHeaviest top-level imports (cumulative ms):")
+    for module in summary["top_cumulative"]:
+        print(f"  {module['cumulative_ms']:>9.1f}  {module['module']}")
+    print("\nHeaviest modules (self ms):")
+    for module in summary["top_self"]:
+        print(f"  {module['self_ms']:>9.1f}  {module['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask, jsonify
+from Config.JsonStream import stream_json_array
+
+
+def pantry_rows(count):
+    """
+    Rows shaped like /user_ingredients/all, produced one at a time the way an unbuffered cursor yields them.
+    """
+    added = datetime(2026, 1, 1)
+    for index in range(count):
+        yield {
+            "edamam_food_id": f"food_{index:026d}", "quantity": index % 7 + 1,
+            "date_added": added - timedelta(hours=index), "Name": f"ingredient {index}", "Category": "Vegetables",
+            "Quantity_Type": "Serving", "Expiration_Duration": 7, "Image_URL": "https://www.edamam.com/food-img/x.jpg",
+            "Fat": Decimal("1.25"), "Cholesterol": 0.0, "Sodium": 12.5, "Potassium": 300.0, "Carbohydrate": 8.5,
+            "Protein": 2.0, "Calorie": 45.0, "internal_quantity": 100.0,
+        }
+
+
+def measure(mode, count):
+    """
+    Peak traced memory, time to the first body byte and total time for one response.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    if mode == "jsonify":
+        # The buffered cursor hands over the full list before encoding starts
+        response = jsonify(list(pantry_rows(count)))
+        body = iter([response.get_data()])
+    else:
+        body = iter(stream_json_array(pantry_rows(count)).response)
+
+    first = next(body)
+    first_byte = time.perf_counter() - started
+    size = len(first) + sum(len(chunk) for chunk in body)
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows": count, "mode": mode, "bytes": size, "first_byte_ms": round(first_byte * 1000, 2),
+            "total_ms": round(total * 1000, 2), "peak_kib": round(peak / 1024)}
+
+
+def main():
+    """
+    Compare jsonify with the streamed response as pantries grow. Streaming should keep
+    time to first byte and peak memory flat while jsonify grows with the row count.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    args = parser.parse_args()
+
+    with Flask(__name__).app_context():
+        for count in args.rows:
+            for mode in ("jsonify", "stream"):
+                result = measure(mode, count)
+                print(f"{result['mode']:>8} rows={result['rows']:<6} first_byte={result['first_byte_ms']:>9}ms "
+                      f"total={result['total_ms']:>9}ms peak={result['peak_kib']:>8}KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import itertools
+from bisect import bisect
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Benchmarks.EndToEnd import UID_PREFIX
+
+BATCH_SIZE = 5000
+
+# Base foods per category with the shelf life range in days used for Expiration_Duration
+CATEGORIES = {
+    "Dairy": ((5, 21), ("milk", "yogurt", "butter", "cheddar", "mozzarella", "cream cheese", "sour cream", "ricotta",
+                        "parmesan", "feta", "heavy cream", "cottage cheese", "kefir", "ghee", "brie", "goat cheese")),
+    "Vegetables": ((3, 14), ("spinach", "broccoli", "carrot", "onion", "garlic", "tomato", "bell pepper", "zucchini",
+                             "kale", "cauliflower", "cucumber", "lettuce", "mushroom", "potato", "sweet potato",
+                             "celery", "asparagus", "green beans", "cabbage", "eggplant")),
+    "Fruits": ((3, 21), ("apple", "banana", "orange", "lemon", "lime", "strawberry", "blueberry", "raspberry", "mango",
+                         "pineapple", "grape", "pear", "peach", "avocado", "cherry", "watermelon", "kiwi", "plum")),
+    "Meat": ((1, 5), ("chicken breast", "chicken thigh", "ground beef", "beef steak", "pork chop", "bacon", "ham",
+                      "turkey", "lamb chop", "sausage", "ground turkey", "pork loin", "beef brisket", "duck breast")),
+    "Seafood": ((1, 3), ("salmon", "shrimp", "tuna", "cod", "tilapia", "scallops", "crab", "lobster", "mussels",
+                         "sardines", "halibut", "trout", "clams", "anchovies")),
+    "Grains": ((180, 365), ("white rice", "brown rice", "quinoa", "oats", "pasta", "spaghetti", "couscous", "barley",
+                            "bread", "tortilla", "flour", "cornmeal", "noodles", "bulgur", "farro", "bagel")),
+    "Spices": ((365, 730), ("black pepper", "cumin", "paprika", "cinnamon", "oregano", "basil", "thyme", "rosemary",
+                            "turmeric", "chili powder", "nutmeg", "ginger", "coriander", "cardamom", "bay leaf")),
+    "Condiments": ((90, 365), ("ketchup", "mustard", "mayonnaise", "soy sauce", "hot sauce", "olive oil",
+                               "balsamic vinegar", "honey", "maple syrup", "salsa", "pesto", "barbecue sauce",
+                               "fish sauce", "sriracha", "tahini", "peanut butter")),
+    "Baking": ((180, 540), ("sugar", "brown sugar", "baking soda", "baking powder", "yeast", "cocoa powder",
+                            "chocolate chips", "vanilla extract", "cornstarch", "powdered sugar", "almond flour")),
+    "Beverages": ((7, 365), ("orange juice", "apple juice", "coffee", "green tea", "black tea", "almond milk",
+                             "oat milk", "coconut water", "sparkling water", "lemonade", "soy milk")),
+}
+MODIFIERS = ("", "organic", "fresh", "frozen", "low-fat", "whole", "smoked", "roasted", "raw", "unsalted", "reduced-sodium",
+             "free-range", "wild", "baby", "extra virgin", "light", "spicy", "sweet", "aged", "dried", "canned",
+             "grass-fed", "gluten-free", "local", "premium", "homestyle", "seasoned", "plain", "mini", "large")
+FORMS = ("", "sliced", "diced", "shredded", "ground", "chopped", "whole", "mashed", "minced", "powder", "halves", "strips")
+QUANTITY_TYPES = ("Serving", "Gram", "Ounce", "Cup", "Piece", "Milliliter")
+CUISINES = ("american", "italian", "mexican", "indian", "chinese", "japanese", "french", "mediterranean", "thai", "korean")
+MEALS = ("breakfast", "lunch/dinner", "snack", "teatime")
+DISHES = ("main course", "salad", "soup", "side dish", "desserts", "starter", "sandwiches", "bread", "drinks")
+REPORT_SUBJECTS = ("Wrong nutrition", "Missing ingredient", "App crash", "Expiration wrong", "Feature request")
+
+
+def table_rng(seed, table):
+    """
+    Independent generator per table, so each table is reproducible on its own.
+    """
+    return random.Random(f"{seed}:{table}")
+
+
+def edamam_id(rng, prefix):
+    return f"{prefix}_{rng.getrandbits(104):026x}"
+
+
+def ingredient_rows(seed, count):
+    """
+    InternalIngredients rows with unique realistic names, e.g. "organic baby spinach, chopped".
+    """
+    rng = table_rng(seed, "InternalIngredients")
+    combinations = [
+        (category, base, modifier, form)
+        for category, (_, bases) in CATEGORIES.items()
+        for base, modifier, form in itertools.product(bases, MODIFIERS, FORMS)
+    ]
+    rng.shuffle(combinations)
+
+    # "sweet" + "potato" and "" + "sweet potato" read the same, so names are deduplicated
+    names = set()
+    for category, base, modifier, form in combinations:
+        if len(names) == count:
+            break
+        name = " ".join(part for part in (modifier, base) if part) + (f", {form}" if form else "")
+        if name in names:
+            continue
+        names.add(name)
+        low, high = CATEGORIES[category][0]
+        yield (
+            edamam_id(rng, "food"), name, category, rng.choice(QUANTITY_TYPES), 100.0,
+            rng.randint(low, high), f"https://www.edamam.com/food-img/{rng.getrandbits(48):012x}.jpg",
+            round(rng.uniform(0, 40), 2), round(rng.uniform(0, 120), 2), round(rng.uniform(0, 900), 2),
+            round(rng.uniform(0, 600), 2), round(rng.uniform(0, 80), 2), round(rng.uniform(0, 35), 2),
+            round(rng.uniform(5, 600), 2),
+        )
+    if len(names) < count:
+        raise ValueError(f"At most {len(names)} distinct ingredient names can be generated")
+
+
+def user_rows(seed, count):
+    for index in range(count):
+        yield (f"{UID_PREFIX}{index}", f"user{index}@example.com")
+
+
+def popularity(count, exponent):
+    """
+    Cumulative Zipf weights over items, so a few of them appear in most pantries and recipes.
+    """
+    total = 0.0
+    cumulative = []
+    for rank in range(1, count + 1):
+        total += 1.0 / rank ** exponent
+        cumulative.append(total)
+    return cumulative
+
+
+def pick_distinct(rng, items, cumulative, size):
+    chosen = set()
+    limit = min(size, len(items))
+    while len(chosen) < limit:
+        chosen.add(items[bisect(cumulative, rng.random() * cumulative[-1])])
+    return sorted(chosen)
+
+
+def user_ingredient_rows(seed, user_ids, food_ids, mean_size, max_size, exponent, anchor):
+    """
+    Pantries with log-normal sizes around mean_size, Zipf-popular foods and date_added skewed to recent days.
+    """
+    rng = table_rng(seed, "UserIngredients")
+    cumulative = popularity(len(food_ids), exponent)
+    # exp(mu + sigma^2 / 2) == mean_size
+    sigma = 1.0
+    mu = max(0.0, math.log(mean_size) - sigma ** 2 / 2)
+    for user_id in user_ids:
+        size = min(max_size, int(rng.lognormvariate(mu, sigma)))
+        for food_id in pick_distinct(rng, food_ids, cumulative, size):
+            age = min(365.0, rng.expovariate(1 / 20))
+            yield (user_id, food_id, rng.randint(1, 12), anchor - timedelta(days=age))
+
+
+def recipe_rows(seed, count, food_ids, exponent):
+    """
+    RecipeCatalog rows and their RecipeIngredients, 4 to 15 ingredients each.
+    """
+    rng = table_rng(seed, "RecipeCatalog")
+    cumulative = popularity(len(food_ids), exponent)
+    for index in range(count):
+        uri = f"http://www.edamam.com/ontologies/edamam.owl#recipe_{rng.getrandbits(128):032x}"
+        cuisine, dish = rng.choice(CUISINES), rng.choice(DISHES)
+        catalog = (
+            uri, f"{cuisine.title()} {dish} {index}", f"https://edamam-product-images.s3.amazonaws.com/{index}.jpg",
+            f"https://example.com/recipes/{index}", round(rng.uniform(80, 2400), 2), round(rng.uniform(100, 1500), 2),
+            cuisine, rng.choice(MEALS), dish,
+        )
+        yield catalog, pick_distinct(rng, food_ids, cumulative, rng.randint(4, 15))
+
+
+def user_recipe_rows(seed, user_ids, uris, mean_saved, anchor):
+    rng = table_rng(seed, "UserRecipes")
+    for user_id in user_ids:
+        count = min(len(uris), int(rng.expovariate(1 / mean_saved)))
+        for uri in rng.sample(uris, count):
+            yield (user_id, uri, anchor - timedelta(days=rng.uniform(0, 365)))
+
+
+def report_rows(seed, user_ids, share, anchor):
+    rng = table_rng(seed, "Reports")
+    for user_id in user_ids:
+        if rng.random() < share:
+            for _ in range(rng.randint(1, 3)):
+                yield (user_id, rng.choice(REPORT_SUBJECTS), "Generated report", anchor - timedelta(days=rng.uniform(0, 180)))
+
+
+def insert_rows(connection, table, sql, rows, batch_size=BATCH_SIZE):
+    """
+    Insert rows in multi-row batches, committing each, and report rows per second.
+    The VALUES tuple must hold only placeholders for pymysql to batch it into one statement.
+    """
+    started = time.perf_counter()
+    total = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            cursor.executemany(sql, batch)
+            connection.commit()
+            total += len(batch)
+    elapsed = time.perf_counter() - started
+    print(f"{table:<20} {total:>10} rows  {elapsed:8.1f}s  {total / elapsed if elapsed else 0:>10.0f} rows/s")
+    return total
+
+
+def generate(connection, seed, anchor, ingredients, users, pantry_mean, pantry_max, recipes, saved_mean, report_share,
+             exponent=1.1):
+    """
+    Fill every table in dependency order. Dates count back from anchor, so a seed and anchor give the same rows.
+    Everything but Reports is inserted with INSERT IGNORE, so re-running the same seed adds nothing new.
+    """
+    ingredient_catalog = list(ingredient_rows(seed, ingredients))
+    insert_rows(connection, "InternalIngredients", """
+        INSERT IGNORE INTO InternalIngredients
+            (Edamam_Food_ID, Name, Category, Quantity_Type, Quantity, Expiration_Duration, Image_URL,
+             Fat, Cholesterol, Sodium, Potassium, Carbohydrate, Protein, Calorie)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, iter(ingredient_catalog))
+    food_ids = [row[0] for row in ingredient_catalog]
+
+    insert_rows(connection, "Users", "INSERT IGNORE INTO Users (firebase_uid, email) VALUES (%s, %s)",
+                user_rows(seed, users))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id FROM Users WHERE firebase_uid LIKE %s ORDER BY id LIMIT %s", (f"{UID_PREFIX}%", users)
+        )
+        user_ids = [row["id"] for row in cursor.fetchall()]
+
+    insert_rows(connection, "UserIngredients", """
+        INSERT IGNORE INTO UserIngredients (user_id, edamam_food_id, quantity, date_added)
+        VALUES (%s, %s, %s, %s)
+    """, user_ingredient_rows(seed, user_ids, food_ids, pantry_mean, pantry_max, exponent, anchor))
+
+    catalog, links = [], []
+    for row, recipe_food_ids in recipe_rows(seed, recipes, food_ids, exponent):
+        catalog.append(row)
+        links.extend((row[0], food_id) for food_id in recipe_food_ids)
+    insert_rows(connection, "RecipeCatalog", """
+        INSERT IGNORE INTO RecipeCatalog
+            (uri, label, image, url, calories, total_weight, cuisine_type, meal_type, dish_type)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, iter(catalog))
+    insert_rows(connection, "RecipeIngredients",
+                "INSERT IGNORE INTO RecipeIngredients (uri, edamam_food_id) VALUES (%s, %s)", iter(links))
+    insert_rows(connection, "UserRecipes",
+                "INSERT IGNORE INTO UserRecipes (user_id, uri, date_added) VALUES (%s, %s, %s)",
+                user_recipe_rows(seed, user_ids, [row[0] for row in catalog], saved_mean, anchor))
+
+    insert_rows(connection, "Reports",
+                "INSERT INTO Reports (user_id, subject, description, date) VALUES (%s, %s, %s, %s)",
+                report_rows(seed, user_ids, report_share, anchor))
+
+
+def main():
+    """
+    Fill a local database with a deterministic production-scale dataset for load testing.
+    Defaults give about 30k ingredients, 100k users and 3M pantry rows.
+
+    Uses the same BENCH_DB_* settings as Benchmarks/EndToEnd.py, e.g.
+        BENCH_DB_NAME=souschef_bench python Benchmarks/SyntheticDataset.py --setup --seed 7
+    Users get EndToEnd's firebase uids, so its stubbed tokens authenticate as them.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--setup", action="store_true", help="apply Benchmarks/schema.sql first")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--anchor", type=datetime.fromisoformat, default=datetime.combine(date.today(), datetime.min.time()),
+                        help="date the generated dates count back from, today by default")
+    parser.add_argument("--ingredients", type=int, default=30000)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--pantry-mean", type=float, default=30, help="mean pantry size, log-normal")
+    parser.add_argument("--pantry-max", type=int, default=2000)
+    parser.add_argument("--recipes", type=int, default=20000)
+    parser.add_argument("--saved-mean", type=float, default=5, help="mean saved recipes per user")
+    parser.add_argument("--report-share", type=float, default=0.05, help="share of users with reports")
+    args = parser.parse_args()
+
+    import pymysql
+    from Benchmarks.EndToEnd import local_credentials, apply_schema
+    credentials = local_credentials()
+    connection = pymysql.connect(
+        host=credentials["DB_HOST"],
+        user=credentials["DB_USER"],
+        password=credentials["DB_PASSWORD"],
+        database=credentials["DB_NAME"],
+        port=int(credentials["DB_PORT"]),
+        cursorclass=pymysql.cursors.DictCursor
+    )
+    try:
+        if args.setup:
+            apply_schema(connection)
+        started = time.perf_counter()
+        generate(connection, args.seed, args.anchor, args.ingredients, args.users, args.pantry_mean, args.pantry_max,
+                 args.recipes, args.saved_mean, args.report_share)
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+-- Tables the app reads and writes, for a local benchmark or development database.
+-- Production already has these; the recipe tables match Migrations/.
+
+CREATE TABLE IF NOT EXISTS Users (
+    id INT NOT NULL AUTO_INCREMENT,
+    firebase_uid VARCHAR(128) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_users_firebase_uid (firebase_uid)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS UserDevices (
+    firebase_uid VARCHAR(128) NOT NULL,
+    device_token VARCHAR(255) NOT NULL,
+    last_active DATETIME NOT NULL,
+    PRIMARY KEY (firebase_uid, device_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS InternalIngredients (
+    Edamam_Food_ID VARCHAR(255) NOT NULL,
+    Name VARCHAR(255) NOT NULL,
+    Category VARCHAR(255),
+    Quantity_Type VARCHAR(64),
+    Quantity DOUBLE,
+    Expiration_Duration INT,
+    Image_URL TEXT,
+    Fat DOUBLE,
+    Cholesterol DOUBLE,
+    Sodium DOUBLE,
+    Potassium DOUBLE,
+    Carbohydrate DOUBLE,
+    Protein DOUBLE,
+    Calorie DOUBLE,
+    PRIMARY KEY (Edamam_Food_ID),
+    KEY idx_internal_ingredients_name (Name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS UserIngredients (
+    user_id INT NOT NULL,
+    edamam_food_id VARCHAR(255) NOT NULL,
+    quantity INT NOT NULL,
+    date_added DATETIME NOT NULL,
+    PRIMARY KEY (user_id, edamam_food_id),
+    KEY idx_user_ingredients_food (edamam_food_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS Reports (
+    id INT NOT NULL AUTO_INCREMENT,
+    user_id INT NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    description TEXT,
+    date DATETIME NOT NULL,
+    PRIMARY KEY (id),
+    KEY idx_reports_user_date (user_id, date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS Categories (
+    id INT NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    description TEXT,
+    PRIMARY KEY (id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS Subcategories (
+    id INT NOT NULL AUTO_INCREMENT,
+    name VARCHAR(255) NOT NULL,
+    category_id INT NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_subcategories_name_category (name, category_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS RecipeCatalog (
+    uri VARCHAR(255) NOT NULL,
+    label VARCHAR(255) NOT NULL,
+    image TEXT,
+    url TEXT,
+    calories DOUBLE,
+    total_weight DOUBLE,
+    cuisine_type VARCHAR(255),
+    meal_type VARCHAR(255),
+    dish_type VARCHAR(255),
+    PRIMARY KEY (uri)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS UserRecipes (
+    user_id INT NOT NULL,
+    uri VARCHAR(255) NOT NULL,
+    date_added DATETIME NOT NULL,
+    PRIMARY KEY (user_id, uri),
+    KEY idx_user_recipes_uri (uri)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS RecipeIngredients (
+    uri VARCHAR(255) NOT NULL,
+    edamam_food_id VARCHAR(255) NOT NULL,
+    PRIMARY KEY (uri, edamam_food_id),
+    KEY idx_recipe_ingredients_food (edamam_food_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,101 @@
+import time
+import asyncio
+import logging
+from Config.Fb import TokenNotYetValid, decode_firebase_token
+from Config.Resilience import DependencyUnavailable, is_dependency_failure
+from Config.RequestMetrics import record_token_cache
+from Model.UserModel import USER_BY_FIREBASE_UID_SQL
+from Cache.FbCache import rejected_key, REJECTED_INVALID, INVALID_TOKEN_TTL, REJECTED_NO_USER, NO_USER_TTL
+
+
+async def reject_token_async(redis_connection, id_token, reason):
+    """
+    Async counterpart of reject_token.
+    """
+    ttl = INVALID_TOKEN_TTL if reason == REJECTED_INVALID else NO_USER_TTL
+    try:
+        await redis_connection.setex(rejected_key(id_token), ttl, reason)
+    except Exception as e:
+        logging.warning("[reject_token_async] Could not cache rejection: %s", e)
+
+
+async def get_cached_uid_redis_async(id_token, redis_connection, db):
+    """
+    Async counterpart of get_cached_uid_redis for the ASGI app, with the same caching and failure
+    handling: a Redis outage only skips the cache, and a MySQL outage raises DependencyUnavailable.
+    """
+    try:
+        # Check the cache UID and a cached rejection in one round trip, verifying with Firebase when Redis is down
+        try:
+            cached_uid, rejected = await redis_connection.mget(id_token, rejected_key(id_token))
+        except Exception as e:
+            record_token_cache("redis", "error")
+            logging.warning("[get_cached_uid_redis_async] Redis unavailable, verifying without cache: %s", e)
+            redis_connection = cached_uid = rejected = None
+        if cached_uid:
+            record_token_cache("redis", "hit")
+            logging.info("[get_cached_uid_redis_async] Cache hit for ID token.")
+            return cached_uid
+        if rejected:
+            record_token_cache("negative", "hit")
+            logging.info("[get_cached_uid_redis_async] Cached rejection (%s) for ID token.", rejected)
+            return None
+
+        if redis_connection:
+            record_token_cache("redis", "miss")
+            logging.info("[get_cached_uid_redis_async] Cache miss, verifying token with Firebase.")
+
+        # The Firebase SDK is sync, so verification runs off the event loop
+        try:
+            decoded_token = await asyncio.to_thread(decode_firebase_token, id_token)
+        except TokenNotYetValid as e:
+            record_token_cache("firebase", "not_yet_valid")
+            logging.warning("[get_cached_uid_redis_async] Token not valid yet, check the clock: %s", e)
+            return None
+        if not decoded_token:
+            record_token_cache("firebase", "rejected")
+            logging.warning("[get_cached_uid_redis_async] Token verification failed.")
+            if redis_connection:
+                await reject_token_async(redis_connection, id_token, REJECTED_INVALID)
+            return None
+
+        # Verify UID is returned
+        firebase_uid = decoded_token.get('uid')
+        if not firebase_uid:
+            logging.error("[get_cached_uid_redis_async] Decoded token does not contain UID.")
+            return None
+
+        # Get User ID in AWS
+        async with db.connect_read() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(USER_BY_FIREBASE_UID_SQL, (firebase_uid,))
+                user = await cursor.fetchone()
+        if not user:
+            record_token_cache("database", "miss")
+            logging.warning("[get_cached_uid_redis_async] User not found for Firebase UID: %s", firebase_uid)
+            if redis_connection:
+                await reject_token_async(redis_connection, id_token, REJECTED_NO_USER)
+            return None
+        record_token_cache("database", "hit")
+        user_id = user['id']
+
+        # Check exp time and user ID
+        expires_in = decoded_token.get('exp', time.time() + 3600) - time.time()
+        if expires_in <= 0:
+            logging.error("[get_cached_uid_redis_async] Expiration time is invalid or in past.")
+            return None
+
+        # Place token in redis
+        if redis_connection:
+            try:
+                await redis_connection.setex(id_token, int(expires_in), user_id)
+                logging.info("[get_cached_uid_redis_async] Cached UID for %s seconds.", int(expires_in))
+            except Exception as e:
+                logging.warning("[get_cached_uid_redis_async] Could not cache UID: %s", e)
+        return user_id
+
+    except Exception as e:
+        logging.error(f"[get_cached_uid_redis_async] Error: {str(e)}", exc_info=True)
+        if is_dependency_failure(e):
+            raise DependencyUnavailable(f"Token lookup failed: {str(e)}") from e
+        return None
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import math
+import mmap
+import time
+import bisect
+import struct
+import logging
+import threading
+import numpy
+from array import array
+
+MAGIC = b"CATSNAP1"
+PREFIX = struct.Struct("<8sQ")
+ALIGNMENT = 8
+
+# InternalIngredients columns in the snapshot. Numbers are float64 records, NaN standing for NULL.
+STRING_COLUMNS = ("Edamam_Food_ID", "Name", "Category", "Quantity_Type", "Image_URL")
+NUMERIC_COLUMNS = (
+    "Quantity", "Expiration_Duration", "Fat", "Cholesterol", "Sodium",
+    "Potassium", "Carbohydrate", "Protein", "Calorie"
+)
+INTEGER_COLUMNS = {"Expiration_Duration"}
+RECORD = struct.Struct("<" + "d" * len(NUMERIC_COLUMNS))
+
+# The same columns get_nutrition_by_edamam_id selects
+NUTRITION_COLUMNS = (
+    "Edamam_Food_ID", "Name", "Category", "Quantity_Type", "Quantity",
+    "Fat", "Cholesterol", "Sodium", "Potassium", "Carbohydrate", "Protein", "Calorie"
+)
+
+CURRENT_LINK = "current"
+SNAPSHOT_KEEP = int(os.getenv("CATALOG_SNAPSHOT_KEEP", 3))
+
+
+# Structured dtype of one record, laid out exactly as RECORD packs it
+RECORD_DTYPE = numpy.dtype([(name, "<f8") for name in NUMERIC_COLUMNS])
+
+
+def _pad(handle):
+    handle.write(b"\0" * (-handle.tell() % ALIGNMENT))
+
+
+def write_snapshot(rows, directory, version=None, catalog_version=None):
+    """
+    Export InternalIngredients rows (dicts) into a snapshot file in directory and point the
+    current link at it. Readers that already mapped the previous file keep using it safely.
+    catalog_version is the catalog:version the rows are at least as new as. Returns the new file's path.
+    """
+    started = time.perf_counter()
+    version = str(version if version is not None else time.time_ns())
+    rows = sorted(rows, key=lambda row: row["Edamam_Food_ID"])
+    os.makedirs(directory, exist_ok=True)
+
+    path = os.path.join(directory, f"catalog-{version}.snap")
+    temporary = path + ".tmp"
+    sections = {}
+    with open(temporary, "wb") as handle:
+        # Space for the prefix, the JSON header follows the data once section offsets are known
+        handle.write(b"\0" * PREFIX.size)
+        _pad(handle)
+
+        records_offset = handle.tell()
+        for row in rows:
+            handle.write(RECORD.pack(*(
+                math.nan if row.get(name) is None else float(row[name]) for name in NUMERIC_COLUMNS
+            )))
+        sections["records"] = [records_offset, handle.tell() - records_offset]
+
+        for name in STRING_COLUMNS:
+            values = [row.get(name) for row in rows]
+            encoded = [value.encode() if value is not None else b"" for value in values]
+            offsets = array("I", [0])
+            for value in encoded:
+                offsets.append(offsets[-1] + len(value))
+            nulls = bytes(1 if value is None else 0 for value in values)
+            for kind, data in (("offsets", offsets.tobytes()), ("nulls", nulls), ("blob", b"".join(encoded))):
+                _pad(handle)
+                sections[f"{kind}:{name}"] = [handle.tell(), len(data)]
+                handle.write(data)
+
+        _pad(handle)
+        header_offset = handle.tell()
+        handle.write(json.dumps({
+            "version": version,
+            "catalog_version": catalog_version,
+            "rows": len(rows),
+            "numeric": list(NUMERIC_COLUMNS),
+            "strings": list(STRING_COLUMNS),
+            "sections": sections,
+        }).encode())
+        handle.seek(0)
+        handle.write(PREFIX.pack(MAGIC, header_offset))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+    # Swap the link atomically, a reader sees either the old file or the new one
+    link = os.path.join(directory, CURRENT_LINK)
+    temporary_link = f"{link}.{os.getpid()}.tmp"
+    os.symlink(os.path.basename(path), temporary_link)
+    os.replace(temporary_link, link)
+    _remove_old_snapshots(directory, path)
+
+    logging.info("[CatalogSnapshot] Wrote %s rows as version %s in %.1f ms",
+                 len(rows), version, (time.perf_counter() - started) * 1000)
+    return path
+
+
+def _remove_old_snapshots(directory, current):
+    # Unlinking a mapped file is fine, the mapping lives until the last reader drops it
+    snapshots = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory)
+         if name.startswith("catalog-") and name.endswith(".snap")),
+        key=os.path.getmtime
+    )
+    for path in snapshots[:-SNAPSHOT_KEEP]:
+        if path != current:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning("[CatalogSnapshot] Could not remove %s: %s", path, e)
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of a snapshot file. The file is mapped, not read, so every worker on the host
+    shares the same page-cache pages and opening it costs no copy whatever the catalog size.
+    """
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("Catalog snapshots are little-endian")
+        self.path = path
+        with open(path, "rb") as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.buffer)
+
+        magic, header_offset = PREFIX.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        header = json.loads(bytes(view[header_offset:]))
+        if header["numeric"] != list(NUMERIC_COLUMNS):
+            raise ValueError(f"{path} has columns {header['numeric']}, expected {list(NUMERIC_COLUMNS)}")
+        self.version = header["version"]
+        self.catalog_version = header.get("catalog_version")
+        self.rows = header["rows"]
+
+        def section(name):
+            offset, size = header["sections"][name]
+            return view[offset:offset + size]
+
+        self.records = section("records")
+        self.offsets = {name: section(f"offsets:{name}").cast("I") for name in STRING_COLUMNS}
+        self.nulls = {name: section(f"nulls:{name}") for name in STRING_COLUMNS}
+        self.blobs = {name: section(f"blob:{name}") for name in STRING_COLUMNS}
+        self.numbers = numpy.frombuffer(self.buffer, dtype=RECORD_DTYPE, count=self.rows,
+                                        offset=header["sections"]["records"][0])
+
+    def __len__(self):
+        return self.rows
+
+    def string(self, name, index):
+        if self.nulls[name][index]:
+            return None
+        offsets = self.offsets[name]
+        return str(self.blobs[name][offsets[index]:offsets[index + 1]], "utf-8")
+
+    def record(self, index):
+        """
+        Numeric columns of one row, NULLs as None.
+        """
+        values = RECORD.unpack_from(self.records, index * RECORD.size)
+        return {
+            name: None if math.isnan(value) else int(value) if name in INTEGER_COLUMNS else value
+            for name, value in zip(NUMERIC_COLUMNS, values)
+        }
+
+    def column(self, name):
+        """
+        Zero-copy NumPy view of one numeric column, for vectorised scans.
+        """
+        return self.numbers[name]
+
+    def index_of(self, edamam_food_id):
+        """
+        Row of an Edamam_Food_ID by binary search over the sorted id blob, -1 when absent.
+        """
+        ids = _StringColumn(self, "Edamam_Food_ID")
+        index = bisect.bisect_left(ids, edamam_food_id)
+        return index if index < self.rows and ids[index] == edamam_food_id else -1
+
+    def row(self, index, columns=STRING_COLUMNS + NUMERIC_COLUMNS):
+        numbers = self.record(index)
+        return {name: numbers[name] if name in numbers else self.string(name, index) for name in columns}
+
+    def nutrition(self, edamam_food_id):
+        """
+        The row get_nutrition_by_edamam_id would return, or None when the id isn't in this snapshot.
+        """
+        index = self.index_of(edamam_food_id)
+        return self.row(index, NUTRITION_COLUMNS) if index >= 0 else None
+
+
+class _StringColumn:
+    # Sequence over one string column, so bisect decodes only the probed rows
+    def __init__(self, snapshot, name):
+        self.snapshot = snapshot
+        self.name = name
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def __getitem__(self, index):
+        return self.snapshot.string(self.name, index)
+
+
+class CatalogSnapshotStore:
+    """
+    The snapshot the current link points at, re-checked at most every check_interval. A new version
+    is mapped and swapped in with one reference assignment, requests holding the old one finish on it.
+    A snapshot older than the catalog version in Redis isn't served until a newer one is built.
+    """
+    def __init__(self, directory=None, check_interval=None):
+        self.directory = directory if directory is not None else os.getenv("CATALOG_SNAPSHOT_DIR")
+        self.check_interval = float(check_interval or os.getenv("CATALOG_SNAPSHOT_CHECK_INTERVAL", 10))
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.target = None
+        self.checked_at = 0
+        self.stale = False
+
+    def current(self):
+        """
+        Latest snapshot, or None when none is configured, built yet or up to date with the catalog.
+        """
+        if not self.directory:
+            return None
+        now = time.monotonic()
+        if now - self.checked_at < self.check_interval:
+            return None if self.stale else self.snapshot
+
+        with self.lock:
+            if now - self.checked_at < self.check_interval:
+                return None if self.stale else self.snapshot
+            self.checked_at = now
+            try:
+                target = os.readlink(os.path.join(self.directory, CURRENT_LINK))
+                if target != self.target:
+                    self.snapshot = CatalogSnapshot(os.path.join(self.directory, target))
+                    self.target = target
+                    logging.info("[CatalogSnapshot] Mapped version %s with %s rows",
+                                 self.snapshot.version, len(self.snapshot))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                # Keep serving the mapped version, a broken file is retried on the next check
+                logging.error(f"[CatalogSnapshot] Error mapping snapshot: {str(e)}", exc_info=True)
+            if self.snapshot is not None:
+                self._check_version()
+            return None if self.stale else self.snapshot
+
+    def _check_version(self):
+        # Keep the last verdict while Redis is unreachable, like the search index keeps its build
+        from Cache.CatalogVersion import get_catalog_version
+        remote_version = get_catalog_version()
+        if remote_version is None:
+            return
+        stale = self.snapshot.catalog_version is None or int(self.snapshot.catalog_version) < remote_version
+        if stale and not self.stale:
+            logging.warning("[CatalogSnapshot] Snapshot %s is behind catalog version %s, reading MySQL",
+                            self.snapshot.version, remote_version)
+        self.stale = stale
+
+
+# Shared store for the process
+catalog_snapshots = CatalogSnapshotStore()
@@ -0,0 +1,38 @@
+import logging
+from Config.Redis import RedisClient
+
+# Bumped whenever InternalIngredients changes, for caches and search indexes built from the catalog
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def get_catalog_version():
+    """
+    Current catalog version, 0 before the first import and None when Redis is unavailable.
+    """
+    redis_connection = None
+    try:
+        redis_connection = RedisClient().connect()
+        value = redis_connection.get(CATALOG_VERSION_KEY)
+        return int(value) if value else 0
+    except Exception as e:
+        logging.error(f"[CatalogVersion] Error reading catalog version: {str(e)}", exc_info=True)
+        return None
+    finally:
+        if redis_connection:
+            redis_connection.close()
+
+
+def bump_catalog_version():
+    """
+    Announce a catalog change, returning the new version or None when Redis is unavailable.
+    """
+    redis_connection = None
+    try:
+        redis_connection = RedisClient().connect()
+        return redis_connection.incr(CATALOG_VERSION_KEY)
+    except Exception as e:
+        logging.error(f"[CatalogVersion] Error bumping catalog version: {str(e)}", exc_info=True)
+        return None
+    finally:
+        if redis_connection:
+            redis_connection.close()
@@ -0,0 +1,107 @@
+import os
+import time
+import logging
+import threading
+from Config.Redis import RedisClient
+
+CATEGORY_VERSION_KEY = "categories:version"
+
+
+def normalize(name):
+    # Subcategories.name compares case-insensitively and ignores trailing spaces in MySQL
+    return name.strip().casefold() if isinstance(name, str) else None
+
+
+class CategoryResolver:
+    """
+    In-process map from subcategory name to category name. The tables are small and change only
+    on a FatSecret sync, which bumps a Redis version so every worker reloads on its next check.
+    """
+    def __init__(self, check_interval=None):
+        self.check_interval = float(check_interval or os.getenv("CATEGORY_RESOLVER_CHECK_INTERVAL", 30))
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.version = None
+        self.checked_at = 0
+        self.categories = {}
+
+    def ensure_fresh(self, loader):
+        """
+        Load the map on first use and reload it when the version changed, checked at most every check_interval.
+        loader() -> rows of {subcategory, category}, ordered so the preferred category of a name comes first.
+        Returns whether a map is available.
+        """
+        now = time.monotonic()
+        if self.loaded and now - self.checked_at < self.check_interval:
+            return True
+
+        with self.lock:
+            if self.loaded and now - self.checked_at < self.check_interval:
+                return True
+            self.checked_at = now
+
+            remote_version = self._get_remote_version()
+            # Keep serving the current map while Redis is unreachable
+            if self.loaded and (remote_version is None or remote_version == self.version):
+                return True
+
+            if self._rebuild(loader):
+                self.version = remote_version
+            return self.loaded
+
+    def _rebuild(self, loader):
+        started = time.perf_counter()
+        rows = loader()
+        if isinstance(rows, dict):
+            # Error from the model, the previous map stays and the next check retries
+            self.checked_at = 0
+            return False
+
+        categories = {}
+        for row in rows:
+            categories.setdefault(normalize(row['subcategory']), row['category'])
+        self.categories = categories
+        self.loaded = True
+        logging.info("[CategoryResolver] Loaded %s subcategories in %.1f ms",
+                     len(categories), (time.perf_counter() - started) * 1000)
+        return True
+
+    def resolve_categories(self, names):
+        """
+        Category of each subcategory name, None for names that aren't known.
+        """
+        categories = self.categories
+        return {name: categories.get(normalize(name)) for name in names}
+
+    def publish(self):
+        """
+        Tell every worker the tables changed, this one included.
+        """
+        self.version = None
+        self.checked_at = 0
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            redis_connection.incr(CATEGORY_VERSION_KEY)
+        except Exception as e:
+            logging.error(f"[CategoryResolver] Error publishing category version: {str(e)}", exc_info=True)
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def _get_remote_version(self):
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            value = redis_connection.get(CATEGORY_VERSION_KEY)
+            return int(value) if value else 0
+        except Exception as e:
+            logging.error(f"[CategoryResolver] Error reading category version: {str(e)}", exc_info=True)
+            return None
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+
+# Shared resolver for the process
+category_resolver = CategoryResolver()
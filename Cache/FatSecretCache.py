@@ -1,51 +1,135 @@
-# import time
-# import logging
-# from Config.Redis import RedisClient  
-# from Auth.FatSecretAuth import FatSecretAuth
-
-# redis_client = RedisClient().connect()
-
-# logging.basicConfig(
-#     filename='/var/log/flask_app.log',
-#     level=logging.INFO,
-#     format='%(asctime)s - %(levelname)s - %(message)s'
-# )
-
-# def get_cached_fatsecret_token():
-#     """
-#     Fetch and cache FatSecret access token in Redis.
-#     """
-#     redis_connection = None
-#     try:
-#         redis_connection = RedisClient().connect()
-        
-#         cached_token = redis_connection.get("fatsecret_token")
-
-#         if cached_token:
-#             logging.info("[get_cached_fatsecret_token] Cache hit for FatSecret token.")
-#             return cached_token
-
-#         logging.info("[get_cached_fatsecret_token] Cache miss, requesting new token.")
-        
-#         fatsecret_auth = FatSecretAuth(region_name="us-east-1")  
-#         new_token = fatsecret_auth.fetch_access_token()
-        
-#         if not new_token:
-#             logging.error("[get_cached_fatsecret_token] Failed to fetch new FatSecret token.")
-#             return None
-
-#         expires_in = 3600 
-
-#         redis_connection.setex("fatsecret_token", expires_in, new_token)
-#         logging.info(f"[get_cached_fatsecret_token] Cached FatSecret token for {expires_in} seconds.")
-
-#         return new_token
-
-#     except Exception as e:
-#         logging.error(f"[get_cached_fatsecret_token] Error: {str(e)}", exc_info=True)
-#         return None
-
-#     finally:
-#         if redis_connection:
-#             redis_connection.close()
-#             logging.info("[get_cached_fatsecret_token] Redis connection closed.")
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from Config.Redis import RedisClient
+from Config.Metrics import metrics
+from Auth.FatSecretAuth import FatSecretAuth
+
+TOKEN_KEY = "fatsecret_token"
+LOCK_KEY = "fatsecret_token_lock"
+
+# The cached token expires this much before FatSecret's expires_in, so it is never sent at the edge
+EXPIRY_MARGIN_SECONDS = int(os.getenv("FATSECRET_TOKEN_EXPIRY_MARGIN", 30))
+
+# Within this window before expiry one worker refreshes in the background while everyone keeps the old token
+REFRESH_AHEAD_SECONDS = int(os.getenv("FATSECRET_TOKEN_REFRESH_AHEAD", 300))
+
+# The refresh lock outlives a slow token call. A failed refresh keeps it, which spaces out retries.
+LOCK_TTL_MS = int(os.getenv("FATSECRET_TOKEN_LOCK_TTL_MS", 10000))
+
+# How long a worker without any token waits for the lock holder before giving up
+WAIT_SECONDS = float(os.getenv("FATSECRET_TOKEN_WAIT", 2))
+POLL_SECONDS = 0.05
+
+# One background refresh per process at a time
+_background_refresh = threading.Lock()
+
+
+def load_token(redis_connection):
+    cached = redis_connection.get(TOKEN_KEY)
+    return json.loads(cached) if cached else None
+
+
+def acquire_refresh_lock(redis_connection):
+    """
+    Owner id when this worker won the right to fetch a token, None when another worker holds it.
+    """
+    owner = uuid.uuid4().hex
+    return owner if redis_connection.set(LOCK_KEY, owner, nx=True, px=LOCK_TTL_MS) else None
+
+
+def release_refresh_lock(redis_connection, owner):
+    # Not atomic, but a lock that expired and was re-taken in between only costs one extra refresh
+    if redis_connection.get(LOCK_KEY) == owner:
+        redis_connection.delete(LOCK_KEY)
+
+
+def refresh_token(redis_connection, mode):
+    """
+    Fetch a token from FatSecret and cache it for its real lifetime. Call with the refresh lock held.
+    """
+    token, expires_in = FatSecretAuth(region_name="us-east-1").fetch_token()
+    if not token:
+        metrics.inc("fatsecret_token_refresh_total", (("mode", mode), ("outcome", "error")))
+        logging.error("[get_cached_fatsecret_token] Failed to fetch new FatSecret token.")
+        return None
+
+    ttl = max(1, expires_in - EXPIRY_MARGIN_SECONDS)
+    redis_connection.setex(TOKEN_KEY, ttl, json.dumps({"token": token, "expires_at": time.time() + ttl}))
+    metrics.inc("fatsecret_token_refresh_total", (("mode", mode), ("outcome", "ok")))
+    logging.info("[get_cached_fatsecret_token] Cached FatSecret token for %s seconds.", ttl)
+    return token
+
+
+def refresh_in_background():
+    """
+    Refresh the still-valid token on a daemon thread, unless this process or another worker already is.
+    """
+    if not _background_refresh.acquire(blocking=False):
+        return
+
+    def run():
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            owner = acquire_refresh_lock(redis_connection)
+            if owner and refresh_token(redis_connection, "background"):
+                release_refresh_lock(redis_connection, owner)
+        except Exception as e:
+            logging.error(f"[get_cached_fatsecret_token] Background refresh error: {str(e)}")
+        finally:
+            if redis_connection:
+                redis_connection.close()
+            _background_refresh.release()
+
+    threading.Thread(target=run, name="fatsecret-token-refresh", daemon=True).start()
+
+
+def wait_for_token(redis_connection, rejected_token):
+    deadline = time.monotonic() + WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        cached = load_token(redis_connection)
+        if cached and cached["token"] != rejected_token:
+            return cached["token"]
+    logging.warning("[get_cached_fatsecret_token] Timed out waiting for another worker's token refresh.")
+    return None
+
+
+def get_cached_fatsecret_token(rejected_token=None):
+    """
+    Fetch and cache FatSecret access token in Redis. Only the worker holding the refresh lock calls
+    FatSecret, the others wait for its token. rejected_token is one the API just answered 401 to,
+    which is replaced unless another worker already did.
+    """
+    redis_connection = None
+    try:
+        redis_connection = RedisClient().connect()
+
+        cached = load_token(redis_connection)
+        if cached and cached["token"] != rejected_token:
+            if time.time() >= cached["expires_at"] - REFRESH_AHEAD_SECONDS:
+                refresh_in_background()
+            return cached["token"]
+
+        logging.info("[get_cached_fatsecret_token] Cache miss, requesting new token.")
+        owner = acquire_refresh_lock(redis_connection)
+        if not owner:
+            return wait_for_token(redis_connection, rejected_token)
+
+        token = refresh_token(redis_connection, "sync")
+        if token:
+            release_refresh_lock(redis_connection, owner)
+        return token
+
+    except Exception as e:
+        # Without Redis there is nothing to coordinate on, each worker fetches its own token
+        logging.error(f"[get_cached_fatsecret_token] Error: {str(e)}", exc_info=True)
+        return FatSecretAuth(region_name="us-east-1").fetch_access_token()
+
+    finally:
+        if redis_connection:
+            redis_connection.close()
@@ -1,38 +1,106 @@
+import os
 import time
+import hashlib
 import logging
-from Config.Fb import verify_firebase_token
+from Config.Fb import TokenNotYetValid, decode_firebase_token
 from Config.Db import Database
-from Config.Redis import RedisClient  
+from Config.Redis import RedisClient
+from Config.Resilience import DependencyUnavailable, is_dependency_failure
 from Model.UserModel import UserModel
+from Config.RequestMetrics import record_token_cache
+
+# Failed verifications are cached under the token's digest, never the token itself
+REJECTED_KEY_PREFIX = "token_rejected:"
+REJECTED_INVALID = "invalid"
+REJECTED_NO_USER = "no_user"
+
+# An invalid or expired token never becomes valid. A missing user row may be created any moment.
+# A token issued ahead of this host's clock is never cached, it becomes valid once the clocks agree.
+INVALID_TOKEN_TTL = int(os.getenv("NEGATIVE_TOKEN_TTL", 300))
+NO_USER_TTL = int(os.getenv("NEGATIVE_USER_TTL", 30))
+
+
+def rejected_key(id_token):
+    return REJECTED_KEY_PREFIX + hashlib.sha256(id_token.encode()).hexdigest()
+
+
+def reject_token(redis_connection, id_token, reason):
+    """
+    Remember a failed verification so retries with the same token cost one lookup.
+    """
+    ttl = INVALID_TOKEN_TTL if reason == REJECTED_INVALID else NO_USER_TTL
+    try:
+        redis_connection.setex(rejected_key(id_token), ttl, reason)
+    except Exception as e:
+        logging.warning("[reject_token] Could not cache rejection: %s", e)
+
+
+def remember_user_token(id_token, decoded_token, user_id):
+    """
+    Cache the UID of a user who was just created and drop any rejection cached while their row
+    didn't exist. The next request then skips the lookup a lagging replica could still miss.
+    """
+    expires_in = int(decoded_token.get('exp', time.time() + 3600) - time.time())
+    redis_connection = None
+    try:
+        redis_connection = RedisClient().connect()
+        pipeline = redis_connection.pipeline(transaction=False)
+        pipeline.delete(rejected_key(id_token))
+        if expires_in > 0:
+            pipeline.setex(id_token, expires_in, user_id)
+        pipeline.execute()
+    except Exception as e:
+        logging.error(f"[remember_user_token] Error: {str(e)}")
+    finally:
+        if redis_connection:
+            redis_connection.close()
 
-# Set up logging
-logging.basicConfig(
-    filename='/var/log/flask_app.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 
 def get_cached_uid_redis(id_token):
     """
-    Cache the Firebase UID in Redis.
+    Cache the Firebase UID in Redis. Rejected tokens and tokens without a user row are cached
+    briefly too, so a client retrying a bad token doesn't cost a verification per attempt.
+    A Redis outage only skips the cache. When MySQL can't be reached the token can't be judged
+    either way, so DependencyUnavailable is raised instead of answering None (a 401).
     """
     redis_connection = None
     try:
         # Start Redis connection
         redis_connection = RedisClient().connect()
-        
-        # Check the cache UID
-        cached_uid = redis_connection.get(id_token)
+
+        # Check the cache UID and a cached rejection in one round trip, verifying with Firebase when Redis is down
+        try:
+            cached_uid, rejected = redis_connection.mget(id_token, rejected_key(id_token))
+        except Exception as e:
+            record_token_cache("redis", "error")
+            logging.warning("[get_cached_uid_redis] Redis unavailable, verifying without cache: %s", e)
+            redis_connection.close()
+            redis_connection = cached_uid = rejected = None
         if cached_uid:
+            record_token_cache("redis", "hit")
             logging.info("[get_cached_uid_redis] Cache hit for ID token.")
             return cached_uid
+        if rejected:
+            record_token_cache("negative", "hit")
+            logging.info("[get_cached_uid_redis] Cached rejection (%s) for ID token.", rejected)
+            return None
 
-        logging.info("[get_cached_uid_redis] Cache miss, verifying token with Firebase.")
+        if redis_connection:
+            record_token_cache("redis", "miss")
+            logging.info("[get_cached_uid_redis] Cache miss, verifying token with Firebase.")
 
         # Verify token in Firebase
-        decoded_token = verify_firebase_token(id_token)
+        try:
+            decoded_token = decode_firebase_token(id_token)
+        except TokenNotYetValid as e:
+            record_token_cache("firebase", "not_yet_valid")
+            logging.warning("[get_cached_uid_redis] Token not valid yet, check the clock: %s", e)
+            return None
         if not decoded_token:
+            record_token_cache("firebase", "rejected")
             logging.warning("[get_cached_uid_redis] Token verification failed.")
+            if redis_connection:
+                reject_token(redis_connection, id_token, REJECTED_INVALID)
             return None
 
         # Verify UID is returned
@@ -40,7 +108,7 @@ def get_cached_uid_redis(id_token):
         if not firebase_uid:
             logging.error("[get_cached_uid_redis] Decoded token does not contain UID.")
             return None
-            
+
         #Database Connection
         connection = Database().connect_read()
         user_model = UserModel(connection)
@@ -48,8 +116,12 @@ def get_cached_uid_redis(id_token):
         #Get User ID in AWS
         user = user_model.get_user_by_firebase_uid(firebase_uid)
         if not user:
-            logging.warning(f"[get_cached_uid_redis] User not found for Firebase UID: {firebase_uid}")
+            record_token_cache("database", "miss")
+            logging.warning("[get_cached_uid_redis] User not found for Firebase UID: %s", firebase_uid)
+            if redis_connection:
+                reject_token(redis_connection, id_token, REJECTED_NO_USER)
             return None
+        record_token_cache("database", "hit")
         user_id = user['id']
 
         # Check exp time and user ID
@@ -59,12 +131,18 @@ def get_cached_uid_redis(id_token):
             return None
 
         # Place token in redis
-        redis_connection.setex(id_token, int(expires_in), user_id)
-        logging.info(f"[get_cached_uid_redis] Cached UID for {int(expires_in)} seconds.")
+        if redis_connection:
+            try:
+                redis_connection.setex(id_token, int(expires_in), user_id)
+                logging.info("[get_cached_uid_redis] Cached UID for %s seconds.", int(expires_in))
+            except Exception as e:
+                logging.warning("[get_cached_uid_redis] Could not cache UID: %s", e)
         return user_id
 
     except Exception as e:
         logging.error(f"[get_cached_uid_redis] Error: {str(e)}", exc_info=True)
+        if is_dependency_failure(e):
+            raise DependencyUnavailable(f"Token lookup failed: {str(e)}") from e
         return None
 
     finally:
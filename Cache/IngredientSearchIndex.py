@@ -0,0 +1,266 @@
+import os
+import re
+import time
+import logging
+import threading
+from array import array
+from collections import namedtuple
+from Config.Db import Database
+from Config.Metrics import metrics
+from Cache.CatalogVersion import get_catalog_version
+from Cache.CatalogSnapshot import catalog_snapshots
+from Model.InternalIngredientsModel import InternalIngredientsModel
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+# Edits tolerated per query word: none below MIN_FUZZY_LENGTH letters, one up to 4, MAX_EDIT_DISTANCE beyond
+MAX_EDIT_DISTANCE = int(os.getenv("SEARCH_MAX_EDIT_DISTANCE", 2))
+MIN_FUZZY_LENGTH = 3
+
+# Deletes are generated from this many leading letters only, which bounds the index and every lookup
+PREFIX_LENGTH = 7
+
+# One built index, replaced as a whole so a search never sees half of a rebuild
+Catalog = namedtuple("Catalog", "ids words word_ids postings leading deletes")
+EMPTY = Catalog([], [], {}, [], [], {})
+
+
+def tokenize(text):
+    return TOKEN.findall(text.casefold())
+
+
+def edit_budget(word):
+    if len(word) < MIN_FUZZY_LENGTH:
+        return 0
+    return min(MAX_EDIT_DISTANCE, 1 if len(word) <= 4 else 2)
+
+
+def deletes(word, distance):
+    """
+    word and every string reachable from it by removing up to distance letters.
+    """
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier if len(variant) > 1 for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(source, target, limit):
+    """
+    Optimal string alignment distance (an adjacent swap is one edit), or limit + 1 once it is exceeded.
+    """
+    if abs(len(source) - len(target)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = source[i - 1] != target[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def load_catalog_names():
+    """
+    Every catalog id and name, read on a connection of its own so a build never holds a request's.
+    """
+    connection = Database().connect_read()
+    try:
+        yield from InternalIngredientsModel(connection).stream_catalog(("Edamam_Food_ID", "Name"))
+    finally:
+        connection.close()
+
+
+class SnapshotIds:
+    """
+    Edamam_Food_IDs of an index built over a mapped catalog snapshot, in index order. Read from the
+    mapping every worker shares, so no worker keeps its own copy of the ids.
+    """
+    def __init__(self, snapshot, rows):
+        self.snapshot = snapshot
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, ingredient):
+        return self.snapshot.string("Edamam_Food_ID", self.rows[ingredient])
+
+
+def union(sets, word_ids):
+    # Most query words correct to a single catalog word, whose set is then used without a copy
+    return sets[word_ids[0]] if len(word_ids) == 1 else frozenset().union(*(sets[word_id] for word_id in word_ids))
+
+
+class IngredientSearchIndex:
+    """
+    Typo-tolerant lookup of ingredient names, for queries the substring search finds nothing for.
+    Every catalog word is indexed under its SymSpell deletes (variants with up to MAX_EDIT_DISTANCE
+    letters removed), so correcting a query word costs a few dozen dict lookups instead of a scan.
+    Rebuilt when the catalog version changes, at warm-up or on a background thread, never in a request.
+    """
+    def __init__(self, check_interval=None):
+        self.check_interval = float(check_interval or os.getenv("SEARCH_INDEX_CHECK_INTERVAL", 30))
+        self.lock = threading.Lock()
+        self.refreshing = threading.Lock()
+        self.thread = None
+        self.loaded = False
+        self.version = None
+        self.checked_at = 0
+        self.catalog = EMPTY
+
+    def ensure_fresh(self, loader=None):
+        """
+        Whether an index is available to search. The first call and the first call every check_interval
+        after it start refresh(loader) on a background thread, searches meanwhile use the current build.
+        """
+        now = time.monotonic()
+        if now - self.checked_at >= self.check_interval and self.refreshing.acquire(blocking=False):
+            self.checked_at = now
+
+            def run():
+                try:
+                    self.refresh(loader)
+                except Exception as e:
+                    # The current index stays, the next check retries
+                    logging.error(f"[IngredientSearchIndex] Error refreshing index: {str(e)}", exc_info=True)
+                finally:
+                    self.refreshing.release()
+
+            self.thread = threading.Thread(target=run, name="ingredient-search-index", daemon=True)
+            self.thread.start()
+        return self.loaded
+
+    def refresh(self, loader=None):
+        """
+        Build from loader() -> rows of {Edamam_Food_ID, Name} when nothing is built yet or the catalog
+        version changed. Without a loader the mapped catalog snapshot is used when there is an up to
+        date one, MySQL otherwise. Returns whether it rebuilt, errors from loader() propagate.
+        """
+        with self.lock:
+            self.checked_at = time.monotonic()
+            remote_version = get_catalog_version()
+            # Keep serving the current index while Redis is unreachable
+            if self.loaded and (remote_version is None or remote_version == self.version):
+                return False
+            snapshot = catalog_snapshots.current() if loader is None else None
+            if snapshot is not None:
+                self.build_from_snapshot(snapshot)
+            else:
+                self.build((loader or load_catalog_names)())
+            self.version = remote_version
+            return True
+
+    def build(self, rows):
+        # Ingredients are numbered in (name, id) order, so ranking candidates is a sort of ints
+        ordered = sorted((row['Name'], row['Edamam_Food_ID']) for row in rows)
+        self._build([food_id for _, food_id in ordered], [name for name, _ in ordered])
+
+    def build_from_snapshot(self, snapshot):
+        """
+        Build over a mapped catalog snapshot, keeping only the words, their postings and the row order.
+        """
+        names = [snapshot.string("Name", row) or "" for row in range(len(snapshot))]
+        # Snapshot rows are in id order, so the row breaks ties between equal names like the id does
+        rows = array('I', sorted(range(len(names)), key=lambda row: (names[row], row)))
+        self._build(SnapshotIds(snapshot, rows), [names[row] for row in rows])
+
+    def _build(self, ids, names):
+        started = time.perf_counter()
+        postings, leading, word_ids = [], [], {}
+        for ingredient, name in enumerate(names):
+            tokens = tokenize(name)
+            for word in set(tokens):
+                word_id = word_ids.get(word)
+                if word_id is None:
+                    word_id = word_ids[word] = len(postings)
+                    postings.append([])
+                    leading.append([])
+                postings[word_id].append(ingredient)
+            if tokens:
+                leading[word_ids[tokens[0]]].append(ingredient)
+
+        words = [None] * len(word_ids)
+        index = {}
+        for word, word_id in word_ids.items():
+            words[word_id] = word
+            for variant in deletes(word[:PREFIX_LENGTH], MAX_EDIT_DISTANCE):
+                index.setdefault(variant, []).append(word_id)
+
+        self.catalog = Catalog(
+            ids, words, word_ids,
+            [frozenset(ingredients) for ingredients in postings],
+            [frozenset(ingredients) for ingredients in leading],
+            {variant: tuple(sorted(found)) for variant, found in index.items()}
+        )
+        self.loaded = True
+        logging.info("[IngredientSearchIndex] Indexed %s names, %s words, %s deletes in %.1f ms",
+                     len(names), len(words), len(index), (time.perf_counter() - started) * 1000)
+
+    def correct(self, token, catalog=None):
+        """
+        Catalog words closest to token and their distance. Only words at the smallest distance found are
+        kept, so "brocoli" means broccoli and not also every word two edits away.
+        """
+        catalog = catalog or self.catalog
+        word_id = catalog.word_ids.get(token)
+        if word_id is not None:
+            return [word_id], 0
+
+        budget = edit_budget(token)
+        if not budget:
+            return [], None
+        candidates = set()
+        for variant in deletes(token[:PREFIX_LENGTH], budget):
+            candidates.update(catalog.deletes.get(variant, ()))
+
+        best, closest = budget + 1, []
+        for word_id in sorted(candidates):
+            distance = edit_distance(token, catalog.words[word_id], min(best, budget))
+            if distance < best:
+                best, closest = distance, [word_id]
+            elif distance == best:
+                closest.append(word_id)
+        return (closest, best) if closest else ([], None)
+
+    def search(self, query, limit):
+        """
+        Edamam_Food_IDs of the names containing a correction of every query word. Like the substring
+        search, names starting with the first word come first, then by name and id, so the order never
+        depends on build or hash order.
+        """
+        catalog = self.catalog
+        matched = []
+        for token in dict.fromkeys(tokenize(query)):
+            word_ids, _ = self.correct(token, catalog)
+            # Words with no close catalog word at all are ignored rather than failing the query
+            if word_ids:
+                matched.append(word_ids)
+        if not matched:
+            metrics.inc("ingredient_search_fuzzy_total", (("result", "miss"),))
+            return []
+
+        sets = sorted((union(catalog.postings, word_ids) for word_ids in matched), key=len)
+        found = sets[0].intersection(*sets[1:])
+        metrics.inc("ingredient_search_fuzzy_total", (("result", "hit" if found else "miss"),))
+        if not found:
+            return []
+
+        limit = int(limit)
+        starting = found & union(catalog.leading, matched[0])
+        ranked = sorted(starting)[:limit]
+        if len(ranked) < limit:
+            ranked += sorted(found - starting)[:limit - len(ranked)]
+        return [catalog.ids[ingredient] for ingredient in ranked]
+
+
+# Shared index for the process
+ingredient_search_index = IngredientSearchIndex()
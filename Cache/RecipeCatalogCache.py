@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import logging
+import threading
+from decimal import Decimal
+from collections import OrderedDict
+from Config.Redis import RedisClient
+
+RECIPE_KEY_PREFIX = "recipe:"
+
+
+def encode_recipe(recipe):
+    return json.dumps(recipe, default=lambda value: float(value) if isinstance(value, Decimal) else str(value))
+
+
+class RecipeCatalogCache:
+    """
+    Read-through cache for shared recipe metadata: in-process LRU in front of Redis in front of MySQL.
+    """
+    def __init__(self, max_entries=None, local_ttl=None, redis_ttl=None):
+        self.max_entries = int(max_entries or os.getenv("RECIPE_CACHE_MAX_ENTRIES", 5000))
+        self.local_ttl = float(local_ttl or os.getenv("RECIPE_CACHE_LOCAL_TTL", 60))
+        self.redis_ttl = int(redis_ttl or os.getenv("RECIPE_CACHE_REDIS_TTL", 86400))
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, uris, loader):
+        """
+        Return recipes for the uris in order, loading misses with loader(uris) -> list of rows.
+        """
+        found = self._get_local(uris)
+
+        missing = [uri for uri in uris if uri not in found]
+        if missing:
+            found.update(self._get_redis(missing))
+
+        missing = [uri for uri in uris if uri not in found]
+        if missing:
+            loaded = {row['uri']: row for row in loader(missing)}
+            found.update(loaded)
+            self._set_redis(loaded)
+
+        self._set_local({uri: found[uri] for uri in uris if uri in found})
+        return [found[uri] for uri in uris if uri in found]
+
+    def invalidate(self, uris):
+        """
+        Drop recipes from both tiers after their metadata changed.
+        """
+        with self.lock:
+            for uri in uris:
+                self.entries.pop(uri, None)
+
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            redis_connection.delete(*[RECIPE_KEY_PREFIX + uri for uri in uris])
+        except Exception as e:
+            logging.error(f"[RecipeCatalogCache] Error invalidating recipes: {str(e)}", exc_info=True)
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def _get_local(self, uris):
+        now = time.monotonic()
+        found = {}
+        with self.lock:
+            for uri in uris:
+                entry = self.entries.get(uri)
+                if entry and entry[0] > now:
+                    self.entries.move_to_end(uri)
+                    found[uri] = entry[1]
+        return found
+
+    def _set_local(self, recipes):
+        expires_at = time.monotonic() + self.local_ttl
+        with self.lock:
+            for uri, recipe in recipes.items():
+                self.entries[uri] = (expires_at, recipe)
+                self.entries.move_to_end(uri)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _get_redis(self, uris):
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            values = redis_connection.mget([RECIPE_KEY_PREFIX + uri for uri in uris])
+            return {uri: json.loads(value) for uri, value in zip(uris, values) if value}
+        except Exception as e:
+            logging.error(f"[RecipeCatalogCache] Redis read error: {str(e)}", exc_info=True)
+            return {}
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def _set_redis(self, recipes):
+        if not recipes:
+            return
+
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            pipeline = redis_connection.pipeline(transaction=False)
+            for uri, recipe in recipes.items():
+                pipeline.setex(RECIPE_KEY_PREFIX + uri, self.redis_ttl, encode_recipe(recipe))
+            pipeline.execute()
+        except Exception as e:
+            logging.error(f"[RecipeCatalogCache] Redis write error: {str(e)}", exc_info=True)
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+
+# Shared cache for the process
+recipe_catalog_cache = RecipeCatalogCache()
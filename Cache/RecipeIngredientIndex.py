@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from array import array
+from Config.Redis import RedisClient
+
+INDEX_SEQ_KEY = "recipe_index:seq"
+INDEX_LOG_KEY = "recipe_index:log"
+
+
+class RecipeIngredientIndex:
+    """
+    In-process inverted index from edamam_food_id to recipe ids, kept in step across workers through a Redis log.
+    """
+    def __init__(self, check_interval=None, log_size=None):
+        self.check_interval = float(check_interval or os.getenv("RECIPE_INDEX_CHECK_INTERVAL", 5))
+        self.log_size = int(log_size or os.getenv("RECIPE_INDEX_LOG_SIZE", 10000))
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.seq = 0
+        self.checked_at = 0
+        self._reset()
+
+    def _reset(self):
+        self.recipe_ids = {}
+        self.uris = []
+        self.recipe_foods = []
+        self.postings = {}
+
+    def ensure_fresh(self, loader):
+        """
+        Load the index on first use and replay writes from other workers at most every check_interval.
+        loader() -> rows of {uri, edamam_food_id}.
+        """
+        now = time.monotonic()
+        if self.loaded and now - self.checked_at < self.check_interval:
+            return
+
+        with self.lock:
+            if self.loaded and now - self.checked_at < self.check_interval:
+                return
+            self.checked_at = now
+
+            remote_seq = self._get_remote_seq()
+            # Keep serving the current index while Redis is unreachable
+            if self.loaded and (remote_seq is None or remote_seq == self.seq):
+                return
+
+            entries = None
+            if self.loaded and 0 < remote_seq - self.seq <= self.log_size:
+                entries = self._get_log_entries(remote_seq - self.seq)
+
+            if entries is None:
+                self._rebuild(loader)
+            else:
+                for uri, food_ids in entries:
+                    self._add(uri, food_ids)
+            self.seq = remote_seq or 0
+
+    def _rebuild(self, loader):
+        started = time.perf_counter()
+        self._reset()
+
+        grouped = {}
+        for row in loader():
+            grouped.setdefault(row['uri'], []).append(row['edamam_food_id'])
+        for uri in sorted(grouped):
+            self._add(uri, grouped[uri])
+
+        self.loaded = True
+        logging.info(f"[RecipeIngredientIndex] Built index for {len(self.uris)} recipes in "
+                     f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def _add(self, uri, food_ids):
+        # A re-indexed recipe keeps its id and swaps its postings, so corrected ingredients take effect
+        # and every posting list stays sorted
+        foods = tuple(sorted(set(food_ids)))
+        recipe_id = self.recipe_ids.get(uri)
+        if recipe_id is None:
+            if not foods:
+                return
+            recipe_id = len(self.uris)
+            self.recipe_ids[uri] = recipe_id
+            self.uris.append(uri)
+            self.recipe_foods.append(())
+
+        previous = self.recipe_foods[recipe_id]
+        if previous == foods:
+            return
+        for food_id in set(previous).difference(foods):
+            posting = self.postings[food_id]
+            posting.remove(recipe_id)
+            if not posting:
+                del self.postings[food_id]
+        for food_id in set(foods).difference(previous):
+            posting = self.postings.setdefault(food_id, array('I'))
+            if posting and posting[-1] > recipe_id:
+                posting.insert(bisect.bisect_left(posting, recipe_id), recipe_id)
+            else:
+                posting.append(recipe_id)
+        self.recipe_foods[recipe_id] = foods
+
+    def publish(self, uri, food_ids):
+        """
+        Index a newly stored or refreshed recipe locally and log it for the other workers.
+        An empty ingredient list clears a recipe indexed before.
+        """
+        food_ids = sorted(set(food_ids))
+        self.add_local(uri, food_ids)
+
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            pipeline = redis_connection.pipeline(transaction=True)
+            self.queue_log_entry(pipeline, uri, food_ids)
+            pipeline.execute()
+        except Exception as e:
+            logging.error(f"[RecipeIngredientIndex] Error publishing recipe {uri}: {str(e)}", exc_info=True)
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def add_local(self, uri, food_ids):
+        """
+        Index a recipe in this worker only, if the index is loaded.
+        """
+        with self.lock:
+            if self.loaded:
+                self._add(uri, food_ids)
+
+    def queue_log_entry(self, pipeline, uri, food_ids):
+        """
+        Queue the Redis log append on a sync or async pipeline.
+        """
+        pipeline.rpush(INDEX_LOG_KEY, json.dumps([uri, sorted(set(food_ids))]))
+        pipeline.ltrim(INDEX_LOG_KEY, -self.log_size, -1)
+        pipeline.incr(INDEX_SEQ_KEY)
+
+    def rank(self, pantry_food_ids, saved_uris, limit=20, min_coverage=0.0):
+        """
+        Rank saved recipes by the share of their ingredients present in the pantry.
+        """
+        saved = {self.recipe_ids[uri] for uri in saved_uris if uri in self.recipe_ids}
+        if not saved:
+            return []
+
+        matched = {}
+        for food_id in set(pantry_food_ids):
+            for recipe_id in self.postings.get(food_id, ()):
+                if recipe_id in saved:
+                    matched[recipe_id] = matched.get(recipe_id, 0) + 1
+
+        scored = []
+        for recipe_id in saved:
+            total = len(self.recipe_foods[recipe_id])
+            if not total:
+                continue
+            hits = matched.get(recipe_id, 0)
+            coverage = hits / total
+            if coverage >= min_coverage:
+                scored.append((-coverage, total - hits, self.uris[recipe_id], recipe_id, hits, total))
+        scored.sort()
+
+        pantry = set(pantry_food_ids)
+        return [
+            {
+                "uri": uri,
+                "coverage": round(-negative_coverage, 4),
+                "matched": hits,
+                "total": total,
+                "missing": [food_id for food_id in self.recipe_foods[recipe_id] if food_id not in pantry]
+            }
+            for negative_coverage, _, uri, recipe_id, hits, total in scored[:limit]
+        ]
+
+    def _get_remote_seq(self):
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            value = redis_connection.get(INDEX_SEQ_KEY)
+            return int(value) if value else 0
+        except Exception as e:
+            logging.error(f"[RecipeIngredientIndex] Error reading index sequence: {str(e)}", exc_info=True)
+            return None
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def _get_log_entries(self, count):
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            return [json.loads(entry) for entry in redis_connection.lrange(INDEX_LOG_KEY, -count, -1)]
+        except Exception as e:
+            logging.error(f"[RecipeIngredientIndex] Error reading index log: {str(e)}", exc_info=True)
+            return None
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+
+# Shared index for the process
+recipe_ingredient_index = RecipeIngredientIndex()
@@ -0,0 +1,114 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from flask import Response
+from Config.Redis import RedisClient
+from Config.Metrics import metrics
+from Config.JsonStream import dumps
+
+STALE_KEY_PREFIX = "stale:"
+
+
+class StaleCache:
+    """
+    Last good body of cacheable reads (catalog, search, pantry snapshots), kept in Redis so any
+    worker can answer with it while MySQL is unavailable. Each key is rewritten at most once per
+    refresh interval per worker, so healthy traffic pays for a write only now and then.
+    """
+    def __init__(self, ttl=None, refresh_seconds=None, max_bytes=None, max_tracked=None):
+        self.ttl = int(ttl or os.getenv("STALE_CACHE_TTL", 86400))
+        self.refresh_seconds = float(refresh_seconds or os.getenv("STALE_CACHE_REFRESH", 60))
+        self.max_bytes = int(max_bytes or os.getenv("STALE_CACHE_MAX_BYTES", 1024 * 1024))
+        self.max_tracked = int(max_tracked or os.getenv("STALE_CACHE_MAX_TRACKED", 10000))
+        self.stored = OrderedDict()
+        self.lock = threading.Lock()
+
+    def claim(self, key):
+        """
+        True when key is due for a rewrite, which this caller then owns until the next interval.
+        """
+        now = time.monotonic()
+        with self.lock:
+            stored_at = self.stored.get(key)
+            if stored_at is not None and now - stored_at < self.refresh_seconds:
+                return False
+            self.stored[key] = now
+            self.stored.move_to_end(key)
+            while len(self.stored) > self.max_tracked:
+                self.stored.popitem(last=False)
+        return True
+
+    def remember(self, key, value):
+        if self.claim(key):
+            self._store(key, dumps(value))
+
+    def remember_rows(self, key, rows):
+        """
+        Pass rows through, keeping a copy of the encoded array when the stream completes within max_bytes.
+        """
+        if not self.claim(key):
+            yield from rows
+            return
+
+        encoded, size = [], 2
+        for row in rows:
+            if encoded is not None:
+                item = dumps(row)
+                size += len(item) + 1
+                if size <= self.max_bytes:
+                    encoded.append(item)
+                else:
+                    encoded = None
+            yield row
+        if encoded is not None:
+            self._store(key, b"[" + b",".join(encoded) + b"]")
+
+    def recall(self, key):
+        """
+        Stored body for key, or None when there is none or Redis is unavailable too.
+        """
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            return redis_connection.get(STALE_KEY_PREFIX + key)
+        except Exception as e:
+            logging.error(f"[StaleCache] Redis read error: {str(e)}")
+            return None
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def _store(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        redis_connection = None
+        try:
+            redis_connection = RedisClient().connect()
+            redis_connection.setex(STALE_KEY_PREFIX + key, self.ttl, body)
+        except Exception as e:
+            logging.error(f"[StaleCache] Redis write error: {str(e)}")
+        finally:
+            if redis_connection:
+                redis_connection.close()
+
+    def clear_tracking(self):
+        with self.lock:
+            self.stored.clear()
+
+
+def stale_response(body, route, response_class=Response):
+    """
+    200 with the stored body, marked so clients and caches know it may be out of date.
+    The async app passes Quart's Response as response_class.
+    """
+    metrics.inc("stale_responses_total", (("route", route),))
+    response = response_class(body, status=200, mimetype="application/json")
+    response.headers["X-Served-Stale"] = "true"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+# Shared cache for the process
+stale_cache = StaleCache()
@@ -0,0 +1,192 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from Config.Db import Database
+from Config.Metrics import metrics
+from Model.UserIngredientsModel import UserIngredientsModel, merge_change, to_quantity
+
+ACK_BUFFERED = "buffered"
+ACK_DURABLE = "durable"
+
+
+def to_change(quantity):
+    """
+    Translate an /update quantity into a (reset, delta) change. Zero removes the ingredient.
+    """
+    value = to_quantity(quantity)
+    if value == 0:
+        return (True, 0)
+    return (False, value)
+
+
+class FlushTicket:
+    """
+    Acknowledgement handle for one submit, resolved only with its final outcome:
+    committed, or dropped after every retry failed. A failed flush that is retried leaves it pending.
+    """
+    def __init__(self, food_ids):
+        self.food_ids = food_ids
+        self.event = threading.Event()
+        self.result = None
+
+    def committed(self):
+        self.resolve({"message": f"Saved {len(self.food_ids)} ingredient changes"})
+
+    def lost(self):
+        self.resolve({"error": "Ingredient changes could not be saved and were discarded", "lost": self.food_ids})
+
+    def resolve(self, result):
+        self.result = result
+        self.event.set()
+
+    def wait(self, timeout=None):
+        if not self.event.wait(timeout):
+            # Still queued and retried, so this is not a failure the client should repeat
+            return {"message": f"Queued {len(self.food_ids)} ingredient changes, not committed yet", "pending": True}
+        return self.result
+
+
+class UserIngredientsWriteBuffer:
+    """
+    Write-behind buffer that merges per-user quantity deltas and flushes them in one transaction.
+    """
+    def __init__(self, db=None, flush_interval=None, max_pending=None, max_retries=3):
+        self.db = db or Database()
+        self.flush_interval = float(flush_interval if flush_interval is not None
+                                    else os.getenv("USER_INGREDIENTS_FLUSH_INTERVAL", 0.05))
+        self.max_pending = int(max_pending or os.getenv("USER_INGREDIENTS_MAX_PENDING", 500))
+        self.max_retries = max_retries
+
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.tickets = []
+        self.failures = 0
+        self.thread = None
+        self.stopped = False
+
+    def submit(self, user_id, ingredients, ack=ACK_DURABLE, timeout=5):
+        """
+        Queue ingredient quantity changes. Durable acks block until the flush commits.
+        """
+        if not ingredients or not all('edamam_food_id' in ing and 'quantity' in ing for ing in ingredients):
+            logging.warning("[UserIngredientsWriteBuffer] Invalid input")
+            return {"error": "Each ingredient must have 'edamam_food_id' and 'quantity'"}
+
+        try:
+            changes = [((user_id, ing['edamam_food_id']), to_change(ing['quantity'])) for ing in ingredients]
+        except ValueError as e:
+            logging.warning("[UserIngredientsWriteBuffer] Invalid input: %s", e)
+            return {"error": str(e)}
+        ticket = FlushTicket([ing['edamam_food_id'] for ing in ingredients]) if ack == ACK_DURABLE else None
+
+        with self.condition:
+            self._ensure_thread()
+            for key, change in changes:
+                self.pending[key] = merge_change(self.pending[key], change) if key in self.pending else change
+            if ticket:
+                self.tickets.append(ticket)
+            self.condition.notify()
+
+        if ticket:
+            return ticket.wait(timeout)
+        return {"message": f"Queued {len(changes)} ingredient changes"}
+
+    def flush(self):
+        """
+        Write everything pending in one transaction. Tickets are resolved once their changes commit
+        or are dropped; a failed flush requeues both.
+        """
+        with self.condition:
+            changes, tickets = self.pending, self.tickets
+            self.pending, self.tickets = {}, []
+
+        if not changes:
+            for ticket in tickets:
+                ticket.committed()
+            return None
+
+        try:
+            connection = self.db.connect_write()
+            connection.ping(reconnect=True)
+            connection.track_writes({user_id for user_id, _ in changes})
+            result = UserIngredientsModel(connection).apply_quantity_changes(changes)
+        except Exception as e:
+            logging.error(f"[UserIngredientsWriteBuffer] Flush error: {str(e)}", exc_info=True)
+            result = {"error": "An error occurred while flushing ingredients", "details": str(e)}
+
+        if "error" in result:
+            self._requeue(changes, tickets)
+            return result
+
+        self.failures = 0
+        for ticket in tickets:
+            ticket.committed()
+        return result
+
+    def _requeue(self, changes, tickets):
+        # Failed changes are older than anything queued since, so they merge underneath
+        self.failures += 1
+        if self.failures > self.max_retries:
+            self.failures = 0
+            self._drop(changes, tickets)
+            return
+
+        with self.condition:
+            for key, change in changes.items():
+                self.pending[key] = merge_change(change, self.pending[key]) if key in self.pending else change
+            self.tickets[:0] = tickets
+
+    def _drop(self, changes, tickets):
+        # Every dropped change is logged and counted, and durable writers are told theirs is lost
+        logging.error(f"[UserIngredientsWriteBuffer] Dropping {len(changes)} changes after {self.max_retries} retries: "
+                      f"{sorted(changes.items())}")
+        metrics.inc("user_ingredients_dropped_changes_total", value=len(changes))
+        for ticket in tickets:
+            ticket.lost()
+
+    def _ensure_thread(self):
+        # Started lazily so a preloading master never owns the flusher
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="user-ingredients-flusher", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.tickets and not self.stopped:
+                    self.condition.wait()
+                if self.stopped and not self.pending and not self.tickets:
+                    return
+                # Hold the window open so bursts coalesce, unless the buffer fills up
+                deadline = time.monotonic() + self.flush_interval
+                while len(self.pending) < self.max_pending and not self.stopped:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+            self.flush()
+
+    def close(self):
+        """
+        Stop the flusher after writing whatever is still pending.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread:
+            self.thread.join(timeout=5)
+        self.flush()
+
+
+def is_write_buffer_enabled():
+    return os.getenv("USER_INGREDIENTS_WRITE_BUFFER", "false").lower() in ("1", "true", "yes")
+
+
+# Shared buffer for the process
+user_ingredients_write_buffer = UserIngredientsWriteBuffer()
+atexit.register(user_ingredients_write_buffer.close)
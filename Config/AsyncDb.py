@@ -0,0 +1,285 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import aiomysql
+from contextlib import asynccontextmanager
+from Config.SecretManager import get_secret, invalidate_secret, is_access_denied
+from Config.Metrics import metrics
+from Config.AsyncRedis import AsyncRedisClient
+from Config.ReadRouting import (
+    parse_replicas, route_read, replica_lag, marker_key, marker_value, parse_marker, lag_from_status,
+    MODE, MARKER_TTL, PRIMARY, WAIT_TIMEOUT, WAIT_FOR_GTID_SQL, EXECUTED_GTIDS_SQL, REPLICA_STATUS_SQL
+)
+from Config.Resilience import get_breaker, remaining_seconds, is_dependency_failure, DependencyUnavailable, DeadlineExceeded
+from Config.RequestMetrics import record_query
+from Config.QueryProfiler import query_profiler
+from Config.InstrumentedCursor import limit_execution
+from Config.Db import CONNECT_TIMEOUT, READ_TIMEOUT
+
+# Longest wait for a free pooled connection, further bounded by the request's deadline
+ACQUIRE_TIMEOUT = float(os.getenv("ASYNC_DB_ACQUIRE_TIMEOUT", 2))
+
+
+class InstrumentedAsyncCursor(aiomysql.DictCursor):
+    """
+    aiomysql counterpart of InstrumentedDictCursor: metrics, profiler, MAX_EXECUTION_TIME hint and
+    circuit breaker. aiomysql has no socket read timeout, so a statement still running after
+    DB_READ_TIMEOUT is cancelled and its connection closed.
+    """
+    # EXPLAIN capture needs a blocking cursor
+    explainable = False
+
+    async def execute(self, query, args=None):
+        statement = limit_execution(query)
+        breaker = getattr(self.connection, "breaker", None)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(super().execute(statement, args), READ_TIMEOUT)
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                # The reply may still arrive, the connection can't be reused
+                self.connection.close()
+            if breaker is not None and is_dependency_failure(e):
+                breaker.record_failure()
+            raise
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+        finally:
+            duration = time.perf_counter() - started
+            record_query(duration)
+            query_profiler.record(self, query, args, duration)
+
+
+class AsyncWriteConnection:
+    """
+    Pooled primary connection that stamps the read-your-writes marker of the users it wrote for
+    once a commit succeeds, like InstrumentedConnection.
+    """
+    def __init__(self, connection, database, user_ids):
+        self.connection = connection
+        self.database = database
+        self.written_users = set(user_ids)
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    async def commit(self):
+        await self.connection.commit()
+        if self.written_users:
+            await self.database.record_writes(self.connection, self.written_users)
+
+
+class AsyncDatabase:
+    """
+    Async database configuration with read and write connection pools.
+    Pools share the threaded app's timeouts, circuit breakers and read-your-writes markers.
+    """
+    def __init__(self, redis_client=None):
+        self.region_name = os.getenv("AWS_REGION")
+        self.write_secret_name = os.getenv("SECRET_WRITE")
+        # One pool on the heaviest replica, weighted routing across several is done by Config.Db
+        replicas = parse_replicas(os.getenv("SECRET_READ"))
+        self.read_secret_name = max(replicas, key=lambda replica: replica[1])[0] if replicas else self.write_secret_name
+        self.pool_size = int(os.getenv("ASYNC_DB_POOL_SIZE", 20))
+        self.redis_client = redis_client or AsyncRedisClient()
+        self.write_pool = None
+        self.read_pool = None
+        self.lock = asyncio.Lock()
+
+    async def _create_pool(self, secret_name):
+        breaker = get_breaker(f"mysql:{secret_name}")
+        breaker.check()
+        try:
+            try:
+                pool = await self._connect_pool(secret_name)
+            except Exception as e:
+                # Rotated password, connect again once with the current secret
+                if not (is_access_denied(e) and invalidate_secret(secret_name, self.region_name)):
+                    raise
+                pool = await self._connect_pool(secret_name)
+        except Exception as e:
+            if is_dependency_failure(e):
+                breaker.record_failure()
+            raise
+        breaker.record_success()
+        return pool
+
+    async def _connect_pool(self, secret_name):
+        # Secrets Manager is only reachable through the sync boto3 client
+        credentials = await asyncio.to_thread(get_secret, secret_name, self.region_name)
+        pool = await aiomysql.create_pool(
+            host=credentials["DB_HOST"],
+            user=credentials["DB_USER"],
+            password=credentials["DB_PASSWORD"],
+            db=credentials["DB_NAME"],
+            port=int(credentials.get("DB_PORT", 3306)),
+            minsize=1,
+            maxsize=self.pool_size,
+            cursorclass=InstrumentedAsyncCursor,
+            connect_timeout=CONNECT_TIMEOUT,
+            autocommit=False
+        )
+        print(f"Async database pool established for {secret_name}.")
+        return pool
+
+    async def write(self):
+        if not self.write_pool:
+            async with self.lock:
+                if not self.write_pool:
+                    self.write_pool = await self._create_pool(self.write_secret_name)
+        return self.write_pool
+
+    async def read(self):
+        # Without a replica reads share the primary's pool
+        if self.read_secret_name == self.write_secret_name:
+            return await self.write()
+        if not self.read_pool:
+            async with self.lock:
+                if not self.read_pool:
+                    self.read_pool = await self._create_pool(self.read_secret_name)
+        return self.read_pool
+
+    @asynccontextmanager
+    async def connect_write(self, user_id=None):
+        """
+        Pooled primary connection, released when the block exits. Commits on it mark user_id
+        as having just written, so their next reads avoid a replica that hasn't caught up.
+        """
+        async with self._acquire(await self.write(), self.write_secret_name, "write") as connection:
+            yield AsyncWriteConnection(connection, self, [user_id] if user_id is not None else [])
+
+    @asynccontextmanager
+    async def connect_read(self, user_id=None):
+        """
+        Pooled connection for a read, routed like Config.Db.connect_read: the replica when it is
+        fresh enough for user_id, the primary otherwise.
+        """
+        route = await self._route(user_id)
+        if route.replica is not PRIMARY:
+            async with self._acquire(await self.read(), route.replica, "read") as connection:
+                if route.gtid is None or await self._wait_for_gtid(connection, route.gtid):
+                    metrics.inc("db_read_routes_total", (("target", "replica"), ("reason", route.reason)))
+                    yield connection
+                    return
+            route = route._replace(reason="wait_timeout")
+
+        metrics.inc("db_read_routes_total", (("target", "primary"), ("reason", route.reason)))
+        async with self._acquire(await self.write(), self.write_secret_name, "read_primary") as connection:
+            yield connection
+
+    async def _route(self, user_id):
+        # A replica behind an open breaker is skipped, its reads go to the primary
+        replicas = []
+        if self.read_secret_name != self.write_secret_name and get_breaker(f"mysql:{self.read_secret_name}").allows():
+            replicas = [(self.read_secret_name, 1.0)]
+        for name in replica_lag.claim_due([name for name, _ in replicas]):
+            await self._sample_lag(name)
+
+        # route_read is sync, so the marker is fetched first and handed over, errors included
+        marker = error = None
+        if replicas and user_id is not None:
+            try:
+                marker = await self._last_write(user_id)
+            except Exception as e:
+                error = e
+
+        def lookup(_):
+            if error is not None:
+                raise error
+            return marker
+
+        return route_read(replicas, user_id, lookup=lookup)
+
+    async def _last_write(self, user_id):
+        return parse_marker(await self.redis_client.connect().get(marker_key(user_id)))
+
+    async def record_writes(self, connection, user_ids):
+        """
+        Stamp each user's last committed write, see Config.ReadRouting.record_commit.
+        """
+        gtid = None
+        if MODE == "wait":
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(EXECUTED_GTIDS_SQL)
+                    row = await cursor.fetchone()
+                gtid = row["gtid"] if row else None
+            except Exception as e:
+                # Still stamped, reads inside the window fall back to the primary instead of waiting
+                logging.error(f"[record_writes] Reading gtid_executed failed: {str(e)}")
+
+        try:
+            value = marker_value(gtid)
+            async with self.redis_client.connect().pipeline(transaction=False) as pipeline:
+                for user_id in user_ids:
+                    pipeline.set(marker_key(user_id), value, ex=MARKER_TTL)
+                await pipeline.execute()
+        except Exception as e:
+            metrics.inc("read_your_writes_marker_errors_total", (("operation", "write"),))
+            logging.error(f"[record_writes] Error: {str(e)}", exc_info=True)
+
+    async def _wait_for_gtid(self, connection, gtid):
+        async with connection.cursor() as cursor:
+            await cursor.execute(WAIT_FOR_GTID_SQL, (gtid, WAIT_TIMEOUT))
+            row = await cursor.fetchone()
+        return row is not None and row["timed_out"] == 0
+
+    async def _sample_lag(self, name):
+        # Unreachable counts as infinitely behind, the replica is skipped until the next sample
+        try:
+            async with self._acquire(await self.read(), name, "read") as connection:
+                # Without REPLICATION CLIENT the lag stays unknown, the replica then serves no user who wrote recently
+                try:
+                    async with connection.cursor() as cursor:
+                        try:
+                            await cursor.execute(REPLICA_STATUS_SQL[0])
+                        except Exception:
+                            await cursor.execute(REPLICA_STATUS_SQL[1])
+                        replica_lag.record(name, lag_from_status(await cursor.fetchone()))
+                except Exception as e:
+                    print(f"Error measuring lag of replica {name}: {e}")
+                    replica_lag.record(name, None)
+        except Exception as e:
+            print(f"Error connecting to replica {name}: {e}")
+            replica_lag.record(name, math.inf)
+
+    @asynccontextmanager
+    async def _acquire(self, pool, secret_name, role):
+        # An open breaker or a spent deadline fails before waiting on the pool
+        breaker = get_breaker(f"mysql:{secret_name}")
+        breaker.check()
+        remaining = remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            metrics.inc("request_deadline_exceeded_total")
+            raise DeadlineExceeded("Request deadline exceeded")
+        timeout = ACQUIRE_TIMEOUT if remaining is None else min(ACQUIRE_TIMEOUT, remaining)
+
+        try:
+            connection = await asyncio.wait_for(pool.acquire(), timeout)
+        except TimeoutError as e:
+            metrics.inc("db_pool_acquire_timeouts_total", (("role", role),))
+            raise DependencyUnavailable(f"No {role} connection free within {timeout:.2f}s") from e
+        except Exception as e:
+            if is_dependency_failure(e):
+                breaker.record_failure()
+            raise
+
+        connection.breaker = breaker
+        try:
+            yield connection
+        finally:
+            # A connection left inside a transaction is closed by the pool, not reused
+            pool.release(connection)
+
+    async def close(self):
+        for pool in (self.write_pool, self.read_pool):
+            if pool:
+                pool.close()
+                await pool.wait_closed()
+        self.write_pool = None
+        self.read_pool = None
+        print("Async database pools closed.")
@@ -0,0 +1,43 @@
+import os
+import redis.asyncio as aioredis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+from Config.RedisBreaker import AsyncBreakerConnection
+
+
+class AsyncRedisClient:
+    """
+    Async Redis configuration with one shared connection pool.
+    Timeouts and circuit breaker match Config.Redis.
+    """
+    def __init__(self):
+        self.host = os.getenv("REDIS_HOST")
+        self.port = int(os.getenv("REDIS_PORT", 6379))
+        self.db = os.getenv("REDIS_DB")
+        self.redis_client = None
+
+    def connect(self):
+        # Establish connection
+        if not self.redis_client:
+            pool = aioredis.BlockingConnectionPool(
+                connection_class=AsyncBreakerConnection,
+                host=self.host,
+                port=self.port,
+                db=self.db,
+                decode_responses=True,
+                max_connections=int(os.getenv("ASYNC_REDIS_MAX_CONNECTIONS", 100)),
+                timeout=float(os.getenv("REDIS_POOL_TIMEOUT", 1)),
+                # A slow Redis fails the command once instead of holding the request through retries
+                socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5)),
+                socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5)),
+                retry=Retry(NoBackoff(), 0)
+            )
+            self.redis_client = aioredis.StrictRedis(connection_pool=pool)
+        return self.redis_client
+
+    async def close(self):
+        # Close connection
+        if self.redis_client:
+            await self.redis_client.aclose(close_connection_pool=True)
+            print("Async Redis connection closed.")
+            self.redis_client = None
@@ -0,0 +1,195 @@
+import os
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import request, g
+from Config.Metrics import metrics
+from Config.RequestMetrics import current_route
+
+try:
+    import brotli
+except ImportError:  # Optional, clients are offered gzip only
+    brotli = None
+
+# Bodies smaller than this fit in a packet or two, compressing them only costs CPU
+MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+
+# Per-request levels, see Benchmarks/Compression.py. On pantry bodies gzip 6 and brotli 5 are the last steps
+# that cut bytes noticeably, the levels above them cost two to three times the CPU for a few percent.
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 5))
+
+# Catalog responses are compressed once and served from the cache, so they can afford the slow levels.
+# Brotli 10 and 11 take seconds on large bodies, too long for the request that misses the cache.
+STATIC_GZIP_LEVEL = int(os.getenv("COMPRESS_STATIC_GZIP_LEVEL", 9))
+STATIC_BROTLI_QUALITY = int(os.getenv("COMPRESS_STATIC_BROTLI_QUALITY", 9))
+CACHE_BYTES = int(os.getenv("COMPRESS_CACHE_BYTES", 32 * 1024 * 1024))
+
+# Routes whose body depends only on the InternalIngredients catalog, never on the caller
+STATIC_ROUTES = frozenset({
+    "/internal_ingredients/search",
+    "/internal_ingredients/get_nutirtion_by_id",
+})
+
+COMPRESSIBLE_TYPES = frozenset({"application/json", "text/plain", "text/html", "text/csv"})
+
+
+def available_encodings():
+    """
+    Encodings this worker can produce, in order of preference on equal client quality.
+    """
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encodings):
+    """
+    Best encoding the client accepts (werkzeug Accept), or None for identity.
+    """
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body, encoding, static=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip_compress(body, STATIC_GZIP_LEVEL if static else GZIP_LEVEL)
+
+
+def gzip_compress(body, level):
+    # zlib with the gzip wrapper, gzip.compress adds a file name and mtime nobody reads
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_chunks(chunks, encoding, route):
+    """
+    Compress a streamed body as it is produced. Each chunk is flushed so the client can decode
+    rows as they arrive instead of waiting for the compressor's window to fill.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    raw = wire = 0
+    try:
+        for chunk in chunks:
+            raw += len(chunk)
+            data = process(chunk) + flush()
+            wire += len(data)
+            if data:
+                yield data
+        data = finish()
+        wire += len(data)
+        yield data
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+        record_bytes(route, encoding, raw, wire)
+
+
+def record_bytes(route, encoding, raw, wire):
+    metrics.inc("http_response_bytes_total", (("route", route), ("encoding", encoding), ("stage", "raw")), raw)
+    metrics.inc("http_response_bytes_total", (("route", route), ("encoding", encoding), ("stage", "wire")), wire)
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by encoding and a digest of the uncompressed body, bounded in bytes.
+    Keying on the body rather than the URL means a catalog change can never serve stale bytes.
+    """
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_compress(self, body, encoding):
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+        if data is not None:
+            metrics.inc("compression_cache_lookups_total", (("result", "hit"),))
+            return data
+
+        metrics.inc("compression_cache_lookups_total", (("result", "miss"),))
+        # Compressed outside the lock, two threads racing on one body both compress it once
+        data = compress(body, encoding, static=True)
+        if len(data) > self.max_bytes:
+            return data
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = data
+                self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+        return data
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+compressed_bodies = CompressedBodyCache()
+
+
+def compress_response(response):
+    """
+    after_request hook negotiating gzip or brotli from Accept-Encoding.
+    """
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or request.method == "HEAD"
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or "no-transform" in response.headers.get("Cache-Control", "")):
+        return response
+
+    # Caches in front of us must key on the header whether or not this response was compressed
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    route = g.get("metrics_route") or current_route()
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, encoding, route)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_BYTES:
+        return response
+    if route in STATIC_ROUTES and response.status_code == 200:
+        data = compressed_bodies.get_or_compress(body, encoding)
+    else:
+        data = compress(body, encoding)
+    if len(data) >= len(body):
+        return response
+
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    record_bytes(route, encoding, len(body), len(data))
+    return response
+
+
+def install_compression(app):
+    """
+    Register after install_request_metrics so the request timing includes compression.
+    """
+    app.after_request(compress_response)
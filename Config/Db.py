@@ -1,72 +1,158 @@
-import pymysql
-from Config.SecretManager import get_secret
 import os
-from dotenv import load_dotenv
+import math
+import weakref
+import threading
+from Config.SecretManager import get_secret, invalidate_secret, is_access_denied
+from Config.Metrics import metrics
+from Config.ReadRouting import parse_replicas, route_read, replica_lag, measure_lag, wait_for_gtid, PRIMARY
+from Config.Resilience import get_breaker, remaining_seconds
+
+# Socket timeouts in seconds. Reads outlast DB_MAX_EXECUTION_MS so MySQL cuts a slow SELECT first.
+CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", 2))
+READ_TIMEOUT = float(os.getenv("DB_READ_TIMEOUT", 10))
+WRITE_TIMEOUT = float(os.getenv("DB_WRITE_TIMEOUT", 10))
+CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", 3))
+
+# Every Database instance, so a forked worker can drop the connections it inherited
+_instances = weakref.WeakSet()
 
-load_dotenv()  
 
 class Database:
     """
     Database configuration connection for read, write and close.
+    Connections are per thread, so threaded workers never share a socket.
+    SECRET_READ may list several weighted replicas, see Config.ReadRouting.
     """
     def __init__(self):
-        self.region_name = os.getenv("AWS_REGION") 
+        self.region_name = os.getenv("AWS_REGION")
         self.write_secret_name = os.getenv("SECRET_WRITE")
         self.read_secret_name = os.getenv("SECRET_READ")
-        self.write_connection = None
-        self.read_connection = None
+        self.replicas = parse_replicas(self.read_secret_name)
+        self.local = threading.local()
+        _instances.add(self)
 
-    def connect_write(self):
-        # Check current connection
-        if self.write_connection and self.write_connection.open:
-            return self.write_connection
+    @property
+    def write_connection(self):
+        return getattr(self.local, "write_connection", None)
+
+    @write_connection.setter
+    def write_connection(self, connection):
+        self.local.write_connection = connection
+
+    @property
+    def read_connection(self):
+        return getattr(self.local, "read_connection", None)
+
+    @read_connection.setter
+    def read_connection(self, connection):
+        self.local.read_connection = connection
+
+    @property
+    def read_connections(self):
+        # Reader connections of this thread by secret name, the primary's included
+        if not hasattr(self.local, "read_connections"):
+            self.local.read_connections = {}
+        return self.local.read_connections
 
-        # Establish connection with 3 tries
-        write_credentials = get_secret(self.write_secret_name, self.region_name)
-        retries = 3
+    def _open(self, secret_name, role):
+        """
+        Connect with bounded timeouts. Retries stop at the request deadline and an open
+        circuit breaker fails the call before any network round trip.
+        """
+        from Config.InstrumentedCursor import InstrumentedConnection, InstrumentedDictCursor
+        breaker = get_breaker(f"mysql:{secret_name}")
+        breaker.check()
+        credentials = get_secret(secret_name, self.region_name)
+
+        # Establish connection with up to DB_CONNECT_RETRIES tries
+        retries = CONNECT_RETRIES
         while retries > 0:
             try:
-                self.write_connection = pymysql.connect(
-                    host=write_credentials["DB_HOST"],
-                    user=write_credentials["DB_USER"],
-                    password=write_credentials["DB_PASSWORD"],
-                    database=write_credentials["DB_NAME"],
-                    port=int(write_credentials.get("DB_PORT", 3306)),
-                    cursorclass=pymysql.cursors.DictCursor
+                connection = InstrumentedConnection(
+                    host=credentials["DB_HOST"],
+                    user=credentials["DB_USER"],
+                    password=credentials["DB_PASSWORD"],
+                    database=credentials["DB_NAME"],
+                    port=int(credentials.get("DB_PORT", 3306)),
+                    cursorclass=InstrumentedDictCursor,
+                    connect_timeout=CONNECT_TIMEOUT,
+                    read_timeout=READ_TIMEOUT,
+                    write_timeout=WRITE_TIMEOUT
                 )
-                print("Write database connection established.")
-                return self.write_connection
+                connection.breaker = breaker
+                breaker.record_success()
+                metrics.inc("db_connections_opened_total", (("role", role),))
+                print(f"{role.replace('_', ' ').capitalize()} database connection established.")
+                return connection
             except Exception as e:
-                print(f"Error connecting to the write database: {e}")
+                print(f"Error connecting to the {role} database: {e}")
+                # Rotated password, connect again once with the current secret
+                if is_access_denied(e) and invalidate_secret(secret_name, self.region_name):
+                    credentials = get_secret(secret_name, self.region_name)
+                    continue
+                breaker.record_failure()
                 retries -= 1
-                if retries == 0:
+                remaining = remaining_seconds()
+                if retries == 0 or (remaining is not None and remaining <= CONNECT_TIMEOUT):
                     raise e
+                breaker.check()
 
-    def connect_read(self):
+    def connect_write(self, user_id=None):
+        """
+        Primary connection. Commits on it mark user_id as having just written, so their
+        next reads avoid replicas that haven't caught up.
+        """
         # Check current connection
-        if self.read_connection and self.read_connection.open:
-            return self.read_connection
+        if not (self.write_connection and self.write_connection.open):
+            self.write_connection = self._open(self.write_secret_name, "write")
+        self.write_connection.track_writes([user_id] if user_id is not None else [])
+        return self.write_connection
 
-        # Establish connection with 3 tries
-        read_credentials = get_secret(self.read_secret_name, self.region_name)
-        retries = 3
-        while retries > 0:
-            try:
-                self.read_connection = pymysql.connect(
-                    host=read_credentials["DB_HOST"],
-                    user=read_credentials["DB_USER"],
-                    password=read_credentials["DB_PASSWORD"],
-                    database=read_credentials["DB_NAME"],
-                    port=int(read_credentials.get("DB_PORT", 3306)),
-                    cursorclass=pymysql.cursors.DictCursor
-                )
-                print("Read database connection established.")
-                return self.read_connection
-            except Exception as e:
-                print(f"Error connecting to the read database: {e}")
-                retries -= 1
-                if retries == 0:
-                    raise e
+    def connect_read(self, user_id=None):
+        """
+        Connection for a read, to a weighted replica when one is fresh enough for user_id and to
+        the primary otherwise. Reads without a user_id (catalog, lookups) go to any healthy replica.
+        """
+        for name in replica_lag.claim_due([name for name, _ in self.replicas]):
+            self._sample_lag(name)
+
+        # Replicas behind an open breaker are skipped, their reads go to the others or the primary
+        replicas = [(name, weight) for name, weight in self.replicas if get_breaker(f"mysql:{name}").allows()]
+        route = route_read(replicas, user_id)
+        if route.replica is not PRIMARY:
+            connection = self._reader(route.replica, "read")
+            if route.gtid is None or wait_for_gtid(connection, route.gtid):
+                metrics.inc("db_read_routes_total", (("target", "replica"), ("reason", route.reason)))
+                self.read_connection = connection
+                return connection
+            route = route._replace(reason="wait_timeout")
+
+        metrics.inc("db_read_routes_total", (("target", "primary"), ("reason", route.reason)))
+        self.read_connection = self._reader(self.write_secret_name, "read_primary")
+        return self.read_connection
+
+    def _reader(self, secret_name, role):
+        connection = self.read_connections.get(secret_name)
+        if not (connection and connection.open):
+            connection = self._open(secret_name, role)
+            self.read_connections[secret_name] = connection
+        return connection
+
+    def _sample_lag(self, name):
+        # Unreachable counts as infinitely behind, the replica is skipped until the next sample
+        try:
+            connection = self._reader(name, "read")
+        except Exception as e:
+            print(f"Error connecting to replica {name}: {e}")
+            replica_lag.record(name, math.inf)
+            return
+
+        # Without REPLICATION CLIENT the lag stays unknown, the replica then serves no user who wrote recently
+        try:
+            replica_lag.record(name, measure_lag(connection))
+        except Exception as e:
+            print(f"Error measuring lag of replica {name}: {e}")
+            replica_lag.record(name, None)
 
     def close_connections(self):
         # C.s
@@ -74,6 +160,28 @@ class Database:
             self.write_connection.close()
             print("Write database connection closed.")
 
-        if self.read_connection and self.read_connection.open:
-            self.read_connection.close()
-            print("Read database connection closed.")
+        for connection in self.read_connections.values():
+            if connection.open:
+                connection.close()
+                print("Read database connection closed.")
+
+    def reset_after_fork(self):
+        # Forget inherited sockets without closing them, a close would send COM_QUIT on the parent's session
+        self.local = threading.local()
+
+
+def streaming_cursor(connection):
+    """
+    Unbuffered dict cursor, rows come off the socket as they are fetched instead of all at execute.
+    The connection can run nothing else until the cursor is exhausted or closed.
+    """
+    from Config.InstrumentedCursor import InstrumentedSSDictCursor
+    return connection.cursor(InstrumentedSSDictCursor)
+
+
+def reset_connections_after_fork():
+    """
+    Drop every inherited database connection in a freshly forked worker.
+    """
+    for database in list(_instances):
+        database.reset_after_fork()
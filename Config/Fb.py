@@ -1,18 +1,32 @@
-import firebase_admin
-from firebase_admin import credentials, auth
-from Config.SecretManager import get_secret
 import os
-from dotenv import load_dotenv
+import sys
+import threading
+from Config.SecretManager import get_secret
+
+# Tolerated difference between this host's clock and the token's issued-at time, Firebase allows 0 to 60
+CLOCK_SKEW_SECONDS = min(max(int(os.getenv("FIREBASE_CLOCK_SKEW_SECONDS", 10)), 0), 60)
+
+# Fetched once per process and reused when a forked worker re-initializes
+_firebase_credentials = None
+_lock = threading.Lock()
 
-load_dotenv()
-FIREBASE_SECRET = os.getenv("FIREBASE_SECRET")
-REGION_NAME = os.getenv("AWS_REGION")
+
+class TokenNotYetValid(Exception):
+    """
+    The token was issued ahead of this host's clock by more than the tolerated skew. It may verify
+    in a few seconds, so unlike a rejected token it must not be remembered as invalid.
+    """
 
 
 def initialize_firebase():
+    global _firebase_credentials
+    import firebase_admin
+    from firebase_admin import credentials
     try:
         # Establish cred with AWS Secret Manager
-        firebase_credentials = get_secret(FIREBASE_SECRET, REGION_NAME)
+        if _firebase_credentials is None:
+            _firebase_credentials = get_secret(os.getenv("FIREBASE_SECRET"), os.getenv("AWS_REGION"))
+        firebase_credentials = _firebase_credentials
         private_key = firebase_credentials['Private-Key'].replace('\\n', '\n')
         cred = credentials.Certificate({
             "type": "service_account",
@@ -35,11 +49,46 @@ def initialize_firebase():
         raise e
 
 
+def ensure_firebase():
+    """
+    Initialize Firebase on first use.
+    """
+    if 'firebase_admin' in sys.modules and sys.modules['firebase_admin']._apps:
+        return
+    with _lock:
+        initialize_firebase()
+
+
+def reset_firebase_after_fork():
+    """
+    Drop the Firebase app inherited from the master, the worker re-creates it on first use.
+    """
+    firebase_admin = sys.modules.get('firebase_admin')
+    if firebase_admin and firebase_admin._apps:
+        firebase_admin.delete_app(firebase_admin.get_app())
+
+
+def decode_firebase_token(id_token):
+    """
+    Decoded token, or None when Firebase rejects the token itself: malformed, bad signature, expired or revoked.
+    Failures that say nothing about the token, like fetching Google's signing certificates, raise,
+    and a token used before its issued-at time raises TokenNotYetValid.
+    """
+    # Decode Token with SDK
+    ensure_firebase()
+    from firebase_admin import auth
+    try:
+        return auth.verify_id_token(id_token, clock_skew_seconds=CLOCK_SKEW_SECONDS)
+    except (ValueError, auth.InvalidIdTokenError) as e:
+        if "used too early" in str(e):
+            raise TokenNotYetValid(str(e)) from e
+        print(f"Firebase rejected token: {e}")
+        return None
+
+
 def verify_firebase_token(id_token):
     try:
-        # Decode Token with SDK
-        decoded_token = auth.verify_id_token(id_token)
-        return decoded_token
+        return decode_firebase_token(id_token)
     except Exception as e:
         print(f"Error verifying Firebase token: {e}")
         return None
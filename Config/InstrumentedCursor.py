@@ -0,0 +1,84 @@
+import re
+import time
+import pymysql
+from Config.RequestMetrics import record_query
+from Config.QueryProfiler import query_profiler
+from Config.ReadRouting import record_commit
+from Config.Resilience import statement_budget_ms, is_dependency_failure
+
+RE_SELECT = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+
+
+def limit_execution(query):
+    """
+    query with a MAX_EXECUTION_TIME hint bounded by the request's deadline when it is a SELECT.
+    """
+    if not RE_SELECT.match(query):
+        return query
+    budget = statement_budget_ms()
+    return RE_SELECT.sub(lambda match: f"{match.group(0)} /*+ MAX_EXECUTION_TIME({budget}) */", query, count=1)
+
+
+class InstrumentedCursorMixin:
+    """
+    Times every statement for the /metrics registry and the query profiler.
+    executemany funnels through execute, so a batched insert counts once per round trip.
+    SELECTs carry a MAX_EXECUTION_TIME hint bounded by the request's deadline, and dependency
+    failures count against the connection's circuit breaker.
+    """
+    execution_limit = True
+
+    def execute(self, query, args=None):
+        statement = limit_execution(query) if self.execution_limit else query
+
+        breaker = getattr(self.connection, "breaker", None)
+        started = time.perf_counter()
+        try:
+            result = super().execute(statement, args)
+        except Exception as e:
+            if breaker is not None and is_dependency_failure(e):
+                breaker.record_failure()
+            raise
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+        finally:
+            duration = time.perf_counter() - started
+            record_query(duration)
+            query_profiler.record(self, query, args, duration)
+
+
+class InstrumentedDictCursor(InstrumentedCursorMixin, pymysql.cursors.DictCursor):
+    """
+    Default cursor of every Database connection.
+    """
+
+
+class InstrumentedSSDictCursor(InstrumentedCursorMixin, pymysql.cursors.SSDictCursor):
+    """
+    Unbuffered cursor for streamed responses. Its timing covers the query up to the first row.
+    No execution limit, MySQL would count the time a slow client takes to read the rows.
+    """
+    execution_limit = False
+
+
+class InstrumentedConnection(pymysql.connections.Connection):
+    """
+    Connection that stamps a read-your-writes marker for the users it wrote for once a commit succeeds.
+    """
+    # Circuit breaker of the server behind it, set by Database
+    breaker = None
+
+    def __init__(self, *args, **kwargs):
+        # Set before connecting, pymysql commits once after an init_command
+        self.written_users = set()
+        super().__init__(*args, **kwargs)
+
+    def track_writes(self, user_ids):
+        self.written_users = set(user_ids)
+
+    def commit(self):
+        super().commit()
+        if self.written_users:
+            record_commit(self, self.written_users)
@@ -0,0 +1,104 @@
+import os
+import json
+import logging
+import itertools
+import uuid
+import decimal
+import dataclasses
+from datetime import date
+from werkzeug.http import http_date
+from flask import Response
+from Config.Metrics import metrics
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard encoder gives the same output more slowly
+    orjson = None
+
+# Rows are encoded into chunks of about this size before each write
+CHUNK_BYTES = int(os.getenv("STREAM_JSON_CHUNK_BYTES", 64 * 1024))
+
+# Rows read before the status is sent, so a failure among them is still answered with an error status
+PREFETCH_ROWS = int(os.getenv("STREAM_JSON_PREFETCH_ROWS", 500))
+
+
+def is_streaming_enabled():
+    # Opt-in: once a streamed 200 is sent, a later failure can only cut the body short
+    return os.getenv("STREAM_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+
+def json_default(value):
+    """
+    Encode the types jsonify handles beyond plain JSON the same way: dates as HTTP dates, Decimal and UUID as str.
+    """
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_SORT_KEYS
+
+    def dumps(value):
+        return orjson.dumps(value, default=json_default, option=_OPTIONS)
+else:
+    def dumps(value):
+        return json.dumps(value, default=json_default, sort_keys=True, separators=(",", ":")).encode()
+
+
+def iter_json_array(rows, chunk_bytes=CHUNK_BYTES):
+    """
+    Encode rows as one JSON array, yielding about chunk_bytes at a time so nothing holds the whole body.
+    """
+    buffer = bytearray(b"[")
+    first = True
+    for row in rows:
+        if not first:
+            buffer += b","
+        buffer += dumps(row)
+        first = False
+        if len(buffer) >= chunk_bytes:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+def prefetch(rows, count=PREFETCH_ROWS):
+    """
+    Read up to count rows before committing to a status. Returns (head, rows): rows is None when head
+    already holds every row, so small results are sent whole, and an empty head lets a handler answer 404.
+    """
+    iterator = iter(rows)
+    head = list(itertools.islice(iterator, count))
+    if len(head) < count:
+        return head, None
+    return head, itertools.chain(head, iterator)
+
+
+def _abort_on_error(chunks):
+    # Re-raised so the server drops the connection before the final chunk, and the client sees an incomplete body
+    try:
+        yield from chunks
+    except Exception as e:
+        metrics.inc("json_stream_errors_total")
+        logging.error(f"[stream_json_array] Error after the response started: {str(e)}", exc_info=True)
+        raise
+
+
+def stream_json_array(rows, status=200, on_close=None):
+    """
+    Streaming counterpart of jsonify(list). on_close runs once the response is closed, whether the body
+    was sent in full or the client went away, which is where an unbuffered cursor's connection is released.
+    A failure while streaming aborts the connection rather than ending the array.
+    """
+    response = Response(_abort_on_error(iter_json_array(rows)), status=status, mimetype="application/json")
+    if on_close:
+        response.call_on_close(on_close)
+    return response
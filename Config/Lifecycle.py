@@ -0,0 +1,21 @@
+from Config.Db import reset_connections_after_fork
+from Config.Redis import reset_pool_after_fork
+from Config.Fb import reset_firebase_after_fork
+from Config.SecretManager import reset_clients_after_fork
+from Config.Metrics import metrics
+from Config.Logging import restart_logging_after_fork
+from Api.FatSecret import reset_session_after_fork
+
+
+def reset_after_fork():
+    """
+    Give a forked worker its own database connections, Redis pool, Firebase app, AWS clients, FatSecret
+    session, metrics and log writer.
+    """
+    reset_connections_after_fork()
+    reset_pool_after_fork()
+    reset_firebase_after_fork()
+    reset_clients_after_fork()
+    reset_session_after_fork()
+    metrics.reset_after_fork()
+    restart_logging_after_fork()
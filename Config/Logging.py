@@ -0,0 +1,207 @@
+import os
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from Config.Metrics import metrics
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Bound on remembered message types, f-string messages make every record a new type
+MAX_MESSAGE_TYPES = 10000
+
+# Records waiting for the writer thread. When the log disk stalls, new records are dropped, not buffered
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+# Seconds to wait at exit for the writer thread to drain the queue
+STOP_TIMEOUT = 5
+
+_configured = False
+_listener = None
+_file_handlers = []
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that hands the record over unformatted, so the message is built on the writer thread.
+    The queue never leaves the process, so the record needs no pickling.
+    """
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        # Never block the request thread on a full queue, count the loss instead
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total", (("reason", "queue_full"),))
+
+
+class BoundedQueueListener(QueueListener):
+    """
+    QueueListener whose stop gives up after STOP_TIMEOUT when the writer is stuck behind a full queue.
+    """
+    def stop(self):
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=STOP_TIMEOUT)
+        except queue.Full:
+            # The writer is stalled, whatever is still queued is lost with the process
+            return
+        self._thread.join(STOP_TIMEOUT)
+        self._thread = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per message type sampling and rate limiting. The type is the unformatted message template,
+    so "Cache hit for ID token." is one type however many users hit it. ERROR and above always pass.
+
+    LOG_SAMPLE_RATES: "Cache hit=0.01,connection closed=0" keeps 1% of INFO/DEBUG records whose
+    template contains "Cache hit" and none containing "connection closed".
+    LOG_RATE_LIMIT: at most this many records per second per type below ERROR, 0 for no limit.
+    """
+    def __init__(self, sample_rates=None, rate_limit=0):
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.rate_limit = rate_limit
+        self.rates = {}
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def sample_rate(self, template):
+        rate = self.rates.get(template)
+        if rate is None:
+            if len(self.rates) >= MAX_MESSAGE_TYPES:
+                self.rates.clear()
+            rate = 1.0
+            for fragment, fragment_rate in self.sample_rates.items():
+                if fragment in template:
+                    rate = fragment_rate
+                    break
+            self.rates[template] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        template = str(record.msg)
+
+        if record.levelno < logging.WARNING and self.sample_rates:
+            rate = self.sample_rate(template)
+            if rate < 1.0 and random.random() >= rate:
+                return self._drop("sampled")
+
+        if self.rate_limit:
+            second = int(time.monotonic())
+            with self.lock:
+                window = self.windows.get(template)
+                if window is None or window[0] != second:
+                    if len(self.windows) >= MAX_MESSAGE_TYPES:
+                        self.windows.clear()
+                    window = self.windows[template] = [second, 0]
+                window[1] += 1
+                if window[1] > self.rate_limit:
+                    return self._drop("rate_limited")
+        return True
+
+    def _drop(self, reason):
+        metrics.inc("log_records_dropped_total", (("reason", reason),))
+        return False
+
+
+def parse_sample_rates(value):
+    rates = {}
+    for item in (value or "").split(","):
+        fragment, _, rate = item.rpartition("=")
+        if fragment.strip():
+            rates[fragment.strip()] = float(rate)
+    return rates
+
+
+def _file_handler():
+    handler = logging.FileHandler(os.getenv("LOG_FILE", "/var/log/flask_app.log"))
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _file_handlers.append(handler)
+    return handler
+
+
+def _start_listener(handler):
+    """
+    Route the root logger through a queue to a background writer thread.
+    """
+    global _listener
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, LazyQueueHandler)]:
+        root.removeHandler(existing)
+
+    log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(
+        parse_sample_rates(os.getenv("LOG_SAMPLE_RATES")),
+        int(os.getenv("LOG_RATE_LIMIT", 0))
+    ))
+    root.addHandler(queue_handler)
+
+    _listener = BoundedQueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """
+    Drain the queue and stop the writer thread. Registered at exit so buffered lines are not lost.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging():
+    """
+    Configure the app log once per process, replacing the per-controller basicConfig calls.
+    Records go through a queue to a writer thread unless LOG_ASYNC is false.
+    """
+    global _configured
+    if _configured:
+        return
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+    if os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes"):
+        _start_listener(_file_handler())
+        atexit.register(stop_logging)
+    else:
+        logging.basicConfig(
+            filename=os.getenv("LOG_FILE", "/var/log/flask_app.log"),
+            level=os.getenv("LOG_LEVEL", "INFO"),
+            format=LOG_FORMAT
+        )
+
+    # Structured slow-query lines from Config.QueryProfiler, optionally in their own file
+    slow_query_log = os.getenv("SLOW_QUERY_LOG")
+    if slow_query_log:
+        handler = logging.FileHandler(slow_query_log)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        slow_query_logger = logging.getLogger("sql.slow")
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.propagate = False
+
+    _configured = True
+
+
+def restart_logging_after_fork():
+    """
+    The writer thread does not survive fork, so a worker starts its own with a fresh file handler.
+    """
+    global _listener
+    if _listener is None:
+        return
+    # The inherited listener's thread is gone, only its file handler needs closing
+    _listener = None
+    for handler in _file_handlers:
+        handler.close()
+    _file_handlers.clear()
+    _start_listener(_file_handler())
@@ -0,0 +1,302 @@
+import os
+import glob
+import json
+import time
+import bisect
+import logging
+import threading
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+DEAD_WORKERS_FILE = "dead_workers.json"
+
+
+class Shard:
+    """
+    Metrics written by one thread. Only its owner writes, so updates take no lock.
+    """
+    def __init__(self, thread=None):
+        self.thread = thread
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+
+class MetricsRegistry:
+    """
+    Per-thread sharded counters, gauges and histograms, merged on scrape and across gunicorn workers.
+    """
+    def __init__(self):
+        self.local = threading.local()
+        self.shards = []
+        self.shards_lock = threading.Lock()
+        self.retired = Shard()
+        self.buckets = {}
+        self.collectors = []
+        self.flusher = None
+
+    def _shard(self):
+        shard = getattr(self.local, "shard", None)
+        if shard is None:
+            shard = Shard(threading.current_thread())
+            self.local.shard = shard
+            with self.shards_lock:
+                self.shards.append(shard)
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def gauge_add(self, name, labels=(), value=1):
+        gauges = self._shard().gauges
+        key = (name, labels)
+        gauges[key] = gauges.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        self.buckets.setdefault(name, buckets)
+        histograms = self._shard().histograms
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+        histogram[bisect.bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+    def register_collector(self, collector):
+        """
+        Add a callable returning [(name, labels, value)] gauge samples read at scrape time.
+        """
+        self.collectors.append(collector)
+
+    def snapshot(self):
+        """
+        Merge every thread's shard into one plain-data snapshot for this process.
+        """
+        with self.shards_lock:
+            self._retire_finished_shards()
+            shards = list(self.shards) + [self.retired]
+
+        counters, gauges, histograms = {}, {}, {}
+        for shard in shards:
+            # dict.copy() runs under the GIL, so a shard can be read while its owner writes
+            for key, value in shard.counters.copy().items():
+                counters[key] = counters.get(key, 0) + value
+            for key, value in shard.gauges.copy().items():
+                gauges[key] = gauges.get(key, 0) + value
+            for key, value in shard.histograms.copy().items():
+                merge_histogram(histograms, key, list(value))
+
+        for collector in self.collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges[(name, labels)] = value
+            except Exception as e:
+                logging.error(f"[Metrics] Collector error: {str(e)}", exc_info=True)
+
+        return {"counters": counters, "gauges": gauges, "histograms": histograms, "buckets": dict(self.buckets)}
+
+    def _retire_finished_shards(self):
+        # Threads that exited never write again, fold them so thread-per-request servers do not grow the list
+        live = []
+        for shard in self.shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+                continue
+            for key, value in shard.counters.items():
+                self.retired.counters[key] = self.retired.counters.get(key, 0) + value
+            for key, value in shard.gauges.items():
+                self.retired.gauges[key] = self.retired.gauges.get(key, 0) + value
+            for key, value in shard.histograms.items():
+                merge_histogram(self.retired.histograms, key, list(value))
+        self.shards = live
+
+    def write_snapshot(self):
+        """
+        Publish this worker's snapshot to METRICS_DIR for the other workers to aggregate.
+        """
+        directory = os.getenv("METRICS_DIR")
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"worker_{os.getpid()}.json")
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump(to_json(self.snapshot()), handle)
+        os.replace(temporary, path)
+
+    def start_flusher(self, interval=None):
+        """
+        Write the snapshot every interval seconds in the background. Started per worker.
+        """
+        if not os.getenv("METRICS_DIR") or (self.flusher and self.flusher.is_alive()):
+            return
+        interval = float(interval or os.getenv("METRICS_FLUSH_INTERVAL", 5))
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot()
+                except Exception as e:
+                    logging.error(f"[Metrics] Snapshot write error: {str(e)}", exc_info=True)
+
+        self.flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+        self.flusher.start()
+
+    def collect(self):
+        """
+        Snapshot of every worker: this process live, the others from METRICS_DIR.
+        """
+        merged = self.snapshot()
+        directory = os.getenv("METRICS_DIR")
+        if not directory:
+            return merged
+
+        own = f"worker_{os.getpid()}.json"
+        for path in glob.glob(os.path.join(directory, "*.json")):
+            if os.path.basename(path) == own:
+                continue
+            try:
+                with open(path) as handle:
+                    merge_snapshot(merged, from_json(json.load(handle)))
+            except (OSError, ValueError) as e:
+                logging.warning("[Metrics] Skipping snapshot %s: %s", path, str(e))
+        return merged
+
+    def reset_after_fork(self):
+        # Counts recorded in the master before fork belong to the master
+        self.local = threading.local()
+        self.shards = []
+        self.shards_lock = threading.Lock()
+        self.retired = Shard()
+        self.flusher = None
+
+
+def merge_histogram(histograms, key, value):
+    existing = histograms.get(key)
+    if existing is None:
+        histograms[key] = value
+    else:
+        for index, count in enumerate(value):
+            existing[index] += count
+
+
+def merge_snapshot(target, source, include_gauges=True):
+    for key, value in source["counters"].items():
+        target["counters"][key] = target["counters"].get(key, 0) + value
+    if include_gauges:
+        for key, value in source["gauges"].items():
+            target["gauges"][key] = target["gauges"].get(key, 0) + value
+    for key, value in source["histograms"].items():
+        merge_histogram(target["histograms"], key, list(value))
+    target["buckets"].update(source["buckets"])
+
+
+def to_json(snapshot):
+    return {
+        "counters": [[name, list(labels), value] for (name, labels), value in snapshot["counters"].items()],
+        "gauges": [[name, list(labels), value] for (name, labels), value in snapshot["gauges"].items()],
+        "histograms": [[name, list(labels), value] for (name, labels), value in snapshot["histograms"].items()],
+        "buckets": {name: list(buckets) for name, buckets in snapshot["buckets"].items()},
+    }
+
+
+def from_json(data):
+    def keyed(rows):
+        return {(name, tuple(tuple(label) for label in labels)): value for name, labels, value in rows}
+    return {
+        "counters": keyed(data["counters"]),
+        "gauges": keyed(data["gauges"]),
+        "histograms": keyed(data["histograms"]),
+        "buckets": {name: tuple(buckets) for name, buckets in data["buckets"].items()},
+    }
+
+
+def mark_worker_dead(pid):
+    """
+    Fold a dead worker's counters and histograms into the tombstone file so totals never go backwards.
+    Called from the gunicorn master, the only writer of the tombstone.
+    """
+    directory = os.getenv("METRICS_DIR")
+    if not directory:
+        return
+    path = os.path.join(directory, f"worker_{pid}.json")
+    dead_path = os.path.join(directory, DEAD_WORKERS_FILE)
+    try:
+        with open(path) as handle:
+            snapshot = from_json(json.load(handle))
+    except (OSError, ValueError):
+        return
+
+    dead = {"counters": {}, "gauges": {}, "histograms": {}, "buckets": {}}
+    if os.path.exists(dead_path):
+        with open(dead_path) as handle:
+            dead = from_json(json.load(handle))
+    merge_snapshot(dead, snapshot, include_gauges=False)
+
+    with open(f"{dead_path}.tmp", "w") as handle:
+        json.dump(to_json(dead), handle)
+    os.replace(f"{dead_path}.tmp", dead_path)
+    os.remove(path)
+
+
+def clear_snapshots():
+    """
+    Remove every snapshot in METRICS_DIR. Called when the gunicorn master starts.
+    """
+    directory = os.getenv("METRICS_DIR")
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, "*.json*")):
+        os.remove(path)
+
+
+def format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus(snapshot):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+    """
+    lines = []
+
+    def by_name(samples):
+        grouped = {}
+        for (name, labels), value in sorted(samples.items(), key=lambda item: (item[0][0], item[0][1])):
+            grouped.setdefault(name, []).append((labels, value))
+        return grouped
+
+    for name, samples in by_name(snapshot["counters"]).items():
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+
+    for name, samples in by_name(snapshot["gauges"]).items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+
+    for name, samples in by_name(snapshot["histograms"]).items():
+        buckets = snapshot["buckets"].get(name, LATENCY_BUCKETS)
+        lines.append(f"# TYPE {name} histogram")
+        for labels, value in samples:
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {cumulative}")
+            count = cumulative + value[len(buckets)]
+            lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {value[-1]}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+# Shared registry for the process
+metrics = MetricsRegistry()
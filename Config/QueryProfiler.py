@@ -0,0 +1,213 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from Config.Metrics import metrics
+
+MODEL_DIRECTORY = f"{os.sep}Model{os.sep}"
+SKIPPED_DIRECTORIES = (f"{os.sep}Config{os.sep}", f"{os.sep}pymysql{os.sep}", f"{os.sep}aiomysql{os.sep}")
+STATEMENT_MAX_LENGTH = 300
+
+# Distinct fingerprints kept as metric labels, later ones are counted under OTHER_FINGERPRINT
+MAX_FINGERPRINTS = int(os.getenv("SQL_PROFILER_MAX_STATEMENTS", 500))
+OTHER_FINGERPRINT = "other"
+
+# Statements remembered for EXPLAIN rate limiting
+EXPLAIN_MAX_ENTRIES = 1000
+
+# Slow queries go to their own logger, one JSON object per line
+slow_query_logger = logging.getLogger("sql.slow")
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[-+]?\d+)?\b", re.IGNORECASE)
+_NULL = re.compile(r"\bNULL\b", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_TUPLE = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_IN_TUPLES = re.compile(rf"\bIN\s*\(\s*{_TUPLE}(?:\s*,\s*{_TUPLE})*\s*\)", re.IGNORECASE)
+_TUPLE_LIST = re.compile(rf"({_TUPLE})(?:\s*,\s*{_TUPLE})+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """
+    Normalize a statement: literals and placeholders become ?, and IN lists (of values or tuples)
+    and multi-row VALUES collapse, so every arity of one statement reads the same.
+    """
+    normalized = _STRING.sub("?", sql)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _NULL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    normalized = _IN_TUPLES.sub("IN (...)", normalized)
+    normalized = _TUPLE_LIST.sub(r"\1, ...", normalized)
+    return normalized[:STATEMENT_MAX_LENGTH]
+
+
+def fingerprint_sql(statement):
+    """
+    Short stable hash of a normalized statement, the metric label in place of its text.
+    """
+    return hashlib.blake2b(statement.encode(), digest_size=8).hexdigest()
+
+
+def find_caller():
+    """
+    Model method that issued the statement, or the first caller outside Config and the MySQL drivers.
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if MODEL_DIRECTORY in filename:
+            return getattr(code, "co_qualname", code.co_name)
+        if fallback is None and not any(directory in filename for directory in SKIPPED_DIRECTORIES):
+            fallback = f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return fallback or "unknown"
+
+
+class QueryProfiler:
+    """
+    Per-statement counters in the metrics registry, sampled slow-query log and rate-limited EXPLAIN capture.
+    Counters are kept for a sample of statements, scaled back up, so the stack walk stays off most calls.
+    """
+    def __init__(self):
+        self.enabled = os.getenv("SQL_PROFILER", "true").lower() in ("1", "true", "yes")
+        self.profile_rate = float(os.getenv("SQL_PROFILER_SAMPLE_RATE", 0.05))
+        self.slow_seconds = float(os.getenv("SLOW_QUERY_MS", 200)) / 1000
+        self.sample_rate = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", 1.0))
+        explain_ms = os.getenv("EXPLAIN_THRESHOLD_MS")
+        self.explain_seconds = float(explain_ms) / 1000 if explain_ms else None
+        self.explain_interval = float(os.getenv("EXPLAIN_INTERVAL", 300))
+        self.explained = OrderedDict()
+        self.statements = {}
+        self.lock = threading.Lock()
+
+    def record(self, cursor, query, args, duration):
+        if not self.enabled:
+            return
+        slow = duration >= self.slow_seconds
+        profiled = self.profile_rate > 0 and random.random() < self.profile_rate
+        if not (profiled or slow):
+            return
+
+        statement = normalize_sql(query)
+        caller = find_caller()
+        # Unbuffered cursors report an unknown count as 2**64 - 1
+        rows = cursor.rowcount if 0 <= (cursor.rowcount or 0) < 1 << 63 else 0
+
+        if profiled:
+            weight = 1 / self.profile_rate
+            labels = (("fingerprint", self.fingerprint(statement)), ("caller", caller))
+            metrics.inc("sql_statement_calls_total", labels, weight)
+            metrics.inc("sql_statement_seconds_total", labels, duration * weight)
+            metrics.inc("sql_statement_rows_total", labels, rows * weight)
+
+        if slow and random.random() < self.sample_rate:
+            self.log_slow_query(cursor, query, args, statement, caller, rows, duration)
+
+    def fingerprint(self, statement):
+        """
+        Label for a statement, remembering its text for /metrics/queries. Past MAX_FINGERPRINTS
+        distinct statements the rest share OTHER_FINGERPRINT, so the series count stays bounded.
+        """
+        fingerprint = fingerprint_sql(statement)
+        if fingerprint in self.statements:
+            return fingerprint
+        with self.lock:
+            if len(self.statements) >= MAX_FINGERPRINTS:
+                return OTHER_FINGERPRINT
+            self.statements[fingerprint] = statement
+        return fingerprint
+
+    def log_slow_query(self, cursor, query, args, statement, caller, rows, duration):
+        # Only the fingerprint is logged, bound values may hold user data
+        from Config.RequestMetrics import current_route
+        entry = {
+            "event": "slow_query",
+            "fingerprint": fingerprint_sql(statement),
+            "statement": statement,
+            "caller": caller,
+            "route": current_route(),
+            "duration_ms": round(duration * 1000, 2),
+            "rows": rows,
+        }
+        if self.should_explain(cursor, statement, duration):
+            entry["explain"] = self.explain(cursor, query, args)
+        slow_query_logger.warning(json.dumps(entry, default=str))
+
+    def should_explain(self, cursor, statement, duration):
+        if self.explain_seconds is None or duration < self.explain_seconds:
+            return False
+        if statement[:6].upper() != "SELECT":
+            return False
+        # explain() is blocking, aiomysql cursors can't run it
+        if not getattr(cursor, "explainable", True):
+            return False
+        # Unbuffered cursors still hold the connection until their rows are read
+        if getattr(cursor, "_result", None) is not None and getattr(cursor._result, "unbuffered_active", False):
+            return False
+        now = time.monotonic()
+        with self.lock:
+            if now - self.explained.get(statement, float("-inf")) < self.explain_interval:
+                return False
+            self.explained[statement] = now
+            self.explained.move_to_end(statement)
+            # Oldest first, so expired and then least recent statements are dropped
+            while len(self.explained) > EXPLAIN_MAX_ENTRIES:
+                self.explained.popitem(last=False)
+        return True
+
+    def explain(self, cursor, query, args):
+        import pymysql
+        try:
+            with cursor.connection.cursor(pymysql.cursors.DictCursor) as explain_cursor:
+                explain_cursor.execute("EXPLAIN " + cursor.mogrify(query, args))
+                return explain_cursor.fetchall()
+        except Exception as e:
+            logging.warning("[QueryProfiler] EXPLAIN failed: %s", str(e))
+            return None
+
+
+def top_statements(snapshot, limit=10, order_by="seconds", statements=None):
+    """
+    Top-N statements from a metrics snapshot, ordered by seconds, calls, rows or mean_ms.
+    Counts are estimates scaled from the profiled sample. The text of a fingerprint comes from
+    statements, this worker's by default, and is None when only another worker ran it.
+    """
+    statements = query_profiler.statements if statements is None else statements
+    entries = {}
+    for (name, labels), value in snapshot["counters"].items():
+        if not name.startswith("sql_statement_"):
+            continue
+        field = name[len("sql_statement_"):-len("_total")]
+        label_map = dict(labels)
+        key = (label_map["fingerprint"], label_map["caller"])
+        entry = entries.setdefault(key, {
+            "fingerprint": key[0], "statement": statements.get(key[0]), "caller": key[1],
+            "calls": 0, "seconds": 0.0, "rows": 0
+        })
+        entry[field] += value
+
+    for entry in entries.values():
+        entry["mean_ms"] = round(entry["seconds"] * 1000 / entry["calls"], 3) if entry["calls"] else 0.0
+        entry["calls"] = round(entry["calls"])
+        entry["rows"] = round(entry["rows"])
+        entry["seconds"] = round(entry["seconds"], 6)
+
+    return sorted(entries.values(), key=lambda entry: (-entry[order_by], entry["fingerprint"]))[:limit]
+
+
+# Shared profiler for the process
+query_profiler = QueryProfiler()
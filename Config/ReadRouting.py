@@ -0,0 +1,251 @@
+import os
+import math
+import time
+import random
+import logging
+import threading
+from collections import namedtuple
+from Config.Redis import RedisClient
+from Config.Metrics import metrics
+
+# A user's reads stay on the primary for at least this long after their last commit
+STALENESS_SECONDS = float(os.getenv("READ_STALENESS_SECONDS", 2))
+
+# Replicas further behind than this take no reads at all
+MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 10))
+
+# How often each worker re-measures a replica's lag
+LAG_INTERVAL = float(os.getenv("REPLICA_LAG_INTERVAL", 5))
+
+# "primary" sends reads inside the window to the primary, "wait" waits on a replica for the write's GTID
+MODE = os.getenv("READ_YOUR_WRITES_MODE", "primary").lower()
+WAIT_TIMEOUT = float(os.getenv("READ_WAIT_TIMEOUT", 0.5))
+
+# Seconds_Behind_Source is truncated to whole seconds
+LAG_MARGIN = 1.0
+
+# A marker must outlive the window in which any eligible replica could still be missing the write
+MARKER_TTL = math.ceil(max(STALENESS_SECONDS, MAX_LAG_SECONDS + LAG_MARGIN + LAG_INTERVAL))
+MARKER_PREFIX = "last_write:"
+
+PRIMARY = None
+
+WAIT_FOR_GTID_SQL = "SELECT WAIT_FOR_EXECUTED_GTID_SET(%s, %s) AS timed_out"
+EXECUTED_GTIDS_SQL = "SELECT @@GLOBAL.gtid_executed AS gtid"
+# MySQL before 8.0.22 only knows the second
+REPLICA_STATUS_SQL = ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS")
+
+Marker = namedtuple("Marker", ["timestamp", "gtid"])
+Route = namedtuple("Route", ["replica", "reason", "gtid"])
+
+
+def parse_replicas(value):
+    """
+    SECRET_READ as "secret-a:3,secret-b:1", one secret per replica with an optional weight.
+    A single name without a weight is the original one-replica setup.
+    """
+    replicas = []
+    for entry in (value or "").split(","):
+        name, _, weight = entry.strip().partition(":")
+        if not name:
+            continue
+        weight = float(weight) if weight else 1.0
+        if weight > 0:
+            replicas.append((name, weight))
+    return replicas
+
+
+def marker_key(user_id):
+    return f"{MARKER_PREFIX}{user_id}"
+
+
+def marker_value(gtid=None):
+    return f"{time.time():.3f}|{gtid or ''}"
+
+
+def parse_marker(value):
+    if not value:
+        return None
+    timestamp, _, gtid = value.partition("|")
+    return Marker(float(timestamp), gtid or None)
+
+
+def record_writes(user_ids, gtid=None):
+    """
+    Stamp each user's last committed write. Reads for them route around replicas that may not have it yet.
+    """
+    value = marker_value(gtid)
+    redis_connection = None
+    try:
+        redis_connection = RedisClient().connect()
+        pipeline = redis_connection.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipeline.set(marker_key(user_id), value, ex=MARKER_TTL)
+        pipeline.execute()
+    except Exception as e:
+        metrics.inc("read_your_writes_marker_errors_total", (("operation", "write"),))
+        logging.error(f"[record_writes] Error: {str(e)}", exc_info=True)
+    finally:
+        if redis_connection:
+            redis_connection.close()
+
+
+def record_commit(connection, user_ids):
+    """
+    Called by the connection after a successful commit that wrote for user_ids.
+    """
+    gtid = None
+    if MODE == "wait":
+        try:
+            gtid = executed_gtids(connection)
+        except Exception as e:
+            # Still stamped, reads inside the window fall back to the primary instead of waiting
+            logging.error(f"[record_commit] Reading gtid_executed failed: {str(e)}")
+    record_writes(user_ids, gtid)
+
+
+def last_write(user_id):
+    """
+    Marker of the user's last write still inside MARKER_TTL, or None. Redis errors propagate.
+    """
+    redis_connection = RedisClient().connect()
+    try:
+        value = redis_connection.get(marker_key(user_id))
+    finally:
+        redis_connection.close()
+    return parse_marker(value)
+
+
+class ReplicaLag:
+    """
+    Last measured lag per replica in this worker. None until measured or when it can't be,
+    infinity when replication is stopped or the replica is unreachable.
+    """
+    def __init__(self, interval=LAG_INTERVAL):
+        self.interval = interval
+        self.samples = {}
+        self.claimed = {}
+        self.lock = threading.Lock()
+
+    def claim_due(self, names):
+        """
+        Replicas whose sample is older than the interval. Each is handed to one caller only.
+        """
+        now = time.monotonic()
+        due = []
+        with self.lock:
+            for name in names:
+                if now - self.claimed.get(name, -math.inf) >= self.interval:
+                    self.claimed[name] = now
+                    due.append(name)
+        return due
+
+    def record(self, name, lag):
+        self.samples[name] = (lag, time.monotonic())
+
+    def lag(self, name):
+        """
+        Upper bound on the replica's current lag: the sample plus its age and the truncation margin.
+        """
+        sample = self.samples.get(name)
+        if sample is None or sample[0] is None:
+            return None
+        lag, sampled_at = sample
+        return lag + LAG_MARGIN + (time.monotonic() - sampled_at)
+
+    def is_healthy(self, name):
+        sample = self.samples.get(name)
+        return sample is None or sample[0] is None or sample[0] <= MAX_LAG_SECONDS
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.claimed.clear()
+
+    def collect(self):
+        return [
+            ("db_replica_lag_seconds", (("replica", name),), lag if lag != math.inf else -1)
+            for name, (lag, _) in list(self.samples.items()) if lag is not None
+        ]
+
+
+replica_lag = ReplicaLag()
+metrics.register_collector(replica_lag.collect)
+
+
+def measure_lag(connection):
+    """
+    Seconds_Behind_Source of the replica behind connection, 0 for a server that isn't replicating
+    and infinity when replication is stopped.
+    """
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(REPLICA_STATUS_SQL[0])
+        except Exception:
+            cursor.execute(REPLICA_STATUS_SQL[1])
+        status = cursor.fetchone()
+    return lag_from_status(status)
+
+
+def lag_from_status(status):
+    if not status:
+        return 0.0
+    lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+    return math.inf if lag is None else float(lag)
+
+
+def wait_for_gtid(connection, gtid, timeout=WAIT_TIMEOUT):
+    """
+    Block until the replica has applied gtid, True when it did within timeout.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(WAIT_FOR_GTID_SQL, (gtid, timeout))
+        row = cursor.fetchone()
+    return row is not None and row["timed_out"] == 0
+
+
+def executed_gtids(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(EXECUTED_GTIDS_SQL)
+        row = cursor.fetchone()
+    return row["gtid"] if row else None
+
+
+def choose(replicas):
+    names, weights = zip(*replicas)
+    return random.choices(names, weights=weights)[0]
+
+
+def route_read(replicas, user_id=None, lag=replica_lag, lookup=None):
+    """
+    Replica for a read, or PRIMARY. A user who wrote recently only reads from a replica whose
+    lag is provably shorter than the time since that write. In wait mode a lagging replica is
+    still chosen and the caller waits for the write's GTID there. lookup replaces last_write for
+    callers that fetched the marker themselves.
+    """
+    healthy = [(name, weight) for name, weight in replicas if lag.is_healthy(name)]
+    if not healthy:
+        return Route(PRIMARY, "no_replica" if not replicas else "lagging", None)
+    if user_id is None:
+        return Route(choose(healthy), "anonymous", None)
+
+    try:
+        marker = (lookup or last_write)(user_id)
+    except Exception as e:
+        # Without the marker a replica can't be proven fresh enough
+        metrics.inc("read_your_writes_marker_errors_total", (("operation", "read"),))
+        logging.error(f"[route_read] Marker lookup failed: {str(e)}")
+        return Route(PRIMARY, "marker_unavailable", None)
+    if marker is None:
+        return Route(choose(healthy), "no_recent_write", None)
+
+    age = time.time() - marker.timestamp
+    if age >= STALENESS_SECONDS:
+        caught_up = [(name, weight) for name, weight in healthy
+                     if lag.lag(name) is not None and lag.lag(name) < age]
+        if caught_up:
+            return Route(choose(caught_up), "caught_up", None)
+
+    if MODE == "wait" and marker.gtid:
+        return Route(choose(healthy), "wait", marker.gtid)
+    return Route(PRIMARY, "recent_write", None)
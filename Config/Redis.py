@@ -1,33 +1,56 @@
 import os
-import redis
-from dotenv import load_dotenv
 
-load_dotenv()  
+# One pool per process, shared by every RedisClient
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        from redis.retry import Retry
+        from redis.backoff import NoBackoff
+        from Config.RedisBreaker import BreakerConnection
+        from Config.RedisPool import CountingConnectionPool
+        _pool = CountingConnectionPool(
+            connection_class=BreakerConnection,
+            host=os.getenv("REDIS_HOST"),
+            port=int(os.getenv("REDIS_PORT")),
+            db=os.getenv("REDIS_DB"),
+            decode_responses=True,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 50)),
+            timeout=float(os.getenv("REDIS_POOL_TIMEOUT", 1)),
+            # A slow Redis fails the command once instead of hanging the request through retries
+            socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5)),
+            socket_timeout=float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5)),
+            retry=Retry(NoBackoff(), 0)
+        )
+    return _pool
+
+
+def reset_pool_after_fork():
+    """
+    Drop the pool inherited from the master so the worker opens its own sockets.
+    """
+    global _pool
+    _pool = None
+
 
 class RedisClient:
     """
     Redis configuration connection and close.
     """
     def __init__(self):
-        self.host = os.getenv("REDIS_HOST") 
-        self.port = int(os.getenv("REDIS_PORT")) 
-        self.db = os.getenv("REDIS_DB")     
         self.redis_client = None
 
     def connect(self):
-        # Establish connection
+        # Establish connection from the shared pool
         if not self.redis_client:
-            self.redis_client = redis.StrictRedis(
-                host=self.host,
-                port=self.port,
-                db=self.db,
-                decode_responses=True
-            )
+            import redis
+            self.redis_client = redis.StrictRedis(connection_pool=get_pool())
         return self.redis_client
 
     def close(self):
-        # Close connection
+        # Return connections to the shared pool
         if self.redis_client:
             self.redis_client.close()
-            print("Redis connection closed.")
             self.redis_client = None
@@ -0,0 +1,72 @@
+import redis
+import redis.asyncio
+from Config.Resilience import get_breaker
+
+redis_breaker = get_breaker("redis")
+
+
+class BreakerConnection(redis.Connection):
+    """
+    Pool connection reporting to the Redis circuit breaker. While it is open commands fail
+    immediately with CircuitOpenError instead of waiting out the socket timeouts.
+    """
+    def connect(self):
+        redis_breaker.check()
+        try:
+            return super().connect()
+        except (redis.ConnectionError, redis.TimeoutError):
+            redis_breaker.record_failure()
+            raise
+
+    def send_packed_command(self, command, check_health=True):
+        redis_breaker.check()
+        connected = self._sock is not None
+        try:
+            return super().send_packed_command(command, check_health)
+        except (redis.ConnectionError, redis.TimeoutError):
+            # A failed connect was already counted by connect()
+            if connected:
+                redis_breaker.record_failure()
+            raise
+
+    def read_response(self, *args, **kwargs):
+        try:
+            response = super().read_response(*args, **kwargs)
+        except (redis.ConnectionError, redis.TimeoutError):
+            redis_breaker.record_failure()
+            raise
+        redis_breaker.record_success()
+        return response
+
+
+class AsyncBreakerConnection(redis.asyncio.Connection):
+    """
+    BreakerConnection for redis.asyncio, sharing the same Redis circuit breaker.
+    """
+    async def connect(self):
+        redis_breaker.check()
+        try:
+            return await super().connect()
+        except (redis.ConnectionError, redis.TimeoutError):
+            redis_breaker.record_failure()
+            raise
+
+    async def send_packed_command(self, command, check_health=True):
+        redis_breaker.check()
+        connected = self.is_connected
+        try:
+            return await super().send_packed_command(command, check_health)
+        except (redis.ConnectionError, redis.TimeoutError):
+            # A failed connect was already counted by connect()
+            if connected:
+                redis_breaker.record_failure()
+            raise
+
+    async def read_response(self, *args, **kwargs):
+        try:
+            response = await super().read_response(*args, **kwargs)
+        except (redis.ConnectionError, redis.TimeoutError):
+            redis_breaker.record_failure()
+            raise
+        redis_breaker.record_success()
+        return response
@@ -0,0 +1,38 @@
+import threading
+import redis
+
+
+class CountingConnectionPool(redis.BlockingConnectionPool):
+    """
+    BlockingConnectionPool that counts the connections it created and has checked out, for the
+    redis_pool_connections gauge. Counts come from its own get_connection, release and make_connection.
+    """
+    def __init__(self, *args, **kwargs):
+        self.counts_lock = threading.Lock()
+        self.created = 0
+        self.in_use = 0
+        super().__init__(*args, **kwargs)
+
+    def make_connection(self):
+        connection = super().make_connection()
+        with self.counts_lock:
+            self.created += 1
+        return connection
+
+    def get_connection(self, *args, **kwargs):
+        connection = super().get_connection(*args, **kwargs)
+        with self.counts_lock:
+            self.in_use += 1
+        return connection
+
+    def release(self, connection):
+        with self.counts_lock:
+            self.in_use = max(self.in_use - 1, 0)
+        super().release(connection)
+
+    def reset(self):
+        # Also runs in a forked child, which starts with none of the parent's connections
+        super().reset()
+        with self.counts_lock:
+            self.created = 0
+            self.in_use = 0
@@ -0,0 +1,137 @@
+import time
+from contextvars import ContextVar
+from flask import g, request, has_request_context
+from Config.Metrics import metrics, COUNT_BUCKETS
+from Config import Redis
+
+BACKGROUND_ROUTE = "background"
+UNMATCHED_ROUTE = "unmatched"
+
+# Route and SQL totals of the request running in this task on the ASGI app, flask's g only exists on the threaded one
+_async_request = ContextVar("async_request", default=None)
+
+
+def current_route():
+    """
+    Route template of the current request, so /recipes/<id> style paths stay one series.
+    """
+    if not has_request_context():
+        state = _async_request.get()
+        return BACKGROUND_ROUTE if state is None else state["route"]
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+def record_query(duration):
+    """
+    Count one SQL statement against the current route. Called by the instrumented cursor.
+    """
+    route = current_route()
+    labels = (("route", route),)
+    metrics.inc("db_queries_total", labels)
+    metrics.observe("db_query_duration_seconds", labels, duration)
+    state = _async_request.get()
+    if state is not None:
+        state["db_queries"] += 1
+        state["db_seconds"] += duration
+    elif route != BACKGROUND_ROUTE:
+        g.db_queries = g.get("db_queries", 0) + 1
+        g.db_seconds = g.get("db_seconds", 0.0) + duration
+
+
+def record_token_cache(tier, result):
+    metrics.inc("token_cache_lookups_total", (("tier", tier), ("result", result)))
+
+
+def redis_pool_samples():
+    """
+    Connections created and checked out of this worker's Redis pool, counted by CountingConnectionPool.
+    """
+    pool = Redis._pool
+    if pool is None or not hasattr(pool, "in_use"):
+        return []
+    return [
+        ("redis_pool_connections", (("state", "created"),), pool.created),
+        ("redis_pool_connections", (("state", "in_use"),), pool.in_use),
+        ("redis_pool_max_connections", (), pool.max_connections),
+    ]
+
+
+metrics.register_collector(redis_pool_samples)
+
+
+def install_request_metrics(app):
+    """
+    Time every request and count its SQL, labelled by route template, method and status.
+    """
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+        g.metrics_route = current_route()
+        metrics.gauge_add("http_requests_in_flight", (("route", g.metrics_route),), 1)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+        route = g.metrics_route
+        elapsed = time.perf_counter() - started
+        metrics.observe(
+            "http_request_duration_seconds",
+            (("route", route), ("method", request.method), ("status", str(response.status_code))),
+            elapsed
+        )
+        metrics.observe("http_request_db_queries", (("route", route),), g.db_queries, COUNT_BUCKETS)
+        metrics.observe("http_request_db_seconds", (("route", route),), g.db_seconds)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        # Teardown runs even when the view raised, so the in-flight gauge never leaks
+        route = g.pop("metrics_route", None)
+        if route is not None:
+            metrics.gauge_add("http_requests_in_flight", (("route", route),), -1)
+
+
+def install_async_request_metrics(app):
+    """
+    install_request_metrics for the Quart app, recording the same series.
+    """
+    from quart import request as async_request
+
+    @app.before_request
+    async def start_request_metrics():
+        rule = async_request.url_rule
+        state = {
+            "started": time.perf_counter(), "db_queries": 0, "db_seconds": 0.0,
+            "route": rule.rule if rule is not None else UNMATCHED_ROUTE
+        }
+        _async_request.set(state)
+        metrics.gauge_add("http_requests_in_flight", (("route", state["route"]),), 1)
+
+    @app.after_request
+    async def record_request_metrics(response):
+        state = _async_request.get()
+        if state is None:
+            return response
+        route = state["route"]
+        elapsed = time.perf_counter() - state["started"]
+        metrics.observe(
+            "http_request_duration_seconds",
+            (("route", route), ("method", async_request.method), ("status", str(response.status_code))),
+            elapsed
+        )
+        metrics.observe("http_request_db_queries", (("route", route),), state["db_queries"], COUNT_BUCKETS)
+        metrics.observe("http_request_db_seconds", (("route", route),), state["db_seconds"])
+        return response
+
+    @app.teardown_request
+    async def finish_request_metrics(error=None):
+        # Teardown runs even when the view raised, so the in-flight gauge never leaks
+        state = _async_request.get()
+        if state is not None and not state.get("finished"):
+            state["finished"] = True
+            metrics.gauge_add("http_requests_in_flight", (("route", state["route"]),), -1)
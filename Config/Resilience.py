@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import logging
+import threading
+from contextvars import ContextVar
+from flask import g, has_request_context
+from Config.Metrics import metrics
+
+# Consecutive failures that open a breaker, and how long it stays open before one trial call
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 10))
+
+# Wall-clock budget of one request, statements get whatever is left of it
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 5))
+
+# Upper bound of any single SELECT, sent to MySQL as a MAX_EXECUTION_TIME hint
+MAX_EXECUTION_MS = int(os.getenv("DB_MAX_EXECUTION_MS", 5000))
+
+# MySQL error codes meaning the server is unreachable or gone: too many connections, shutdown in progress,
+# can't connect locally or to the host, unknown host, server gone away, connection lost (the socket read
+# timeout surfaces as this one). Deadlocks, lock waits, MAX_EXECUTION_TIME aborts and access denied are
+# query or configuration problems and leave the breaker alone.
+MYSQL_UNAVAILABLE_CODES = frozenset({1040, 1053, 2002, 2003, 2005, 2006, 2013, 2055})
+
+
+class DependencyUnavailable(Exception):
+    """
+    MySQL or Redis could not answer in time. Callers serve stale data or fail fast.
+    """
+
+
+class CircuitOpenError(DependencyUnavailable):
+    pass
+
+
+class DeadlineExceeded(DependencyUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. Open rejects calls without touching the dependency, after
+    reset_seconds a single trial call is let through and its outcome closes or reopens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_seconds=RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allows(self):
+        """
+        Whether check() would currently let a call through, without claiming the trial.
+        """
+        return self.state == self.CLOSED or time.monotonic() - self.opened_at >= self.reset_seconds
+
+    def check(self):
+        if self.state == self.CLOSED:
+            return
+        with self.lock:
+            now = time.monotonic()
+            # Also re-arms a half-open breaker whose trial never reported back
+            if self.state != self.CLOSED and now - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self.opened_at = now
+                return
+            if self.state == self.CLOSED:
+                return
+        metrics.inc("circuit_breaker_rejections_total", (("dependency", self.name),))
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self):
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self.lock:
+            if self.state != self.CLOSED:
+                logging.warning("[CircuitBreaker] %s closed", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning("[CircuitBreaker] %s opened after %s failures", self.name, self.failures)
+                    metrics.inc("circuit_breaker_opened_total", (("dependency", self.name),))
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def breaker_samples():
+    return [
+        ("circuit_breaker_open", (("dependency", name),), 0 if breaker.state == CircuitBreaker.CLOSED else 1)
+        for name, breaker in list(_breakers.items())
+    ]
+
+
+metrics.register_collector(breaker_samples)
+
+
+def is_dependency_failure(error):
+    """
+    Errors meaning the dependency is down or too slow, as opposed to a bad query or bad input.
+    """
+    if isinstance(error, (DependencyUnavailable, TimeoutError, ConnectionError)):
+        return True
+    pymysql = sys.modules.get("pymysql")
+    if pymysql is not None and isinstance(error, pymysql.err.InterfaceError):
+        return True
+    if pymysql is not None and isinstance(error, pymysql.err.OperationalError):
+        return bool(error.args) and error.args[0] in MYSQL_UNAVAILABLE_CODES
+    redis = sys.modules.get("redis")
+    return redis is not None and isinstance(error, (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError))
+
+
+# Deadline of the request running in this task on the ASGI app, flask's g only exists on the threaded one
+_async_deadline = ContextVar("async_deadline", default=None)
+
+
+def remaining_seconds():
+    """
+    Time left before the current request's deadline, None outside a request.
+    """
+    deadline = g.get("deadline") if has_request_context() else _async_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def statement_budget_ms():
+    """
+    MAX_EXECUTION_TIME for the next SELECT: the configured cap, shortened to the request's remaining time.
+    """
+    remaining = remaining_seconds()
+    if remaining is None:
+        return MAX_EXECUTION_MS
+    if remaining <= 0:
+        metrics.inc("request_deadline_exceeded_total")
+        raise DeadlineExceeded("Request deadline exceeded")
+    return max(1, min(MAX_EXECUTION_MS, int(remaining * 1000)))
+
+
+def install_deadlines(app):
+    @app.before_request
+    def start_deadline():
+        g.deadline = time.monotonic() + REQUEST_DEADLINE_SECONDS
+
+
+def install_async_deadlines(app):
+    """
+    install_deadlines for the Quart app.
+    """
+    @app.before_request
+    async def start_deadline():
+        _async_deadline.set(time.monotonic() + REQUEST_DEADLINE_SECONDS)
@@ -1,16 +1,69 @@
-import boto3
+import os
 import json
+import time
+import threading
+
+# Secrets and clients are created on first use and cached for the process
+_clients = {}
+_secrets = {}
+_lock = threading.Lock()
+
+# A secret is re-fetched after an authentication failure at most this often, so a wrong password can't flood Secrets Manager
+MIN_REFRESH_SECONDS = float(os.getenv("SECRET_MIN_REFRESH_SECONDS", 30))
+
+# MySQL ER_ACCESS_DENIED_ERROR, raised by pymysql and aiomysql alike
+ACCESS_DENIED = 1045
+
+
+def _get_client(region_name):
+    if region_name not in _clients:
+        with _lock:
+            if region_name not in _clients:
+                import boto3
+                _clients[region_name] = boto3.client("secretsmanager", region_name=region_name)
+    return _clients[region_name]
+
 
 def get_secret(secret_name, region_name):
-    # Get Secret from AWS Secret Manager
-    client = boto3.client("secretsmanager", region_name=region_name)
+    # Get Secret from AWS Secret Manager, cached for SECRET_CACHE_TTL seconds
+    cached = _secrets.get((secret_name, region_name))
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    client = _get_client(region_name)
     try:
         response = client.get_secret_value(SecretId=secret_name)
         if 'SecretString' in response:
-            return json.loads(response['SecretString'])
+            secret = json.loads(response['SecretString'])
+            ttl = float(os.getenv("SECRET_CACHE_TTL", 3600))
+            _secrets[(secret_name, region_name)] = (time.monotonic() + ttl, secret, time.monotonic())
+            return secret
         else:
             raise Exception("SecretBinary is not supported")
     except Exception as e:
         print(f"Error retrieving secret {secret_name}: {e}")
         raise e
 
+
+def invalidate_secret(secret_name, region_name):
+    """
+    Drop a cached secret after the service rejected it, so the next get_secret fetches the rotated value.
+    Returns whether it was dropped, False when it was fetched less than MIN_REFRESH_SECONDS ago.
+    """
+    cached = _secrets.get((secret_name, region_name))
+    if cached and time.monotonic() - cached[2] < MIN_REFRESH_SECONDS:
+        return False
+    _secrets.pop((secret_name, region_name), None)
+    print(f"Secret {secret_name} invalidated after an authentication failure.")
+    return True
+
+
+def is_access_denied(error):
+    return bool(error.args) and error.args[0] == ACCESS_DENIED
+
+
+def reset_clients_after_fork():
+    """
+    Drop boto3 clients inherited from the master, keeping the cached secret values.
+    """
+    _clients.clear()
@@ -0,0 +1,38 @@
+import os
+import time
+import logging
+from Config.Db import Database
+from Config.Fb import ensure_firebase
+from Config.Redis import RedisClient
+from Cache.IngredientSearchIndex import ingredient_search_index
+
+
+def is_warm_up_enabled():
+    return os.getenv("APP_WARM_UP", "false").lower() in ("1", "true", "yes")
+
+
+def warm_up():
+    """
+    Initialize the lazy clients ahead of the first request: secrets, Firebase, Redis and MySQL,
+    then start building the ingredient search index in the background. Failures are logged and left for
+    the first request to retry.
+    """
+    timings = {}
+    steps = (
+        ("firebase", ensure_firebase),
+        ("redis", lambda: RedisClient().connect().ping()),
+        ("mysql_read", lambda: Database().connect_read().close()),
+        ("mysql_write", lambda: Database().connect_write().close()),
+        ("search_index", ingredient_search_index.ensure_fresh),
+    )
+
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logging.error(f"[warm_up] {name} failed: {str(e)}", exc_info=True)
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    logging.info("[warm_up] Completed in ms: %s", timings)
+    return timings
@@ -0,0 +1,701 @@
+import os
+import json
+import asyncio
+import logging
+from quart import Blueprint, Response, jsonify, request
+from Config.Metrics import metrics, render_prometheus
+from Config.QueryProfiler import top_statements
+from Config.Resilience import is_dependency_failure
+from Controller.MetricsController import is_authorized_token
+from Controller.RecipeController import RECIPES_BATCH_LIMIT, COOKABLE_LIMIT
+from Cache.AsyncFbCache import get_cached_uid_redis_async
+from Cache.StaleCache import stale_cache, stale_response
+from Cache.CatalogSnapshot import catalog_snapshots
+from Cache.IngredientSearchIndex import ingredient_search_index
+from Cache.UserIngredientsWriteBuffer import user_ingredients_write_buffer, is_write_buffer_enabled, ACK_BUFFERED, ACK_DURABLE
+from Cache.RecipeCatalogCache import RECIPE_KEY_PREFIX, encode_recipe, recipe_catalog_cache
+from Cache.RecipeIngredientIndex import recipe_ingredient_index
+from Model.UserIngredientsModel import to_bulk_changes
+from Model.AsyncModels import AsyncUserIngredientsModel, AsyncRecipesModel, AsyncReportsModel, AsyncInternalIngredientsModel
+
+# Routes answer like their Controller/ counterparts, status codes and bodies included.
+# Stale cache, write buffer, typo index and catalog snapshot are shared with the threaded app;
+# their blocking calls run off the event loop.
+
+
+class AsyncController:
+    """
+    Shared async controller plumbing: pools, authentication, stale responses and logging.
+    """
+    # Body of the 401 for a token without a user, worded like the sync controller's
+    unknown_user_error = "User ID not found from token"
+
+    def __init__(self, name, db, redis_client):
+        self.blueprint = Blueprint(name, __name__)
+        self.db = db
+        self.redis_client = redis_client
+        self.logger = logging.getLogger(__name__)
+
+    async def authenticate(self, route):
+        """
+        Resolve the request's user ID, or return the error response.
+        """
+        id_token = request.headers.get('Authorization')
+        if not id_token:
+            self.logger.warning("[%s] Missing Authorization token", route)
+            return None, (jsonify({"error": "Authorization token is missing"}), 401)
+
+        user_id = await get_cached_uid_redis_async(id_token, self.redis_client.connect(), self.db)
+        if not user_id:
+            self.logger.warning("[%s] Invalid or expired token", route)
+            return None, (jsonify({"error": self.unknown_user_error}), 401)
+
+        return user_id, None
+
+    async def stale(self, stale_key, route):
+        """
+        The last good body stored under stale_key as a stale response, None without one.
+        """
+        body = await asyncio.to_thread(stale_cache.recall, stale_key)
+        return None if body is None else stale_response(body, route, Response)
+
+
+class AsyncUserIngredientsController(AsyncController):
+    """
+    Async controller with routes, function calling, error handling, and logging.
+    """
+    def __init__(self, db, redis_client):
+        super().__init__('async_ingredients_blueprint', db, redis_client)
+
+        # Routes
+        self.blueprint.add_url_rule('/all', view_func=self.get_all_user_ingredients, methods=['GET'])
+        self.blueprint.add_url_rule('/update', view_func=self.update_user_ingredients_batch, methods=['POST'])
+        self.blueprint.add_url_rule('/get_expiring', view_func=self.get_expiring_user_ingredients, methods=['GET'])
+        self.blueprint.add_url_rule('/delete', view_func=self.delete_user_ingredients_batch, methods=['DELETE'])
+        self.blueprint.add_url_rule('/bulk', view_func=self.bulk_user_ingredients, methods=['POST'])
+
+    async def get_all_user_ingredients(self):
+        """
+        Fetch all ingredients for a specific user.
+        """
+        stale_key = None
+        try:
+            user_id, error = await self.authenticate("/all")
+            if error:
+                return error
+
+            stale_key = f"pantry:{user_id}"
+            async with self.db.connect_read(user_id) as connection:
+                ingredients = await AsyncUserIngredientsModel(connection).get_all_user_ingredients(user_id)
+
+            if isinstance(ingredients, dict) and "error" in ingredients:
+                stale = await self.stale(stale_key, "/user_ingredients/all")
+                if stale is not None:
+                    self.logger.warning("[/all/%s] Serving stale pantry: %s", user_id, ingredients.get("details"))
+                    return stale
+            if not ingredients:
+                self.logger.info("[/all/%s] No ingredients found", user_id)
+                return jsonify({"message": "No ingredients found"}), 404
+
+            self.logger.info("[/all/%s] Retrieved %s ingredients", user_id, len(ingredients))
+            if isinstance(ingredients, list):
+                await asyncio.to_thread(stale_cache.remember, stale_key, ingredients)
+            return jsonify(ingredients), 200
+
+        except Exception as e:
+            # A pantry snapshot from before the outage beats an error
+            stale = await self.stale(stale_key, "/user_ingredients/all") if stale_key and is_dependency_failure(e) else None
+            if stale is not None:
+                self.logger.warning("[/all] Serving stale pantry: %s", e)
+                return stale
+            self.logger.error(f"[/all] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+    async def update_user_ingredients_batch(self):
+        """
+        Batch update ingredients for the user.
+        """
+        try:
+            data = await request.get_json()
+            ingredients = data.get("ingredients")
+            if not ingredients:
+                self.logger.warning("[/update] Missing ingredients payload")
+                return jsonify({"error": "Missing ingredients"}), 400
+
+            user_id, error = await self.authenticate("/update")
+            if error:
+                return error
+
+            # Opt-in write coalescing, durable acks wait for the flush to commit
+            if is_write_buffer_enabled():
+                ack = request.headers.get('X-Write-Ack', os.getenv("USER_INGREDIENTS_WRITE_ACK", ACK_DURABLE)).lower()
+                if ack not in (ACK_BUFFERED, ACK_DURABLE):
+                    return jsonify({"error": f"Invalid X-Write-Ack '{ack}'"}), 400
+
+                response = await asyncio.to_thread(user_ingredients_write_buffer.submit, user_id, ingredients, ack=ack)
+                if "lost" in response:
+                    return jsonify(response), 500
+                if "error" in response:
+                    return jsonify(response), 400
+                # Accepted but not committed yet, retrying would apply the deltas twice
+                return jsonify(response), 202 if ack == ACK_BUFFERED or response.get("pending") else 200
+
+            async with self.db.connect_write(user_id) as connection:
+                response = await AsyncUserIngredientsModel(connection).update_user_ingredients_batch(user_id, ingredients)
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/update] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+    async def get_expiring_user_ingredients(self):
+        """
+        Fetch all expiring ingredients for a specific user within 24 hours.
+        """
+        try:
+            user_id, error = await self.authenticate("/get_expiring")
+            if error:
+                return error
+
+            async with self.db.connect_read(user_id) as connection:
+                ingredients = await AsyncUserIngredientsModel(connection).get_ingredients_expiring(user_id)
+
+            if not ingredients:
+                self.logger.info("[/get_expiring/%s] No ingredients found", user_id)
+                return jsonify({"message": "No ingredients found"}), 404
+
+            return jsonify(ingredients), 200
+
+        except Exception as e:
+            self.logger.error(f"[/get_expiring] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+    async def delete_user_ingredients_batch(self):
+        """
+        Batch delete ingredients for the user.
+        """
+        try:
+            data = await request.get_json()
+            edamam_food_id = data.get("edamam_food_id")
+            if not edamam_food_id:
+                self.logger.warning("[/delete] Missing edamam_food_id payload")
+                return jsonify({"error": "Missing edamam_food_id"}), 400
+
+            user_id, error = await self.authenticate("/delete")
+            if error:
+                return error
+
+            async with self.db.connect_write(user_id) as connection:
+                response = await AsyncUserIngredientsModel(connection).delete_user_ingredients_batch(user_id, edamam_food_id)
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/delete] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+    async def bulk_user_ingredients(self):
+        """
+        Apply mixed add/set/remove operations for the user in one transaction.
+        """
+        try:
+            data = await request.get_json()
+            operations = data.get("operations")
+            if not operations or not isinstance(operations, list):
+                self.logger.warning("[/bulk] Missing operations payload")
+                return jsonify({"error": "Missing operations"}), 400
+
+            user_id, error = await self.authenticate("/bulk")
+            if error:
+                return error
+
+            # Bad input is rejected before any connection is taken
+            try:
+                to_bulk_changes(user_id, operations)
+            except ValueError as e:
+                self.logger.warning("[/bulk] Invalid operations: %s", e)
+                return jsonify({"error": str(e)}), 400
+
+            async with self.db.connect_write(user_id) as connection:
+                response = await AsyncUserIngredientsModel(connection).apply_bulk_operations(user_id, operations)
+            if "error" in response:
+                return jsonify(response), 500
+
+            self.logger.info("[/bulk/%s] Applied %s operations", user_id, len(operations))
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/bulk] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+
+class AsyncRecipeController(AsyncController):
+    """
+    Async controller with routes, function calling, error handling, and logging.
+    """
+    unknown_user_error = "User ID not found from Token"
+
+    def __init__(self, db, redis_client):
+        super().__init__('async_recipe_blueprint', db, redis_client)
+
+        # Routes
+        self.blueprint.add_url_rule('/all', view_func=self.get_all_recipes, methods=['GET'])
+        self.blueprint.add_url_rule('/add', view_func=self.add_saved_recipes, methods=['POST'])
+        self.blueprint.add_url_rule('/remove', view_func=self.removed_saved_recipes, methods=['POST'])
+        self.blueprint.add_url_rule('/add_batch', view_func=self.add_saved_recipes_batch, methods=['POST'])
+        self.blueprint.add_url_rule('/remove_batch', view_func=self.remove_saved_recipes_batch, methods=['POST'])
+        self.blueprint.add_url_rule('/cookable', view_func=self.get_cookable_recipes, methods=['GET'])
+
+    async def catalog_recipes(self, recipe_model, uris):
+        """
+        Shared metadata of the uris by uri, read through the Redis recipe cache.
+        Like RecipeCatalogCache, a Redis error is logged and treated as a cache miss.
+        """
+        redis_connection = self.redis_client.connect()
+        try:
+            cached = await redis_connection.mget([RECIPE_KEY_PREFIX + uri for uri in uris])
+            found = {uri: json.loads(value) for uri, value in zip(uris, cached) if value}
+        except Exception as e:
+            self.logger.error(f"[RecipeCatalogCache] Redis read error: {str(e)}", exc_info=True)
+            found = {}
+
+        missing = [uri for uri in uris if uri not in found]
+        if missing:
+            loaded = {row['uri']: row for row in await recipe_model.get_catalog_recipes(missing)}
+            found.update(loaded)
+            if loaded:
+                try:
+                    async with redis_connection.pipeline(transaction=False) as pipeline:
+                        for uri, recipe in loaded.items():
+                            pipeline.setex(RECIPE_KEY_PREFIX + uri, recipe_catalog_cache.redis_ttl, encode_recipe(recipe))
+                        await pipeline.execute()
+                except Exception as e:
+                    self.logger.error(f"[RecipeCatalogCache] Redis write error: {str(e)}", exc_info=True)
+        return found
+
+    async def publish_ingredients(self, ingredients):
+        """
+        Index stored recipe ingredients in this worker and log them for the others, like RecipeIngredientIndex.publish.
+        """
+        if not ingredients:
+            return
+        for uri, food_ids in ingredients.items():
+            recipe_ingredient_index.add_local(uri, food_ids)
+        try:
+            async with self.redis_client.connect().pipeline(transaction=True) as pipeline:
+                for uri, food_ids in ingredients.items():
+                    recipe_ingredient_index.queue_log_entry(pipeline, uri, food_ids)
+                await pipeline.execute()
+        except Exception as e:
+            self.logger.error(f"[RecipeIngredientIndex] Error publishing recipes {list(ingredients)}: {str(e)}", exc_info=True)
+
+    async def get_all_recipes(self):
+        """
+        Fetch all recipes for a specific user, resolving metadata through the Redis recipe cache.
+        """
+        try:
+            user_id, error = await self.authenticate("/all")
+            if error:
+                return error
+
+            async with self.db.connect_read(user_id) as connection:
+                recipe_model = AsyncRecipesModel(connection)
+                uris = await recipe_model.get_user_recipe_uris(user_id)
+                if not uris:
+                    self.logger.info("[/all/%s] No recipes found", user_id)
+                    return jsonify({"message": "No recipes found"}), 404
+
+                found = await self.catalog_recipes(recipe_model, uris)
+
+            recipes = [found[uri] for uri in uris if uri in found]
+            self.logger.info("[/all/%s] Retrieved %s recipes", user_id, len(recipes))
+            return jsonify(recipes), 200
+
+        except Exception as e:
+            self.logger.error(f"[/all] Error occurred: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while fetching recipes", "details": str(e)}), 500
+
+    async def add_saved_recipes(self):
+        """
+        Add recipes.
+        """
+        try:
+            data = await request.get_json()
+            recipe = data.get("recipe")
+            if not recipe:
+                self.logger.warning("[/add] Missing Recipe parameters")
+                return jsonify({"error": "Missing Recipe"}), 400
+
+            user_id, error = await self.authenticate("/add")
+            if error:
+                return error
+
+            async with self.db.connect_write(user_id) as connection:
+                response, food_ids = await AsyncRecipesModel(connection).add_recipe(user_id, recipe)
+
+            # Ingredients are only published when the save stored them
+            if "error" not in response and food_ids:
+                await self.publish_ingredients({recipe['uri']: food_ids})
+
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/add] Error adding recipe: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while adding recipe", "details": str(e)}), 500
+
+    async def removed_saved_recipes(self):
+        """
+        Remove recipe.
+        """
+        try:
+            data = await request.get_json()
+            recipe = data.get("recipe")
+            if not recipe:
+                self.logger.warning("[/remove] Missing Recipe data")
+                return jsonify({"error": "Missing Recipe"}), 400
+
+            user_id, error = await self.authenticate("/remove")
+            if error:
+                return error
+
+            async with self.db.connect_write(user_id) as connection:
+                response = await AsyncRecipesModel(connection).delete_recipe(user_id, recipe)
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/remove] Error removing recipe: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while removing recipe", "details": str(e)}), 500
+
+    async def add_saved_recipes_batch(self):
+        """
+        Add many recipes, reporting a result per recipe.
+        """
+        try:
+            user_id, recipes, error = await self.read_batch("/add_batch")
+            if error:
+                return error
+
+            async with self.db.connect_write(user_id) as connection:
+                response, ingredients = await AsyncRecipesModel(connection).add_recipes_batch(user_id, recipes)
+            if "error" in response:
+                return jsonify(response), 500
+            await self.publish_ingredients(ingredients)
+
+            self.logger.info("[/add_batch/%s] %s", user_id, response['message'])
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/add_batch] Error processing recipes batch: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while processing recipes", "details": str(e)}), 500
+
+    async def remove_saved_recipes_batch(self):
+        """
+        Remove many recipes, reporting a result per recipe.
+        """
+        try:
+            user_id, recipes, error = await self.read_batch("/remove_batch")
+            if error:
+                return error
+
+            async with self.db.connect_write(user_id) as connection:
+                response = await AsyncRecipesModel(connection).delete_recipes_batch(user_id, recipes)
+            if "error" in response:
+                return jsonify(response), 500
+
+            self.logger.info("[/remove_batch/%s] %s", user_id, response['message'])
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/remove_batch] Error processing recipes batch: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while processing recipes", "details": str(e)}), 500
+
+    async def read_batch(self, route):
+        """
+        The user ID and recipes of a batch request, or the error response.
+        """
+        data = await request.get_json()
+        recipes = data.get("recipes")
+        if not recipes or not isinstance(recipes, list):
+            self.logger.warning("[%s] Missing Recipes", route)
+            return None, None, (jsonify({"error": "Missing Recipes"}), 400)
+
+        if len(recipes) > RECIPES_BATCH_LIMIT:
+            self.logger.warning("[%s] Batch of %s recipes over limit", route, len(recipes))
+            return None, None, (jsonify({"error": f"At most {RECIPES_BATCH_LIMIT} recipes per batch"}), 400)
+
+        user_id, error = await self.authenticate(route)
+        return user_id, recipes, error
+
+    async def get_cookable_recipes(self):
+        """
+        Rank the user's saved recipes by how much of each is covered by their pantry.
+        """
+        try:
+            limit = int(request.args.get("limit", 20))
+            min_coverage = float(request.args.get("min_coverage", 0))
+        except ValueError:
+            return jsonify({"error": "'limit' and 'min_coverage' must be numbers"}), 400
+        if not 1 <= limit <= COOKABLE_LIMIT or not 0 <= min_coverage <= 1:
+            self.logger.warning("[/cookable] Out of range limit %s or min_coverage %s", limit, min_coverage)
+            return jsonify({"error": f"'limit' must be 1 to {COOKABLE_LIMIT} and 'min_coverage' 0 to 1"}), 400
+
+        try:
+            user_id, error = await self.authenticate("/cookable")
+            if error:
+                return error
+
+            async with self.db.connect_read(user_id) as connection:
+                recipe_model = AsyncRecipesModel(connection)
+                await self.ensure_index_fresh(recipe_model)
+                saved_uris = await recipe_model.get_user_recipe_uris(user_id)
+                pantry_food_ids = await AsyncUserIngredientsModel(connection).get_user_food_ids(user_id)
+
+                ranked = recipe_ingredient_index.rank(pantry_food_ids, saved_uris, limit, min_coverage)
+                if not ranked:
+                    self.logger.info("[/cookable/%s] No cookable recipes found", user_id)
+                    return jsonify({"message": "No cookable recipes found"}), 404
+
+                recipes = await self.catalog_recipes(recipe_model, [item['uri'] for item in ranked])
+
+            cookable = [dict(recipes[item['uri']], **item) for item in ranked if item['uri'] in recipes]
+            self.logger.info("[/cookable/%s] Ranked %s recipes", user_id, len(cookable))
+            return jsonify(cookable), 200
+
+        except Exception as e:
+            self.logger.error(f"[/cookable] Error occurred: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while ranking recipes", "details": str(e)}), 500
+
+    async def ensure_index_fresh(self, recipe_model):
+        """
+        RecipeIngredientIndex.ensure_fresh off the event loop. Its loader blocks under the index lock,
+        so a rebuild's query is handed back to the loop and run on recipe_model's connection.
+        """
+        loop = asyncio.get_running_loop()
+
+        def loader():
+            return asyncio.run_coroutine_threadsafe(recipe_model.get_all_recipe_ingredients(), loop).result()
+
+        await asyncio.to_thread(recipe_ingredient_index.ensure_fresh, loader)
+
+
+class AsyncReportsController(AsyncController):
+    """
+    Async controller with routes, function calling, error handling, and logging.
+    """
+    def __init__(self, db, redis_client):
+        super().__init__('async_reports_blueprint', db, redis_client)
+
+        # Routes
+        self.blueprint.add_url_rule('/fetch', view_func=self.get_all_reports, methods=['GET'])
+        self.blueprint.add_url_rule('/add', view_func=self.add_report, methods=['POST'])
+
+    async def get_all_reports(self):
+        """
+        Fetch all submitted reports.
+        """
+        try:
+            user_id, error = await self.authenticate("/fetch")
+            if error:
+                return error
+
+            async with self.db.connect_read(user_id) as connection:
+                result = await AsyncReportsModel(connection).get_all_reports(user_id)
+            return jsonify(result), 200
+
+        except Exception as e:
+            self.logger.error(f"[/fetch] Error fetching reports: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+    async def add_report(self):
+        """
+        Add a report for the authenticated user.
+        """
+        try:
+            user_id, error = await self.authenticate("/add")
+            if error:
+                return error
+
+            data = await request.get_json()
+            subject = data.get("subject")
+            description = data.get("description")
+            if not subject or not description:
+                return jsonify({"error": "Subject and description are required"}), 400
+
+            async with self.db.connect_write(user_id) as connection:
+                result = await AsyncReportsModel(connection).add_report(user_id, subject, description)
+            return jsonify(result), 201
+
+        except Exception as e:
+            self.logger.error(f"[/add] Error creating report: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+
+class AsyncInternalIngredientsController(AsyncController):
+    """
+    Async controller with routes, function calling, error handling, and logging.
+    """
+    def __init__(self, db, redis_client):
+        super().__init__('async_internal_ingredients_blueprint', db, redis_client)
+
+        # Routes
+        self.blueprint.add_url_rule('/search', view_func=self.get_ingredients_with_search, methods=['GET'])
+        self.blueprint.add_url_rule('/get_nutirtion_by_id', view_func=self.get_nutrition_by_id, methods=['GET'])
+
+    async def get_ingredients_with_search(self):
+        """
+        Fetch ingredients by name search with limit.
+        """
+        stale_key = None
+        try:
+            q = request.args.get("q")
+            limit = request.args.get("limit")
+            if not q or limit is None:
+                self.logger.warning("[/search] Missing query parameters")
+                return jsonify({"error": "Missing 'q' or 'limit' parameters"}), 400
+
+            stale_key = f"search:{q.strip().lower()}:{limit}"
+            async with self.db.connect_read() as connection:
+                internal_ingredients_model = AsyncInternalIngredientsModel(connection)
+                ingredients = await internal_ingredients_model.get_all_ingredients(q, limit)
+
+                # Nothing contains the query as typed, try names a typo or two away before giving up
+                if isinstance(ingredients, dict) and "message" in ingredients:
+                    ingredients = await self.search_with_typos(internal_ingredients_model, q, limit) or ingredients
+
+            if not ingredients:
+                self.logger.info("[/search] No ingredients found")
+                return jsonify({"message": "No ingredients found"}), 404
+
+            # The model reports a failed query as an error dict, the last good results are better
+            if isinstance(ingredients, dict) and "error" in ingredients:
+                stale = await self.stale(stale_key, "/internal_ingredients/search")
+                if stale is not None:
+                    self.logger.warning("[/search] Serving stale results: %s", ingredients.get("details"))
+                    return stale
+            elif isinstance(ingredients, list):
+                await asyncio.to_thread(stale_cache.remember, stale_key, ingredients)
+
+            self.logger.info("[/search] Retrieved %s ingredients", len(ingredients))
+            return jsonify(ingredients), 200
+
+        except Exception as e:
+            # Catalog results barely change, an older answer beats an error while MySQL is down
+            stale = await self.stale(stale_key, "/internal_ingredients/search") if stale_key and is_dependency_failure(e) else None
+            if stale is not None:
+                self.logger.warning("[/search] Serving stale results: %s", e)
+                return stale
+            self.logger.error(f"[/search] Error occurred: {str(e)}", exc_info=True)
+            return jsonify({
+                "error": "An error occurred while fetching ingredients",
+                "details": str(e)
+            }), 500
+
+    async def search_with_typos(self, internal_ingredients_model, q, limit):
+        """
+        Ingredients whose names match q after correcting typos, None when there are none.
+        """
+        # Until the background build finishes there is no fallback, the request never waits for it
+        if not await asyncio.to_thread(ingredient_search_index.ensure_fresh):
+            return None
+
+        edamam_ids = ingredient_search_index.search(q, limit)
+        if not edamam_ids:
+            return None
+        self.logger.info("[/search] No exact match for %s, %s typo-tolerant matches", q, len(edamam_ids))
+        return await internal_ingredients_model.get_ingredients_by_ids(edamam_ids)
+
+    async def get_nutrition_by_id(self):
+        """
+        Fetch nutrition by Edamam Food ID.
+        """
+        stale_key = None
+        try:
+            food_id = request.args.get("edamam_food_id")
+            if not food_id:
+                self.logger.warning("[/get_nutrition_by_id] Missing 'edamam_food_id' parameter")
+                return jsonify({"error": "Missing 'edamam_food_id' parameter"}), 400
+
+            # The mapped catalog answers without MySQL while it is current, ids newer than the snapshot fall through to it
+            snapshot = await asyncio.to_thread(catalog_snapshots.current)
+            nutrition = snapshot.nutrition(food_id) if snapshot else None
+            if nutrition:
+                self.logger.info("[/get_nutrition_by_id] Nutrition info for %s from snapshot %s", food_id, snapshot.version)
+                return jsonify(nutrition), 200
+
+            stale_key = f"nutrition:{food_id}"
+            async with self.db.connect_read() as connection:
+                nutrition = await AsyncInternalIngredientsModel(connection).get_nutrition_by_edamam_id(food_id)
+
+            if not nutrition or isinstance(nutrition, dict) and "message" in nutrition:
+                self.logger.info("[/get_nutrition_by_id] No data found for food ID: %s", food_id)
+                return jsonify({"message": "No nutrition info found"}), 404
+
+            if "error" in nutrition:
+                stale = await self.stale(stale_key, "/internal_ingredients/get_nutirtion_by_id")
+                if stale is not None:
+                    self.logger.warning("[/get_nutrition_by_id] Serving stale nutrition: %s", nutrition.get("details"))
+                    return stale
+            else:
+                await asyncio.to_thread(stale_cache.remember, stale_key, nutrition)
+
+            self.logger.info("[/get_nutrition_by_id] Nutrition info found for %s", food_id)
+            return jsonify(nutrition), 200
+
+        except Exception as e:
+            stale = await self.stale(stale_key, "/internal_ingredients/get_nutirtion_by_id") if stale_key and is_dependency_failure(e) else None
+            if stale is not None:
+                self.logger.warning("[/get_nutrition_by_id] Serving stale nutrition: %s", e)
+                return stale
+            self.logger.error(f"[/get_nutrition_by_id] Error: {str(e)}", exc_info=True)
+            return jsonify({
+                "error": "An error occurred while fetching nutrition info",
+                "details": str(e)
+            }), 500
+
+
+class AsyncMetricsController:
+    """
+    Async controller exposing the same metrics as MetricsController.
+    """
+    def __init__(self):
+        self.blueprint = Blueprint('async_metrics_blueprint', __name__)
+        self.logger = logging.getLogger(__name__)
+
+        # Routes
+        self.blueprint.add_url_rule('', view_func=self.get_metrics, methods=['GET'])
+        self.blueprint.add_url_rule('/queries', view_func=self.get_top_queries, methods=['GET'])
+
+    async def get_metrics(self):
+        """
+        Metrics in the Prometheus text format. Requires METRICS_TOKEN as a bearer token, disabled without it.
+        """
+        try:
+            if not is_authorized_token(request.headers.get('Authorization')):
+                self.logger.warning("[/metrics] Invalid metrics token")
+                return jsonify({"error": "Unauthorized"}), 401
+
+            body = render_prometheus(metrics.collect())
+            return Response(body, status=200, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+        except Exception as e:
+            self.logger.error(f"[/metrics] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "Internal server error"}), 500
+
+    async def get_top_queries(self):
+        """
+        Top-N SQL statements across every worker, by total seconds unless ?order=calls|rows|mean_ms.
+        """
+        try:
+            if not is_authorized_token(request.headers.get('Authorization')):
+                self.logger.warning("[/metrics/queries] Invalid metrics token")
+                return jsonify({"error": "Unauthorized"}), 401
+
+            order_by = request.args.get('order', 'seconds')
+            if order_by not in ('seconds', 'calls', 'rows', 'mean_ms'):
+                return jsonify({"error": "order must be seconds, calls, rows or mean_ms"}), 400
+            limit = min(request.args.get('limit', 10, type=int), 100)
+
+            return jsonify(top_statements(metrics.collect(), limit, order_by)), 200
+
+        except Exception as e:
+            self.logger.error(f"[/metrics/queries] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "Internal server error"}), 500
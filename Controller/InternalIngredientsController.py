@@ -1,6 +1,10 @@
 import logging
 from flask import Blueprint, jsonify, request
 from Config.Db import Database
+from Config.Resilience import is_dependency_failure
+from Cache.StaleCache import stale_cache, stale_response
+from Cache.CatalogSnapshot import catalog_snapshots
+from Cache.IngredientSearchIndex import ingredient_search_index
 from Model.InternalIngredientsModel import InternalIngredientsModel
 
 class InternalIngredientsController:
@@ -11,12 +15,7 @@ class InternalIngredientsController:
         self.blueprint = Blueprint('internal_ingredients_blueprint', __name__)
         self.db = Database()
 
-        # Initialize logger
-        logging.basicConfig(
-            filename='/var/log/flask_app.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        # Logger, configured once by Config.Logging
         self.logger = logging.getLogger(__name__)
 
         # Routes
@@ -31,6 +30,7 @@ class InternalIngredientsController:
         self.logger.info("[/search] Fetching ingredients by search")
 
         connection = None
+        stale_key = None
         try:
             q = request.args.get("q")
             limit = request.args.get("limit")
@@ -39,19 +39,38 @@ class InternalIngredientsController:
                 self.logger.warning("[/search] Missing query parameters")
                 return jsonify({"error": "Missing 'q' or 'limit' parameters"}), 400
 
+            stale_key = f"search:{q.strip().lower()}:{limit}"
             connection = self.db.connect_read()
             internal_ingredients_model = InternalIngredientsModel(connection)
 
             ingredients = internal_ingredients_model.get_all_ingredients(q, limit)
 
+            # Nothing contains the query as typed, try names a typo or two away before giving up
+            if isinstance(ingredients, dict) and "message" in ingredients:
+                ingredients = self.search_with_typos(internal_ingredients_model, q, limit) or ingredients
+
             if not ingredients:
                 self.logger.info("[/search] No ingredients found")
                 return jsonify({"message": "No ingredients found"}), 404
 
-            self.logger.info(f"[/search] Retrieved {len(ingredients)} ingredients")
+            # The model reports a failed query as an error dict, the last good results are better
+            if isinstance(ingredients, dict) and "error" in ingredients:
+                stale = stale_cache.recall(stale_key)
+                if stale is not None:
+                    self.logger.warning("[/search] Serving stale results: %s", ingredients.get("details"))
+                    return stale_response(stale, "/internal_ingredients/search")
+            elif isinstance(ingredients, list):
+                stale_cache.remember(stale_key, ingredients)
+
+            self.logger.info("[/search] Retrieved %s ingredients", len(ingredients))
             return jsonify(ingredients), 200
 
         except Exception as e:
+            # Catalog results barely change, an older answer beats an error while MySQL is down
+            stale = stale_cache.recall(stale_key) if stale_key and is_dependency_failure(e) else None
+            if stale is not None:
+                self.logger.warning("[/search] Serving stale results: %s", e)
+                return stale_response(stale, "/internal_ingredients/search")
             self.logger.error(f"[/search] Error occurred: {str(e)}", exc_info=True)
             return jsonify({
                 "error": "An error occurred while fetching ingredients",
@@ -63,6 +82,20 @@ class InternalIngredientsController:
                 connection.close()
             self.logger.info("[/search] Database connection closed")
 
+    def search_with_typos(self, internal_ingredients_model, q, limit):
+        """
+        Ingredients whose names match q after correcting typos, None when there are none.
+        """
+        # Until the background build finishes there is no fallback, the request never waits for it
+        if not ingredient_search_index.ensure_fresh():
+            return None
+
+        edamam_ids = ingredient_search_index.search(q, limit)
+        if not edamam_ids:
+            return None
+        self.logger.info("[/search] No exact match for %s, %s typo-tolerant matches", q, len(edamam_ids))
+        return internal_ingredients_model.get_ingredients_by_ids(edamam_ids)
+
     def get_nutrition_by_id(self):
         """
         Fetch  nutrition by Edamam Food ID.
@@ -70,25 +103,46 @@ class InternalIngredientsController:
         self.logger.info("[/get_nutrition_by_id] Fetching nutrition info")
 
         connection = None
+        stale_key = None
         try:
             food_id = request.args.get("edamam_food_id")
             if not food_id:
                 self.logger.warning("[/get_nutrition_by_id] Missing 'edamam_food_id' parameter")
                 return jsonify({"error": "Missing 'edamam_food_id' parameter"}), 400
 
+            # The mapped catalog answers without MySQL while it is current, ids newer than the snapshot fall through to it
+            snapshot = catalog_snapshots.current()
+            nutrition = snapshot.nutrition(food_id) if snapshot else None
+            if nutrition:
+                self.logger.info("[/get_nutrition_by_id] Nutrition info for %s from snapshot %s", food_id, snapshot.version)
+                return jsonify(nutrition), 200
+
+            stale_key = f"nutrition:{food_id}"
             connection = self.db.connect_read()
             internal_ingredients_model = InternalIngredientsModel(connection)
 
             nutrition = internal_ingredients_model.get_nutrition_by_edamam_id(food_id)
 
             if not nutrition or isinstance(nutrition, dict) and "message" in nutrition:
-                self.logger.info(f"[/get_nutrition_by_id] No data found for food ID: {food_id}")
+                self.logger.info("[/get_nutrition_by_id] No data found for food ID: %s", food_id)
                 return jsonify({"message": "No nutrition info found"}), 404
 
-            self.logger.info(f"[/get_nutrition_by_id] Nutrition info found for {food_id}")
+            if "error" in nutrition:
+                stale = stale_cache.recall(stale_key)
+                if stale is not None:
+                    self.logger.warning("[/get_nutrition_by_id] Serving stale nutrition: %s", nutrition.get("details"))
+                    return stale_response(stale, "/internal_ingredients/get_nutirtion_by_id")
+            else:
+                stale_cache.remember(stale_key, nutrition)
+
+            self.logger.info("[/get_nutrition_by_id] Nutrition info found for %s", food_id)
             return jsonify(nutrition), 200
 
         except Exception as e:
+            stale = stale_cache.recall(stale_key) if stale_key and is_dependency_failure(e) else None
+            if stale is not None:
+                self.logger.warning("[/get_nutrition_by_id] Serving stale nutrition: %s", e)
+                return stale_response(stale, "/internal_ingredients/get_nutirtion_by_id")
             self.logger.error(f"[/get_nutrition_by_id] Error: {str(e)}", exc_info=True)
             return jsonify({
                 "error": "An error occurred while fetching nutrition info",
@@ -0,0 +1,77 @@
+import os
+import hmac
+import logging
+from flask import Blueprint, Response, jsonify, request
+from Config.Metrics import metrics, render_prometheus
+from Config.QueryProfiler import top_statements
+
+
+def is_authorized_token(authorization):
+    """
+    Whether an Authorization header carries METRICS_TOKEN. Denied unless METRICS_TOKEN is set,
+    the query report exposes SQL text and call sites.
+    """
+    expected = os.getenv("METRICS_TOKEN")
+    if not expected:
+        return False
+    provided = (authorization or '').removeprefix('Bearer ')
+    return hmac.compare_digest(provided.encode(), expected.encode())
+
+
+class MetricsController:
+    """
+    Controller exposing the Prometheus metrics of every gunicorn worker.
+    """
+    def __init__(self):
+        self.blueprint = Blueprint('metrics_blueprint', __name__)
+
+        # Logger, configured once by Config.Logging
+        self.logger = logging.getLogger(__name__)
+
+        # Routes
+        self.blueprint.add_url_rule('', view_func=self.get_metrics, methods=['GET'])
+        self.blueprint.add_url_rule('/queries', view_func=self.get_top_queries, methods=['GET'])
+
+    def is_authorized(self):
+        return is_authorized_token(request.headers.get('Authorization'))
+
+    def get_metrics(self):
+        """
+        Metrics in the Prometheus text format. Requires METRICS_TOKEN as a bearer token, disabled without it.
+        """
+        try:
+            if not self.is_authorized():
+                self.logger.warning("[/metrics] Invalid metrics token")
+                return jsonify({"error": "Unauthorized"}), 401
+
+            body = render_prometheus(metrics.collect())
+            return Response(body, status=200, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+        except Exception as e:
+            self.logger.error(f"[/metrics] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "Internal server error"}), 500
+
+    def get_top_queries(self):
+        """
+        Top-N SQL statements across every worker, by total seconds unless ?order=calls|rows|mean_ms.
+        """
+        try:
+            if not self.is_authorized():
+                self.logger.warning("[/metrics/queries] Invalid metrics token")
+                return jsonify({"error": "Unauthorized"}), 401
+
+            order_by = request.args.get('order', 'seconds')
+            if order_by not in ('seconds', 'calls', 'rows', 'mean_ms'):
+                return jsonify({"error": "order must be seconds, calls, rows or mean_ms"}), 400
+            limit = min(request.args.get('limit', 10, type=int), 100)
+
+            return jsonify(top_statements(metrics.collect(), limit, order_by)), 200
+
+        except Exception as e:
+            self.logger.error(f"[/metrics/queries] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "Internal server error"}), 500
+
+
+# Initialize controller
+metrics_controller = MetricsController()
+metrics_blueprint = metrics_controller.blueprint
@@ -1,10 +1,17 @@
 from flask import Blueprint, jsonify, request
 from Config.Db import Database
+from Config.JsonStream import is_streaming_enabled, prefetch, stream_json_array
 from Config.Fb import verify_firebase_token
 from Cache.FbCache import get_cached_uid_redis
 from Model.RecipesModel import RecipesModel  
+from Model.UserIngredientsModel import UserIngredientsModel
+from Cache.RecipeIngredientIndex import recipe_ingredient_index
+from Cache.RecipeCatalogCache import recipe_catalog_cache
 import logging
 
+RECIPES_BATCH_LIMIT = 100
+COOKABLE_LIMIT = 100
+
 class RecipeController:
     """
     Controller with routes, function calling, error handling, and logging.
@@ -13,24 +20,22 @@ class RecipeController:
         self.blueprint = Blueprint('recipe_blueprint', __name__)
         self.db = Database() 
 
-        # Initialize logger
-        logging.basicConfig(
-            filename='/var/log/flask_app.log', 
-            level=logging.INFO,               
-            format='%(asctime)s - %(levelname)s - %(message)s' 
-        )
+        # Logger, configured once by Config.Logging
         self.logger = logging.getLogger(__name__)  
 
         # Routes
         self.blueprint.add_url_rule('/all', view_func=self.get_all_recipes, methods=['GET'])
         self.blueprint.add_url_rule('/add', view_func=self.add_saved_recipes, methods=['POST'])
         self.blueprint.add_url_rule('/remove', view_func=self.removed_saved_recipes, methods=['POST'])
+        self.blueprint.add_url_rule('/add_batch', view_func=self.add_saved_recipes_batch, methods=['POST'])
+        self.blueprint.add_url_rule('/remove_batch', view_func=self.remove_saved_recipes_batch, methods=['POST'])
+        self.blueprint.add_url_rule('/cookable', view_func=self.get_cookable_recipes, methods=['GET'])
 
     def get_all_recipes(self):
         """
         Fetch all recipes for a specific user.
         """
-        self.logger.info(f"[/all] Fetching all recipes")
+        self.logger.info("[/all] Fetching all recipes")
         try:
             # Get Authorization token
             id_token = request.headers.get('Authorization')
@@ -41,18 +46,28 @@ class RecipeController:
             # Get user ID from token
             user_id = get_cached_uid_redis(id_token)
             if not user_id:
-                self.logger.warning(f"User ID not found for token: {id_token}")
+                self.logger.warning("User ID not found for token: %s", id_token)
                 return jsonify({"error": "User ID not found from Token"}), 401
 
-            connection = self.db.connect_read()
+            connection = self.db.connect_read(user_id)
             recipe_model = RecipesModel(connection)
 
+            # Stream the catalog a batch at a time instead of building the whole list and body
+            if is_streaming_enabled():
+                head, recipes = prefetch(recipe_model.iter_all_recipes(user_id))
+                if not head:
+                    self.logger.info("[/all/] No recipes found")
+                    return jsonify({"message": "No recipes found"}), 404
+                if recipes is None:
+                    return jsonify(head), 200
+                return stream_json_array(recipes)
+
             recipes = recipe_model.get_all_recipes(user_id)
             if not recipes:
-                self.logger.info(f"[/all/] No recipes found")
+                self.logger.info("[/all/] No recipes found")
                 return jsonify({"message": "No recipes found"}), 404
 
-            self.logger.info(f"[/all/{user_id}] Retrieved {len(recipes)} recipes")
+            self.logger.info("[/all/%s] Retrieved %s recipes", user_id, len(recipes))
             return jsonify(recipes), 200
 
         except Exception as e:
@@ -80,10 +95,10 @@ class RecipeController:
             # Get user ID
             user_id = get_cached_uid_redis(id_token)
             if not user_id:
-                self.logger.warning(f"User ID not found for token: {id_token}")
+                self.logger.warning("User ID not found for token: %s", id_token)
                 return jsonify({"error": "User ID not found from Token"}), 401
 
-            connection = self.db.connect_write()
+            connection = self.db.connect_write(user_id)
             recipe_model = RecipesModel(connection)
 
             response = recipe_model.add_recipe(user_id, recipe)
@@ -114,10 +129,10 @@ class RecipeController:
             # Get user ID
             user_id = get_cached_uid_redis(id_token)
             if not user_id:
-                self.logger.warning(f"User ID not found for token: {id_token}")
+                self.logger.warning("User ID not found for token: %s", id_token)
                 return jsonify({"error": "User ID not found from Token"}), 401
 
-            connection = self.db.connect_write()
+            connection = self.db.connect_write(user_id)
             recipe_model = RecipesModel(connection)
 
             response = recipe_model.delete_recipe(user_id, recipe) 
@@ -128,6 +143,117 @@ class RecipeController:
             self.logger.error(f"[/remove] Error removing recipe: {str(e)}", exc_info=True)
             return jsonify({"error": "An error occurred while removing recipe", "details": str(e)}), 500
 
+    def add_saved_recipes_batch(self):
+        """
+        Add many recipes, reporting a result per recipe.
+        """
+        return self._recipes_batch("/add_batch", "add_recipes_batch")
+
+    def remove_saved_recipes_batch(self):
+        """
+        Remove many recipes, reporting a result per recipe.
+        """
+        return self._recipes_batch("/remove_batch", "delete_recipes_batch")
+
+    def _recipes_batch(self, route, model_method):
+        connection = None
+        try:
+            data = request.json
+            recipes = data.get("recipes")
+
+            if not recipes or not isinstance(recipes, list):
+                self.logger.warning("[%s] Missing Recipes", route)
+                return jsonify({"error": "Missing Recipes"}), 400
+
+            if len(recipes) > RECIPES_BATCH_LIMIT:
+                self.logger.warning("[%s] Batch of %s recipes over limit", route, len(recipes))
+                return jsonify({"error": f"At most {RECIPES_BATCH_LIMIT} recipes per batch"}), 400
+
+            # Get Authorization token
+            id_token = request.headers.get('Authorization')
+            if not id_token:
+                self.logger.warning("Authorization token is missing in the request")
+                return jsonify({"error": "Authorization token is missing"}), 401
+
+            # Get user ID
+            user_id = get_cached_uid_redis(id_token)
+            if not user_id:
+                self.logger.warning("[%s] User ID not found for token", route)
+                return jsonify({"error": "User ID not found from Token"}), 401
+
+            connection = self.db.connect_write(user_id)
+            recipe_model = RecipesModel(connection)
+
+            response = getattr(recipe_model, model_method)(user_id, recipes)
+            if "error" in response:
+                return jsonify(response), 500
+
+            self.logger.info("[%s/%s] %s", route, user_id, response['message'])
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[{route}] Error processing recipes batch: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while processing recipes", "details": str(e)}), 500
+
+        finally:
+            if connection:
+                connection.close()
+
+    def get_cookable_recipes(self):
+        """
+        Rank the user's saved recipes by how much of each is covered by their pantry.
+        """
+        self.logger.info("[/cookable] Ranking saved recipes by pantry coverage")
+        connection = None
+        try:
+            limit = int(request.args.get("limit", 20))
+            min_coverage = float(request.args.get("min_coverage", 0))
+            if not 1 <= limit <= COOKABLE_LIMIT or not 0 <= min_coverage <= 1:
+                self.logger.warning("[/cookable] Out of range limit %s or min_coverage %s", limit, min_coverage)
+                return jsonify({"error": f"'limit' must be 1 to {COOKABLE_LIMIT} and 'min_coverage' 0 to 1"}), 400
+
+            # Get Authorization token
+            id_token = request.headers.get('Authorization')
+            if not id_token:
+                self.logger.warning("Authorization token is missing in the request")
+                return jsonify({"error": "Authorization token is missing"}), 401
+
+            # Get user ID from token
+            user_id = get_cached_uid_redis(id_token)
+            if not user_id:
+                self.logger.warning("[/cookable] User ID not found for token")
+                return jsonify({"error": "User ID not found from Token"}), 401
+
+            connection = self.db.connect_read(user_id)
+            recipe_model = RecipesModel(connection)
+
+            recipe_ingredient_index.ensure_fresh(recipe_model.get_all_recipe_ingredients)
+            saved_uris = recipe_model.get_user_recipe_uris(user_id)
+            pantry_food_ids = UserIngredientsModel(connection).get_user_food_ids(user_id)
+
+            ranked = recipe_ingredient_index.rank(pantry_food_ids, saved_uris, limit, min_coverage)
+            if not ranked:
+                self.logger.info("[/cookable/%s] No cookable recipes found", user_id)
+                return jsonify({"message": "No cookable recipes found"}), 404
+
+            recipes = {recipe['uri']: recipe for recipe in recipe_catalog_cache.get_many(
+                [item['uri'] for item in ranked], recipe_model.get_catalog_recipes)}
+            cookable = [dict(recipes[item['uri']], **item) for item in ranked if item['uri'] in recipes]
+
+            self.logger.info("[/cookable/%s] Ranked %s recipes", user_id, len(cookable))
+            return jsonify(cookable), 200
+
+        except ValueError:
+            return jsonify({"error": "'limit' and 'min_coverage' must be numbers"}), 400
+
+        except Exception as e:
+            self.logger.error(f"[/cookable] Error occurred: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred while ranking recipes", "details": str(e)}), 500
+
+        finally:
+            if connection:
+                connection.close()
+
 # Create controller and blueprint
 recipes_controller = RecipeController()
 recipes_blueprint = recipes_controller.blueprint
\ No newline at end of file
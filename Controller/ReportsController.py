@@ -12,12 +12,7 @@ class ReportsController:
         self.blueprint = Blueprint('reports_blueprint', __name__)
         self.db = Database()
 
-        # Logger setup
-        logging.basicConfig(
-            filename='/var/log/flask_app.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        # Logger, configured once by Config.Logging
         self.logger = logging.getLogger(__name__)
 
         # Routes
@@ -39,7 +34,7 @@ class ReportsController:
                 self.logger.warning("[/all] Invalid or expired token")
                 return jsonify({"error": "User ID not found from token"}), 401
 
-            connection = self.db.connect_read()
+            connection = self.db.connect_read(user_id)
             reports_model = ReportsModel(connection)
             result = reports_model.get_all_reports(user_id)
             return jsonify(result), 200
@@ -69,7 +64,7 @@ class ReportsController:
             if not subject or not description:
                 return jsonify({"error": "Subject and description are required"}), 400
 
-            connection = self.db.connect_write()
+            connection = self.db.connect_write(user_id)
             reports_model = ReportsModel(connection)
             result = reports_model.add_report(user_id, subject, description)
             return jsonify(result), 201
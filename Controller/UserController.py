@@ -2,7 +2,7 @@ import logging
 from flask import Blueprint, jsonify, request
 from Config.Db import Database
 from Config.Fb import verify_firebase_token
-from Cache.FbCache import get_cached_uid_redis
+from Cache.FbCache import remember_user_token
 from Model.UserModel import UserModel
 
 class UserController:
@@ -13,12 +13,7 @@ class UserController:
         self.blueprint = Blueprint('user', __name__)
         self.db = Database()
 
-        # Initialize the logger
-        logging.basicConfig(
-            filename='/var/log/flask_app.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        # Logger, configured once by Config.Logging
         self.logger = logging.getLogger(__name__)
 
         # Routes
@@ -41,8 +36,9 @@ class UserController:
                     self.logger.warning("[/create] Email is missing in the request")
                 return jsonify({"error": "Authorization token or email is missing"}), 400
 
-            # Get UID
-            firebase_uid = get_cached_uid_redis(id_token)
+            # Get UID, verified directly since the cached lookup only knows users that already exist
+            decoded_token = verify_firebase_token(id_token)
+            firebase_uid = decoded_token.get('uid') if decoded_token else None
             if not firebase_uid:
                 self.logger.warning("[/create] Invalid or expired Firebase token")
                 return jsonify({"error": "Invalid or expired Firebase token"}), 401
@@ -55,12 +51,17 @@ class UserController:
             # Check if user exist
             existing_user = user_model.get_user_by_firebase_uid(firebase_uid)
             if existing_user:
-                self.logger.info(f"[/create] User already exists: {existing_user['id']}")
+                self.logger.info("[/create] User already exists: %s", existing_user['id'])
+                remember_user_token(id_token, decoded_token, existing_user['id'])
                 return jsonify({"message": "User already exists", "user_id": existing_user['id']}), 200
 
             # Add user
             user_id = user_model.create_user(firebase_uid, email)
-            self.logger.info(f"[/create] New user created with ID: {user_id}")
+            if isinstance(user_id, dict):
+                self.logger.error(f"[/create] Failed to create user: {user_id.get('details')}")
+                return jsonify(user_id), 500
+            self.logger.info("[/create] New user created with ID: %s", user_id)
+            remember_user_token(id_token, decoded_token, user_id)
 
             return jsonify({"message": "User created successfully", "user_id": user_id}), 201
 
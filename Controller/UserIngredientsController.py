@@ -1,8 +1,13 @@
+import os
 import logging
 from flask import Blueprint, jsonify, request
 from Config.Db import Database
+from Config.JsonStream import is_streaming_enabled, prefetch, stream_json_array
+from Config.Resilience import is_dependency_failure
+from Cache.StaleCache import stale_cache, stale_response
 from Cache.FbCache import get_cached_uid_redis
-from Model.UserIngredientsModel import UserIngredientsModel
+from Cache.UserIngredientsWriteBuffer import user_ingredients_write_buffer, is_write_buffer_enabled, ACK_BUFFERED, ACK_DURABLE
+from Model.UserIngredientsModel import UserIngredientsModel, to_bulk_changes
 
 class UserIngredientsController:
     """
@@ -12,12 +17,7 @@ class UserIngredientsController:
         self.blueprint = Blueprint('ingredients_blueprint', __name__)
         self.db = Database()
 
-        # Logger setup
-        logging.basicConfig(
-            filename='/var/log/flask_app.log',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        # Logger, configured once by Config.Logging
         self.logger = logging.getLogger(__name__)
 
         # Routes
@@ -25,6 +25,7 @@ class UserIngredientsController:
         self.blueprint.add_url_rule('/update', view_func=self.update_user_ingredients_batch, methods=['POST'])
         self.blueprint.add_url_rule('/get_expiring', view_func=self.get_expiring_user_ingredients, methods=['GET'])
         self.blueprint.add_url_rule('/delete', view_func=self.delete_user_ingredients_batch, methods=['DELETE'])
+        self.blueprint.add_url_rule('/bulk', view_func=self.bulk_user_ingredients, methods=['POST'])
 
     def get_all_user_ingredients(self):
         """
@@ -32,6 +33,7 @@ class UserIngredientsController:
         """
         self.logger.info("[/all] Fetching all ingredients")
         connection = None
+        stale_key = None
 
         try:
             id_token = request.headers.get('Authorization')
@@ -44,18 +46,45 @@ class UserIngredientsController:
                 self.logger.warning("[/all] Invalid or expired token")
                 return jsonify({"error": "User ID not found from token"}), 401
 
-            connection = self.db.connect_read()
+            stale_key = f"pantry:{user_id}"
+            connection = self.db.connect_read(user_id)
             ingredients_model = UserIngredientsModel(connection)
 
+            # Stream large pantries row by row, the response closes the connection once sent.
+            # The first batch is read up front, so its errors still reach the stale fallback below
+            if is_streaming_enabled():
+                head, ingredients = prefetch(ingredients_model.stream_user_ingredients(user_id))
+                if not head:
+                    self.logger.info("[/all/%s] No ingredients found", user_id)
+                    return jsonify({"message": "No ingredients found"}), 404
+                if ingredients is None:
+                    stale_cache.remember(stale_key, head)
+                    return jsonify(head), 200
+
+                streamed, connection = connection, None
+                return stream_json_array(stale_cache.remember_rows(stale_key, ingredients), on_close=streamed.close)
+
             ingredients = ingredients_model.get_all_user_ingredients(user_id)
+            if isinstance(ingredients, dict) and "error" in ingredients:
+                stale = stale_cache.recall(stale_key)
+                if stale is not None:
+                    self.logger.warning("[/all/%s] Serving stale pantry: %s", user_id, ingredients.get("details"))
+                    return stale_response(stale, "/user_ingredients/all")
             if not ingredients:
-                self.logger.info(f"[/all/{user_id}] No ingredients found")
+                self.logger.info("[/all/%s] No ingredients found", user_id)
                 return jsonify({"message": "No ingredients found"}), 404
 
-            self.logger.info(f"[/all/{user_id}] Retrieved {len(ingredients)} ingredients")
+            self.logger.info("[/all/%s] Retrieved %s ingredients", user_id, len(ingredients))
+            if isinstance(ingredients, list):
+                stale_cache.remember(stale_key, ingredients)
             return jsonify(ingredients), 200
 
         except Exception as e:
+            # A pantry snapshot from before the outage beats an error
+            stale = stale_cache.recall(stale_key) if stale_key and is_dependency_failure(e) else None
+            if stale is not None:
+                self.logger.warning("[/all] Serving stale pantry: %s", e)
+                return stale_response(stale, "/user_ingredients/all")
             self.logger.error(f"[/all] Error: {str(e)}", exc_info=True)
             return jsonify({"error": "An error occurred", "details": str(e)}), 500
 
@@ -89,7 +118,21 @@ class UserIngredientsController:
                 self.logger.warning("[/update] Invalid or expired token")
                 return jsonify({"error": "User ID not found from token"}), 401
 
-            connection = self.db.connect_write()
+            # Opt-in write coalescing, durable acks wait for the flush to commit
+            if is_write_buffer_enabled():
+                ack = request.headers.get('X-Write-Ack', os.getenv("USER_INGREDIENTS_WRITE_ACK", ACK_DURABLE)).lower()
+                if ack not in (ACK_BUFFERED, ACK_DURABLE):
+                    return jsonify({"error": f"Invalid X-Write-Ack '{ack}'"}), 400
+
+                response = user_ingredients_write_buffer.submit(user_id, ingredients, ack=ack)
+                if "lost" in response:
+                    return jsonify(response), 500
+                if "error" in response:
+                    return jsonify(response), 400
+                # Accepted but not committed yet, retrying would apply the deltas twice
+                return jsonify(response), 202 if ack == ACK_BUFFERED or response.get("pending") else 200
+
+            connection = self.db.connect_write(user_id)
             ingredients_model = UserIngredientsModel(connection)
 
             response = ingredients_model.update_user_ingredients_batch(user_id, ingredients)
@@ -122,15 +165,15 @@ class UserIngredientsController:
                 self.logger.warning("[/get_expring] Invalid or expired token")
                 return jsonify({"error": "User ID not found from token"}), 401
 
-            connection = self.db.connect_read()
+            connection = self.db.connect_read(user_id)
             ingredients_model = UserIngredientsModel(connection)
 
             ingredients = ingredients_model.get_ingredients_expiring(user_id)
             if not ingredients:
-                self.logger.info(f"[/get_expring/{user_id}] No ingredients found")
+                self.logger.info("[/get_expring/%s] No ingredients found", user_id)
                 return jsonify({"message": "No ingredients found"}), 404
 
-            self.logger.info(f"[/get_expring/{user_id}] Retrieved {len(ingredients)} ingredients")
+            self.logger.info("[/get_expring/%s] Retrieved %s ingredients", user_id, len(ingredients))
             return jsonify(ingredients), 200
 
         except Exception as e:
@@ -170,7 +213,7 @@ class UserIngredientsController:
                 self.logger.warning("[/delete] Invalid or expired token")
                 return jsonify({"error": "User ID not found from token"}), 401
 
-            connection = self.db.connect_write()
+            connection = self.db.connect_write(user_id)
             ingredients_model = UserIngredientsModel(connection)
 
             response = ingredients_model.delete_user_ingredients_batch(user_id, edamam_food_id)
@@ -185,6 +228,57 @@ class UserIngredientsController:
                 connection.close()
 
 
+    def bulk_user_ingredients(self):
+        """
+        Apply mixed add/set/remove operations for the user in one transaction.
+        """
+        self.logger.info("[/bulk] Applying bulk ingredient operations")
+        connection = None
+
+        try:
+            data = request.json
+            operations = data.get("operations")
+
+            if not operations or not isinstance(operations, list):
+                self.logger.warning("[/bulk] Missing operations payload")
+                return jsonify({"error": "Missing operations"}), 400
+
+            id_token = request.headers.get('Authorization')
+            if not id_token:
+                self.logger.warning("[/bulk] Missing Authorization token")
+                return jsonify({"error": "Authorization token is missing"}), 401
+
+            user_id = get_cached_uid_redis(id_token)
+            if not user_id:
+                self.logger.warning("[/bulk] Invalid or expired token")
+                return jsonify({"error": "User ID not found from token"}), 401
+
+            # Bad input is rejected before any connection is taken
+            try:
+                to_bulk_changes(user_id, operations)
+            except ValueError as e:
+                self.logger.warning("[/bulk] Invalid operations: %s", e)
+                return jsonify({"error": str(e)}), 400
+
+            connection = self.db.connect_write(user_id)
+            ingredients_model = UserIngredientsModel(connection)
+
+            response = ingredients_model.apply_bulk_operations(user_id, operations)
+            if "error" in response:
+                return jsonify(response), 500
+
+            self.logger.info("[/bulk/%s] Applied %s operations", user_id, len(operations))
+            return jsonify(response), 200
+
+        except Exception as e:
+            self.logger.error(f"[/bulk] Error: {str(e)}", exc_info=True)
+            return jsonify({"error": "An error occurred", "details": str(e)}), 500
+
+        finally:
+            if connection:
+                connection.close()
+            self.logger.info("[/bulk] Database connection closed")
+
 
 # Register controller and blueprint
 user_ingredients_controller = UserIngredientsController()
@@ -0,0 +1,154 @@
+import logging
+from dotenv import load_dotenv
+from Config.Db import Database
+
+BATCH_SIZE = 5000
+
+CREATE_RECIPE_CATALOG = """
+CREATE TABLE IF NOT EXISTS RecipeCatalog (
+    uri VARCHAR(255) NOT NULL,
+    label VARCHAR(255) NOT NULL,
+    image TEXT,
+    url TEXT,
+    calories DOUBLE,
+    total_weight DOUBLE,
+    cuisine_type VARCHAR(255),
+    meal_type VARCHAR(255),
+    dish_type VARCHAR(255),
+    PRIMARY KEY (uri)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+CREATE_USER_RECIPES = """
+CREATE TABLE IF NOT EXISTS UserRecipes (
+    user_id INT NOT NULL,
+    uri VARCHAR(255) NOT NULL,
+    date_added DATETIME NOT NULL,
+    PRIMARY KEY (user_id, uri),
+    KEY idx_user_recipes_uri (uri)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+
+def create_tables(connection):
+    """
+    Create the shared recipe catalog and the user link table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_RECIPE_CATALOG)
+        cursor.execute(CREATE_USER_RECIPES)
+    connection.commit()
+    logging.info("[RecipeCatalogMigration] Tables created.")
+
+
+def has_saved_date(connection):
+    """
+    Whether the legacy Recipes table records when each recipe was saved.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1 FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Recipes' AND COLUMN_NAME = 'date_added'
+            """
+        )
+        return cursor.fetchone() is not None
+
+
+def backfill(connection, batch_size=BATCH_SIZE):
+    """
+    Copy legacy Recipes rows into RecipeCatalog and UserRecipes in uri-ordered batches,
+    keeping the original saved date of every link.
+    """
+    if has_saved_date(connection):
+        saved_at = "COALESCE(date_added, NOW())"
+    else:
+        # Nothing recorded when the recipe was saved, so the backfill time is the best available
+        logging.warning("[RecipeCatalogMigration] Recipes has no saved date, links are stamped with the backfill time")
+        saved_at = "NOW()"
+
+    last_uri = ""
+    catalog_rows = 0
+    link_rows = 0
+
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT DISTINCT uri FROM Recipes
+                WHERE uri > %s
+                ORDER BY uri
+                LIMIT %s
+                """,
+                (last_uri, batch_size)
+            )
+            uris = [row['uri'] for row in cursor.fetchall()]
+            if not uris:
+                break
+
+            format_strings = ','.join(['%s'] * len(uris))
+
+            # One copy of the metadata per uri, whichever user row MySQL returns first
+            cursor.execute(
+                f"""
+                INSERT IGNORE INTO RecipeCatalog (uri, label, image, url, calories, total_weight, cuisine_type, meal_type, dish_type)
+                SELECT uri, ANY_VALUE(label), ANY_VALUE(image), ANY_VALUE(url), ANY_VALUE(calories),
+                    ANY_VALUE(total_weight), ANY_VALUE(cuisine_type), ANY_VALUE(meal_type), ANY_VALUE(dish_type)
+                FROM Recipes
+                WHERE uri IN ({format_strings})
+                GROUP BY uri
+                """,
+                uris
+            )
+            catalog_rows += cursor.rowcount
+
+            cursor.execute(
+                f"""
+                INSERT IGNORE INTO UserRecipes (user_id, uri, date_added)
+                SELECT user_id, uri, {saved_at}
+                FROM Recipes
+                WHERE uri IN ({format_strings})
+                """,
+                uris
+            )
+            link_rows += cursor.rowcount
+
+        connection.commit()
+        last_uri = uris[-1]
+        logging.info(f"[RecipeCatalogMigration] Backfilled through {last_uri}")
+
+    logging.info(f"[RecipeCatalogMigration] Backfill done: {catalog_rows} catalog rows, {link_rows} links.")
+    return {"catalog_rows": catalog_rows, "link_rows": link_rows}
+
+
+def migrate():
+    """
+    Create the tables and backfill them. Safe to re-run; the legacy Recipes table is left in place.
+    """
+    connection = None
+    try:
+        connection = Database().connect_write()
+        create_tables(connection)
+        return backfill(connection)
+
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        logging.error(f"[RecipeCatalogMigration] Error: {str(e)}", exc_info=True)
+        raise
+
+    finally:
+        if connection:
+            connection.close()
+            logging.info("[RecipeCatalogMigration] Database connection closed.")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(
+        filename='/var/log/migrations.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    result = migrate()
+    print(result)
@@ -0,0 +1,126 @@
+import logging
+import argparse
+import itertools
+from dotenv import load_dotenv
+from Config.Db import Database
+from Model.RecipesModel import RecipesModel
+from Sync.CatalogImport import read_records
+
+BATCH_SIZE = 500
+
+CREATE_RECIPE_INGREDIENTS = """
+CREATE TABLE IF NOT EXISTS RecipeIngredients (
+    uri VARCHAR(255) NOT NULL,
+    edamam_food_id VARCHAR(255) NOT NULL,
+    PRIMARY KEY (uri, edamam_food_id),
+    KEY idx_recipe_ingredients_food (edamam_food_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+
+def missing_uris(connection, uris):
+    """
+    The uris among uris that are in the catalog but have no ingredients yet.
+    """
+    format_strings = ','.join(['%s'] * len(uris))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT uri FROM RecipeCatalog
+            WHERE uri IN ({format_strings})
+            AND NOT EXISTS (SELECT 1 FROM RecipeIngredients WHERE RecipeIngredients.uri = RecipeCatalog.uri)
+            """,
+            uris
+        )
+        return [row['uri'] for row in cursor.fetchall()]
+
+
+def count_without_ingredients(connection):
+    """
+    Number of catalog recipes that still have no ingredients.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS count FROM RecipeCatalog
+            WHERE NOT EXISTS (SELECT 1 FROM RecipeIngredients WHERE RecipeIngredients.uri = RecipeCatalog.uri)
+            """
+        )
+        return cursor.fetchone()['count']
+
+
+def backfill(connection, path, batch_size=BATCH_SIZE):
+    """
+    Fill the ingredients of catalog recipes saved before this migration from a trusted export of
+    recipes (JSONL, one recipe per line in the shape /recipes/add takes). The catalog and the saved
+    recipes only hold metadata, so the ingredients have to come from the source the recipes came from.
+    Recipes that already have ingredients are left as they are.
+    """
+    model = RecipesModel(connection)
+    records = (
+        record for record in read_records(path, "jsonl")
+        if isinstance(record, dict) and all(record.get(key) is not None for key in ('uri', 'label', 'calories', 'total_weight'))
+    )
+    filled = 0
+
+    while True:
+        batch = {record['uri']: record for record in itertools.islice(records, batch_size)}
+        if not batch:
+            break
+
+        missing = missing_uris(connection, list(batch))
+        if missing:
+            result = model.refresh_catalog([batch[uri] for uri in missing])
+            if "error" in result:
+                raise RuntimeError(result["details"])
+            filled += len(missing)
+            logging.info(f"[RecipeIngredientsMigration] Backfilled {filled} recipes")
+
+    remaining = count_without_ingredients(connection)
+    logging.info(f"[RecipeIngredientsMigration] Backfill done: {filled} recipes filled, {remaining} still without ingredients.")
+    return {"filled": filled, "without_ingredients": remaining}
+
+
+def migrate(path=None):
+    """
+    Create the recipe ingredient table behind /recipes/cookable and, given an export of the
+    recipes, backfill the ingredients of recipes saved before it. Recipes not in the export get
+    theirs the next time a user saves them.
+    """
+    connection = None
+    try:
+        connection = Database().connect_write()
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_RECIPE_INGREDIENTS)
+        connection.commit()
+        logging.info("[RecipeIngredientsMigration] Table created.")
+
+        if path:
+            return backfill(connection, path)
+        return {"without_ingredients": count_without_ingredients(connection)}
+
+    except Exception as e:
+        if connection:
+            connection.rollback()
+        logging.error(f"[RecipeIngredientsMigration] Error: {str(e)}", exc_info=True)
+        raise
+
+    finally:
+        if connection:
+            connection.close()
+            logging.info("[RecipeIngredientsMigration] Database connection closed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create RecipeIngredients and backfill it from a recipe export.")
+    parser.add_argument("path", nargs="?", help="JSONL export of the recipes, one recipe per line")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(
+        filename='/var/log/migrations.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    result = migrate(args.path)
+    print(result)
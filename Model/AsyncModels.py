@@ -0,0 +1,397 @@
+import logging
+from datetime import datetime
+from Model.RecipesModel import (
+    to_catalog_row, to_food_ids, to_recipes_batch, to_uris_batch, USER_RECIPE_URIS_SQL, DELETE_USER_RECIPE_SQL,
+    RECIPE_INGREDIENTS_SQL, catalog_recipes_query, existing_catalog_query, insert_catalog_query, insert_links_statement,
+    insert_ingredients_statement, indexed_uris_query, user_recipes_in_query, delete_user_recipes_query
+)
+from Model.UserIngredientsModel import (
+    USER_INGREDIENTS_SQL, EXPIRING_INGREDIENTS_SQL, UPSERT_INGREDIENT_SQL, DELETE_INGREDIENT_SQL, USER_FOOD_IDS_SQL,
+    to_ingredient_updates, to_bulk_changes, quantity_change_statements, delete_ingredients_query, bulk_rows_query
+)
+from Model.InternalIngredientsModel import SEARCH_SQL, NUTRITION_SQL, search_args, ingredients_by_ids_query
+from Model.ReportsModel import REPORTS_SQL, ADD_REPORT_SQL
+
+# SQL and input validation come from the sync models, so both apps read and write the same way
+
+
+class AsyncUserIngredientsModel:
+    def __init__(self, db_connection):
+        self.db = db_connection
+
+    async def get_all_user_ingredients(self, user_id):
+        """
+        Fetch all ingredients for a specific user.
+        """
+        try:
+            async with self.db.cursor() as cursor:
+                await cursor.execute(USER_INGREDIENTS_SQL, (user_id,))
+                ingredients = await cursor.fetchall()
+
+            logging.info("Fetched %s ingredients for user_id %s", len(ingredients), user_id)
+            return list(ingredients)
+
+        except Exception as e:
+            logging.error(f"Error fetching ingredients for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while fetching ingredients", "details": str(e)}
+
+    async def get_user_food_ids(self, user_id):
+        """
+        Fetch the edamam_food_ids in a user's pantry.
+        """
+        async with self.db.cursor() as cursor:
+            await cursor.execute(USER_FOOD_IDS_SQL, (user_id,))
+            return [row['edamam_food_id'] for row in await cursor.fetchall()]
+
+    async def get_ingredients_expiring(self, user_id):
+        """
+        Gets ingredients that are expiring within 24 hours for a specific user.
+        """
+        try:
+            async with self.db.cursor() as cursor:
+                await cursor.execute(EXPIRING_INGREDIENTS_SQL, (user_id,))
+                rows = await cursor.fetchall()
+
+            logging.info("Fetched %s expiring ingredients for user %s", len(rows), user_id)
+            return list(rows)
+
+        except Exception as e:
+            logging.error(f"Error fetching expiring ingredients for user {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while checking for expiring ingredients", "details": str(e)}
+
+    async def update_user_ingredients_batch(self, user_id, ingredients):
+        """
+        Insert or update user ingredients.
+        If quantity becomes 0, the ingredient is removed instead.
+        """
+        try:
+            try:
+                insert_data, delete_data = to_ingredient_updates(user_id, ingredients)
+            except ValueError as e:
+                logging.warning("[update_user_ingredients_batch] Invalid input: %s", e)
+                return {"error": str(e)}
+
+            async with self.db.cursor() as cursor:
+                if insert_data:
+                    await cursor.executemany(UPSERT_INGREDIENT_SQL, insert_data)
+
+                if delete_data:
+                    await cursor.executemany(DELETE_INGREDIENT_SQL, delete_data)
+
+            await self.db.commit()
+
+            logging.info("Successfully updated ingredients for user_id %s", user_id)
+            return {"message": f"Updated {len(insert_data)} and removed {len(delete_data)} ingredients"}
+
+        except Exception as e:
+            await self.db.rollback()
+            logging.error(f"Error adding ingredients for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while adding ingredients", "details": str(e)}
+
+    async def apply_bulk_operations(self, user_id, operations):
+        """
+        Apply a list of add/set/remove operations in one transaction and return the resulting rows.
+        """
+        try:
+            changes = to_bulk_changes(user_id, operations)
+        except ValueError as e:
+            logging.warning("[apply_bulk_operations] Invalid operations: %s", e)
+            return {"error": str(e)}
+
+        try:
+            statements, upserted, removed = quantity_change_statements(changes)
+            async with self.db.cursor() as cursor:
+                for statement, args in statements:
+                    await cursor.execute(statement, args)
+
+                food_ids = [food_id for _, food_id in changes]
+                await cursor.execute(bulk_rows_query(len(food_ids)), [user_id] + food_ids)
+                rows = await cursor.fetchall()
+
+            await self.db.commit()
+
+            logging.info("Applied %s bulk operations for user_id %s", len(operations), user_id)
+            return {
+                "message": f"Updated {upserted} and removed {removed} ingredients",
+                "ingredients": list(rows)
+            }
+
+        except Exception as e:
+            await self.db.rollback()
+            logging.error(f"Error applying bulk operations for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while applying bulk operations", "details": str(e)}
+
+    async def delete_user_ingredients_batch(self, user_id, edamam_food_id):
+        """
+        Deletes a batch of ingredients for a given user.
+        """
+        try:
+            if isinstance(edamam_food_id, str):
+                edamam_food_id = [edamam_food_id]
+
+            async with self.db.cursor() as cursor:
+                await cursor.execute(delete_ingredients_query(len(edamam_food_id)), [user_id] + edamam_food_id)
+                deleted = cursor.rowcount
+
+            await self.db.commit()
+            return {"message": f"Deleted {deleted} ingredients."}
+
+        except Exception as e:
+            await self.db.rollback()
+            raise Exception(f"Failed to delete ingredients: {str(e)}")
+
+
+class AsyncRecipesModel:
+    def __init__(self, db_connection):
+        self.db = db_connection
+
+    async def get_user_recipe_uris(self, user_id):
+        """
+        Fetch the uris of every recipe a user saved, oldest first.
+        """
+        async with self.db.cursor() as cursor:
+            await cursor.execute(USER_RECIPE_URIS_SQL, (user_id,))
+            return [row['uri'] for row in await cursor.fetchall()]
+
+    async def get_catalog_recipes(self, uris):
+        """
+        Fetch shared recipe metadata by uri.
+        """
+        async with self.db.cursor() as cursor:
+            await cursor.execute(catalog_recipes_query(len(uris)), list(uris))
+            return list(await cursor.fetchall())
+
+    async def get_all_recipe_ingredients(self):
+        """
+        Fetch every (uri, edamam_food_id) pair to build the ingredient index.
+        """
+        async with self.db.cursor() as cursor:
+            await cursor.execute(RECIPE_INGREDIENTS_SQL)
+            return list(await cursor.fetchall())
+
+    async def add_recipe(self, user_id, recipe):
+        """
+        Add a recipe for a specific user. Returns the ingredient food ids it stored alongside the response.
+        """
+        try:
+            if not recipe or 'uri' not in recipe:
+                logging.warning("Invalid input: %s", recipe)
+                return {"error": "Invalid recipe data. Each recipe must have a 'uri'."}, []
+
+            food_ids = to_food_ids(recipe)
+
+            async with self.db.cursor() as cursor:
+                # Only a missing catalog row is created, existing shared metadata is never rewritten by a user
+                await cursor.execute(existing_catalog_query(1), (recipe['uri'],))
+                added = not await cursor.fetchone()
+                if added:
+                    await cursor.execute(insert_catalog_query(1), to_catalog_row(recipe))
+                await cursor.execute(*insert_links_statement(user_id, [recipe['uri']]))
+                indexed = await self._insert_missing_ingredients(cursor, {recipe['uri']: food_ids})
+
+            await self.db.commit()
+
+            logging.info("Successfully added recipe %s for user_id %s (or ignored if duplicate)", recipe['uri'], user_id)
+            return {"message": f"Successfully added recipe {recipe['uri']} (or ignored if already exists)"}, indexed.get(recipe['uri'], [])
+
+        except Exception as e:
+            await self.db.rollback()
+            logging.error(f"Error adding recipe for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while adding the recipe", "details": str(e)}, []
+
+    async def delete_recipe(self, user_id, recipe):
+        """
+        Remove a recipe for a specific user.
+        """
+        try:
+            if not recipe or 'uri' not in recipe:
+                logging.warning("Invalid input: %s", recipe)
+                return {"error": "Invalid recipe data. Each recipe must have a 'uri'."}
+
+            async with self.db.cursor() as cursor:
+                await cursor.execute(DELETE_USER_RECIPE_SQL, (recipe['uri'], user_id))
+            await self.db.commit()
+
+            logging.info("Successfully removed recipe %s for user_id %s", recipe['uri'], user_id)
+            return {"message": f"Successfully removed recipe {recipe['uri']}"}
+
+        except Exception as e:
+            await self.db.rollback()
+            logging.error(f"Error removing recipe {recipe['uri']} for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while removing the recipe", "details": str(e)}
+
+
+    async def add_recipes_batch(self, user_id, recipes):
+        """
+        Add many recipes for a specific user with one multi-row insert. Returns the ingredient food ids
+        it stored by uri alongside the response.
+        """
+        try:
+            results, rows, ingredients = to_recipes_batch(recipes)
+            indexed = {}
+
+            if rows:
+                async with self.db.cursor() as cursor:
+                    await cursor.execute(user_recipes_in_query(len(rows)), [user_id] + list(rows))
+                    existing = {row['uri'] for row in await cursor.fetchall()}
+
+                    await cursor.execute(existing_catalog_query(len(rows)), list(rows))
+                    in_catalog = {row['uri'] for row in await cursor.fetchall()}
+                    added = [uri for uri in rows if uri not in in_catalog]
+                    if added:
+                        await cursor.execute(insert_catalog_query(len(added)), [value for uri in added for value in rows[uri]])
+                    await cursor.execute(*insert_links_statement(user_id, list(rows)))
+                    indexed = await self._insert_missing_ingredients(cursor, ingredients)
+                await self.db.commit()
+
+                for result in results:
+                    if result["status"] == "added" and result["uri"] in existing:
+                        result["status"] = "exists"
+
+            added = sum(1 for result in results if result["status"] == "added")
+            logging.info("Added %s of %s recipes for user_id %s", added, len(recipes), user_id)
+            return {"message": f"Added {added} recipes", "results": results}, indexed
+
+        except Exception as e:
+            await self.db.rollback()
+            logging.error(f"Error adding recipes batch for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while adding the recipes", "details": str(e)}, {}
+
+    async def delete_recipes_batch(self, user_id, recipes):
+        """
+        Remove many recipes for a specific user with one DELETE ... IN.
+        """
+        try:
+            results, uris = to_uris_batch(recipes)
+
+            if uris:
+                async with self.db.cursor() as cursor:
+                    await cursor.execute(user_recipes_in_query(len(uris)), [user_id] + uris)
+                    existing = {row['uri'] for row in await cursor.fetchall()}
+                    await cursor.execute(delete_user_recipes_query(len(uris)), [user_id] + uris)
+                await self.db.commit()
+
+                for result in results:
+                    if result["status"] == "removed" and result["uri"] not in existing:
+                        result["status"] = "not_found"
+
+            removed = sum(1 for result in results if result["status"] == "removed")
+            logging.info("Removed %s of %s recipes for user_id %s", removed, len(recipes), user_id)
+            return {"message": f"Removed {removed} recipes", "results": results}
+
+        except Exception as e:
+            await self.db.rollback()
+            logging.error(f"Error removing recipes batch for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while removing the recipes", "details": str(e)}
+
+
+    async def _insert_missing_ingredients(self, cursor, ingredients):
+        # Same rule as RecipesModel._insert_missing_ingredients, returns what was stored
+        ingredients = {uri: food_ids for uri, food_ids in ingredients.items() if food_ids}
+        if not ingredients:
+            return {}
+        await cursor.execute(indexed_uris_query(len(ingredients)), list(ingredients))
+        stored = {row['uri'] for row in await cursor.fetchall()}
+        missing = {uri: food_ids for uri, food_ids in ingredients.items() if uri not in stored}
+        statement = insert_ingredients_statement(missing)
+        if statement:
+            await cursor.execute(*statement)
+        return missing
+
+
+class AsyncReportsModel:
+    def __init__(self, db_connection):
+        self.db = db_connection
+
+    async def get_all_reports(self, user_id):
+        """
+        Fetch all reports for a specific user.
+        """
+        try:
+            async with self.db.cursor() as cursor:
+                await cursor.execute(REPORTS_SQL, (user_id,))
+                reports = await cursor.fetchall()
+
+            logging.info("Fetched %s reports for user_id %s", len(reports), user_id)
+            return list(reports)
+
+        except Exception as e:
+            logging.error(f"Error fetching reports for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while fetching reports", "details": str(e)}
+
+    async def add_report(self, user_id, subject, description):
+        """
+        Add a new report
+        """
+        try:
+            current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+            async with self.db.cursor() as cursor:
+                await cursor.execute(ADD_REPORT_SQL, (user_id, subject, description, current_date))
+            await self.db.commit()
+            logging.info("Report added for user_id %s", user_id)
+            return {"message": "Report added successfully"}
+        except Exception as e:
+            logging.error(f"Error adding report for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while adding the report", "details": str(e)}
+
+
+class AsyncInternalIngredientsModel:
+    def __init__(self, db_connection):
+        self.db = db_connection
+
+    async def get_all_ingredients(self, q, limit):
+        """
+        Fetch internal ingredients by name search and limit.
+        """
+        try:
+            async with self.db.cursor() as cursor:
+                await cursor.execute(SEARCH_SQL, search_args(q, limit))
+                ingredients = await cursor.fetchall()
+
+            if not ingredients:
+                logging.info("No ingredients found for query: %s", q)
+                return {"message": f"No ingredients found for query: {q}"}
+
+            logging.info("Found %s ingredients for query: %s", len(ingredients), q)
+            return list(ingredients)
+
+        except Exception as e:
+            logging.error(f"Error searching ingredients with query '{q}': {str(e)}", exc_info=True)
+            return {"error": "An error occurred while searching for ingredients", "details": str(e)}
+
+    async def get_ingredients_by_ids(self, edamam_ids):
+        """
+        Fetch the search columns of the given ingredients, in the order of edamam_ids.
+        """
+        if not edamam_ids:
+            return []
+        try:
+            async with self.db.cursor() as cursor:
+                await cursor.execute(ingredients_by_ids_query(len(edamam_ids)), list(edamam_ids))
+                rows = {row['Edamam_Food_ID']: row for row in await cursor.fetchall()}
+
+            return [rows[edamam_id] for edamam_id in edamam_ids if edamam_id in rows]
+
+        except Exception as e:
+            logging.error(f"Error fetching ingredients by id: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while fetching ingredients", "details": str(e)}
+
+    async def get_nutrition_by_edamam_id(self, edamam_id):
+        """
+        Fetch nutrition details for an ingredient by ID.
+        """
+        try:
+            async with self.db.cursor() as cursor:
+                await cursor.execute(NUTRITION_SQL, (edamam_id,))
+                result = await cursor.fetchone()
+
+            if not result:
+                logging.info("No nutrition info found for Edamam_Food_ID: %s", edamam_id)
+                return {"message": f"No nutrition info found for food ID: {edamam_id}"}
+
+            return result
+
+        except Exception as e:
+            logging.error(f"Error fetching nutrition info for Edamam_Food_ID '{edamam_id}': {str(e)}", exc_info=True)
+            return {"error": "An error occurred while fetching nutrition info", "details": str(e)}
@@ -1,4 +1,15 @@
+import os
 import logging
+from Cache.CategoryResolver import category_resolver
+
+# Rows per multi-row INSERT, keeping each statement well under max_allowed_packet
+UPSERT_BATCH_SIZE = int(os.getenv("CATEGORY_UPSERT_BATCH_SIZE", 500))
+
+
+def chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
 
 class CategoryModel:
     def __init__(self, db_connection):
@@ -21,7 +32,7 @@ class CategoryModel:
                     (category_id, name, description)
                 )
             self.db.commit()
-            logging.info(f"Category {category_id} - '{name}' inserted/updated successfully.")
+            logging.info("Category %s - '%s' inserted/updated successfully.", category_id, name)
             return {"message": f"Category {category_id} processed."}
 
         except Exception as e:
@@ -44,13 +55,70 @@ class CategoryModel:
                     (subcategory_name, category_id)
                 )
             self.db.commit()
-            logging.info(f"Subcategory '{subcategory_name}' in category {category_id} inserted/updated successfully.")
+            logging.info("Subcategory '%s' in category %s inserted/updated successfully.", subcategory_name, category_id)
             return {"message": f"Subcategory '{subcategory_name}' processed."}
 
         except Exception as e:
             logging.error(f"Error inserting/updating subcategory '{subcategory_name}': {str(e)}", exc_info=True)
             return {"error": "Error while processing subcategory", "details": str(e)}
 
+    def get_sync_state(self):
+        """
+        Fetch every stored category and subcategory pair, for diffing a sync against.
+        """
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("SELECT id, name, description FROM Categories;")
+                categories = cursor.fetchall()
+                cursor.execute("SELECT name, category_id FROM Subcategories;")
+                subcategories = cursor.fetchall()
+
+            logging.info("Loaded %s categories and %s subcategories.", len(categories), len(subcategories))
+            return {"categories": list(categories), "subcategories": list(subcategories)}
+
+        except Exception as e:
+            logging.error(f"Error loading stored categories: {str(e)}", exc_info=True)
+            return {"error": "Error while loading categories", "details": str(e)}
+
+    def upsert_categories_bulk(self, categories, subcategories):
+        """
+        Write changed categories (id, name, description) and new subcategories (name, category_id)
+        with multi-row upserts in one transaction.
+        """
+        try:
+            with self.db.cursor() as cursor:
+                for batch in chunks(categories, UPSERT_BATCH_SIZE):
+                    format_strings = ','.join(['(%s, %s, %s)'] * len(batch))
+                    cursor.execute(
+                        f"""
+                        INSERT INTO Categories (id, name, description)
+                        VALUES {format_strings}
+                        ON DUPLICATE KEY UPDATE
+                        name = VALUES(name),
+                        description = VALUES(description)
+                        """,
+                        [value for row in batch for value in row]
+                    )
+                for batch in chunks(subcategories, UPSERT_BATCH_SIZE):
+                    format_strings = ','.join(['(%s, %s)'] * len(batch))
+                    cursor.execute(
+                        f"""
+                        INSERT INTO Subcategories (name, category_id)
+                        VALUES {format_strings}
+                        ON DUPLICATE KEY UPDATE
+                        category_id = VALUES(category_id)
+                        """,
+                        [value for row in batch for value in row]
+                    )
+            self.db.commit()
+            logging.info("Upserted %s categories and %s subcategories.", len(categories), len(subcategories))
+            return {"message": f"Upserted {len(categories)} categories and {len(subcategories)} subcategories."}
+
+        except Exception as e:
+            self.db.rollback()
+            logging.error(f"Error upserting categories: {str(e)}", exc_info=True)
+            return {"error": "Error while upserting categories", "details": str(e)}
+
     def get_all_categories(self):
         """
         Fetch all categories.
@@ -64,37 +132,53 @@ class CategoryModel:
                 logging.info("No categories found.")
                 return {"message": "No categories found."}
 
-            logging.info(f"Fetched {len(categories)} categories.")
+            logging.info("Fetched %s categories.", len(categories))
             return categories
 
         except Exception as e:
             logging.error(f"Error fetching categories: {str(e)}", exc_info=True)
             return {"error": "Error while fetching categories", "details": str(e)}
 
-    def get_category_by_subcategory(self, subcategory_name):
+    def get_subcategory_categories(self):
         """
-        Fetch category ID based on a given subcategory name.
+        Fetch every subcategory with its category name, lowest category id first for names in several.
         """
         try:
             with self.db.cursor() as cursor:
                 cursor.execute(
                     """
-                    SELECT c.name 
+                    SELECT s.name AS subcategory, c.name AS category
                     FROM Subcategories s
                     JOIN Categories c ON s.category_id = c.id
-                    WHERE s.name = %s;
-                    """,
-                    (subcategory_name,)
+                    ORDER BY c.id;
+                    """
                 )
-                category = cursor.fetchone()
+                return cursor.fetchall()
 
-            if not category:
-                logging.info(f"No category found for subcategory {subcategory_name}.")
-                return {"message": f"No category found for subcategory {subcategory_name}."}
+        except Exception as e:
+            logging.error(f"Error fetching subcategory categories: {str(e)}", exc_info=True)
+            return {"error": "Error while fetching subcategory categories", "details": str(e)}
 
-            logging.info(f"Fetched category {category['name']} for subcategory {subcategory_name}.")
-            return category['name']
+    def resolve_categories(self, subcategory_names):
+        """
+        Map each subcategory name to its category name (None when unknown) from the in-process resolver.
+        """
+        if not category_resolver.ensure_fresh(self.get_subcategory_categories):
+            return {"error": "Error while loading categories"}
+        return category_resolver.resolve_categories(subcategory_names)
 
-        except Exception as e:
-            logging.error(f"Error fetching category for subcategory {subcategory_name}: {str(e)}", exc_info=True)
-            return {"error": "Error while fetching category", "details": str(e)}
+    def get_category_by_subcategory(self, subcategory_name):
+        """
+        Fetch category name based on a given subcategory name.
+        """
+        if not category_resolver.ensure_fresh(self.get_subcategory_categories):
+            logging.error(f"Error fetching category for subcategory {subcategory_name}: categories unavailable")
+            return {"error": "Error while fetching category", "details": "Categories could not be loaded"}
+
+        category = category_resolver.resolve_categories([subcategory_name])[subcategory_name]
+        if not category:
+            logging.info("No category found for subcategory %s.", subcategory_name)
+            return {"message": f"No category found for subcategory {subcategory_name}."}
+
+        logging.info("Fetched category %s for subcategory %s.", category, subcategory_name)
+        return category
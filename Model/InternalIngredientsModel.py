@@ -1,4 +1,50 @@
 import logging
+from Config.Db import streaming_cursor
+
+# Rows fetched per round trip while streaming the whole catalog
+CATALOG_BATCH_SIZE = 1000
+
+CATALOG_COLUMNS = (
+    "Edamam_Food_ID", "Name", "Category", "Quantity_Type", "Quantity", "Expiration_Duration", "Image_URL",
+    "Fat", "Cholesterol", "Sodium", "Potassium", "Carbohydrate", "Protein", "Calorie"
+)
+
+# Names containing the query, those starting with it first
+SEARCH_SQL = """
+    SELECT Edamam_Food_ID, Name, Category, Quantity_Type, Expiration_Duration, Image_URL
+    FROM InternalIngredients
+    WHERE LOWER(Name) LIKE %s
+    ORDER BY 
+        CASE 
+            WHEN LOWER(Name) LIKE %s THEN 1
+            ELSE 2
+        END,
+        Name ASC
+    LIMIT %s
+"""
+
+NUTRITION_SQL = """
+    SELECT 
+        Edamam_Food_ID, Name, Category, Quantity_Type, Quantity,
+        Fat, Cholesterol, Sodium, Potassium,
+        Carbohydrate, Protein, Calorie
+    FROM InternalIngredients
+    WHERE Edamam_Food_ID = %s
+"""
+
+
+def search_args(q, limit):
+    search_term = q.lower()
+    return (f"%{search_term}%", f"{search_term}%", int(limit))
+
+
+def ingredients_by_ids_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"""
+        SELECT Edamam_Food_ID, Name, Category, Quantity_Type, Expiration_Duration, Image_URL
+        FROM InternalIngredients
+        WHERE Edamam_Food_ID IN ({format_strings})
+    """
 
 class InternalIngredientsModel:
     def __init__(self, db_connection):
@@ -10,63 +56,98 @@ class InternalIngredientsModel:
         """
         try:
             with self.db.cursor() as cursor:
-                search_term = q.lower()
-                cursor.execute(
-                    """
-                    SELECT Edamam_Food_ID, Name, Category, Quantity_Type, Expiration_Duration, Image_URL
-                    FROM InternalIngredients
-                    WHERE LOWER(Name) LIKE %s
-                    ORDER BY 
-                        CASE 
-                            WHEN LOWER(Name) LIKE %s THEN 1
-                            ELSE 2
-                        END,
-                        Name ASC
-                    LIMIT %s
-                    """,
-                    (f"%{search_term}%", f"{search_term}%", int(limit))
-                )
+                cursor.execute(SEARCH_SQL, search_args(q, limit))
                 ingredients = cursor.fetchall()
 
             if not ingredients:
-                logging.info(f"No ingredients found for query: {q}")
+                logging.info("No ingredients found for query: %s", q)
                 return {"message": f"No ingredients found for query: {q}"}
 
-            logging.info(f"Found {len(ingredients)} ingredients for query: {q}")
+            logging.info("Found %s ingredients for query: %s", len(ingredients), q)
             return ingredients
 
         except Exception as e:
             logging.error(f"Error searching ingredients with query '{q}': {str(e)}", exc_info=True)
             return {"error": "An error occurred while searching for ingredients", "details": str(e)}
 
+    def get_ingredients_by_ids(self, edamam_ids):
+        """
+        Fetch the search columns of the given ingredients, in the order of edamam_ids.
+        """
+        if not edamam_ids:
+            return []
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute(ingredients_by_ids_query(len(edamam_ids)), list(edamam_ids))
+                rows = {row['Edamam_Food_ID']: row for row in cursor.fetchall()}
+
+            return [rows[edamam_id] for edamam_id in edamam_ids if edamam_id in rows]
+
+        except Exception as e:
+            logging.error(f"Error fetching ingredients by id: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while fetching ingredients", "details": str(e)}
+
     def get_nutrition_by_edamam_id(self, edamam_id):
         """
         Fetch nutrition details for an ingredient by ID.
         """
         try:
             with self.db.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT 
-                        Edamam_Food_ID, Name, Category, Quantity_Type, Quantity,
-                        Fat, Cholesterol, Sodium, Potassium,
-                        Carbohydrate, Protein, Calorie
-                    FROM InternalIngredients
-                    WHERE Edamam_Food_ID = %s
-                    """,
-                    (edamam_id,)
-                )
+                cursor.execute(NUTRITION_SQL, (edamam_id,))
                 result = cursor.fetchone()
 
             if not result:
-                logging.info(f"No nutrition info found for Edamam_Food_ID: {edamam_id}")
+                logging.info("No nutrition info found for Edamam_Food_ID: %s", edamam_id)
                 return {"message": f"No nutrition info found for food ID: {edamam_id}"}
 
-            logging.info(f"Nutrition info found for Edamam_Food_ID: {edamam_id}")
+            logging.info("Nutrition info found for Edamam_Food_ID: %s", edamam_id)
             return result
 
         except Exception as e:
             logging.error(f"Error fetching nutrition info for Edamam_Food_ID '{edamam_id}': {str(e)}", exc_info=True)
             return {"error": "An error occurred while fetching nutrition info", "details": str(e)}
 
+    def stream_catalog(self, columns=CATALOG_COLUMNS):
+        """
+        Yield every InternalIngredients row from an unbuffered cursor, for exports of the whole catalog.
+        """
+        cursor = streaming_cursor(self.db)
+        try:
+            cursor.execute(f"SELECT {', '.join(columns)} FROM InternalIngredients")
+            while True:
+                rows = cursor.fetchmany(CATALOG_BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+
+        except Exception as e:
+            logging.error(f"Error streaming the ingredient catalog: {str(e)}", exc_info=True)
+            raise
+
+        finally:
+            cursor.close()
 
+    def upsert_ingredients(self, rows):
+        """
+        Insert or update catalog rows, tuples in CATALOG_COLUMNS order, as one multi-row statement and commit.
+        """
+        try:
+            with self.db.cursor() as cursor:
+                # Placeholders only in VALUES, so pymysql folds executemany into multi-row INSERTs
+                cursor.executemany(
+                    f"""
+                    INSERT INTO InternalIngredients ({', '.join(CATALOG_COLUMNS)})
+                    VALUES ({', '.join(['%s'] * len(CATALOG_COLUMNS))})
+                    ON DUPLICATE KEY UPDATE
+                    {', '.join(f"{column} = VALUES({column})" for column in CATALOG_COLUMNS[1:])}
+                    """,
+                    rows
+                )
+            self.db.commit()
+            logging.info("Upserted %s catalog ingredients", len(rows))
+            return {"message": f"Upserted {len(rows)} ingredients"}
+
+        except Exception as e:
+            self.db.rollback()
+            logging.error(f"Error upserting {len(rows)} catalog ingredients: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while upserting ingredients", "details": str(e)}
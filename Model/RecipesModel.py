@@ -1,4 +1,134 @@
 import logging
+from datetime import datetime
+from Cache.RecipeCatalogCache import recipe_catalog_cache
+from Cache.RecipeIngredientIndex import recipe_ingredient_index
+
+CATALOG_COLUMNS = "uri, label, image, url, calories, total_weight, cuisine_type, meal_type, dish_type"
+
+USER_RECIPE_URIS_SQL = "SELECT uri FROM UserRecipes WHERE user_id = %s ORDER BY date_added"
+DELETE_USER_RECIPE_SQL = "DELETE FROM UserRecipes WHERE uri = %s AND user_id = %s;"
+RECIPE_INGREDIENTS_SQL = "SELECT uri, edamam_food_id FROM RecipeIngredients"
+
+
+def catalog_recipes_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"SELECT {CATALOG_COLUMNS} FROM RecipeCatalog WHERE uri IN ({format_strings})"
+
+
+def existing_catalog_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"SELECT uri FROM RecipeCatalog WHERE uri IN ({format_strings})"
+
+
+def indexed_uris_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"SELECT DISTINCT uri FROM RecipeIngredients WHERE uri IN ({format_strings})"
+
+
+def user_recipes_in_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"SELECT uri FROM UserRecipes WHERE user_id = %s AND uri IN ({format_strings})"
+
+
+def delete_user_recipes_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"DELETE FROM UserRecipes WHERE user_id = %s AND uri IN ({format_strings})"
+
+
+def insert_catalog_query(count):
+    format_strings = ','.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s)'] * count)
+    return f"INSERT IGNORE INTO RecipeCatalog ({CATALOG_COLUMNS}) VALUES {format_strings}"
+
+
+def insert_links_statement(user_id, uris):
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    format_strings = ','.join(['(%s, %s, %s)'] * len(uris))
+    return (
+        f"INSERT IGNORE INTO UserRecipes (user_id, uri, date_added) VALUES {format_strings}",
+        [value for uri in uris for value in (user_id, uri, timestamp)]
+    )
+
+
+def insert_ingredients_statement(ingredients):
+    """
+    INSERT IGNORE of RecipeIngredients for {uri: food_ids}, None when there are no ingredients.
+    """
+    rows = [(uri, food_id) for uri, food_ids in ingredients.items() for food_id in food_ids]
+    if not rows:
+        return None
+    format_strings = ','.join(['(%s, %s)'] * len(rows))
+    return (
+        f"INSERT IGNORE INTO RecipeIngredients (uri, edamam_food_id) VALUES {format_strings}",
+        [value for row in rows for value in row]
+    )
+
+
+def to_catalog_row(recipe):
+    """
+    Shared recipe metadata row in RecipeCatalog column order.
+    """
+    return (
+        recipe['uri'],
+        recipe['label'],
+        recipe.get('image', ''),
+        recipe.get('url', ''),
+        recipe['calories'],
+        recipe['total_weight'],
+        recipe.get('cuisine_type', ''),
+        recipe.get('meal_type', ''),
+        recipe.get('dish_type', ''),
+    )
+
+
+def to_food_ids(recipe):
+    """
+    Ingredient edamam_food_ids of a recipe, given as ids or Edamam ingredient objects.
+    """
+    food_ids = []
+    for ingredient in recipe.get('ingredients') or []:
+        food_id = (ingredient.get('edamam_food_id') or ingredient.get('foodId')) if isinstance(ingredient, dict) else ingredient
+        if food_id and isinstance(food_id, str) and food_id not in food_ids:
+            food_ids.append(food_id)
+    return food_ids
+
+
+def to_recipes_batch(recipes):
+    """
+    Per-recipe results of a batch add, with the catalog rows and ingredient food ids of the recipes to store.
+    """
+    results = []
+    rows = {}
+    ingredients = {}
+    for recipe in recipes:
+        uri = recipe.get('uri') if isinstance(recipe, dict) else None
+        if not uri or not all(key in recipe for key in ('label', 'calories', 'total_weight')):
+            results.append({"uri": uri, "status": "invalid"})
+        elif uri in rows:
+            results.append({"uri": uri, "status": "duplicate"})
+        else:
+            rows[uri] = to_catalog_row(recipe)
+            ingredients[uri] = to_food_ids(recipe)
+            results.append({"uri": uri, "status": "added"})
+    return results, rows, ingredients
+
+
+def to_uris_batch(recipes):
+    """
+    Per-recipe results of a batch removal, with the uris to remove. Recipes are given as uris or objects.
+    """
+    results = []
+    uris = []
+    for recipe in recipes:
+        uri = recipe.get('uri') if isinstance(recipe, dict) else recipe
+        if not uri or not isinstance(uri, str):
+            results.append({"uri": None, "status": "invalid"})
+        elif uri in uris:
+            results.append({"uri": uri, "status": "duplicate"})
+        else:
+            uris.append(uri)
+            results.append({"uri": uri, "status": "removed"})
+    return results, uris
+
 
 class RecipesModel:
     def __init__(self, db_connection):
@@ -12,59 +142,112 @@ class RecipesModel:
             with self.db.cursor() as cursor:
                 cursor.execute(
                     """
-                    SELECT uri, label, image, url, calories, total_weight, cuisine_type, meal_type, dish_type
-                    FROM Recipes
+                    SELECT uri
+                    FROM UserRecipes
                     WHERE user_id = %s
+                    ORDER BY date_added
                     """,
                     (user_id,)
                 )
-                recipes = cursor.fetchall()
+                uris = [row['uri'] for row in cursor.fetchall()]
 
-            if not recipes:
-                logging.info(f"No recipes found for user_id {user_id}")
+            if not uris:
+                logging.info("No recipes found for user_id %s", user_id)
                 return {"message": f"No recipes found for user_id {user_id}"}
 
-            logging.info(f"Fetched {len(recipes)} recipes for user_id {user_id}")
+            recipes = recipe_catalog_cache.get_many(uris, self.get_catalog_recipes)
+
+            logging.info("Fetched %s recipes for user_id %s", len(recipes), user_id)
             return recipes
 
         except Exception as e:
             logging.error(f"Error fetching recipes for user_id {user_id}: {str(e)}", exc_info=True)
             return {"error": "An error occurred while fetching recipes", "details": str(e)}
 
+    def iter_all_recipes(self, user_id, batch_size=100):
+        """
+        Yield all recipes for a specific user, loading uris and then their catalog rows a batch at a time.
+        """
+        for uris in self.iter_user_recipe_uris(user_id, batch_size):
+            yield from recipe_catalog_cache.get_many(uris, self.get_catalog_recipes)
+
+    def iter_user_recipe_uris(self, user_id, batch_size=100):
+        """
+        Yield the uris a user saved in batches, oldest first. Keyset pages keep the connection free
+        between batches for the catalog lookups.
+        """
+        after = None
+        while True:
+            with self.db.cursor() as cursor:
+                if after is None:
+                    cursor.execute(
+                        "SELECT uri, date_added FROM UserRecipes WHERE user_id = %s ORDER BY date_added, uri LIMIT %s",
+                        (user_id, batch_size)
+                    )
+                else:
+                    cursor.execute(
+                        """
+                        SELECT uri, date_added FROM UserRecipes
+                        WHERE user_id = %s AND (date_added > %s OR (date_added = %s AND uri > %s))
+                        ORDER BY date_added, uri
+                        LIMIT %s
+                        """,
+                        (user_id, after[0], after[0], after[1], batch_size)
+                    )
+                rows = cursor.fetchall()
+
+            if rows:
+                yield [row['uri'] for row in rows]
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]['date_added'], rows[-1]['uri'])
+
+    def get_catalog_recipes(self, uris):
+        """
+        Fetch shared recipe metadata by uri.
+        """
+        with self.db.cursor() as cursor:
+            cursor.execute(catalog_recipes_query(len(uris)), list(uris))
+            return cursor.fetchall()
+
+    def get_user_recipe_uris(self, user_id):
+        """
+        Fetch the uris of every recipe a user saved, oldest first.
+        """
+        with self.db.cursor() as cursor:
+            cursor.execute(USER_RECIPE_URIS_SQL, (user_id,))
+            return [row['uri'] for row in cursor.fetchall()]
+
+    def get_all_recipe_ingredients(self):
+        """
+        Fetch every (uri, edamam_food_id) pair to build the ingredient index.
+        """
+        with self.db.cursor() as cursor:
+            cursor.execute(RECIPE_INGREDIENTS_SQL)
+            return cursor.fetchall()
+
     def add_recipe(self, user_id, recipe):
         """
         Add a recipe for a specific user.
         """
         try:
             if not recipe or 'uri' not in recipe:
-                logging.warning(f"Invalid input: {recipe}")
+                logging.warning("Invalid input: %s", recipe)
                 return {"error": "Invalid recipe data. Each recipe must have a 'uri'."}
 
             with self.db.cursor() as cursor:
-                logging.info(f"Adding recipe {recipe['uri']} for user_id {user_id}")
-
-                sql = """
-                INSERT IGNORE INTO Recipes (uri, user_id, label, image, url, calories, total_weight, cuisine_type, meal_type, dish_type)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-                """
-
-                data = (
-                    recipe['uri'],
-                    user_id,
-                    recipe['label'],
-                    recipe.get('image', ''),
-                    recipe.get('url', ''),
-                    recipe['calories'],
-                    recipe['total_weight'],
-                    recipe.get('cuisine_type', ''), 
-                    recipe.get('meal_type', ''),
-                    recipe.get('dish_type', ''),
-                )
+                logging.info("Adding recipe %s for user_id %s", recipe['uri'], user_id)
 
-                cursor.execute(sql, data)
+                food_ids = to_food_ids(recipe)
+                self._insert_catalog(cursor, {recipe['uri']: to_catalog_row(recipe)})
+                self._insert_links(cursor, user_id, [recipe['uri']])
+                indexed = self._insert_missing_ingredients(cursor, {recipe['uri']: food_ids})
                 self.db.commit()
 
-            logging.info(f"Successfully added recipe {recipe['uri']} for user_id {user_id} (or ignored if duplicate)")
+            for uri, food_ids in indexed.items():
+                recipe_ingredient_index.publish(uri, food_ids)
+
+            logging.info("Successfully added recipe %s for user_id %s (or ignored if duplicate)", recipe['uri'], user_id)
             return {"message": f"Successfully added recipe {recipe['uri']} (or ignored if already exists)"}
 
         except Exception as e:
@@ -78,17 +261,16 @@ class RecipesModel:
         """
         try:
             if not recipe or 'uri' not in recipe:
-                logging.warning(f"Invalid input: {recipe}")
+                logging.warning("Invalid input: %s", recipe)
                 return {"error": "Invalid recipe data. Each recipe must have a 'uri'."}
 
             with self.db.cursor() as cursor:
-                logging.info(f"Removing recipe {recipe['uri']} for user_id {user_id}")
+                logging.info("Removing recipe %s for user_id %s", recipe['uri'], user_id)
 
-                sql = "DELETE FROM Recipes WHERE uri = %s AND user_id = %s;"
-                cursor.execute(sql, (recipe['uri'], user_id))
+                cursor.execute(DELETE_USER_RECIPE_SQL, (recipe['uri'], user_id))
                 self.db.commit()
 
-            logging.info(f"Successfully removed recipe {recipe['uri']} for user_id {user_id}")
+            logging.info("Successfully removed recipe %s for user_id %s", recipe['uri'], user_id)
             return {"message": f"Successfully removed recipe {recipe['uri']}"}
 
         except Exception as e:
@@ -96,3 +278,144 @@ class RecipesModel:
             logging.error(f"Error removing recipe {recipe['uri']} for user_id {user_id}: {str(e)}", exc_info=True)
             return {"error": "An error occurred while removing the recipe", "details": str(e)}
 
+    def add_recipes_batch(self, user_id, recipes):
+        """
+        Add many recipes for a specific user with one multi-row insert.
+        """
+        try:
+            results, rows, ingredients = to_recipes_batch(recipes)
+
+            if rows:
+                with self.db.cursor() as cursor:
+                    existing = self._get_existing_uris(cursor, user_id, list(rows))
+
+                    self._insert_catalog(cursor, rows)
+                    self._insert_links(cursor, user_id, list(rows))
+                    indexed = self._insert_missing_ingredients(cursor, ingredients)
+                self.db.commit()
+
+                for uri, food_ids in indexed.items():
+                    recipe_ingredient_index.publish(uri, food_ids)
+
+                for result in results:
+                    if result["status"] == "added" and result["uri"] in existing:
+                        result["status"] = "exists"
+
+            added = sum(1 for result in results if result["status"] == "added")
+            logging.info("Added %s of %s recipes for user_id %s", added, len(recipes), user_id)
+            return {"message": f"Added {added} recipes", "results": results}
+
+        except Exception as e:
+            self.db.rollback()
+            logging.error(f"Error adding recipes batch for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while adding the recipes", "details": str(e)}
+
+    def delete_recipes_batch(self, user_id, recipes):
+        """
+        Remove many recipes for a specific user with one DELETE ... IN.
+        """
+        try:
+            results, uris = to_uris_batch(recipes)
+
+            if uris:
+                with self.db.cursor() as cursor:
+                    existing = self._get_existing_uris(cursor, user_id, uris)
+
+                    cursor.execute(delete_user_recipes_query(len(uris)), [user_id] + uris)
+                self.db.commit()
+
+                for result in results:
+                    if result["status"] == "removed" and result["uri"] not in existing:
+                        result["status"] = "not_found"
+
+            removed = sum(1 for result in results if result["status"] == "removed")
+            logging.info("Removed %s of %s recipes for user_id %s", removed, len(recipes), user_id)
+            return {"message": f"Removed {removed} recipes", "results": results}
+
+        except Exception as e:
+            self.db.rollback()
+            logging.error(f"Error removing recipes batch for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while removing the recipes", "details": str(e)}
+
+    def refresh_catalog(self, recipes):
+        """
+        Overwrite shared metadata and ingredients with recipes from a trusted source such as Edamam,
+        never with what a user sent. Returns the number of recipes refreshed.
+        """
+        try:
+            rows, ingredients = {}, {}
+            for recipe in recipes:
+                rows[recipe['uri']] = to_catalog_row(recipe)
+                ingredients[recipe['uri']] = to_food_ids(recipe)
+            if not rows:
+                return {"message": "Refreshed 0 recipes"}
+
+            with self.db.cursor() as cursor:
+                format_strings = ','.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(rows))
+                cursor.execute(
+                    f"""
+                    INSERT INTO RecipeCatalog ({CATALOG_COLUMNS})
+                    VALUES {format_strings}
+                    ON DUPLICATE KEY UPDATE
+                        label = VALUES(label),
+                        image = VALUES(image),
+                        url = VALUES(url),
+                        calories = VALUES(calories),
+                        total_weight = VALUES(total_weight),
+                        cuisine_type = VALUES(cuisine_type),
+                        meal_type = VALUES(meal_type),
+                        dish_type = VALUES(dish_type)
+                    """,
+                    [value for row in rows.values() for value in row]
+                )
+                format_strings = ','.join(['%s'] * len(rows))
+                cursor.execute(f"DELETE FROM RecipeIngredients WHERE uri IN ({format_strings})", list(rows))
+                self._insert_ingredients(cursor, ingredients)
+            self.db.commit()
+
+            recipe_catalog_cache.invalidate(list(rows))
+            for uri, food_ids in ingredients.items():
+                recipe_ingredient_index.publish(uri, food_ids)
+
+            logging.info("Refreshed %s catalog recipes", len(rows))
+            return {"message": f"Refreshed {len(rows)} recipes"}
+
+        except Exception as e:
+            self.db.rollback()
+            logging.error(f"Error refreshing catalog recipes: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while refreshing the recipes", "details": str(e)}
+
+    def _insert_catalog(self, cursor, rows):
+        # User saves only create missing catalog rows, so no user can rewrite what every other user sees
+        cursor.execute(existing_catalog_query(len(rows)), list(rows))
+        existing = {row['uri'] for row in cursor.fetchall()}
+        added = [uri for uri in rows if uri not in existing]
+        if not added:
+            return added
+
+        cursor.execute(insert_catalog_query(len(added)), [value for uri in added for value in rows[uri]])
+        return added
+
+    def _insert_links(self, cursor, user_id, uris):
+        cursor.execute(*insert_links_statement(user_id, uris))
+
+    def _insert_ingredients(self, cursor, ingredients):
+        statement = insert_ingredients_statement(ingredients)
+        if statement:
+            cursor.execute(*statement)
+
+    def _insert_missing_ingredients(self, cursor, ingredients):
+        # Any recipe still without ingredients gets them, new to the catalog or not, while a user
+        # save never changes the ingredients of a recipe that has some. Returns what was stored.
+        ingredients = {uri: food_ids for uri, food_ids in ingredients.items() if food_ids}
+        if not ingredients:
+            return {}
+        cursor.execute(indexed_uris_query(len(ingredients)), list(ingredients))
+        indexed = {row['uri'] for row in cursor.fetchall()}
+        missing = {uri: food_ids for uri, food_ids in ingredients.items() if uri not in indexed}
+        self._insert_ingredients(cursor, missing)
+        return missing
+
+    def _get_existing_uris(self, cursor, user_id, uris):
+        cursor.execute(user_recipes_in_query(len(uris)), [user_id] + uris)
+        return {row['uri'] for row in cursor.fetchall()}
@@ -1,6 +1,18 @@
 import logging
 from datetime import datetime
 
+REPORTS_SQL = """
+    SELECT id, user_id, subject, description, date
+    FROM Reports
+    WHERE user_id = %s
+    ORDER BY date DESC
+"""
+
+ADD_REPORT_SQL = """
+    INSERT INTO Reports (user_id, subject, description, date)
+    VALUES (%s, %s, %s, %s)
+"""
+
 
 class ReportsModel:
     def __init__(self, db_connection):
@@ -12,18 +24,10 @@ class ReportsModel:
         """
         try:
             with self.db.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT id, user_id, subject, description, date
-                    FROM Reports
-                    WHERE user_id = %s
-                    ORDER BY date DESC
-                    """,
-                    (user_id,)
-                )
+                cursor.execute(REPORTS_SQL, (user_id,))
                 reports = cursor.fetchall()
 
-            logging.info(f"Fetched {len(reports)} reports for user_id {user_id}")
+            logging.info("Fetched %s reports for user_id %s", len(reports), user_id)
             return reports
 
         except Exception as e:
@@ -39,15 +43,9 @@ class ReportsModel:
             current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
             with self.db.cursor() as cursor:
-                cursor.execute(
-                    """
-                    INSERT INTO Reports (user_id, subject, description, date)
-                    VALUES (%s, %s, %s, %s)
-                    """,
-                    (user_id, subject, description, current_date)
-                )
+                cursor.execute(ADD_REPORT_SQL, (user_id, subject, description, current_date))
             self.db.commit()
-            logging.info(f"Report added for user_id {user_id}")
+            logging.info("Report added for user_id %s", user_id)
             return {"message": "Report added successfully"}
         except Exception as e:
             logging.error(f"Error adding report for user_id {user_id}: {str(e)}", exc_info=True)
@@ -1,5 +1,201 @@
+import math
 import logging
 from datetime import datetime
+from Config.Db import streaming_cursor
+
+BULK_OPERATIONS = ('add', 'set', 'remove')
+STREAM_BATCH_SIZE = 500
+
+USER_INGREDIENTS_SQL = """
+    SELECT 
+        ui.edamam_food_id,
+        ui.quantity,
+        ui.date_added,
+        ii.Name,
+        ii.Category,
+        ii.Quantity_Type,
+        ii.Expiration_Duration,
+        ii.Image_URL,
+        ii.Fat,
+        ii.Cholesterol,
+        ii.Sodium,
+        ii.Potassium,
+        ii.Carbohydrate,
+        ii.Protein,
+        ii.Calorie,
+        ii.Quantity AS internal_quantity
+    FROM UserIngredients ui
+    JOIN InternalIngredients ii
+        ON ui.edamam_food_id = ii.Edamam_Food_ID
+    WHERE ui.user_id = %s
+"""
+
+EXPIRING_INGREDIENTS_SQL = """
+    SELECT ui.user_id, ui.edamam_food_id, ui.quantity, ui.date_added,
+        ii.Name, ii.Expiration_Duration,
+        TIMESTAMPDIFF(DAY, ui.date_added, NOW()) AS days_elapsed,
+        (ii.Expiration_Duration - TIMESTAMPDIFF(DAY, ui.date_added, NOW())) AS days_left
+    FROM UserIngredients ui
+    JOIN InternalIngredients ii
+    ON ui.edamam_food_id = ii.Edamam_Food_ID
+    WHERE (ii.Expiration_Duration - TIMESTAMPDIFF(DAY, ui.date_added, NOW())) BETWEEN 0 AND 1
+    AND ui.user_id = %s
+"""
+
+# One row each, executemany folds the upsert into multi-row INSERTs
+UPSERT_INGREDIENT_SQL = """
+    INSERT INTO UserIngredients (user_id, edamam_food_id, quantity, date_added)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE 
+        quantity = quantity + VALUES(quantity),
+        date_added = VALUES(date_added)
+"""
+DELETE_INGREDIENT_SQL = """
+    DELETE FROM UserIngredients
+    WHERE user_id = %s AND edamam_food_id = %s
+"""
+USER_FOOD_IDS_SQL = "SELECT edamam_food_id FROM UserIngredients WHERE user_id = %s AND quantity > 0"
+
+INVALID_INGREDIENTS = "Each ingredient must have 'edamam_food_id' and 'quantity'"
+
+
+def delete_ingredients_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"""
+        DELETE FROM UserIngredients
+        WHERE user_id = %s AND edamam_food_id IN ({format_strings})
+    """
+
+
+def bulk_rows_query(count):
+    format_strings = ','.join(['%s'] * count)
+    return f"""
+        SELECT 
+            ui.edamam_food_id,
+            ui.quantity,
+            ui.date_added,
+            ii.Name,
+            ii.Category,
+            ii.Quantity_Type,
+            ii.Expiration_Duration,
+            ii.Image_URL
+        FROM UserIngredients ui
+        JOIN InternalIngredients ii
+            ON ui.edamam_food_id = ii.Edamam_Food_ID
+        WHERE ui.user_id = %s AND ui.edamam_food_id IN ({format_strings})
+    """
+
+
+def to_quantity(quantity):
+    """
+    Normalize a quantity to an int when it is whole. Raises ValueError when it is not a finite number.
+    """
+    try:
+        value = float(quantity)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid quantity: {quantity!r}")
+    if not math.isfinite(value):
+        raise ValueError(f"Invalid quantity: {quantity!r}")
+    return int(value) if value.is_integer() else value
+
+
+def merge_change(older, newer):
+    """
+    Compose two (reset, delta) quantity changes for the same ingredient, oldest first.
+    """
+    if newer[0]:
+        return newer
+    return (older[0], older[1] + newer[1])
+
+
+def to_bulk_changes(user_id, operations):
+    """
+    Validate add/set/remove operations and merge them into (reset, delta) changes per ingredient.
+    Raises ValueError describing the first invalid operation.
+    """
+    changes = {}
+    for operation in operations or []:
+        if not isinstance(operation, dict):
+            raise ValueError("Each operation must be an object")
+        op = operation.get('op')
+        food_id = operation.get('edamam_food_id')
+        if op not in BULK_OPERATIONS or not food_id or (op != 'remove' and 'quantity' not in operation):
+            raise ValueError("Each operation needs 'op' (add, set or remove), 'edamam_food_id' and, unless removing, 'quantity'")
+
+        if op == 'remove':
+            change = (True, 0)
+        elif op == 'set':
+            change = (True, to_quantity(operation['quantity']))
+        else:
+            change = (False, to_quantity(operation['quantity']))
+
+        key = (user_id, food_id)
+        changes[key] = merge_change(changes[key], change) if key in changes else change
+
+    if not changes:
+        raise ValueError("No operations provided")
+    return changes
+
+
+def to_ingredient_updates(user_id, ingredients):
+    """
+    Split /update ingredients into UPSERT_INGREDIENT_SQL rows and DELETE_INGREDIENT_SQL rows, a quantity
+    of 0 removing the ingredient. Raises ValueError when an ingredient lacks 'edamam_food_id' or 'quantity'.
+    """
+    if not ingredients or not all('edamam_food_id' in ing and 'quantity' in ing for ing in ingredients):
+        raise ValueError(INVALID_INGREDIENTS)
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    insert_data = []
+    delete_data = []
+    for ing in ingredients:
+        if int(ing['quantity']) == 0:
+            delete_data.append((user_id, ing['edamam_food_id']))
+        else:
+            insert_data.append((user_id, ing['edamam_food_id'], ing['quantity'], timestamp))
+    return insert_data, delete_data
+
+
+def quantity_change_statements(changes):
+    """
+    Statements applying coalesced (reset, delta) changes: reset rows are deleted first, then every
+    non-zero delta goes through one multi-row additive upsert. Returns (statements, upserted, removed).
+    """
+    resets = [key for key, (reset, _) in changes.items() if reset]
+    upserts = [(user_id, food_id, delta) for (user_id, food_id), (_, delta) in changes.items() if delta]
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    statements = []
+
+    # One user's resets use the index-friendly form /delete uses, row constructors are only for a mix of users
+    reset_users = {user_id for user_id, _ in resets}
+    if len(reset_users) == 1:
+        statements.append((delete_ingredients_query(len(resets)), [*reset_users] + [food_id for _, food_id in resets]))
+    elif resets:
+        format_strings = ','.join(['(%s, %s)'] * len(resets))
+        statements.append((
+            f"""
+            DELETE FROM UserIngredients
+            WHERE (user_id, edamam_food_id) IN ({format_strings})
+            """,
+            [value for key in resets for value in key]
+        ))
+
+    if upserts:
+        format_strings = ','.join(['(%s, %s, %s, %s)'] * len(upserts))
+        statements.append((
+            f"""
+            INSERT INTO UserIngredients (user_id, edamam_food_id, quantity, date_added)
+            VALUES {format_strings}
+            ON DUPLICATE KEY UPDATE
+                quantity = quantity + VALUES(quantity),
+                date_added = VALUES(date_added)
+            """,
+            [value for row in upserts for value in (*row, timestamp)]
+        ))
+
+    removed = sum(1 for key in resets if not changes[key][1])
+    return statements, len(upserts), removed
+
 
 class UserIngredientsModel:
     def __init__(self, db_connection):
@@ -11,96 +207,71 @@ class UserIngredientsModel:
         """
         try:
             with self.db.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT 
-                        ui.edamam_food_id,
-                        ui.quantity,
-                        ui.date_added,
-                        ii.Name,
-                        ii.Category,
-                        ii.Quantity_Type,
-                        ii.Expiration_Duration,
-                        ii.Image_URL,
-                        ii.Fat,
-                        ii.Cholesterol,
-                        ii.Sodium,
-                        ii.Potassium,
-                        ii.Carbohydrate,
-                        ii.Protein,
-                        ii.Calorie,
-                        ii.Quantity AS internal_quantity
-                    FROM UserIngredients ui
-                    JOIN InternalIngredients ii
-                        ON ui.edamam_food_id = ii.Edamam_Food_ID
-                    WHERE ui.user_id = %s
-                    """,
-                    (user_id,)
-                )
+                cursor.execute(USER_INGREDIENTS_SQL, (user_id,))
                 ingredients = cursor.fetchall()
 
             if not ingredients:
-                logging.info(f"No ingredients found for user_id {user_id}")
+                logging.info("No ingredients found for user_id %s", user_id)
                 return []
 
-            logging.info(f"Fetched {len(ingredients)} ingredients for user_id {user_id}")
+            logging.info("Fetched %s ingredients for user_id %s", len(ingredients), user_id)
             return ingredients
 
         except Exception as e:
             logging.error(f"Error fetching ingredients for user_id {user_id}: {str(e)}", exc_info=True)
             return {"error": "An error occurred while fetching ingredients", "details": str(e)}
 
+    def stream_user_ingredients(self, user_id):
+        """
+        Yield all ingredients for a specific user from an unbuffered cursor, for streamed responses.
+        The connection stays busy until the generator is exhausted or closed.
+        """
+        cursor = streaming_cursor(self.db)
+        try:
+            cursor.execute(USER_INGREDIENTS_SQL, (user_id,))
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                yield from rows
+
+        except Exception as e:
+            logging.error(f"Error streaming ingredients for user_id {user_id}: {str(e)}", exc_info=True)
+            raise
+
+        finally:
+            cursor.close()
+
+    def get_user_food_ids(self, user_id):
+        """
+        Fetch the edamam_food_ids in a user's pantry.
+        """
+        with self.db.cursor() as cursor:
+            cursor.execute(USER_FOOD_IDS_SQL, (user_id,))
+            return [row['edamam_food_id'] for row in cursor.fetchall()]
+
     def update_user_ingredients_batch(self, user_id, ingredients):
         """
         Insert or update user ingredients.
         If quantity becomes 0, the ingredient is removed instead.
         """
         try:
-            if not ingredients or not all('edamam_food_id' in ing and 'quantity' in ing for ing in ingredients):
-                logging.warning("[update_user_ingredients_batch] Invalid input")
-                return {"error": "Each ingredient must have 'edamam_food_id' and 'quantity'"}
+            try:
+                insert_data, delete_data = to_ingredient_updates(user_id, ingredients)
+            except ValueError as e:
+                logging.warning("[update_user_ingredients_batch] Invalid input: %s", e)
+                return {"error": str(e)}
 
             with self.db.cursor() as cursor:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                insert_data = []
-                delete_data = []
-
-                for ing in ingredients:
-                    if int(ing['quantity']) == 0:
-                        delete_data.append((user_id, ing['edamam_food_id']))
-                    else:
-                        insert_data.append((
-                            user_id,
-                            ing['edamam_food_id'],
-                            ing['quantity'],
-                            timestamp
-                        ))
-
                 if insert_data:
-                    cursor.executemany(
-                        """
-                        INSERT INTO UserIngredients (user_id, edamam_food_id, quantity, date_added)
-                        VALUES (%s, %s, %s, %s)
-                        ON DUPLICATE KEY UPDATE 
-                            quantity = quantity + VALUES(quantity),
-                            date_added = VALUES(date_added)
-                        """,
-                        insert_data
-                    )
+                    cursor.executemany(UPSERT_INGREDIENT_SQL, insert_data)
 
                 if delete_data:
-                    cursor.executemany(
-                        """
-                        DELETE FROM UserIngredients
-                        WHERE user_id = %s AND edamam_food_id = %s
-                        """,
-                        delete_data
-                    )
+                    cursor.executemany(DELETE_INGREDIENT_SQL, delete_data)
 
                 self.db.commit()
 
-            logging.info(f"Successfully updated ingredients for user_id {user_id}")
+            logging.info("Successfully updated ingredients for user_id %s", user_id)
             return {"message": f"Updated {len(insert_data)} and removed {len(delete_data)} ingredients"}
 
         except Exception as e:
@@ -108,6 +279,62 @@ class UserIngredientsModel:
             logging.error(f"Error adding ingredients for user_id {user_id}: {str(e)}", exc_info=True)
             return {"error": "An error occurred while adding ingredients", "details": str(e)}
 
+    def apply_quantity_changes(self, changes):
+        """
+        Apply coalesced quantity changes in one transaction.
+        Changes map (user_id, edamam_food_id) to (reset, delta).
+        """
+        try:
+            with self.db.cursor() as cursor:
+                upserted, removed = self._write_quantity_changes(cursor, changes)
+
+            self.db.commit()
+
+            logging.info("Applied %s coalesced ingredient changes", len(changes))
+            return {"message": f"Updated {upserted} and removed {removed} ingredients"}
+
+        except Exception as e:
+            self.db.rollback()
+            logging.error(f"Error applying coalesced ingredient changes: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while applying ingredient changes", "details": str(e)}
+
+    def apply_bulk_operations(self, user_id, operations):
+        """
+        Apply a list of add/set/remove operations in one transaction and return the resulting rows.
+        """
+        try:
+            changes = to_bulk_changes(user_id, operations)
+        except ValueError as e:
+            logging.warning("[apply_bulk_operations] Invalid operations: %s", e)
+            return {"error": str(e)}
+
+        try:
+            with self.db.cursor() as cursor:
+                upserted, removed = self._write_quantity_changes(cursor, changes)
+
+                food_ids = [food_id for _, food_id in changes]
+                cursor.execute(bulk_rows_query(len(food_ids)), [user_id] + food_ids)
+                rows = cursor.fetchall()
+
+            self.db.commit()
+
+            logging.info("Applied %s bulk operations for user_id %s", len(operations), user_id)
+            return {
+                "message": f"Updated {upserted} and removed {removed} ingredients",
+                "ingredients": rows
+            }
+
+        except Exception as e:
+            self.db.rollback()
+            logging.error(f"Error applying bulk operations for user_id {user_id}: {str(e)}", exc_info=True)
+            return {"error": "An error occurred while applying bulk operations", "details": str(e)}
+
+    def _write_quantity_changes(self, cursor, changes):
+        statements, upserted, removed = quantity_change_statements(changes)
+        for statement, args in statements:
+            cursor.execute(statement, args)
+        return upserted, removed
+
     def get_all_ingredients_expiring_grouped(self):
         """
         Gets ingredients that are expiring within 24 hours from all users
@@ -136,7 +363,7 @@ class UserIngredientsModel:
                     grouped[user_id] = []
                 grouped[user_id].append(row)
 
-            logging.info(f"Grouped expiring ingredients for {len(grouped)} users")
+            logging.info("Grouped expiring ingredients for %s users", len(grouped))
             return grouped
 
         except Exception as e:
@@ -149,23 +376,10 @@ class UserIngredientsModel:
         """
         try:
             with self.db.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT ui.user_id, ui.edamam_food_id, ui.quantity, ui.date_added,
-                        ii.Name, ii.Expiration_Duration,
-                        TIMESTAMPDIFF(DAY, ui.date_added, NOW()) AS days_elapsed,
-                        (ii.Expiration_Duration - TIMESTAMPDIFF(DAY, ui.date_added, NOW())) AS days_left
-                    FROM UserIngredients ui
-                    JOIN InternalIngredients ii
-                    ON ui.edamam_food_id = ii.Edamam_Food_ID
-                    WHERE (ii.Expiration_Duration - TIMESTAMPDIFF(DAY, ui.date_added, NOW())) BETWEEN 0 AND 1
-                    AND ui.user_id = %s
-                    """, 
-                    (user_id,)
-                )
+                cursor.execute(EXPIRING_INGREDIENTS_SQL, (user_id,))
                 rows = cursor.fetchall()
 
-            logging.info(f"Fetched {len(rows)} expiring ingredients for user {user_id}")
+            logging.info("Fetched %s expiring ingredients for user %s", len(rows), user_id)
             return rows
 
         except Exception as e:
@@ -178,23 +392,10 @@ class UserIngredientsModel:
         """
         try:
             with self.db.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT ui.user_id, ui.edamam_food_id, ui.quantity, ui.date_added,
-                        ii.Name, ii.Expiration_Duration,
-                        TIMESTAMPDIFF(DAY, ui.date_added, NOW()) AS days_elapsed,
-                        (ii.Expiration_Duration - TIMESTAMPDIFF(DAY, ui.date_added, NOW())) AS days_left
-                    FROM UserIngredients ui
-                    JOIN InternalIngredients ii
-                    ON ui.edamam_food_id = ii.Edamam_Food_ID
-                    WHERE (ii.Expiration_Duration - TIMESTAMPDIFF(DAY, ui.date_added, NOW())) BETWEEN 0 AND 1
-                    AND ui.user_id = %s
-                    """, 
-                    (user_id,)
-                )
+                cursor.execute(EXPIRING_INGREDIENTS_SQL, (user_id,))
                 rows = cursor.fetchall()
 
-            logging.info(f"Fetched {len(rows)} expiring ingredients for user {user_id}")
+            logging.info("Fetched %s expiring ingredients for user %s", len(rows), user_id)
             return rows
 
         except Exception as e:
@@ -210,12 +411,7 @@ class UserIngredientsModel:
                 edamam_food_id = [edamam_food_id]
 
             with self.db.cursor() as cursor:
-                format_strings = ','.join(['%s'] * len(edamam_food_id))
-                query = f"""
-                    DELETE FROM UserIngredients
-                    WHERE user_id = %s AND edamam_food_id IN ({format_strings})
-                """
-                cursor.execute(query, [user_id] + edamam_food_id)
+                cursor.execute(delete_ingredients_query(len(edamam_food_id)), [user_id] + edamam_food_id)
 
             self.db.commit()
             return {"message": f"Deleted {cursor.rowcount} ingredients."}
@@ -1,6 +1,9 @@
 import logging
 from datetime import datetime
 
+USER_BY_FIREBASE_UID_SQL = "SELECT id FROM Users WHERE firebase_uid = %s"
+
+
 class UserModel:
     def __init__(self, db_connection):
         self.db = db_connection
@@ -11,7 +14,7 @@ class UserModel:
         """
         try:
             with self.db.cursor() as cursor:
-                cursor.execute("SELECT id FROM Users WHERE firebase_uid = %s", (firebase_uid,))
+                cursor.execute(USER_BY_FIREBASE_UID_SQL, (firebase_uid,))
                 return cursor.fetchone()
 
         except Exception as e:
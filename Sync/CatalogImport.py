@@ -0,0 +1,188 @@
+import os
+import csv
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import itertools
+from Config.Db import Database
+from Model.InternalIngredientsModel import InternalIngredientsModel, CATALOG_COLUMNS
+from Cache.CatalogVersion import bump_catalog_version
+
+# Input rows per chunk, changed rows of a chunk go out as one multi-row upsert and commit
+BATCH_SIZE = int(os.getenv("CATALOG_IMPORT_BATCH_SIZE", 2000))
+
+REQUIRED_COLUMNS = ("Edamam_Food_ID", "Name")
+INTEGER_COLUMNS = {"Expiration_Duration"}
+FLOAT_COLUMNS = {"Quantity", "Fat", "Cholesterol", "Sodium", "Potassium", "Carbohydrate", "Protein", "Calorie"}
+
+# Invalid rows logged one by one, the rest are only counted
+LOGGED_INVALID = 20
+
+
+def read_records(path, input_format=None):
+    """
+    Stream records from a CSV (header row of column names) or JSONL file without loading it whole.
+    """
+    input_format = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        if input_format == "csv":
+            yield from csv.DictReader(handle)
+            return
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line
+
+
+def normalize(record):
+    """
+    Catalog row tuple in CATALOG_COLUMNS order, typed the way MySQL returns it. Raises ValueError when invalid.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("not an object")
+    values = {str(key).strip().lower(): value for key, value in record.items()}
+
+    row = []
+    for column in CATALOG_COLUMNS:
+        value = values.get(column.lower())
+        if isinstance(value, str):
+            value = value.strip() or None
+        if value is not None:
+            if column in INTEGER_COLUMNS:
+                value = int(float(value))
+            elif column in FLOAT_COLUMNS:
+                value = float(value)
+            else:
+                value = str(value)
+        elif column in REQUIRED_COLUMNS:
+            raise ValueError(f"missing {column}")
+        row.append(value)
+    return tuple(row)
+
+
+def row_hash(row):
+    return hashlib.blake2b(json.dumps(row, separators=(",", ":")).encode(), digest_size=16).digest()
+
+
+def stored_hashes(model):
+    """
+    Content hash of every stored row by Edamam_Food_ID, so unchanged input rows are never written.
+    """
+    return {
+        row["Edamam_Food_ID"]: row_hash(tuple(row[column] for column in CATALOG_COLUMNS))
+        for row in model.stream_catalog()
+    }
+
+
+def import_catalog(path, input_format=None, batch_size=BATCH_SIZE, snapshot_dir=None, dry_run=False):
+    """
+    Upsert the changed rows of a catalog file and bump the catalog version when anything changed.
+    Returns row counts and throughput.
+    """
+    logging.info("[import_catalog] Importing %s", path)
+    started = time.perf_counter()
+    stats = {"read": 0, "changed": 0, "unchanged": 0, "invalid": 0}
+
+    connection = None
+    try:
+        connection = Database().connect_write()
+        model = InternalIngredientsModel(connection)
+        hashes = stored_hashes(model)
+        stats["stored"] = len(hashes)
+        stats["hash_seconds"] = round(time.perf_counter() - started, 3)
+
+        records = read_records(path, input_format)
+        while True:
+            chunk = list(itertools.islice(records, batch_size))
+            if not chunk:
+                break
+
+            # Keyed by id, so a repeated id in one chunk is written once with its last content
+            changed = {}
+            for record in chunk:
+                stats["read"] += 1
+                try:
+                    row = normalize(record)
+                except (ValueError, TypeError) as e:
+                    stats["invalid"] += 1
+                    if stats["invalid"] <= LOGGED_INVALID:
+                        logging.warning("[import_catalog] Skipping invalid row %s: %s", stats["read"], e)
+                    continue
+
+                digest = row_hash(row)
+                if hashes.get(row[0]) == digest:
+                    stats["unchanged"] += 1
+                    continue
+                hashes[row[0]] = digest
+                changed[row[0]] = row
+
+            if changed and not dry_run:
+                result = model.upsert_ingredients(list(changed.values()))
+                if "error" in result:
+                    # Earlier chunks are committed, so their change is still announced
+                    announce_changes(stats, snapshot_dir, dry_run)
+                    return dict(result, **stats)
+            stats["changed"] += len(changed)
+
+            elapsed = time.perf_counter() - started
+            logging.info("[import_catalog] %s rows read, %s changed, %.0f rows/s",
+                         stats["read"], stats["changed"], stats["read"] / elapsed if elapsed else 0)
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 3)
+        stats["rows_per_second"] = round(stats["read"] / elapsed) if elapsed else 0
+
+        announce_changes(stats, snapshot_dir, dry_run)
+        logging.info("[import_catalog] Import finished: %s", stats)
+        return stats
+
+    except Exception as e:
+        logging.error(f"[import_catalog] Error importing {path}: {str(e)}", exc_info=True)
+        announce_changes(stats, snapshot_dir, dry_run)
+        return dict({"error": "Error importing catalog", "details": str(e)}, **stats)
+
+    finally:
+        if connection:
+            connection.close()
+
+
+def announce_changes(stats, snapshot_dir=None, dry_run=False):
+    """
+    Bump the catalog version and rebuild the snapshot when rows were committed, also after a failed import.
+    """
+    if not stats["changed"] or dry_run:
+        return
+    stats["catalog_version"] = bump_catalog_version()
+    if snapshot_dir:
+        from Sync.CatalogSnapshotBuild import build_catalog_snapshot
+        stats["snapshot"] = build_catalog_snapshot(snapshot_dir, stats["catalog_version"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upsert changed InternalIngredients rows from a CSV or JSONL file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format, guessed from the extension by default")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--snapshot-dir", default=os.getenv("CATALOG_SNAPSHOT_DIR"),
+                        help="rebuild the catalog snapshot here after a change")
+    parser.add_argument("--dry-run", action="store_true", help="count changed rows without writing them")
+    args = parser.parse_args()
+
+    stats = import_catalog(args.path, args.format, args.batch_size, args.snapshot_dir, args.dry_run)
+    print(json.dumps(stats, indent=2))
+    if "error" in stats:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
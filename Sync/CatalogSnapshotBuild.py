@@ -0,0 +1,53 @@
+import os
+import time
+import logging
+import argparse
+from Config.Db import Database
+from Model.InternalIngredientsModel import InternalIngredientsModel
+from Cache.CatalogSnapshot import write_snapshot
+from Cache.CatalogVersion import get_catalog_version
+
+
+def build_catalog_snapshot(directory, version=None):
+    """
+    Export InternalIngredients into a new snapshot in directory. Workers pick it up on their next check.
+    """
+    logging.info("[build_catalog_snapshot] Exporting catalog to %s", directory)
+    started = time.perf_counter()
+
+    connection = None
+    try:
+        # Read before the export, so the rows are at least as new as the version recorded with them
+        catalog_version = get_catalog_version()
+        connection = Database().connect_read()
+        rows = InternalIngredientsModel(connection).stream_catalog()
+        path = write_snapshot(rows, directory, version, catalog_version)
+
+        elapsed = time.perf_counter() - started
+        logging.info("[build_catalog_snapshot] Snapshot %s built in %.2f s", path, elapsed)
+        return {"path": path, "seconds": round(elapsed, 3)}
+
+    except Exception as e:
+        logging.error(f"[build_catalog_snapshot] Error building snapshot: {str(e)}", exc_info=True)
+        return {"error": "Error building catalog snapshot", "details": str(e)}
+
+    finally:
+        if connection:
+            connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export InternalIngredients into a memory-mapped catalog snapshot")
+    parser.add_argument("--dir", default=os.getenv("CATALOG_SNAPSHOT_DIR"), help="Snapshot directory shared by the workers")
+    parser.add_argument("--version", help="Version label, defaults to the current time")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("--dir or CATALOG_SNAPSHOT_DIR is required")
+    print(build_catalog_snapshot(args.dir, args.version))
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -1,51 +1,125 @@
-# import logging
-# from Config.Db import Database
-# from Api.FatSecret import FatSecretComponent
-# from Model.CategoryModel import CategoryModel
-
-# logging.basicConfig(
-#     filename='/var/log/fatsecret_sync.log',
-#     level=logging.INFO,
-#     format='%(asctime)s - %(levelname)s - %(message)s'
-# )
-
-# def sync_fatsecret_category():
-#     """
-#     Syncs FatSecret categories and subcategories.
-#     """
-#     logging.info("[sync_fatsecret_data] Starting FatSecret sync")
-
-#     try:
-#         db_connection = Database().connect_write()
-#         category_model = CategoryModel(db_connection)
-#         fatsecret = FatSecretComponent()
-
-#         categories = fatsecret.get_food_categories()
-#         if not categories:
-#             logging.error("[sync_fatsecret_data] Failed to fetch categories.")
-#             return
-
-#         for category in categories:
-#             category_id = int(category["id"])
-#             category_name = category["name"]
-#             category_description = "" 
-
-#             category_model.insert_or_update_category(category_id, category_name, category_description)
-
-#             subcategories = fatsecret.get_food_sub_categories(category_id)
-#             if subcategories:
-#                 for subcategory in subcategories:
-#                     category_model.insert_or_update_subcategory(subcategory, category_id)
-
-#         logging.info("[sync_fatsecret_data] Sync successfully.")
-
-#     except Exception as e:
-#         logging.error(f"[sync_fatsecret_data] Error during sync: {str(e)}", exc_info=True)
-
-#     finally:
-#         if db_connection:
-#             db_connection.close()
-#             logging.info("[sync_fatsecret_data] Database connection closed.")
-
-# if __name__ == "__main__":
-#     sync_fatsecret_category()
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from Config.Db import Database
+from Api.FatSecret import FatSecretComponent
+from Model.CategoryModel import CategoryModel
+from Cache.CategoryResolver import category_resolver
+
+# Concurrent subcategory requests, kept within the FatSecret session's connection pool
+SYNC_WORKERS = int(os.getenv("FATSECRET_SYNC_WORKERS", 8))
+
+
+def fetch_subcategories(fatsecret, category_ids, workers=SYNC_WORKERS):
+    """
+    Fetch subcategories of every category concurrently. A category whose request failed maps to None.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fatsecret-sync") as executor:
+        return dict(zip(category_ids, executor.map(fatsecret.get_food_sub_categories, category_ids)))
+
+
+def diff_categories(categories, subcategories, stored):
+    """
+    Rows that differ from what is stored: changed or new categories, and subcategory pairs not yet stored.
+    """
+    stored_categories = {row["id"]: (row["name"], row["description"] or "") for row in stored["categories"]}
+    stored_pairs = {(row["name"], row["category_id"]) for row in stored["subcategories"]}
+
+    changed_categories = [
+        (category_id, name, "")
+        for category_id, name in categories.items()
+        if stored_categories.get(category_id) != (name, "")
+    ]
+    new_subcategories = []
+    seen = set()
+    for category_id, names in subcategories.items():
+        # FatSecret collapses a one-element list into a bare string
+        if isinstance(names, str):
+            names = [names]
+        for name in names or ():
+            pair = (name, category_id)
+            if pair not in stored_pairs and pair not in seen:
+                seen.add(pair)
+                new_subcategories.append(pair)
+    return changed_categories, new_subcategories
+
+
+def sync_fatsecret_category(workers=SYNC_WORKERS):
+    """
+    Syncs FatSecret categories and subcategories, writing only what changed in one transaction.
+    Returns the counts written and the seconds spent in each phase.
+    """
+    logging.info("[sync_fatsecret_data] Starting FatSecret sync")
+    timings = {}
+    started = time.perf_counter()
+
+    def phase(name):
+        nonlocal started
+        now = time.perf_counter()
+        timings[name] = round(now - started, 4)
+        started = now
+
+    db_connection = None
+    try:
+        fatsecret = FatSecretComponent()
+
+        categories = fatsecret.get_food_categories()
+        if not categories:
+            logging.error("[sync_fatsecret_data] Failed to fetch categories.")
+            return {"error": "Failed to fetch categories"}
+        categories = {int(category["id"]): category["name"] for category in categories}
+        phase("fetch_categories")
+
+        subcategories = fetch_subcategories(fatsecret, list(categories), workers)
+        failed = [category_id for category_id, names in subcategories.items() if names is None]
+        if failed:
+            logging.warning("[sync_fatsecret_data] Subcategories unavailable for categories %s, keeping stored rows.", failed)
+        phase("fetch_subcategories")
+
+        db_connection = Database().connect_write()
+        category_model = CategoryModel(db_connection)
+        stored = category_model.get_sync_state()
+        if "error" in stored:
+            return stored
+        phase("load_stored")
+
+        changed_categories, new_subcategories = diff_categories(categories, subcategories, stored)
+        phase("diff")
+
+        if changed_categories or new_subcategories:
+            result = category_model.upsert_categories_bulk(changed_categories, new_subcategories)
+            if "error" in result:
+                return result
+            category_resolver.publish()
+        phase("write")
+
+        summary = {
+            "categories": len(changed_categories),
+            "subcategories": len(new_subcategories),
+            "failed_categories": failed,
+            "timings": timings,
+        }
+        logging.info(
+            "[sync_fatsecret_data] Sync successfully: %s categories and %s subcategories changed, phases %s",
+            len(changed_categories), len(new_subcategories), timings
+        )
+        return summary
+
+    except Exception as e:
+        logging.error(f"[sync_fatsecret_data] Error during sync: {str(e)}", exc_info=True)
+        return {"error": "Error during sync", "details": str(e)}
+
+    finally:
+        if db_connection:
+            db_connection.close()
+            logging.info("[sync_fatsecret_data] Database connection closed.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename='/var/log/fatsecret_sync.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    print(sync_fatsecret_category())
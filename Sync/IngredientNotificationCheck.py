@@ -41,7 +41,7 @@ class ExpiringIngredientNotifierService:
             grouped_results = model.get_all_ingredients_expiring_grouped()
 
             for user_id, items in grouped_results.items():
-                logging.info(f"[Notifier] User {user_id} has {len(items)} expiring ingredients")
+                logging.info("[Notifier] User %s has %s expiring ingredients", user_id, len(items))
 
             return grouped_results
 
@@ -61,7 +61,7 @@ class ExpiringIngredientNotifierService:
         try:
             payload = Payload(alert=message, sound="default", badge=1)
             self.apns_client.send_notification(device_token, payload, topic=self.apns_topic)
-            logging.info(f"[Notifier] Sent notification to {device_token}")
+            logging.info("[Notifier] Sent notification to %s", device_token)
         except Exception as e:
             logging.error(f"[Notifier] Failed to send notification: {str(e)}", exc_info=True)
 
@@ -83,7 +83,7 @@ class ExpiringIngredientNotifierService:
         for user_id, items in grouped_results.items():
             device_token = self.get_device_token(user_id)
             if not device_token:
-                logging.warning(f"[Notifier] No device token for user {user_id}")
+                logging.warning("[Notifier] No device token for user %s", user_id)
                 continue
 
             message = f"You have {len(items)} ingredient(s) expiring soon."
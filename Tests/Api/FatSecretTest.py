@@ -0,0 +1,106 @@
+import json
+import itertools
+import time
+import threading
+import pytest
+import fakeredis
+import redis
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from Api import FatSecret
+from Api.FatSecret import FatSecretComponent
+
+CATEGORIES = {"food_categories": {"food_category": [{"food_category_id": "1", "food_category_name": "Dairy"}]}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the client can keep the connection open between calls
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Authorization"), self.client_address[1]))
+        status, body, delay = self.server.responses.pop(0) if self.server.responses else (200, CATEGORIES, 0)
+        time.sleep(delay)
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests, server.responses = [], []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    tokens = itertools.count(1)
+    with patch("Config.Redis._pool", pool), \
+            patch.object(FatSecret, "BASE_URL", f"http://127.0.0.1:{server.server_port}"), \
+            patch.object(FatSecret, "BACKOFF_SECONDS", 0), \
+            patch.object(FatSecret, "_session", None), \
+            patch.object(FatSecret, "get_cached_fatsecret_token", side_effect=lambda rejected_token=None: f"token-{next(tokens)}"):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_categories_are_cached_and_connections_reused(stub):
+    fatsecret = FatSecretComponent()
+    assert fatsecret.get_food_categories() == [{"id": "1", "name": "Dairy"}]
+    assert fatsecret.get_food_categories() == [{"id": "1", "name": "Dairy"}]
+    assert len(stub.requests) == 1
+
+    stub.responses.append((200, {"food_sub_categories": {"food_sub_category": ["Milk", "Cheese"]}}, 0))
+    assert fatsecret.get_food_sub_categories(1) == ["Milk", "Cheese"]
+
+    # Second call went over the same keep-alive socket
+    assert stub.requests[0][2] == stub.requests[1][2]
+    assert stub.requests[1][1] == "Bearer token-1"
+
+
+def test_server_errors_are_retried_a_bounded_number_of_times(stub):
+    stub.responses.extend([(503, {}, 0), (429, {}, 0), (200, CATEGORIES, 0)])
+    assert FatSecretComponent().get_food_categories() == [{"id": "1", "name": "Dairy"}]
+    assert len(stub.requests) == 3
+
+    stub.requests.clear()
+    stub.responses.extend([(500, {}, 0)] * 10)
+    assert FatSecretComponent().get_food_sub_categories(2) is None
+    assert len(stub.requests) == FatSecret.MAX_RETRIES + 1
+
+
+def test_expired_token_is_refreshed_once(stub):
+    stub.responses.extend([(401, {}, 0), (200, CATEGORIES, 0)])
+    assert FatSecretComponent().get_food_categories() == [{"id": "1", "name": "Dairy"}]
+    assert [auth for _, auth, _ in stub.requests] == ["Bearer token-1", "Bearer token-2"]
+
+    stub.responses.extend([(401, {}, 0)] * 5)
+    assert FatSecretComponent().get_food_sub_categories(3) is None
+    assert len(stub.requests) == 4
+
+
+def test_slow_responses_time_out_and_error_bodies_are_not_cached(stub):
+    stub.responses.append((200, CATEGORIES, 0.5))
+    with patch.object(FatSecret, "READ_TIMEOUT", 0.1), patch.object(FatSecret, "MAX_RETRIES", 0):
+        assert FatSecretComponent().get_food_categories() is None
+
+    stub.responses.extend([(200, {"error": {"code": 12}}, 0), (200, CATEGORIES, 0)])
+    fatsecret = FatSecretComponent()
+    assert fatsecret.get_food_categories() == []
+    assert fatsecret.get_food_categories() == [{"id": "1", "name": "Dairy"}]
+    assert len(stub.requests) == 3
+
+
+if __name__ == "__main__":
+    pytest.main()
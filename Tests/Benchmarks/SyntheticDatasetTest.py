@@ -0,0 +1,39 @@
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from pymysql.cursors import RE_INSERT_VALUES
+from Benchmarks.SyntheticDataset import generate, ingredient_rows, user_ingredient_rows
+
+ANCHOR = datetime(2026, 1, 1)
+
+
+def test_rows_are_deterministic_from_seed():
+    first = list(ingredient_rows(7, 500))
+    assert first == list(ingredient_rows(7, 500))
+    assert first != list(ingredient_rows(8, 500))
+    assert len({row[1] for row in first}) == 500
+
+    food_ids = [row[0] for row in first]
+    pantry = list(user_ingredient_rows(7, range(1, 201), food_ids, 30, 2000, 1.1, ANCHOR))
+    assert pantry == list(user_ingredient_rows(7, range(1, 201), food_ids, 30, 2000, 1.1, ANCHOR))
+    assert all(row[3] <= ANCHOR for row in pantry)
+
+
+def test_generate_uses_multi_row_inserts():
+    """
+    pymysql only folds executemany into one multi-row INSERT when VALUES holds nothing but placeholders.
+    """
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [{"id": user_id} for user_id in range(1, 51)]
+
+    generate(connection, 1, ANCHOR, ingredients=200, users=50, pantry_mean=10, pantry_max=100,
+             recipes=20, saved_mean=2, report_share=0.5)
+
+    statements = [call.args[0] for call in cursor.executemany.call_args_list]
+    assert len(statements) >= 7
+    assert all(RE_INSERT_VALUES.match(statement) for statement in statements)
+
+
+if __name__ == "__main__":
+    pytest.main()
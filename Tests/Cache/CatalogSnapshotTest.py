@@ -0,0 +1,128 @@
+import os
+import pytest
+import fakeredis
+import redis
+from unittest.mock import patch
+from flask import Flask
+from Benchmarks.SyntheticDataset import ingredient_rows
+from Cache.CatalogVersion import bump_catalog_version
+from Cache.CatalogSnapshot import CatalogSnapshot, CatalogSnapshotStore, write_snapshot, CURRENT_LINK
+
+COLUMNS = (
+    "Edamam_Food_ID", "Name", "Category", "Quantity_Type", "Quantity", "Expiration_Duration", "Image_URL",
+    "Fat", "Cholesterol", "Sodium", "Potassium", "Carbohydrate", "Protein", "Calorie"
+)
+
+
+@pytest.fixture
+def fake_redis():
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    with patch("Config.Redis._pool", pool):
+        yield
+
+
+def catalog(count=300):
+    rows = [dict(zip(COLUMNS, row)) for row in ingredient_rows(3, count)]
+    rows[0].update(Category=None, Fat=None, Name="crème fraîche")
+    return rows
+
+
+def test_snapshot_round_trips_rows(tmp_path):
+    rows = catalog()
+    snapshot = CatalogSnapshot(write_snapshot(rows, str(tmp_path), version=1))
+
+    assert len(snapshot) == len(rows)
+    for row in rows:
+        index = snapshot.index_of(row["Edamam_Food_ID"])
+        assert snapshot.row(index) == row
+    assert snapshot.index_of("food_missing") == -1
+
+    nutrition = snapshot.nutrition(rows[0]["Edamam_Food_ID"])
+    assert nutrition["Name"] == "crème fraîche"
+    assert nutrition["Category"] is None and nutrition["Fat"] is None
+    assert "Expiration_Duration" not in nutrition
+
+
+def test_numpy_columns_are_zero_copy(tmp_path):
+    rows = catalog()
+    snapshot = CatalogSnapshot(write_snapshot(rows, str(tmp_path), version=1))
+
+    calories = snapshot.column("Calorie")
+    assert not calories.flags.owndata and not calories.flags.writeable
+    assert sorted(calories.tolist()) == sorted(row["Calorie"] for row in rows)
+
+
+def test_store_swaps_to_new_versions(tmp_path):
+    directory = str(tmp_path)
+    store = CatalogSnapshotStore(directory, check_interval=60)
+    assert store.current() is None
+
+    rows = catalog()
+    write_snapshot(rows, directory, version=1)
+    # Within the interval the store keeps its answer without looking at the link
+    assert store.current() is None
+    store.checked_at = 0
+    first = store.current()
+    assert first.version == "1"
+
+    rows[1]["Calorie"] = 1.5
+    with patch("Cache.CatalogSnapshot.SNAPSHOT_KEEP", 1):
+        write_snapshot(rows, directory, version=2)
+    store.checked_at = 0
+    second = store.current()
+    assert second.version == "2"
+    assert os.readlink(os.path.join(directory, CURRENT_LINK)) == "catalog-2.snap"
+    assert sorted(os.listdir(directory)) == ["catalog-2.snap", CURRENT_LINK]
+
+    # A request still holding the old mapping reads it even though the file is gone
+    food_id = rows[1]["Edamam_Food_ID"]
+    assert first.nutrition(food_id)["Calorie"] != 1.5
+    assert second.nutrition(food_id)["Calorie"] == 1.5
+
+
+def test_nutrition_route_reads_the_snapshot(tmp_path):
+    from Controller.InternalIngredientsController import internal_ingredients_blueprint
+
+    rows = catalog()
+    write_snapshot(rows, str(tmp_path), version=1)
+    app = Flask(__name__)
+    app.register_blueprint(internal_ingredients_blueprint, url_prefix="/internal_ingredients")
+
+    with patch("Controller.InternalIngredientsController.catalog_snapshots", CatalogSnapshotStore(str(tmp_path))), \
+            patch("Config.Db.Database.connect_read") as connect_read:
+        response = app.test_client().get(
+            f"/internal_ingredients/get_nutirtion_by_id?edamam_food_id={rows[5]['Edamam_Food_ID']}"
+        )
+
+    assert response.status_code == 200
+    assert response.get_json()["Name"] == rows[5]["Name"]
+    connect_read.assert_not_called()
+
+
+def test_snapshot_behind_the_catalog_version_is_not_served(tmp_path, fake_redis):
+    directory = str(tmp_path)
+    store = CatalogSnapshotStore(directory, check_interval=60)
+    write_snapshot(catalog(), directory, version=1, catalog_version=1)
+    bump_catalog_version()
+    assert store.current().catalog_version == 1
+
+    # An import changed MySQL after this snapshot was built
+    bump_catalog_version()
+    store.checked_at = 0
+    assert store.current() is None
+    assert store.current() is None
+
+    write_snapshot(catalog(), directory, version=2, catalog_version=2)
+    store.checked_at = 0
+    assert store.current().version == "2"
+
+    # Without a recorded version the snapshot's age is unknown
+    write_snapshot(catalog(), directory, version=3)
+    store.checked_at = 0
+    assert store.current() is None
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,66 @@
+import pytest
+import fakeredis
+import redis
+from unittest.mock import MagicMock, patch
+from Cache.CategoryResolver import CategoryResolver
+from Model.CategoryModel import CategoryModel
+
+
+@pytest.fixture
+def fake_redis():
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    with patch("Config.Redis._pool", pool):
+        yield
+
+
+def test_bulk_lookups_cost_one_load(fake_redis):
+    resolver = CategoryResolver(check_interval=60)
+    loader = MagicMock(return_value=[
+        {"subcategory": "Milk", "category": "Dairy"},
+        {"subcategory": "Cheese", "category": "Dairy"},
+        {"subcategory": "Milk", "category": "Beverages"},
+    ])
+
+    for _ in range(3):
+        assert resolver.ensure_fresh(loader)
+    assert resolver.resolve_categories(["milk ", "Cheese", "Bread"]) == {"milk ": "Dairy", "Cheese": "Dairy", "Bread": None}
+    loader.assert_called_once()
+
+
+def test_publish_reloads_every_worker(fake_redis):
+    writer, reader = CategoryResolver(check_interval=60), CategoryResolver(check_interval=60)
+    rows = [{"subcategory": "Milk", "category": "Dairy"}]
+    loader = MagicMock(side_effect=lambda: list(rows))
+    writer.ensure_fresh(loader)
+    reader.ensure_fresh(loader)
+
+    # Unchanged version, the reader's check once the interval elapsed is a single GET
+    reader.checked_at = 0
+    reader.ensure_fresh(loader)
+    assert loader.call_count == 2
+
+    rows.append({"subcategory": "Apples", "category": "Fruit"})
+    writer.publish()
+    reader.checked_at = 0
+    reader.ensure_fresh(loader)
+    assert reader.resolve_categories(["Apples"]) == {"Apples": "Fruit"}
+
+
+def test_model_serves_lookups_without_a_query_per_name(fake_redis):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [{"subcategory": "Milk", "category": "Dairy"}]
+
+    with patch("Model.CategoryModel.category_resolver", CategoryResolver(check_interval=60)):
+        model = CategoryModel(connection)
+        assert model.resolve_categories(["Milk", "Tofu"]) == {"Milk": "Dairy", "Tofu": None}
+        assert model.get_category_by_subcategory("milk") == "Dairy"
+        assert "message" in model.get_category_by_subcategory("Tofu")
+
+    assert cursor.execute.call_count == 1
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,79 @@
+import json
+import time
+import threading
+import pytest
+import fakeredis
+import redis
+from unittest.mock import patch
+from Cache import FatSecretCache
+from Cache.FatSecretCache import get_cached_fatsecret_token
+
+
+@pytest.fixture
+def server():
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    with patch("Config.Redis._pool", pool):
+        yield redis.StrictRedis(connection_pool=pool)
+
+
+@pytest.fixture
+def auth():
+    with patch("Cache.FatSecretCache.FatSecretAuth") as auth:
+        yield auth.return_value
+
+
+def test_token_is_cached_for_its_real_lifetime(server, auth):
+    auth.fetch_token.return_value = ("token-1", 86400)
+
+    assert get_cached_fatsecret_token() == "token-1"
+    assert get_cached_fatsecret_token() == "token-1"
+
+    auth.fetch_token.assert_called_once()
+    assert 86400 - FatSecretCache.EXPIRY_MARGIN_SECONDS - 5 < server.ttl(FatSecretCache.TOKEN_KEY) <= 86400
+    assert server.get(FatSecretCache.LOCK_KEY) is None
+
+
+def test_concurrent_misses_fetch_once(server, auth):
+    def slow_fetch():
+        time.sleep(0.2)
+        return "token-1", 3600
+
+    auth.fetch_token.side_effect = slow_fetch
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(get_cached_fatsecret_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ["token-1"] * 8
+    auth.fetch_token.assert_called_once()
+
+
+def test_expiring_token_is_served_while_refreshed_in_background(server, auth):
+    server.setex(FatSecretCache.TOKEN_KEY, 60, json.dumps({"token": "old", "expires_at": time.time() + 60}))
+    auth.fetch_token.return_value = ("new", 3600)
+
+    assert get_cached_fatsecret_token() == "old"
+
+    deadline = time.monotonic() + 2
+    while json.loads(server.get(FatSecretCache.TOKEN_KEY))["token"] != "new" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert get_cached_fatsecret_token() == "new"
+    auth.fetch_token.assert_called_once()
+
+
+def test_rejected_token_is_replaced_once(server, auth):
+    server.setex(FatSecretCache.TOKEN_KEY, 3600, json.dumps({"token": "revoked", "expires_at": time.time() + 3600}))
+    auth.fetch_token.return_value = ("fresh", 3600)
+
+    assert get_cached_fatsecret_token(rejected_token="revoked") == "fresh"
+    # A worker still holding the revoked token picks up the replacement without another fetch
+    assert get_cached_fatsecret_token(rejected_token="revoked") == "fresh"
+    auth.fetch_token.assert_called_once()
+
+
+if __name__ == "__main__":
+    pytest.main()
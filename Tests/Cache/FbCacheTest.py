@@ -0,0 +1,125 @@
+import time
+import asyncio
+import pytest
+import fakeredis
+import redis
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from Cache import FbCache
+from Cache.AsyncFbCache import get_cached_uid_redis_async
+from Config.Resilience import CircuitOpenError, DependencyUnavailable
+from Config.Fb import TokenNotYetValid, decode_firebase_token
+from Cache.FbCache import get_cached_uid_redis, remember_user_token, rejected_key
+
+
+@pytest.fixture
+def server():
+    server = fakeredis.FakeServer()
+    pool = redis.BlockingConnectionPool(connection_class=fakeredis.FakeConnection, server=server, decode_responses=True)
+    with patch("Config.Redis._pool", pool), patch("Cache.FbCache.Database"):
+        yield redis.StrictRedis(connection_pool=pool)
+
+
+def test_invalid_token_is_verified_once(server):
+    with patch("Cache.FbCache.decode_firebase_token", return_value=None) as decode:
+        assert get_cached_uid_redis("bad-token") is None
+        assert get_cached_uid_redis("bad-token") is None
+
+    assert decode.call_count == 1
+    # Keyed by digest, the token itself is never stored for a rejection
+    assert server.get(rejected_key("bad-token")) == FbCache.REJECTED_INVALID
+    assert server.get("bad-token") is None
+    assert 0 < server.ttl(rejected_key("bad-token")) <= FbCache.INVALID_TOKEN_TTL
+
+
+def test_missing_user_is_cached_until_created(server):
+    decoded = {"uid": "firebase-1", "exp": time.time() + 3600}
+    with patch("Cache.FbCache.decode_firebase_token", return_value=decoded) as decode, \
+            patch("Cache.FbCache.UserModel") as user_model:
+        user_model.return_value.get_user_by_firebase_uid.return_value = None
+        assert get_cached_uid_redis("new-token") is None
+        assert get_cached_uid_redis("new-token") is None
+        assert decode.call_count == 1
+        assert 0 < server.ttl(rejected_key("new-token")) <= FbCache.NO_USER_TTL
+
+        remember_user_token("new-token", decoded, 42)
+        assert get_cached_uid_redis("new-token") == "42"
+
+    assert server.get(rejected_key("new-token")) is None
+
+
+def test_verification_outage_is_not_cached(server):
+    with patch("Cache.FbCache.decode_firebase_token", side_effect=OSError("certificate fetch failed")):
+        assert get_cached_uid_redis("good-token") is None
+
+    assert server.get(rejected_key("good-token")) is None
+
+
+def test_token_used_too_early_is_not_cached(server):
+    with patch("Cache.FbCache.decode_firebase_token", side_effect=TokenNotYetValid("Token used too early")) as decode:
+        assert get_cached_uid_redis("skewed-token") is None
+        assert get_cached_uid_redis("skewed-token") is None
+
+    assert decode.call_count == 2
+    assert server.get(rejected_key("skewed-token")) is None
+
+
+def test_early_use_is_told_apart_from_rejection():
+    from firebase_admin import auth
+
+    def verify(id_token, clock_skew_seconds):
+        raise auth.InvalidIdTokenError(f"Token {id_token}, check that your computer's clock is set correctly.")
+
+    with patch("Config.Fb.ensure_firebase"), patch("firebase_admin.auth.verify_id_token", side_effect=verify):
+        with pytest.raises(TokenNotYetValid):
+            decode_firebase_token("used too early")
+        assert decode_firebase_token("has a bad signature") is None
+
+
+class FakeAsyncDatabase:
+    def __init__(self, user=None, error=None):
+        cursor = MagicMock(execute=AsyncMock(), fetchone=AsyncMock(return_value=user))
+        cursor.__aenter__ = AsyncMock(return_value=cursor)
+        cursor.__aexit__ = AsyncMock(return_value=False)
+        self.connection = MagicMock(cursor=MagicMock(return_value=cursor))
+        self.error = error
+
+    @asynccontextmanager
+    async def connect_read(self, user_id=None):
+        if self.error:
+            raise self.error
+        yield self.connection
+
+
+def test_async_lookup_caches_like_the_sync_one():
+    redis_connection = fakeredis.FakeAsyncRedis(decode_responses=True)
+    decoded = {"uid": "firebase-1", "exp": time.time() + 3600}
+
+    async def lookups():
+        with patch("Cache.AsyncFbCache.decode_firebase_token", return_value=None) as decode:
+            rejected = [await get_cached_uid_redis_async("bad-token", redis_connection, FakeAsyncDatabase()) for _ in range(2)]
+            assert decode.call_count == 1
+        with patch("Cache.AsyncFbCache.decode_firebase_token", return_value=decoded) as decode:
+            accepted = [await get_cached_uid_redis_async("good-token", redis_connection, FakeAsyncDatabase({"id": 42})) for _ in range(2)]
+            assert decode.call_count == 1
+        return rejected, accepted, await redis_connection.get(rejected_key("bad-token"))
+
+    assert asyncio.run(lookups()) == ([None, None], [42, "42"], FbCache.REJECTED_INVALID)
+
+
+def test_async_lookup_outages_match_the_sync_one():
+    decoded = {"uid": "firebase-1", "exp": time.time() + 3600}
+    redis_down = MagicMock(mget=AsyncMock(side_effect=redis.ConnectionError("down")))
+
+    with patch("Cache.AsyncFbCache.decode_firebase_token", return_value=decoded):
+        # Redis down only skips the cache
+        assert asyncio.run(get_cached_uid_redis_async("token", redis_down, FakeAsyncDatabase({"id": 42}))) == 42
+        redis_down.setex.assert_not_called()
+
+        # MySQL down can't judge the token either way, so it is not answered as a 401
+        with pytest.raises(DependencyUnavailable):
+            asyncio.run(get_cached_uid_redis_async("token", redis_down, FakeAsyncDatabase(error=CircuitOpenError("mysql circuit is open"))))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,143 @@
+import pytest
+import threading
+import fakeredis
+import redis
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from Cache.CatalogVersion import bump_catalog_version
+from Cache.CatalogSnapshot import CatalogSnapshotStore, write_snapshot
+from Cache.IngredientSearchIndex import IngredientSearchIndex, SnapshotIds, edit_distance
+
+NAMES = {
+    "food_1": "broccoli, diced",
+    "food_2": "broccoli florets",
+    "food_3": "canned tomato",
+    "food_4": "tomatoes, canned",
+    "food_5": "tomato",
+    "food_6": "chicken breast",
+    "food_7": "peas",
+}
+ROWS = [{"Edamam_Food_ID": food_id, "Name": name} for food_id, name in NAMES.items()]
+
+
+@pytest.fixture
+def fake_redis():
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    with patch("Config.Redis._pool", pool):
+        yield
+
+
+def build(rows):
+    index = IngredientSearchIndex()
+    index.build(rows)
+    return index
+
+
+def test_edit_distance_counts_swaps_as_one_edit():
+    assert edit_distance("brocoli", "broccoli", 2) == 1
+    assert edit_distance("chiken", "chicken", 2) == 1
+    assert edit_distance("brest", "breast", 2) == 1
+    assert edit_distance("staek", "steak", 2) == 1
+    assert edit_distance("tomato", "potatoes", 2) == 3
+
+
+def test_typos_are_corrected_with_a_stable_order():
+    index = build(ROWS)
+
+    assert index.search("brocoli", 10) == ["food_2", "food_1"]
+    # Names starting with the word first, then by name, like the substring search
+    assert index.search("tomatoe", 10) == ["food_5", "food_4", "food_3"]
+    assert index.search("chiken brest", 10) == ["food_6"]
+    assert index.search("tomatoe", 2) == ["food_5", "food_4"]
+
+    # Words too short to correct safely must match exactly
+    assert index.search("pe", 10) == []
+    assert index.search("xyzzy", 10) == []
+
+    assert build(list(reversed(ROWS))).search("tomatoe", 10) == index.search("tomatoe", 10)
+
+
+def test_index_is_rebuilt_when_the_catalog_version_changes(fake_redis):
+    index = IngredientSearchIndex(check_interval=60)
+    rows = list(ROWS)
+    loader = MagicMock(side_effect=lambda: iter(rows))
+    assert index.refresh(loader)
+    assert not index.refresh(loader)
+    assert index.search("spinnach", 5) == []
+
+    rows.append({"Edamam_Food_ID": "food_8", "Name": "baby spinach"})
+    bump_catalog_version()
+    assert index.refresh(loader)
+
+    assert index.search("spinnach", 5) == ["food_8"]
+    assert loader.call_count == 2
+
+
+def test_index_reads_the_mapped_catalog_snapshot_instead_of_mysql(fake_redis, tmp_path):
+    write_snapshot(list(ROWS), str(tmp_path), version=1, catalog_version=bump_catalog_version())
+    index = IngredientSearchIndex(check_interval=60)
+    with patch("Cache.IngredientSearchIndex.catalog_snapshots", CatalogSnapshotStore(str(tmp_path))), \
+            patch("Cache.IngredientSearchIndex.load_catalog_names", side_effect=AssertionError("read MySQL")):
+        assert index.refresh()
+
+    assert isinstance(index.catalog.ids, SnapshotIds)
+    assert index.search("tomatoe", 10) == build(ROWS).search("tomatoe", 10) == ["food_5", "food_4", "food_3"]
+    assert index.search("chiken brest", 10) == ["food_6"]
+
+    # A snapshot behind the catalog is skipped
+    bump_catalog_version()
+    loader = MagicMock(return_value=iter(ROWS))
+    with patch("Cache.IngredientSearchIndex.catalog_snapshots", CatalogSnapshotStore(str(tmp_path))), \
+            patch("Cache.IngredientSearchIndex.load_catalog_names", loader):
+        assert index.refresh()
+    loader.assert_called_once()
+    assert isinstance(index.catalog.ids, list)
+
+
+def test_requests_never_wait_for_a_build(fake_redis):
+    index = IngredientSearchIndex(check_interval=60)
+    release = threading.Event()
+
+    def loader():
+        release.wait(5)
+        return iter(ROWS)
+
+    # The build runs on its own thread, the caller is answered from what is built so far
+    assert not index.ensure_fresh(loader)
+    assert not index.ensure_fresh(loader)
+    release.set()
+    index.thread.join(5)
+    assert index.ensure_fresh(loader)
+    assert index.search("brocoli", 1) == ["food_2"]
+
+
+def test_build_failures_reach_the_caller(fake_redis):
+    index = IngredientSearchIndex()
+    with pytest.raises(ConnectionError):
+        index.refresh(MagicMock(side_effect=ConnectionError("MySQL unavailable")))
+    assert not index.loaded
+
+
+def test_search_route_falls_back_to_typo_tolerant_matches(fake_redis):
+    from Controller.InternalIngredientsController import internal_ingredients_blueprint
+
+    app = Flask(__name__)
+    app.register_blueprint(internal_ingredients_blueprint, url_prefix="/internal_ingredients")
+    index = IngredientSearchIndex(check_interval=60)
+    index.refresh(lambda: iter(ROWS))
+    model = "Model.InternalIngredientsModel.InternalIngredientsModel"
+    with patch("Controller.InternalIngredientsController.ingredient_search_index", index), \
+            patch("Config.Db.Database.connect_read"), \
+            patch(f"{model}.get_all_ingredients", return_value={"message": "No ingredients found for query: brocoli"}), \
+            patch(f"{model}.get_ingredients_by_ids",
+                  side_effect=lambda ids: [{"Edamam_Food_ID": food_id, "Name": NAMES[food_id]} for food_id in ids]):
+        response = app.test_client().get("/internal_ingredients/search?q=brocoli&limit=5")
+
+    assert response.status_code == 200
+    assert [row["Name"] for row in response.get_json()] == ["broccoli florets", "broccoli, diced"]
+    assert index.thread is None
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import patch
+from Cache.RecipeIngredientIndex import RecipeIngredientIndex
+
+ROWS = [
+    {"uri": "omelette", "edamam_food_id": "egg"},
+    {"uri": "omelette", "edamam_food_id": "butter"},
+    {"uri": "pancakes", "edamam_food_id": "egg"},
+    {"uri": "pancakes", "edamam_food_id": "flour"},
+    {"uri": "pancakes", "edamam_food_id": "milk"},
+    {"uri": "salad", "edamam_food_id": "lettuce"},
+]
+
+
+@patch.object(RecipeIngredientIndex, "_get_remote_seq", return_value=None)
+def test_rank_by_pantry_coverage(mock_seq):
+    """
+    Saved recipes are ranked by coverage, then fewest missing, then uri.
+    """
+    index = RecipeIngredientIndex()
+    index.ensure_fresh(lambda: ROWS)
+
+    ranked = index.rank(["egg", "butter", "milk"], ["omelette", "pancakes", "salad"])
+
+    assert [item["uri"] for item in ranked] == ["omelette", "pancakes", "salad"]
+    assert ranked[0]["coverage"] == 1.0
+    assert ranked[1]["missing"] == ["flour"]
+    assert index.rank(["egg"], ["salad"], min_coverage=0.5) == []
+
+
+@patch.object(RecipeIngredientIndex, "_get_log_entries", return_value=[["toast", ["bread", "butter"]]])
+@patch.object(RecipeIngredientIndex, "_get_remote_seq", side_effect=[0, 1])
+def test_replays_writes_from_other_workers(mock_seq, mock_log):
+    """
+    A newer Redis sequence replays the logged recipes instead of rebuilding.
+    """
+    index = RecipeIngredientIndex(check_interval=0.000001)
+    index.ensure_fresh(lambda: ROWS)
+    index.ensure_fresh(lambda: pytest.fail("should not rebuild"))
+
+    mock_log.assert_called_once_with(1)
+    assert index.rank(["bread", "butter"], ["toast"])[0]["coverage"] == 1.0
+
+
+@patch.object(RecipeIngredientIndex, "_get_remote_seq", return_value=None)
+def test_reindexed_recipe_replaces_its_postings(mock_seq):
+    """
+    A recipe stored again with a corrected ingredient list is ranked on the new list only.
+    """
+    index = RecipeIngredientIndex()
+    index.ensure_fresh(lambda: ROWS)
+
+    index.add_local("omelette", ["egg", "cheese", "milk"])
+    index.add_local("aaa", ["butter"])
+
+    assert index.rank(["egg", "butter"], ["omelette"])[0]["missing"] == ["cheese", "milk"]
+    assert list(index.postings["butter"]) == [index.recipe_ids["aaa"]]
+    assert list(index.postings["milk"]) == [index.recipe_ids["omelette"], index.recipe_ids["pancakes"]]
+
+    index.add_local("omelette", [])
+    assert index.rank(["egg"], ["omelette"]) == []
+
+
+if __name__ == "__main__":
+    pytest.main()
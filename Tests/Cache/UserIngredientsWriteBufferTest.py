@@ -0,0 +1,103 @@
+import pytest
+from unittest.mock import MagicMock
+from Cache.UserIngredientsWriteBuffer import UserIngredientsWriteBuffer, FlushTicket, to_change, ACK_BUFFERED
+from Model.UserIngredientsModel import merge_change
+
+
+def make_buffer():
+    """
+    Buffer with a mocked write connection that records the executed statements.
+    """
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    db = MagicMock()
+    db.connect_write.return_value = connection
+    return UserIngredientsWriteBuffer(db=db, flush_interval=10), connection, cursor
+
+
+def test_merge_change():
+    """
+    Deltas add up and a removal resets everything queued before it.
+    """
+    assert merge_change(to_change(2), to_change(3)) == (False, 5)
+    assert merge_change(to_change(2), to_change(0)) == (True, 0)
+    assert merge_change(to_change(0), to_change(4)) == (True, 4)
+
+
+def test_flush_coalesces_into_one_transaction():
+    """
+    Queued writes for the same ingredient collapse into one upsert row and one commit.
+    """
+    buffer, connection, cursor = make_buffer()
+    buffer._ensure_thread = MagicMock()
+
+    buffer.submit(1, [{"edamam_food_id": "food_a", "quantity": 1}], ack=ACK_BUFFERED)
+    buffer.submit(1, [{"edamam_food_id": "food_a", "quantity": 2}], ack=ACK_BUFFERED)
+    buffer.submit(2, [{"edamam_food_id": "food_b", "quantity": 0}], ack=ACK_BUFFERED)
+
+    result = buffer.flush()
+
+    assert result == {"message": "Updated 1 and removed 1 ingredients"}
+    assert cursor.execute.call_count == 2
+    delete_params = cursor.execute.call_args_list[0].args[1]
+    upsert_params = cursor.execute.call_args_list[1].args[1]
+    assert delete_params == [2, "food_b"]
+    assert upsert_params[:3] == [1, "food_a", 3]
+    connection.commit.assert_called_once()
+
+
+def test_failed_flush_is_requeued_under_newer_writes():
+    """
+    A failed flush keeps its changes, merged beneath anything queued afterwards.
+    """
+    buffer, connection, cursor = make_buffer()
+    buffer._ensure_thread = MagicMock()
+    cursor.execute.side_effect = [Exception("deadlock"), None]
+
+    buffer.submit(1, [{"edamam_food_id": "food_a", "quantity": 2}], ack=ACK_BUFFERED)
+    assert "error" in buffer.flush()
+    connection.rollback.assert_called_once()
+
+    buffer.submit(1, [{"edamam_food_id": "food_a", "quantity": 1}], ack=ACK_BUFFERED)
+    assert buffer.pending == {(1, "food_a"): (False, 3)}
+
+
+def test_tickets_resolve_with_their_own_final_outcome():
+    """
+    A retried flush leaves durable tickets pending; they resolve per writer once committed or dropped.
+    """
+    buffer, connection, cursor = make_buffer()
+    buffer._ensure_thread = MagicMock()
+    buffer.max_retries = 1
+    first, second = FlushTicket(["food_a"]), FlushTicket(["food_b", "food_c"])
+    buffer.pending = {(1, "food_a"): (False, 2), (2, "food_b"): (False, 1), (2, "food_c"): (True, 0)}
+    buffer.tickets = [first, second]
+
+    cursor.execute.side_effect = Exception("deadlock")
+    assert "error" in buffer.flush()
+    assert not first.event.is_set() and buffer.tickets == [first, second]
+    assert first.wait(0) == {"message": "Queued 1 ingredient changes, not committed yet", "pending": True}
+
+    cursor.execute.side_effect = None
+    buffer.flush()
+    assert first.wait(0) == {"message": "Saved 1 ingredient changes"}
+    assert second.wait(0) == {"message": "Saved 2 ingredient changes"}
+
+    third = FlushTicket(["food_d"])
+    buffer.pending, buffer.tickets = {(3, "food_d"): (False, 1)}, [third]
+    cursor.execute.side_effect = Exception("deadlock")
+    buffer.flush()
+    buffer.flush()
+    assert third.wait(0) == {"error": "Ingredient changes could not be saved and were discarded", "lost": ["food_d"]}
+    assert buffer.pending == {} and buffer.tickets == []
+
+
+def test_invalid_payload_is_rejected():
+    buffer, _, _ = make_buffer()
+    assert "error" in buffer.submit(1, [{"quantity": 2}])
+    assert buffer.submit(1, [{"edamam_food_id": "food_a", "quantity": "lots"}]) == {"error": "Invalid quantity: 'lots'"}
+    assert buffer.pending == {} and buffer.tickets == []
+
+
+if __name__ == "__main__":
+    pytest.main()
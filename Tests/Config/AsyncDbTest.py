@@ -0,0 +1,158 @@
+import asyncio
+import pytest
+import aiomysql
+import fakeredis
+import redis
+from unittest.mock import AsyncMock, MagicMock, patch
+from quart import Quart, jsonify
+from Config.AsyncDb import AsyncDatabase, InstrumentedAsyncCursor
+from Config.Metrics import MetricsRegistry
+from Config.ReadRouting import record_writes, replica_lag
+from Config.Resilience import CircuitBreaker, CircuitOpenError, DependencyUnavailable, install_async_deadlines, remaining_seconds
+from Config.RequestMetrics import install_async_request_metrics
+
+
+def cursor_on(breaker=None, execute=None):
+    async def recorded(cursor, query, args=None):
+        cursor.statement = query
+        if execute:
+            await execute()
+        return 1
+
+    connection = MagicMock(breaker=breaker)
+    return InstrumentedAsyncCursor(connection), patch.object(aiomysql.cursors.Cursor, "execute", recorded)
+
+
+def test_async_routes_get_deadlines_and_request_metrics():
+    registry = MetricsRegistry()
+    app = Quart(__name__)
+    install_async_deadlines(app)
+    install_async_request_metrics(app)
+    seen = {}
+
+    @app.route("/items/<item_id>")
+    async def get_item(item_id):
+        cursor, execute = cursor_on()
+        with execute:
+            await cursor.execute("SELECT id FROM Items WHERE id = %s", (item_id,))
+            await cursor.execute("UPDATE Items SET seen = 1")
+        seen["statement"] = cursor.statement
+        seen["remaining"] = remaining_seconds()
+        return jsonify({"id": item_id}), 404
+
+    async def run():
+        client = app.test_client()
+        await client.get("/items/7")
+        await client.get("/items/8")
+
+    with patch("Config.RequestMetrics.metrics", registry):
+        asyncio.run(run())
+
+    route = (("route", "/items/<item_id>"),)
+    snapshot = registry.snapshot()
+    assert 0 < seen["remaining"] <= 5
+    assert seen["statement"] == "UPDATE Items SET seen = 1"
+    assert snapshot["counters"][("db_queries_total", route)] == 4
+    assert snapshot["histograms"][("http_request_db_queries", route)][-1] == 4
+    assert sum(snapshot["histograms"][("http_request_duration_seconds", route + (("method", "GET"), ("status", "404")))][:-1]) == 2
+    assert snapshot["gauges"][("http_requests_in_flight", route)] == 0
+    assert remaining_seconds() is None
+
+
+def test_async_selects_carry_the_execution_limit_and_report_to_the_breaker():
+    breaker = CircuitBreaker("mysql:async-test", failure_threshold=1)
+    cursor, execute = cursor_on(breaker)
+    with execute:
+        asyncio.run(cursor.execute("SELECT id FROM Users WHERE id = %s", (1,)))
+    assert cursor.statement.startswith("SELECT /*+ MAX_EXECUTION_TIME(")
+
+    async def hang():
+        await asyncio.sleep(5)
+
+    # A statement outliving the read timeout is cancelled and its connection never reused
+    cursor, execute = cursor_on(breaker, hang)
+    with execute, patch("Config.AsyncDb.READ_TIMEOUT", 0.01):
+        with pytest.raises(TimeoutError):
+            asyncio.run(cursor.execute("DELETE FROM Reports"))
+    cursor.connection.close.assert_called_once()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_pool_waits_are_bounded_and_skip_an_open_breaker():
+    db = AsyncDatabase()
+    db.write_secret_name = "async-primary"
+    db.write_pool = MagicMock()
+
+    async def exhausted():
+        await asyncio.sleep(5)
+
+    db.write_pool.acquire.side_effect = exhausted
+
+    async def write():
+        async with db.connect_write():
+            pass
+
+    with patch("Config.AsyncDb.ACQUIRE_TIMEOUT", 0.01):
+        with pytest.raises(DependencyUnavailable):
+            asyncio.run(write())
+
+    breaker = CircuitBreaker("mysql:async-primary", failure_threshold=1)
+    breaker.record_failure()
+    with patch("Config.AsyncDb.get_breaker", return_value=breaker):
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(write())
+    assert db.write_pool.acquire.call_count == 1
+
+
+class FakeAsyncRedisClient:
+    def __init__(self, server):
+        self.redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    def connect(self):
+        return self.redis_client
+
+
+def pool_of(connection):
+    pool = MagicMock()
+    pool.acquire = AsyncMock(return_value=connection)
+    return pool
+
+
+def test_async_reads_honour_read_your_writes_markers(monkeypatch):
+    monkeypatch.setenv("SECRET_WRITE", "async-primary")
+    monkeypatch.setenv("SECRET_READ", "async-replica")
+    server = fakeredis.FakeServer()
+    db = AsyncDatabase(FakeAsyncRedisClient(server))
+    primary, replica = MagicMock(name="primary"), MagicMock(name="replica")
+    primary.commit = AsyncMock()
+    db.write_pool, db.read_pool = pool_of(primary), pool_of(replica)
+
+    async def read(user_id=None):
+        async with db.connect_read(user_id) as connection:
+            return connection
+
+    async def write(user_id):
+        async with db.connect_write(user_id) as connection:
+            await connection.commit()
+
+    async def run():
+        before = await read(7)
+        await write(7)
+        return before, await read(7), await read(8), await read()
+
+    with patch.object(replica_lag, "claim_due", return_value=[]):
+        assert asyncio.run(run()) == (replica, primary, replica, replica)
+
+        # Markers are shared with the threaded app, a write there routes async reads too
+        pool = redis.BlockingConnectionPool(connection_class=fakeredis.FakeConnection, server=server, decode_responses=True)
+        with patch("Config.Redis._pool", pool):
+            record_writes([9])
+        assert asyncio.run(read(9)) is primary
+
+        # Without the marker a replica can't be proven fresh enough
+        db.redis_client.redis_client = MagicMock(get=AsyncMock(side_effect=redis.ConnectionError("down")))
+        assert asyncio.run(read(8)) is primary
+
+
+if __name__ == "__main__":
+    pytest.main()
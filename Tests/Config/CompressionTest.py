@@ -0,0 +1,81 @@
+import zlib
+import pytest
+from unittest.mock import patch
+from flask import Flask, jsonify
+from Config import Compression
+from Config.Compression import install_compression, compressed_bodies
+from Config.JsonStream import stream_json_array
+
+ROWS = [{"Name": f"ingredient {index}", "Category": "Vegetables", "Quantity_Type": "Serving"} for index in range(200)]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.add_url_rule("/large", "large", view_func=lambda: jsonify(ROWS))
+    app.add_url_rule("/small", "small", view_func=lambda: jsonify({"message": "ok"}))
+    app.add_url_rule("/stream", "stream", view_func=lambda: stream_json_array(iter(ROWS)))
+    app.add_url_rule("/internal_ingredients/search", "search", view_func=lambda: jsonify(ROWS))
+    install_compression(app)
+    compressed_bodies.clear()
+    return app.test_client()
+
+
+def test_gzip_above_threshold_only(client):
+    with patch.object(Compression, "brotli", None):
+        large = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+        small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in large.headers["Vary"]
+    assert zlib.decompress(large.data, 31) == jsonify_body(client, "/large")
+    assert "Content-Encoding" not in small.headers
+    assert "Accept-Encoding" in small.headers["Vary"]
+
+
+def test_negotiation_respects_quality(client):
+    refused = client.get("/large", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in refused.headers
+
+    if Compression.brotli is not None:
+        preferred = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+        assert preferred.headers["Content-Encoding"] == "br"
+        assert Compression.brotli.decompress(preferred.data) == jsonify_body(client, "/large")
+        weighted = client.get("/large", headers={"Accept-Encoding": "gzip, br;q=0.5"})
+        assert weighted.headers["Content-Encoding"] == "gzip"
+
+
+def test_streamed_body_is_compressed_incrementally(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    body = zlib.decompress(response.data, 31)
+    assert body.startswith(b"[{") and body.count(b'"Name"') == len(ROWS)
+
+
+def test_static_routes_compress_once(client):
+    with patch.object(Compression, "compress", wraps=Compression.compress) as compress:
+        first = client.get("/internal_ingredients/search", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/internal_ingredients/search", headers={"Accept-Encoding": "gzip"})
+
+    assert compress.call_count == 1
+    assert first.data == second.data
+    assert zlib.decompress(second.data, 31) == jsonify_body(client, "/large")
+
+
+def test_cache_is_bounded_in_bytes():
+    cache = Compression.CompressedBodyCache(max_bytes=200)
+    for index in range(20):
+        cache.get_or_compress(f"body {index} ".encode() * 100, "gzip")
+
+    assert cache.size <= 200
+    assert len(cache.entries) < 20
+
+
+def jsonify_body(client, path):
+    return client.get(path, headers={"Accept-Encoding": "identity"}).data
+
+
+if __name__ == "__main__":
+    pytest.main()
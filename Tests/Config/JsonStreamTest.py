@@ -0,0 +1,69 @@
+import json
+import pytest
+from decimal import Decimal
+from datetime import date, datetime
+from flask import Flask, jsonify
+from Config.JsonStream import iter_json_array, prefetch, stream_json_array
+
+ROWS = [
+    {"edamam_food_id": "food_a", "quantity": Decimal("2.50"), "date_added": datetime(2026, 3, 1, 8, 30), "Name": "Crème fraîche"},
+    {"edamam_food_id": "food_b", "quantity": 1, "date_added": date(2026, 3, 2), "Name": None},
+]
+
+
+def test_stream_matches_jsonify():
+    """
+    Dates become HTTP dates and Decimals strings, exactly as jsonify encodes them.
+    """
+    app = Flask(__name__)
+    with app.app_context():
+        expected = json.loads(jsonify(ROWS).get_data())
+        streamed = stream_json_array(iter(ROWS))
+
+    assert streamed.mimetype == "application/json"
+    assert json.loads(b"".join(streamed.response)) == expected
+    assert expected[0]["quantity"] == "2.50"
+    assert expected[0]["date_added"] == "Sun, 01 Mar 2026 08:30:00 GMT"
+
+
+def test_iter_json_array_yields_bounded_chunks():
+    rows = ({"id": index, "name": "x" * 100} for index in range(1000))
+    chunks = list(iter_json_array(rows, chunk_bytes=4096))
+
+    assert len(chunks) > 20
+    assert max(len(chunk) for chunk in chunks[:-1]) < 4096 + 200
+    assert len(json.loads(b"".join(chunks))) == 1000
+    assert list(iter_json_array(iter([]))) == [b"[]"]
+
+
+def test_prefetch_and_on_close():
+    assert prefetch(iter([]), 2) == ([], None)
+    assert prefetch(iter([1]), 2) == ([1], None)
+    head, rows = prefetch(iter([1, 2, 3]), 2)
+    assert head == [1, 2] and list(rows) == [1, 2, 3]
+
+    closed = []
+    response = stream_json_array(iter([{"a": 1}]), on_close=lambda: closed.append(True))
+    response.close()
+    assert closed == [True]
+
+
+def test_prefetch_surfaces_errors_before_the_status_is_sent():
+    def failing(after):
+        yield from range(after)
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        prefetch(failing(1), 2)
+
+    # Past the prefetch the array is never closed, so a cut-off body cannot parse as a complete result
+    _, rows = prefetch(failing(3), 2)
+    response = stream_json_array(rows)
+    body = b""
+    with pytest.raises(RuntimeError):
+        for chunk in response.response:
+            body += chunk
+    assert not body.endswith(b"]")
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import Config.Redis as redis_config
+import Api.FatSecret as fatsecret
+from Config.Db import Database
+from Config.Lifecycle import reset_after_fork
+
+
+@patch("Config.Lifecycle.reset_firebase_after_fork")
+def test_reset_after_fork_drops_inherited_connections(mock_reset_firebase):
+    """
+    A forked worker forgets inherited connections without closing them and gets a fresh Redis pool and FatSecret session.
+    """
+    database = Database()
+    connection = MagicMock()
+    database.write_connection = connection
+    redis_config._pool = MagicMock()
+    fatsecret._session = MagicMock()
+
+    reset_after_fork()
+
+    assert database.write_connection is None
+    connection.close.assert_not_called()
+    assert redis_config._pool is None
+    assert fatsecret._session is None
+    mock_reset_firebase.assert_called_once()
+
+
+@patch("app.warm_up")
+def test_create_app_registers_blueprints(mock_warm_up):
+    from app import create_app
+
+    app = create_app(warm=False)
+    rules = {rule.rule for rule in app.url_map.iter_rules()}
+
+    assert "/user_ingredients/all" in rules
+    assert "/recipes/cookable" in rules
+    mock_warm_up.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main()
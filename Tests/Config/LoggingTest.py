@@ -0,0 +1,74 @@
+import queue
+import logging
+import pytest
+from unittest.mock import patch
+from Config.Metrics import MetricsRegistry
+from Config.Logging import LazyQueueHandler, BoundedQueueListener, SamplingFilter, parse_sample_rates
+
+
+def make_record(msg, *args, level=logging.INFO):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+def test_sampling_is_per_message_template():
+    sampling = SamplingFilter(parse_sample_rates("Cache hit=0,connection closed=0"))
+
+    assert not sampling.filter(make_record("[get_cached_uid_redis] Cache hit for ID token."))
+    assert not sampling.filter(make_record("[get_cached_uid_redis] Redis connection closed."))
+    assert sampling.filter(make_record("Fetched %s reports for user_id %s", 3, 7))
+    assert sampling.filter(make_record("Cache hit but failed", level=logging.ERROR))
+
+
+def test_rate_limit_per_message_template():
+    sampling = SamplingFilter(rate_limit=3)
+
+    with patch("Config.Logging.time.monotonic", return_value=100.0):
+        passed = [sampling.filter(make_record("Fetched %s reports for user_id %s", n, n)) for n in range(5)]
+        assert sampling.filter(make_record("Report added for user_id %s", 1))
+    assert passed == [True, True, True, False, False]
+
+    with patch("Config.Logging.time.monotonic", return_value=101.0):
+        assert sampling.filter(make_record("Fetched %s reports for user_id %s", 9, 9))
+
+
+def test_queue_handler_defers_formatting():
+    """
+    The record is queued with its template and arguments, formatting happens on the writer thread.
+    """
+    class Counted:
+        calls = 0
+
+        def __str__(self):
+            Counted.calls += 1
+            return "counted"
+
+    log_queue = queue.SimpleQueue()
+    LazyQueueHandler(log_queue).handle(make_record("Fetched %s", Counted()))
+
+    record = log_queue.get_nowait()
+    assert record.msg == "Fetched %s"
+    assert Counted.calls == 0
+    assert record.getMessage() == "Fetched counted"
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    registry = MetricsRegistry()
+    log_queue = queue.Queue(maxsize=2)
+    handler = LazyQueueHandler(log_queue)
+
+    with patch("Config.Logging.metrics", registry):
+        for n in range(5):
+            handler.handle(make_record("Fetched %s", n))
+
+    assert log_queue.qsize() == 2
+    assert registry.snapshot()["counters"][("log_records_dropped_total", (("reason", "queue_full"),))] == 3
+
+    # A stalled writer must not hang shutdown
+    listener = BoundedQueueListener(log_queue, logging.NullHandler())
+    listener._thread = object()
+    with patch("Config.Logging.STOP_TIMEOUT", 0.01):
+        listener.stop()
+
+
+if __name__ == "__main__":
+    pytest.main()
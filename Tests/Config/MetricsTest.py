@@ -0,0 +1,141 @@
+import threading
+import pytest
+from unittest.mock import patch
+from flask import Flask, jsonify
+from Config.Metrics import MetricsRegistry, render_prometheus, mark_worker_dead
+from Config.RequestMetrics import install_request_metrics, record_query, redis_pool_samples
+from Config.RedisPool import CountingConnectionPool
+
+
+def test_shards_merge_across_threads():
+    """
+    Each thread writes its own shard and the snapshot sums them.
+    """
+    registry = MetricsRegistry()
+
+    def work():
+        for _ in range(1000):
+            registry.inc("jobs_total", (("kind", "a"),))
+            registry.observe("job_seconds", (), 0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"][("jobs_total", (("kind", "a"),))] == 4000
+    assert snapshot["histograms"][("job_seconds", ())][-1] == pytest.approx(80.0)
+
+
+def test_finished_threads_are_folded_into_retired_shard():
+    registry = MetricsRegistry()
+    for _ in range(10):
+        thread = threading.Thread(target=registry.inc, args=("jobs_total",))
+        thread.start()
+        thread.join()
+
+    assert registry.snapshot()["counters"][("jobs_total", ())] == 10
+    assert registry.shards == []
+    assert registry.snapshot()["counters"][("jobs_total", ())] == 10
+
+
+def test_render_prometheus_histogram_is_cumulative():
+    registry = MetricsRegistry()
+    registry.observe("latency_seconds", (("route", "/a"),), 0.003)
+    registry.observe("latency_seconds", (("route", "/a"),), 0.2)
+    registry.observe("latency_seconds", (("route", "/a"),), 30)
+
+    body = render_prometheus(registry.snapshot())
+
+    assert "# TYPE latency_seconds histogram" in body
+    assert 'latency_seconds_bucket{route="/a",le="0.005"} 1' in body
+    assert 'latency_seconds_bucket{route="/a",le="0.25"} 2' in body
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in body
+    assert 'latency_seconds_count{route="/a"} 3' in body
+
+
+def test_collect_aggregates_workers_and_keeps_dead_counters(tmp_path, monkeypatch):
+    """
+    Snapshots of other workers are summed, and an exited worker's counters survive in the tombstone.
+    """
+    monkeypatch.setenv("METRICS_DIR", str(tmp_path))
+    other = MetricsRegistry()
+    other.inc("requests_total", (), 5)
+    other.gauge_add("in_flight", (), 2)
+    with patch("os.getpid", return_value=999999):
+        other.write_snapshot()
+
+    registry = MetricsRegistry()
+    registry.inc("requests_total", (), 1)
+    assert registry.collect()["counters"][("requests_total", ())] == 6
+
+    mark_worker_dead(999999)
+    collected = registry.collect()
+    assert collected["counters"][("requests_total", ())] == 6
+    assert ("in_flight", ()) not in collected["gauges"]
+
+
+def test_request_hooks_label_by_route_template_and_status():
+    registry = MetricsRegistry()
+    app = Flask(__name__)
+
+    @app.route("/items/<item_id>")
+    def get_item(item_id):
+        record_query(0.001)
+        record_query(0.002)
+        return jsonify({"id": item_id}), 404
+
+    with patch("Config.RequestMetrics.metrics", registry):
+        install_request_metrics(app)
+        app.test_client().get("/items/7")
+        app.test_client().get("/items/8")
+
+    snapshot = registry.snapshot()
+    labels = (("route", "/items/<item_id>"), ("method", "GET"), ("status", "404"))
+    assert sum(snapshot["histograms"][("http_request_duration_seconds", labels)][:-1]) == 2
+    assert snapshot["counters"][("db_queries_total", (("route", "/items/<item_id>"),))] == 4
+    assert snapshot["histograms"][("http_request_db_queries", (("route", "/items/<item_id>"),))][-1] == 4
+    assert snapshot["gauges"][("http_requests_in_flight", (("route", "/items/<item_id>"),))] == 0
+
+
+def test_metrics_routes_are_denied_without_a_configured_token(monkeypatch):
+    from Controller.MetricsController import metrics_blueprint
+
+    app = Flask(__name__)
+    app.register_blueprint(metrics_blueprint, url_prefix='/metrics')
+    client = app.test_client()
+
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics/queries").status_code == 401
+
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong-secret"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+
+def test_redis_pool_gauge_counts_created_and_checked_out_connections():
+    import fakeredis
+    import redis
+
+    pool = CountingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True, max_connections=5
+    )
+    with patch("Config.Redis._pool", pool):
+        client = redis.StrictRedis(connection_pool=pool)
+        held = pool.get_connection()
+        client.set("key", "value")
+        assert redis_pool_samples() == [
+            ("redis_pool_connections", (("state", "created"),), 2),
+            ("redis_pool_connections", (("state", "in_use"),), 1),
+            ("redis_pool_max_connections", (), 5),
+        ]
+
+        pool.release(held)
+        assert redis_pool_samples()[1] == ("redis_pool_connections", (("state", "in_use"),), 0)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,113 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from Config.Metrics import MetricsRegistry
+from Config.QueryProfiler import QueryProfiler, normalize_sql, fingerprint_sql, top_statements, OTHER_FINGERPRINT
+
+
+def test_normalize_sql_collapses_literals_and_lists():
+    assert normalize_sql(
+        "SELECT *  FROM UserIngredients\n WHERE user_id = %s AND edamam_food_id IN (%s, %s, %s)"
+    ) == "SELECT * FROM UserIngredients WHERE user_id = ? AND edamam_food_id IN (...)"
+    assert normalize_sql(
+        "INSERT INTO RecipeIngredients (uri, edamam_food_id) VALUES ('a', 'b'), ('c', NULL), ('e', 'f')"
+    ) == "INSERT INTO RecipeIngredients (uri, edamam_food_id) VALUES (?, ?), ..."
+    assert normalize_sql("DELETE FROM Reports WHERE id = 42 AND subject = 'it''s'") == \
+        "DELETE FROM Reports WHERE id = ? AND subject = ?"
+    # Every arity of a tuple IN list and scientific notation read the same
+    assert normalize_sql("DELETE FROM UserIngredients WHERE (user_id, edamam_food_id) IN ((%s, %s), (%s, %s))") == \
+        normalize_sql("DELETE FROM UserIngredients WHERE (user_id, edamam_food_id) IN ((%s, %s))") == \
+        "DELETE FROM UserIngredients WHERE (user_id, edamam_food_id) IN (...)"
+    assert normalize_sql("INSERT INTO T (a) VALUES (1e-05), (2.5)") == "INSERT INTO T (a) VALUES (?), ..."
+
+
+class FakeModel:
+    def get_rows(self, profiler, cursor):
+        profiler.record(cursor, "SELECT id FROM Users WHERE firebase_uid = %s", ("abc",), 0.5)
+
+
+def make_profiler(**overrides):
+    profiler = QueryProfiler()
+    profiler.enabled = True
+    profiler.profile_rate = 1.0
+    profiler.slow_seconds = 0.2
+    profiler.sample_rate = 1.0
+    profiler.explain_seconds = None
+    for name, value in overrides.items():
+        setattr(profiler, name, value)
+    return profiler
+
+
+@patch("Config.QueryProfiler.slow_query_logger")
+def test_record_counts_per_statement_and_logs_slow_queries(mock_logger):
+    registry = MetricsRegistry()
+    profiler = make_profiler()
+    cursor = MagicMock(rowcount=1)
+
+    with patch("Config.QueryProfiler.metrics", registry), patch("Config.QueryProfiler.MODEL_DIRECTORY", "QueryProfilerTest"):
+        FakeModel().get_rows(profiler, cursor)
+        FakeModel().get_rows(profiler, cursor)
+
+    top = top_statements(registry.snapshot(), statements=profiler.statements)
+    statement = "SELECT id FROM Users WHERE firebase_uid = ?"
+    assert top == [{
+        "fingerprint": fingerprint_sql(statement),
+        "statement": statement,
+        "caller": "FakeModel.get_rows",
+        "calls": 2,
+        "seconds": 1.0,
+        "rows": 2,
+        "mean_ms": 500.0,
+    }]
+    entry = json.loads(mock_logger.warning.call_args[0][0])
+    assert entry["event"] == "slow_query"
+    assert entry["caller"] == "FakeModel.get_rows"
+    assert "abc" not in mock_logger.warning.call_args[0][0]
+
+
+@patch("Config.QueryProfiler.slow_query_logger")
+def test_explain_is_rate_limited_per_statement(mock_logger):
+    profiler = make_profiler(explain_seconds=0.3, explain_interval=300)
+    cursor = MagicMock(rowcount=1, _result=None)
+    cursor.mogrify.return_value = "SELECT id FROM Users WHERE firebase_uid = 'abc'"
+    explain_cursor = cursor.connection.cursor.return_value.__enter__.return_value
+    explain_cursor.fetchall.return_value = [{"table": "Users", "type": "ref", "key": "firebase_uid"}]
+
+    with patch("Config.QueryProfiler.metrics", MetricsRegistry()):
+        FakeModel().get_rows(profiler, cursor)
+        FakeModel().get_rows(profiler, cursor)
+
+    explain_cursor.execute.assert_called_once_with("EXPLAIN SELECT id FROM Users WHERE firebase_uid = 'abc'")
+    first, second = (json.loads(call[0][0]) for call in mock_logger.warning.call_args_list)
+    assert first["explain"][0]["key"] == "firebase_uid"
+    assert "explain" not in second
+
+
+def test_unsampled_fast_statements_skip_the_stack_walk():
+    registry = MetricsRegistry()
+    profiler = make_profiler(profile_rate=0.0)
+
+    with patch("Config.QueryProfiler.metrics", registry), patch("Config.QueryProfiler.find_caller") as find_caller:
+        profiler.record(MagicMock(rowcount=1), "SELECT 1", None, 0.001)
+
+    find_caller.assert_not_called()
+    assert registry.snapshot()["counters"] == {}
+
+
+def test_labels_and_explain_history_stay_bounded():
+    registry = MetricsRegistry()
+    profiler = make_profiler(explain_seconds=0.3)
+
+    with patch("Config.QueryProfiler.metrics", registry), patch("Config.QueryProfiler.MAX_FINGERPRINTS", 2), \
+            patch("Config.QueryProfiler.EXPLAIN_MAX_ENTRIES", 2):
+        for table in ("A", "B", "C", "D"):
+            profiler.record(MagicMock(rowcount=1), f"SELECT id FROM {table}", None, 0.001)
+            profiler.should_explain(MagicMock(_result=None), f"SELECT id FROM {table}", 1.0)
+
+    fingerprints = {dict(labels)["fingerprint"] for _, labels in registry.snapshot()["counters"]}
+    assert len(fingerprints) == 3 and OTHER_FINGERPRINT in fingerprints
+    assert list(profiler.explained) == ["SELECT id FROM C", "SELECT id FROM D"]
+
+
+if __name__ == "__main__":
+    pytest.main()
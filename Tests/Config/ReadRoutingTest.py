@@ -0,0 +1,112 @@
+import math
+import pytest
+import fakeredis
+import redis
+from unittest.mock import MagicMock, patch
+from Config import ReadRouting
+from Config.ReadRouting import ReplicaLag, parse_replicas, route_read, record_writes, measure_lag, PRIMARY
+from Config.Db import Database
+
+REPLICAS = [("replica-a", 3.0), ("replica-b", 1.0)]
+
+
+@pytest.fixture(autouse=True)
+def fake_redis():
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    with patch("Config.Redis._pool", pool):
+        yield
+
+
+def measured(**lags):
+    lag = ReplicaLag()
+    for name, value in lags.items():
+        lag.record(name.replace("_", "-"), value)
+    return lag
+
+
+def test_parse_replicas():
+    assert parse_replicas("replica-a:3, replica-b,replica-c:0") == [("replica-a", 3.0), ("replica-b", 1.0)]
+    assert parse_replicas("read-secret") == [("read-secret", 1.0)]
+    assert parse_replicas(None) == []
+
+
+def test_users_without_recent_writes_read_from_replicas():
+    lag = measured(replica_a=0.0, replica_b=0.0)
+
+    assert route_read(REPLICAS, None, lag).replica in ("replica-a", "replica-b")
+    assert route_read(REPLICAS, 7, lag).reason == "no_recent_write"
+    assert route_read([], 7, lag) == (PRIMARY, "no_replica", None)
+
+
+def test_recent_write_reads_from_primary_until_replica_catches_up():
+    lag = measured(replica_a=0.0, replica_b=None)
+    with patch("Config.ReadRouting.time.time", return_value=1000.0):
+        record_writes([7])
+        assert route_read(REPLICAS, 7, lag) == (PRIMARY, "recent_write", None)
+
+    # Past the window only the replica whose lag is known to be shorter than the write's age qualifies
+    with patch("Config.ReadRouting.time.time", return_value=1000.0 + ReadRouting.STALENESS_SECONDS + 1):
+        assert route_read(REPLICAS, 7, lag) == ("replica-a", "caught_up", None)
+        assert route_read(REPLICAS, 8, lag).reason == "no_recent_write"
+
+
+def test_lagging_replicas_take_no_reads():
+    lag = measured(replica_a=ReadRouting.MAX_LAG_SECONDS + 1, replica_b=math.inf)
+
+    assert route_read(REPLICAS, None, lag) == (PRIMARY, "lagging", None)
+
+
+def test_wait_mode_waits_for_the_writes_gtid():
+    lag = measured(replica_a=5.0, replica_b=5.0)
+    with patch.object(ReadRouting, "MODE", "wait"):
+        record_writes([7], gtid="uuid:1-42")
+        route = route_read(REPLICAS, 7, lag)
+
+    assert route.reason == "wait" and route.gtid == "uuid:1-42"
+
+
+def test_marker_lookup_failure_reads_from_primary():
+    with patch("Config.ReadRouting.last_write", side_effect=redis.ConnectionError("down")):
+        assert route_read(REPLICAS, 7, measured(replica_a=0.0)).reason == "marker_unavailable"
+
+
+def test_measure_lag():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+
+    cursor.fetchone.return_value = {"Seconds_Behind_Source": 3}
+    assert measure_lag(connection) == 3.0
+    cursor.fetchone.return_value = {"Seconds_Behind_Source": None}
+    assert measure_lag(connection) == math.inf
+    cursor.fetchone.return_value = None
+    assert measure_lag(connection) == 0.0
+
+
+def test_database_routes_recent_writers_to_primary():
+    """
+    connect_read opens one connection per target secret and sends a user who just wrote to the primary.
+    """
+    connections = {}
+
+    def open_connection(secret_name, role):
+        connection = connections[secret_name] = MagicMock(open=True)
+        connection.cursor.return_value.__enter__.return_value.fetchone.return_value = None
+        return connection
+
+    with patch.dict("os.environ", {"SECRET_WRITE": "primary", "SECRET_READ": "replica-a"}), \
+            patch("Config.Db.replica_lag", ReplicaLag()) as lag, \
+            patch("Config.ReadRouting.replica_lag", lag), \
+            patch.object(Database, "_open", side_effect=open_connection):
+        database = Database()
+        assert database.connect_read(7) is connections["replica-a"]
+        assert lag.samples["replica-a"][0] == 0.0
+
+        record_writes([7])
+        assert database.connect_read(7) is connections["primary"]
+        assert database.connect_read(8) is connections["replica-a"]
+
+
+if __name__ == "__main__":
+    pytest.main()
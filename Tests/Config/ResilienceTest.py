@@ -0,0 +1,141 @@
+import pytest
+import pymysql
+import fakeredis
+import redis
+from unittest.mock import MagicMock, patch
+from flask import Flask
+from Config.Resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, install_deadlines, statement_budget_ms
+from Config.InstrumentedCursor import InstrumentedCursorMixin
+from Cache.StaleCache import StaleCache, stale_cache
+
+
+@pytest.fixture
+def fake_redis():
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    with patch("Config.Redis._pool", pool):
+        yield
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=10)
+    with patch("Config.Resilience.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+    # One trial after the reset interval, a second caller is still rejected while it runs
+    with patch("Config.Resilience.time.monotonic", return_value=110.0):
+        breaker.check()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    with patch("Config.Resilience.time.monotonic", return_value=120.0):
+        breaker.check()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class RecordingCursor:
+    rowcount = 1
+
+    def __init__(self, breaker=None):
+        self.connection = MagicMock(breaker=breaker)
+
+    def execute(self, query, args=None):
+        self.statement = query
+        return 1
+
+
+class LimitedCursor(InstrumentedCursorMixin, RecordingCursor):
+    pass
+
+
+def test_selects_carry_the_remaining_request_budget():
+    app = Flask(__name__)
+    install_deadlines(app)
+    cursor = LimitedCursor()
+
+    with app.test_request_context():
+        app.preprocess_request()
+        cursor.execute("SELECT id FROM Users WHERE id = %s", (1,))
+        assert cursor.statement.startswith("SELECT /*+ MAX_EXECUTION_TIME(")
+        cursor.execute("UPDATE Users SET name = %s", ("x",))
+        assert cursor.statement == "UPDATE Users SET name = %s"
+
+        with patch("Config.Resilience.time.monotonic", return_value=10 ** 9):
+            with pytest.raises(DeadlineExceeded):
+                statement_budget_ms()
+
+
+def test_only_dependency_failures_count_against_the_breaker():
+    cursor = LimitedCursor(CircuitBreaker("mysql:test", failure_threshold=1))
+    with patch.object(RecordingCursor, "execute", side_effect=ValueError("bad input")):
+        with pytest.raises(ValueError):
+            cursor.execute("DELETE FROM Reports")
+    assert cursor.connection.breaker.state == CircuitBreaker.CLOSED
+
+    # Deadlocks, lock waits, execution time aborts and access denied come from a healthy server
+    for code in (1213, 1205, 3024, 1045):
+        with patch.object(RecordingCursor, "execute", side_effect=pymysql.err.OperationalError(code, "query failed")):
+            with pytest.raises(pymysql.err.OperationalError):
+                cursor.execute("DELETE FROM Reports")
+    assert cursor.connection.breaker.state == CircuitBreaker.CLOSED
+
+    with patch.object(RecordingCursor, "execute", side_effect=pymysql.err.OperationalError(2013, "Lost connection")):
+        with pytest.raises(pymysql.err.OperationalError):
+            cursor.execute("DELETE FROM Reports")
+    assert cursor.connection.breaker.state == CircuitBreaker.OPEN
+
+    cursor = LimitedCursor(CircuitBreaker("mysql:test", failure_threshold=1))
+    with patch.object(RecordingCursor, "execute", side_effect=ConnectionError("lost")):
+        with pytest.raises(ConnectionError):
+            cursor.execute("DELETE FROM Reports")
+    assert cursor.connection.breaker.state == CircuitBreaker.OPEN
+
+
+def test_stale_cache_keeps_last_good_body(fake_redis):
+    cache = StaleCache(refresh_seconds=60, max_bytes=200)
+    cache.remember("search:milk:5", [{"Name": "milk"}])
+    cache.remember("search:milk:5", [{"Name": "ignored within the refresh interval"}])
+
+    assert cache.recall("search:milk:5") == '[{"Name":"milk"}]'
+    assert list(cache.remember_rows("pantry:1", iter([{"a": 1}, {"a": 2}]))) == [{"a": 1}, {"a": 2}]
+    assert cache.recall("pantry:1") == '[{"a":1},{"a":2}]'
+
+    # Streams larger than max_bytes pass through without being kept
+    assert len(list(cache.remember_rows("pantry:2", ({"a": "x" * 50} for _ in range(10))))) == 10
+    assert cache.recall("pantry:2") is None
+
+
+def test_search_serves_stale_results_while_mysql_is_down(fake_redis):
+    from Controller.InternalIngredientsController import internal_ingredients_blueprint
+
+    app = Flask(__name__)
+    app.register_blueprint(internal_ingredients_blueprint, url_prefix="/internal_ingredients")
+    client = app.test_client()
+    stale_cache.clear_tracking()
+
+    with patch("Config.Db.Database.connect_read"), \
+            patch("Model.InternalIngredientsModel.InternalIngredientsModel.get_all_ingredients",
+                  return_value=[{"Name": "milk"}]):
+        assert client.get("/internal_ingredients/search?q=Milk&limit=5").status_code == 200
+
+    with patch("Config.Db.Database.connect_read", side_effect=CircuitOpenError("mysql circuit is open")):
+        response = client.get("/internal_ingredients/search?q=milk&limit=5")
+        missing = client.get("/internal_ingredients/search?q=eggs&limit=5")
+
+    assert response.status_code == 200
+    assert response.headers["X-Served-Stale"] == "true"
+    assert response.get_json() == [{"Name": "milk"}]
+    assert missing.status_code == 500
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,69 @@
+import json
+import pytest
+import pymysql
+import requests
+from unittest.mock import MagicMock, patch
+from Config import SecretManager
+from Config.Db import Database
+from Auth.FatSecretAuth import FatSecretAuth
+
+
+@pytest.fixture
+def secrets():
+    """
+    Secrets Manager stand-in returning the given secret values in turn.
+    """
+    client = MagicMock()
+    SecretManager._secrets.clear()
+    with patch("Config.SecretManager._get_client", return_value=client), \
+            patch("Config.SecretManager.MIN_REFRESH_SECONDS", 0):
+        def serve(*values):
+            client.get_secret_value.side_effect = [{"SecretString": json.dumps(value)} for value in values]
+            return client
+        yield serve
+    SecretManager._secrets.clear()
+
+
+def test_rotated_database_password_is_fetched_again_once(secrets):
+    client = secrets({"DB_HOST": "db", "DB_USER": "app", "DB_PASSWORD": "old", "DB_NAME": "app"},
+                     {"DB_HOST": "db", "DB_USER": "app", "DB_PASSWORD": "new", "DB_NAME": "app"})
+
+    def connect(**kwargs):
+        if kwargs["password"] == "old":
+            raise pymysql.err.OperationalError(1045, "Access denied for user 'app'")
+        return MagicMock()
+
+    with patch("Config.InstrumentedCursor.InstrumentedConnection", side_effect=connect) as connection:
+        Database()._open("rotated-secret", "write")
+
+    assert [call.kwargs["password"] for call in connection.call_args_list] == ["old", "new"]
+    assert client.get_secret_value.call_count == 2
+
+
+def test_secret_is_not_refetched_more_often_than_the_minimum_interval(secrets):
+    client = secrets({"DB_PASSWORD": "old"}, {"DB_PASSWORD": "new"})
+    SecretManager.get_secret("name", "region")
+
+    with patch("Config.SecretManager.MIN_REFRESH_SECONDS", 60):
+        assert not SecretManager.invalidate_secret("name", "region")
+    assert SecretManager.invalidate_secret("name", "region")
+    assert SecretManager.get_secret("name", "region") == {"DB_PASSWORD": "new"}
+
+
+def test_rejected_fatsecret_credentials_are_reloaded(secrets):
+    secrets({"Client-ID": "id", "Client-Secret": "old"}, {"Client-ID": "id", "Client-Secret": "new"})
+
+    def post(url, headers, data, timeout):
+        response = requests.Response()
+        rotated = headers["Authorization"] == "Basic aWQ6bmV3"
+        response.status_code = 200 if rotated else 401
+        response._content = json.dumps({"access_token": "token", "expires_in": 60} if rotated else {"error": "invalid_client"}).encode()
+        return response
+
+    with patch("Auth.FatSecretAuth.requests.post", side_effect=post) as request:
+        assert FatSecretAuth().fetch_token() == ("token", 60)
+    assert request.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main()
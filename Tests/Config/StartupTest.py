@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", 1.5))
+
+
+def test_startup_within_budget():
+    """
+    Importing the app and building it in a fresh interpreter stays within STARTUP_BUDGET_SECONDS.
+    """
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import app; app.create_app(warm=False)"],
+        cwd=ROOT, check=True
+    )
+    elapsed = time.perf_counter() - started
+
+    assert elapsed <= STARTUP_BUDGET_SECONDS, f"Startup took {elapsed:.2f}s, budget is {STARTUP_BUDGET_SECONDS}s"
+
+
+def test_heavy_clients_are_lazy():
+    """
+    Building the app must not import the AWS, Firebase, MySQL or Redis clients.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, app; app.create_app(warm=False); "
+         "print(','.join(m for m in ('boto3', 'firebase_admin', 'pymysql', 'redis') if m in sys.modules))"],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    )
+
+    assert result.stdout.strip() == ""
+
+
+if __name__ == "__main__":
+    pytest.main()
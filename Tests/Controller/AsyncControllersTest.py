@@ -0,0 +1,255 @@
+import asyncio
+import pytest
+import fakeredis
+import redis
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from flask import Flask
+from quart import Quart
+from Config.Resilience import CircuitOpenError, DependencyUnavailable
+from Cache.StaleCache import stale_cache
+from Cache.CatalogSnapshot import catalog_snapshots
+from Cache.IngredientSearchIndex import ingredient_search_index
+from Cache.RecipeCatalogCache import RecipeCatalogCache
+from Cache.RecipeIngredientIndex import RecipeIngredientIndex, INDEX_LOG_KEY
+from Controller.AsyncControllers import (
+    AsyncUserIngredientsController, AsyncInternalIngredientsController, AsyncReportsController, AsyncRecipeController
+)
+
+MODELS = {
+    "UserIngredientsModel": ("Model.UserIngredientsModel.UserIngredientsModel", "Model.AsyncModels.AsyncUserIngredientsModel"),
+    "InternalIngredientsModel": ("Model.InternalIngredientsModel.InternalIngredientsModel", "Model.AsyncModels.AsyncInternalIngredientsModel"),
+    "ReportsModel": ("Model.ReportsModel.ReportsModel", "Model.AsyncModels.AsyncReportsModel"),
+    "RecipesModel": ("Model.RecipesModel.RecipesModel", "Model.AsyncModels.AsyncRecipesModel"),
+}
+TOKEN = {"Authorization": "token"}
+
+
+class FakeAsyncDatabase:
+    """
+    Pools stand-in, error makes every connection attempt fail like an unreachable MySQL.
+    """
+    def __init__(self):
+        self.error = None
+
+    @asynccontextmanager
+    async def _connect(self, user_id=None):
+        if self.error:
+            raise self.error
+        yield MagicMock()
+
+    connect_read = connect_write = _connect
+
+
+class FakeAsyncRedisClient:
+    def __init__(self, server):
+        self.redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    def connect(self):
+        return self.redis_client
+
+
+@pytest.fixture
+def apps():
+    """
+    The threaded and the async app with the same routes, Redis, token lookup and database outage switch.
+    """
+    from Controller.UserIngredientsController import user_ingredients_blueprint
+    from Controller.InternalIngredientsController import internal_ingredients_blueprint
+    from Controller.ReportsController import reports_blueprint
+    from Controller.RecipeController import recipes_blueprint
+
+    server = fakeredis.FakeServer()
+    pool = redis.BlockingConnectionPool(connection_class=fakeredis.FakeConnection, server=server, decode_responses=True)
+    sync_app = Flask(__name__)
+    sync_app.register_blueprint(user_ingredients_blueprint, url_prefix="/user_ingredients")
+    sync_app.register_blueprint(internal_ingredients_blueprint, url_prefix="/internal_ingredients")
+    sync_app.register_blueprint(reports_blueprint, url_prefix="/reports")
+    sync_app.register_blueprint(recipes_blueprint, url_prefix="/recipes")
+
+    db = FakeAsyncDatabase()
+    redis_client = FakeAsyncRedisClient(server)
+    async_app = Quart(__name__)
+    async_app.register_blueprint(AsyncUserIngredientsController(db, redis_client).blueprint, url_prefix="/user_ingredients")
+    async_app.register_blueprint(AsyncInternalIngredientsController(db, redis_client).blueprint, url_prefix="/internal_ingredients")
+    async_app.register_blueprint(AsyncReportsController(db, redis_client).blueprint, url_prefix="/reports")
+    async_app.register_blueprint(AsyncRecipeController(db, redis_client).blueprint, url_prefix="/recipes")
+
+    def sync_connect(*args):
+        if db.error:
+            raise db.error
+        return MagicMock()
+
+    stale_cache.clear_tracking()
+    with patch("Config.Redis._pool", pool), \
+            patch("Config.Db.Database.connect_read", side_effect=sync_connect), \
+            patch("Config.Db.Database.connect_write", side_effect=sync_connect), \
+            patch("Controller.UserIngredientsController.get_cached_uid_redis", return_value=7) as sync_lookup, \
+            patch("Controller.ReportsController.get_cached_uid_redis", new=sync_lookup), \
+            patch("Controller.RecipeController.get_cached_uid_redis", new=sync_lookup), \
+            patch("Controller.AsyncControllers.get_cached_uid_redis_async", new_callable=AsyncMock, return_value=7) as async_lookup:
+        yield Apps(sync_app, async_app, db, redis_client.redis_client, sync_lookup, async_lookup)
+    stale_cache.clear_tracking()
+
+
+class Apps:
+    def __init__(self, sync_app, async_app, db, async_redis, sync_lookup, async_lookup):
+        self.sync_app = sync_app
+        self.async_app = async_app
+        self.db = db
+        self.async_redis = async_redis
+        self.sync_lookup = sync_lookup
+        self.async_lookup = async_lookup
+
+    def call(self, method, path, **kwargs):
+        """
+        (status, json body, served stale) from the threaded app and then the async one.
+        """
+        sync_response = getattr(self.sync_app.test_client(), method)(path, **kwargs)
+
+        async def call_async():
+            response = await getattr(self.async_app.test_client(), method)(path, **kwargs)
+            return response.status_code, await response.get_json(), response.headers.get("X-Served-Stale")
+
+        return (
+            (sync_response.status_code, sync_response.get_json(), sync_response.headers.get("X-Served-Stale")),
+            asyncio.run(call_async())
+        )
+
+
+def model(name, method, **kwargs):
+    """
+    Patch method of the sync model and of its async counterpart alike.
+    """
+    sync_path, async_path = MODELS[name]
+    sync_patch = patch(f"{sync_path}.{method}", **kwargs)
+    async_patch = patch(f"{async_path}.{method}", new_callable=AsyncMock, **kwargs)
+
+    class Both:
+        def __enter__(self):
+            sync_patch.__enter__()
+            async_patch.__enter__()
+
+        def __exit__(self, *exc):
+            async_patch.__exit__(*exc)
+            sync_patch.__exit__(*exc)
+
+    return Both()
+
+
+def assert_same(results, status, stale=None):
+    sync_result, async_result = results
+    assert sync_result == async_result
+    assert sync_result[0] == status
+    assert sync_result[2] == stale
+    return sync_result[1]
+
+
+def test_pantry_reads_serve_stale_the_same_way(apps):
+    rows = [{"edamam_food_id": "food_a", "quantity": "2.00"}]
+    with model("UserIngredientsModel", "get_all_user_ingredients", return_value=rows):
+        assert assert_same(apps.call("get", "/user_ingredients/all", headers=TOKEN), 200) == rows
+
+    with model("UserIngredientsModel", "get_all_user_ingredients", return_value={"error": "failed", "details": "lost"}):
+        assert assert_same(apps.call("get", "/user_ingredients/all", headers=TOKEN), 200, "true") == rows
+
+    apps.db.error = CircuitOpenError("mysql circuit is open")
+    assert assert_same(apps.call("get", "/user_ingredients/all", headers=TOKEN), 200, "true") == rows
+    apps.sync_lookup.return_value = apps.async_lookup.return_value = 8
+    assert_same(apps.call("get", "/user_ingredients/all", headers=TOKEN), 500)
+
+    # A token that can't be checked is an outage, not a 401
+    apps.sync_lookup.side_effect = apps.async_lookup.side_effect = DependencyUnavailable("Token lookup failed")
+    assert_same(apps.call("get", "/reports/fetch", headers=TOKEN), 500)
+    assert_same(apps.call("get", "/user_ingredients/all"), 401)
+
+
+def test_writes_answer_with_the_same_status_codes(apps, monkeypatch):
+    invalid = {"ingredients": [{"edamam_food_id": "food_a"}]}
+    with model("UserIngredientsModel", "update_user_ingredients_batch", return_value={"message": "Updated 1 and removed 0 ingredients"}):
+        assert_same(apps.call("post", "/user_ingredients/update", json={"ingredients": [{"edamam_food_id": "food_a", "quantity": 1}]}, headers=TOKEN), 200)
+
+    monkeypatch.setenv("USER_INGREDIENTS_WRITE_BUFFER", "true")
+    assert_same(apps.call("post", "/user_ingredients/update", json=invalid, headers=TOKEN), 400)
+    assert_same(apps.call("post", "/user_ingredients/update", json=invalid, headers=dict(TOKEN, **{"X-Write-Ack": "eventually"})), 400)
+    bad_quantity = {"ingredients": [{"edamam_food_id": "food_a", "quantity": "lots"}]}
+    assert_same(apps.call("post", "/user_ingredients/update", json=bad_quantity, headers=dict(TOKEN, **{"X-Write-Ack": "buffered"})), 400)
+    with patch("Cache.UserIngredientsWriteBuffer.user_ingredients_write_buffer.submit", return_value={"message": "Buffered 1 ingredient changes"}):
+        assert_same(apps.call("post", "/user_ingredients/update", json=invalid, headers=dict(TOKEN, **{"X-Write-Ack": "buffered"})), 202)
+
+    assert_same(apps.call("post", "/user_ingredients/bulk", json={"operations": [{"op": "fly"}]}, headers=TOKEN), 400)
+    with model("UserIngredientsModel", "apply_bulk_operations", return_value={"error": "failed", "details": "deadlock"}):
+        assert_same(apps.call("post", "/user_ingredients/bulk", json={"operations": [{"op": "remove", "edamam_food_id": "food_a"}]}, headers=TOKEN), 500)
+
+
+def test_catalog_reads_use_the_same_fallbacks(apps):
+    typo_rows = [{"Edamam_Food_ID": "food_2", "Name": "broccoli florets"}]
+    with model("InternalIngredientsModel", "get_all_ingredients", return_value={"message": "No ingredients found for query: brocoli"}), \
+            model("InternalIngredientsModel", "get_ingredients_by_ids", return_value=typo_rows), \
+            patch.object(ingredient_search_index, "ensure_fresh", return_value=True), \
+            patch.object(ingredient_search_index, "search", return_value=["food_2"]):
+        assert assert_same(apps.call("get", "/internal_ingredients/search?q=brocoli&limit=5"), 200) == typo_rows
+
+    apps.db.error = CircuitOpenError("mysql circuit is open")
+    assert assert_same(apps.call("get", "/internal_ingredients/search?q=Brocoli&limit=5"), 200, "true") == typo_rows
+
+    snapshot = MagicMock(version=3, nutrition=lambda food_id: {"Edamam_Food_ID": food_id, "Calories": 34})
+    with patch.object(catalog_snapshots, "current", return_value=snapshot):
+        assert assert_same(apps.call("get", "/internal_ingredients/get_nutirtion_by_id?edamam_food_id=food_2"), 200)["Calories"] == 34
+    with patch.object(catalog_snapshots, "current", return_value=None):
+        assert_same(apps.call("get", "/internal_ingredients/get_nutirtion_by_id?edamam_food_id=food_2"), 500)
+
+
+def test_recipe_batches_and_cookable_answer_alike(apps):
+    added = {"message": "Added 1 recipes", "results": [{"uri": "toast", "status": "added"}]}
+    removed = {"message": "Removed 0 recipes", "results": [{"uri": "toast", "status": "not_found"}]}
+    batch = {"recipes": [{"uri": "toast", "label": "Toast", "calories": 90, "total_weight": 40, "ingredients": ["bread"]}]}
+    rows = [
+        {"uri": "omelette", "edamam_food_id": "egg"},
+        {"uri": "omelette", "edamam_food_id": "butter"},
+        {"uri": "pancakes", "edamam_food_id": "egg"},
+        {"uri": "pancakes", "edamam_food_id": "flour"},
+    ]
+    index = RecipeIngredientIndex()
+
+    with model("RecipesModel", "get_all_recipe_ingredients", return_value=rows), \
+            model("RecipesModel", "get_user_recipe_uris", return_value=["omelette", "pancakes", "toast"]), \
+            model("RecipesModel", "get_catalog_recipes", side_effect=lambda uris: [{"uri": uri, "label": uri.title()} for uri in uris]), \
+            model("UserIngredientsModel", "get_user_food_ids", return_value=["egg", "butter"]), \
+            patch("Controller.RecipeController.recipe_catalog_cache", RecipeCatalogCache()), \
+            patch("Controller.RecipeController.recipe_ingredient_index", index), \
+            patch("Controller.AsyncControllers.recipe_ingredient_index", index):
+        cookable = assert_same(apps.call("get", "/recipes/cookable?limit=5", headers=TOKEN), 200)
+        assert [(item["uri"], item["label"], item["coverage"]) for item in cookable] == [("omelette", "Omelette", 1.0), ("pancakes", "Pancakes", 0.5)]
+        assert_same(apps.call("get", "/recipes/cookable?limit=5&min_coverage=2", headers=TOKEN), 400)
+        assert_same(apps.call("get", "/recipes/cookable?limit=many", headers=TOKEN), 400)
+
+        # Ingredients stored by the async batch reach this worker's index and the log the other workers replay
+        with patch("Model.RecipesModel.RecipesModel.add_recipes_batch", return_value=added), \
+                patch("Model.AsyncModels.AsyncRecipesModel.add_recipes_batch", new_callable=AsyncMock, return_value=(added, {"toast": ["bread"]})):
+            assert assert_same(apps.call("post", "/recipes/add_batch", json=batch, headers=TOKEN), 200) == added
+        assert index.rank(["bread"], ["toast"])[0]["coverage"] == 1.0
+        assert asyncio.run(apps.async_redis.lrange(INDEX_LOG_KEY, 0, -1)) == ['["toast", ["bread"]]']
+
+    with model("RecipesModel", "delete_recipes_batch", return_value=removed):
+        assert assert_same(apps.call("post", "/recipes/remove_batch", json={"recipes": ["toast"]}, headers=TOKEN), 200) == removed
+    assert_same(apps.call("post", "/recipes/add_batch", json={"recipes": [{}] * 101}, headers=TOKEN), 400)
+    assert_same(apps.call("post", "/recipes/remove_batch", json={"recipes": "toast"}, headers=TOKEN), 400)
+
+
+def test_recipes_are_read_from_mysql_while_redis_is_down(apps):
+    recipes = [{"uri": "omelette", "label": "Omelette"}]
+    apps.async_redis.mget = AsyncMock(side_effect=redis.ConnectionError("down"))
+    apps.async_redis.pipeline = MagicMock(side_effect=redis.ConnectionError("down"))
+    # The threaded app's Redis reads are guarded inside RecipeCatalogCache, only the async app is called
+    async def get_all():
+        response = await apps.async_app.test_client().get("/recipes/all", headers=TOKEN)
+        return response.status_code, await response.get_json()
+
+    with patch("Model.AsyncModels.AsyncRecipesModel.get_user_recipe_uris", new_callable=AsyncMock, return_value=["omelette"]), \
+            patch("Model.AsyncModels.AsyncRecipesModel.get_catalog_recipes", new_callable=AsyncMock, return_value=recipes):
+        assert asyncio.run(get_all()) == (200, recipes)
+
+
+if __name__ == "__main__":
+    pytest.main()
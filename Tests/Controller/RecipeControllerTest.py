@@ -0,0 +1,100 @@
+import pytest
+import fakeredis
+import redis
+from contextlib import contextmanager
+from unittest.mock import patch
+from flask import Flask
+from Cache.RecipeIngredientIndex import RecipeIngredientIndex
+
+TOKEN = {"Authorization": "token"}
+
+
+class FakeRecipeTables:
+    """
+    The recipe and pantry tables in memory, answering the statements RecipesModel and /cookable run.
+    """
+    def __init__(self, catalog, pantry):
+        self.catalog = dict(catalog)
+        self.links = []
+        self.ingredients = set()
+        self.pantry = pantry
+        self.rows = []
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql, args=()):
+        args = list(args)
+        if sql.startswith("SELECT uri FROM RecipeCatalog"):
+            self.rows = [{"uri": uri} for uri in args if uri in self.catalog]
+        elif sql.startswith("SELECT uri, label"):
+            self.rows = [self.catalog[uri] for uri in args if uri in self.catalog]
+        elif sql.startswith("INSERT IGNORE INTO RecipeCatalog"):
+            for index in range(0, len(args), 9):
+                self.catalog.setdefault(args[index], {"uri": args[index], "label": args[index + 1]})
+        elif sql.startswith("INSERT IGNORE INTO UserRecipes"):
+            self.links += [(args[index], args[index + 1]) for index in range(0, len(args), 3)]
+        elif sql.startswith("SELECT DISTINCT uri FROM RecipeIngredients"):
+            self.rows = [{"uri": uri} for uri in args if any(row[0] == uri for row in self.ingredients)]
+        elif sql.startswith("INSERT IGNORE INTO RecipeIngredients"):
+            self.ingredients |= {(args[index], args[index + 1]) for index in range(0, len(args), 2)}
+        elif sql.startswith("SELECT uri, edamam_food_id FROM RecipeIngredients"):
+            self.rows = [{"uri": uri, "edamam_food_id": food_id} for uri, food_id in sorted(self.ingredients)]
+        elif sql.startswith("SELECT uri FROM UserRecipes WHERE user_id = %s ORDER BY"):
+            self.rows = [{"uri": uri} for user_id, uri in self.links if user_id == args[0]]
+        elif sql.startswith("SELECT edamam_food_id FROM UserIngredients"):
+            self.rows = [{"edamam_food_id": food_id} for food_id in self.pantry]
+        else:
+            pytest.fail(f"unexpected statement {sql}")
+
+    def fetchall(self):
+        return self.rows
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_saving_a_recipe_already_in_the_catalog_makes_it_cookable():
+    """
+    A recipe another user put in the catalog before ingredients were stored is indexed on the next save.
+    """
+    from Controller.RecipeController import recipes_blueprint
+
+    app = Flask(__name__)
+    app.register_blueprint(recipes_blueprint, url_prefix="/recipes")
+    tables = FakeRecipeTables({"omelette": {"uri": "omelette", "label": "Omelette"}}, ["egg", "butter"])
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    index = RecipeIngredientIndex()
+    recipe = {"uri": "omelette", "label": "Omelette", "calories": 300, "total_weight": 150, "ingredients": ["egg", "butter"]}
+
+    with patch("Config.Redis._pool", pool), \
+            patch("Config.Db.Database.connect_read", return_value=tables), \
+            patch("Config.Db.Database.connect_write", return_value=tables), \
+            patch("Controller.RecipeController.get_cached_uid_redis", return_value=7), \
+            patch("Controller.RecipeController.recipe_ingredient_index", index), \
+            patch("Model.RecipesModel.recipe_ingredient_index", index):
+        client = app.test_client()
+        assert client.get("/recipes/cookable", headers=TOKEN).status_code == 404
+
+        assert client.post("/recipes/add", json={"recipe": recipe}, headers=TOKEN).status_code == 200
+        response = client.get("/recipes/cookable", headers=TOKEN)
+
+        # Saving it again, with whatever ingredients, leaves the stored list alone
+        client.post("/recipes/add", json={"recipe": dict(recipe, ingredients=["caviar"])}, headers=TOKEN)
+
+    assert response.status_code == 200
+    assert [(item["uri"], item["label"], item["coverage"]) for item in response.get_json()] == [("omelette", "Omelette", 1.0)]
+    assert tables.ingredients == {("omelette", "egg"), ("omelette", "butter")}
+
+
+if __name__ == "__main__":
+    pytest.main()
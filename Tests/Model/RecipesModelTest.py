@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from Model.RecipesModel import RecipesModel
+
+
+def make_model(existing_uris):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [{"uri": uri} for uri in existing_uris]
+    return RecipesModel(connection), connection, cursor
+
+
+@patch("Model.RecipesModel.recipe_catalog_cache")
+def test_add_recipes_batch_reports_per_item(mock_cache):
+    """
+    One catalog INSERT IGNORE and one link INSERT IGNORE cover every valid recipe, with results per item.
+    Catalog rows that already exist are left as they are.
+    """
+    model, connection, cursor = make_model(["uri_b"])
+    recipe = {"label": "Soup", "calories": 100, "total_weight": 300}
+
+    response = model.add_recipes_batch(1, [
+        dict(recipe, uri="uri_a"),
+        dict(recipe, uri="uri_b", label="Tampered"),
+        dict(recipe, uri="uri_a"),
+        {"uri": "uri_c"},
+    ])
+
+    assert [result["status"] for result in response["results"]] == ["added", "exists", "duplicate", "invalid"]
+    assert cursor.execute.call_count == 4
+    sql, params = cursor.execute.call_args_list[2].args
+    assert "INSERT IGNORE INTO RecipeCatalog" in sql and "ON DUPLICATE KEY" not in sql
+    assert params[0] == "uri_a" and "Tampered" not in params
+    assert "INSERT IGNORE INTO UserRecipes" in cursor.execute.call_args_list[3].args[0]
+    connection.commit.assert_called_once()
+    mock_cache.invalidate.assert_not_called()
+
+
+@patch("Model.RecipesModel.recipe_ingredient_index")
+@patch("Model.RecipesModel.recipe_catalog_cache")
+def test_refresh_catalog_replaces_metadata_and_ingredients(mock_cache, mock_index):
+    model, connection, cursor = make_model([])
+    recipe = {"uri": "uri_a", "label": "Soup", "calories": 100, "total_weight": 300, "ingredients": ["food_a", "food_b"]}
+
+    assert model.refresh_catalog([recipe]) == {"message": "Refreshed 1 recipes"}
+
+    assert "ON DUPLICATE KEY UPDATE" in cursor.execute.call_args_list[0].args[0]
+    assert cursor.execute.call_args_list[1].args == ("DELETE FROM RecipeIngredients WHERE uri IN (%s)", ["uri_a"])
+    assert cursor.execute.call_args_list[2].args[1] == ["uri_a", "food_a", "uri_a", "food_b"]
+    mock_cache.invalidate.assert_called_once_with(["uri_a"])
+    mock_index.publish.assert_called_once_with("uri_a", ["food_a", "food_b"])
+
+
+def test_delete_recipes_batch_reports_not_found():
+    model, connection, cursor = make_model(["uri_a"])
+
+    response = model.delete_recipes_batch(1, [{"uri": "uri_a"}, "uri_b"])
+
+    assert [result["status"] for result in response["results"]] == ["removed", "not_found"]
+    assert cursor.execute.call_args_list[1].args[1] == [1, "uri_a", "uri_b"]
+    connection.commit.assert_called_once()
+
+
+@patch("Model.RecipesModel.recipe_catalog_cache")
+def test_get_all_recipes_reads_through_catalog_cache(mock_cache):
+    model, _, _ = make_model(["uri_a", "uri_b"])
+    mock_cache.get_many.return_value = [{"uri": "uri_a"}, {"uri": "uri_b"}]
+
+    assert model.get_all_recipes(1) == [{"uri": "uri_a"}, {"uri": "uri_b"}]
+    mock_cache.get_many.assert_called_once_with(["uri_a", "uri_b"], model.get_catalog_recipes)
+
+
+@patch("Model.RecipesModel.recipe_catalog_cache")
+def test_iter_all_recipes_pages_uris_by_keyset(mock_cache):
+    model, _, cursor = make_model([])
+    cursor.fetchall.side_effect = [
+        [{"uri": "uri_a", "date_added": 1}, {"uri": "uri_b", "date_added": 2}],
+        [{"uri": "uri_c", "date_added": 2}],
+    ]
+    mock_cache.get_many.side_effect = lambda uris, loader: [{"uri": uri} for uri in uris]
+
+    assert [row["uri"] for row in model.iter_all_recipes(1, batch_size=2)] == ["uri_a", "uri_b", "uri_c"]
+    assert [call.args[0] for call in mock_cache.get_many.call_args_list] == [["uri_a", "uri_b"], ["uri_c"]]
+    assert cursor.execute.call_args_list[1].args[1] == (1, 2, 2, "uri_b", 2)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from Model.UserIngredientsModel import UserIngredientsModel, to_bulk_changes, quantity_change_statements
+
+
+def test_apply_bulk_operations_single_transaction():
+    """
+    Mixed operations collapse into one DELETE, one upsert and one SELECT, committed once.
+    """
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [{"edamam_food_id": "food_a", "quantity": 5}]
+
+    result = UserIngredientsModel(connection).apply_bulk_operations(7, [
+        {"op": "add", "edamam_food_id": "food_a", "quantity": 2},
+        {"op": "set", "edamam_food_id": "food_a", "quantity": 5},
+        {"op": "remove", "edamam_food_id": "food_b"},
+    ])
+
+    assert result["message"] == "Updated 1 and removed 1 ingredients"
+    assert result["ingredients"] == [{"edamam_food_id": "food_a", "quantity": 5}]
+    assert cursor.execute.call_count == 3
+    assert "user_id = %s AND edamam_food_id IN (%s,%s)" in cursor.execute.call_args_list[0].args[0]
+    assert cursor.execute.call_args_list[0].args[1] == [7, "food_a", "food_b"]
+    assert cursor.execute.call_args_list[1].args[1][:3] == [7, "food_a", 5]
+    connection.commit.assert_called_once()
+
+
+def test_resets_of_several_users_match_on_both_columns():
+    statements, _, removed = quantity_change_statements({(7, "food_a"): (True, 0), (8, "food_b"): (True, 0)})
+    assert "(user_id, edamam_food_id) IN ((%s, %s),(%s, %s))" in statements[0][0]
+    assert statements[0][1] == [7, "food_a", 8, "food_b"]
+    assert len(statements) == 1 and removed == 2
+
+
+def test_apply_bulk_operations_rejects_unknown_op():
+    connection = MagicMock()
+    result = UserIngredientsModel(connection).apply_bulk_operations(7, [{"op": "move", "edamam_food_id": "food_a"}])
+    assert "error" in result
+    connection.commit.assert_not_called()
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "add", "edamam_food_id": "food_a", "quantity": "two"}],
+    [{"op": "set", "edamam_food_id": "food_a", "quantity": None}],
+    [{"op": "add", "edamam_food_id": "food_a", "quantity": "nan"}],
+    ["food_a"],
+    [],
+])
+def test_invalid_bulk_operations_are_client_errors(operations):
+    """
+    Malformed operations raise ValueError up front and never reach the database.
+    """
+    with pytest.raises(ValueError):
+        to_bulk_changes(7, operations)
+
+    connection = MagicMock()
+    result = UserIngredientsModel(connection).apply_bulk_operations(7, operations)
+    assert set(result) == {"error"}
+    connection.cursor.assert_not_called()
+
+
+@patch("Model.UserIngredientsModel.streaming_cursor")
+def test_stream_user_ingredients_fetches_in_batches(mock_streaming_cursor):
+    """
+    Rows come off the unbuffered cursor a batch at a time and the cursor is closed even if the stream stops early.
+    """
+    cursor = mock_streaming_cursor.return_value
+    cursor.fetchmany.side_effect = [[{"edamam_food_id": "food_a"}, {"edamam_food_id": "food_b"}], [{"edamam_food_id": "food_c"}], []]
+
+    rows = UserIngredientsModel(MagicMock()).stream_user_ingredients(7)
+    assert next(rows) == {"edamam_food_id": "food_a"}
+    cursor.close.assert_not_called()
+    rows.close()
+
+    cursor.close.assert_called_once()
+    assert cursor.execute.call_args.args[1] == (7,)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,103 @@
+import csv
+import json
+import pytest
+import fakeredis
+import redis
+from unittest.mock import MagicMock, patch
+from pymysql.cursors import RE_INSERT_VALUES
+from Model.InternalIngredientsModel import CATALOG_COLUMNS
+from Sync.CatalogImport import import_catalog, main
+
+STORED = [
+    {"Edamam_Food_ID": "food_a", "Name": "milk", "Category": "Dairy", "Quantity_Type": "ml", "Quantity": 100.0,
+     "Expiration_Duration": 7, "Image_URL": None, "Fat": 3.5, "Cholesterol": 10.0, "Sodium": 40.0,
+     "Potassium": 150.0, "Carbohydrate": 5.0, "Protein": 3.4, "Calorie": 64.0},
+    {"Edamam_Food_ID": "food_b", "Name": "eggs", "Category": "Dairy", "Quantity_Type": "unit", "Quantity": 100.0,
+     "Expiration_Duration": 21, "Image_URL": None, "Fat": 10.0, "Cholesterol": 370.0, "Sodium": 140.0,
+     "Potassium": 130.0, "Carbohydrate": 1.1, "Protein": 12.6, "Calorie": 143.0},
+]
+
+
+@pytest.fixture
+def server():
+    pool = redis.BlockingConnectionPool(
+        connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer(), decode_responses=True
+    )
+    with patch("Config.Redis._pool", pool):
+        yield redis.StrictRedis(connection_pool=pool)
+
+
+@pytest.fixture
+def connection():
+    connection = MagicMock()
+    with patch("Sync.CatalogImport.Database") as database, \
+            patch("Model.InternalIngredientsModel.InternalIngredientsModel.stream_catalog",
+                  side_effect=lambda: iter(STORED)):
+        database.return_value.connect_write.return_value = connection
+        yield connection
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=CATALOG_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_only_changed_rows_are_upserted(tmp_path, server, connection):
+    path = str(tmp_path / "catalog.csv")
+    changed = dict(STORED[1], Expiration_Duration=28)
+    added = dict(STORED[0], Edamam_Food_ID="food_c", Name="oat milk", Expiration_Duration="10")
+    write_csv(path, [STORED[0], changed, {"Edamam_Food_ID": "food_d"}, added, added])
+
+    stats = import_catalog(path, batch_size=10)
+
+    assert (stats["read"], stats["changed"], stats["unchanged"], stats["invalid"]) == (5, 2, 2, 1)
+    assert stats["catalog_version"] == 1
+    assert stats["rows_per_second"] > 0
+
+    cursor = connection.cursor.return_value.__enter__.return_value
+    sql, rows = cursor.executemany.call_args.args
+    assert RE_INSERT_VALUES.match(sql)
+    assert [row[0] for row in rows] == ["food_b", "food_c"]
+    assert rows[0][5] == 28 and rows[1][5] == 10
+    connection.commit.assert_called_once()
+
+
+def test_unchanged_import_leaves_the_version_alone(tmp_path, server, connection):
+    path = str(tmp_path / "catalog.jsonl")
+    with open(path, "w") as handle:
+        for row in STORED:
+            handle.write(json.dumps(row) + "\n")
+        handle.write("not json\n")
+
+    stats = import_catalog(path)
+
+    assert (stats["read"], stats["changed"], stats["invalid"]) == (3, 0, 1)
+    assert "catalog_version" not in stats
+    assert server.get("catalog:version") is None
+    connection.commit.assert_not_called()
+
+
+def test_failed_chunk_still_announces_committed_rows(tmp_path, server, connection):
+    path = str(tmp_path / "catalog.csv")
+    write_csv(path, [dict(STORED[0], Expiration_Duration=9), dict(STORED[1], Expiration_Duration=28)])
+    failure = {"error": "An error occurred while upserting ingredients", "details": "Lock wait timeout"}
+
+    with patch("Model.InternalIngredientsModel.InternalIngredientsModel.upsert_ingredients",
+               side_effect=[{"message": "Upserted 1 ingredients"}, failure]), \
+            patch("Sync.CatalogSnapshotBuild.build_catalog_snapshot", return_value={"path": "snap"}) as build:
+        stats = import_catalog(path, batch_size=1, snapshot_dir=str(tmp_path))
+
+    assert stats["error"] == failure["error"] and stats["changed"] == 1
+    assert stats["catalog_version"] == 1 and server.get("catalog:version") == "1"
+    build.assert_called_once_with(str(tmp_path), 1)
+
+    with patch("sys.argv", ["CatalogImport", path]), \
+            patch("Sync.CatalogImport.import_catalog", return_value=stats), pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+
+
+if __name__ == "__main__":
+    pytest.main()
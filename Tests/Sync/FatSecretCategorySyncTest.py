@@ -0,0 +1,75 @@
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from Sync.FatSecretCategorySync import sync_fatsecret_category
+
+
+def make_connection(categories, subcategories):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.side_effect = [categories, subcategories]
+    return connection, cursor
+
+
+@patch("Sync.FatSecretCategorySync.category_resolver")
+@patch("Sync.FatSecretCategorySync.Database")
+@patch("Sync.FatSecretCategorySync.FatSecretComponent")
+def test_sync_fetches_concurrently_and_writes_only_changes(fatsecret, database, resolver):
+    # Every worker has to be in flight at once to get past the barrier
+    barrier = threading.Barrier(3, timeout=5)
+    subcategories = {1: ["Milk", "Cheese"], 2: "Apples", 3: None}
+
+    def get_food_sub_categories(category_id):
+        barrier.wait()
+        return subcategories[category_id]
+
+    fatsecret.return_value.get_food_categories.return_value = [
+        {"id": "1", "name": "Dairy"}, {"id": "2", "name": "Fruit"}, {"id": "3", "name": "Meat"},
+    ]
+    fatsecret.return_value.get_food_sub_categories.side_effect = get_food_sub_categories
+    connection, cursor = make_connection(
+        [{"id": 1, "name": "Dairy", "description": None}, {"id": 2, "name": "Fruits", "description": ""}],
+        [{"name": "Milk", "category_id": 1}],
+    )
+    database.return_value.connect_write.return_value = connection
+
+    summary = sync_fatsecret_category(workers=3)
+
+    assert summary["categories"] == 2
+    assert summary["subcategories"] == 2
+    assert summary["failed_categories"] == [3]
+    assert set(summary["timings"]) == {"fetch_categories", "fetch_subcategories", "load_stored", "diff", "write"}
+
+    # Two reads, then one multi-row statement per table and a single commit
+    statements = [call.args for call in cursor.execute.call_args_list]
+    assert len(statements) == 4
+    assert "INSERT INTO Categories" in statements[2][0]
+    assert statements[2][1] == [2, "Fruit", "", 3, "Meat", ""]
+    assert "INSERT INTO Subcategories" in statements[3][0]
+    assert statements[3][1] == ["Cheese", 1, "Apples", 2]
+    connection.commit.assert_called_once()
+    connection.close.assert_called_once()
+    resolver.publish.assert_called_once()
+
+
+@patch("Sync.FatSecretCategorySync.category_resolver")
+@patch("Sync.FatSecretCategorySync.Database")
+@patch("Sync.FatSecretCategorySync.FatSecretComponent")
+def test_sync_without_changes_writes_nothing(fatsecret, database, resolver):
+    fatsecret.return_value.get_food_categories.return_value = [{"id": "1", "name": "Dairy"}]
+    fatsecret.return_value.get_food_sub_categories.return_value = ["Milk"]
+    connection, cursor = make_connection(
+        [{"id": 1, "name": "Dairy", "description": ""}], [{"name": "Milk", "category_id": 1}]
+    )
+    database.return_value.connect_write.return_value = connection
+
+    summary = sync_fatsecret_category()
+
+    assert (summary["categories"], summary["subcategories"]) == (0, 0)
+    assert cursor.execute.call_count == 2
+    connection.commit.assert_not_called()
+    resolver.publish.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,33 +1,54 @@
 import os
 from dotenv import load_dotenv
 from flask import Flask
-from firebase_admin import credentials, auth
-# from Controller.PantryController import pantry_blueprint
-from Controller.UserIngredientsController import user_ingredients_blueprint
-from Controller.InternalIngredientsController import internal_ingredients_blueprint
-from Controller.ReportsController import reports_blueprint
-from Controller.RecipeController import recipes_blueprint
-from Controller.UserController import user_blueprint
-
-from Config.Fb import initialize_firebase
-
-
-load_dotenv()
-
-app = Flask(__name__)
-
-initialize_firebase()
-
-# app.register_blueprint(pantry_blueprint, url_prefix='/pantry')
-app.register_blueprint(recipes_blueprint, url_prefix='/recipes')
-app.register_blueprint(user_blueprint, url_prefix='/users')
-app.register_blueprint(user_ingredients_blueprint, url_prefix='/user_ingredients')
-app.register_blueprint(internal_ingredients_blueprint, url_prefix='/internal_ingredients')
-app.register_blueprint(reports_blueprint, url_prefix='/reports')
-
-# Setup for python3
+from Config.Logging import configure_logging
+from Config.Startup import warm_up, is_warm_up_enabled
+from Config.RequestMetrics import install_request_metrics
+from Config.Compression import install_compression
+from Config.Resilience import install_deadlines
+
+
+def create_app(warm=None):
+    """
+    Build the Flask app. Environment is loaded once here, before any controller reads it.
+    Firebase, AWS, Redis and MySQL clients start lazily on first use unless warm (or APP_WARM_UP) is set.
+    """
+    load_dotenv()
+    configure_logging()
+
+    # Controllers build their Database objects on import, so they load after the environment
+    # from Controller.PantryController import pantry_blueprint
+    from Controller.UserIngredientsController import user_ingredients_blueprint
+    from Controller.InternalIngredientsController import internal_ingredients_blueprint
+    from Controller.ReportsController import reports_blueprint
+    from Controller.RecipeController import recipes_blueprint
+    from Controller.UserController import user_blueprint
+    from Controller.MetricsController import metrics_blueprint
+
+    app = Flask(__name__)
+
+    # app.register_blueprint(pantry_blueprint, url_prefix='/pantry')
+    app.register_blueprint(recipes_blueprint, url_prefix='/recipes')
+    app.register_blueprint(user_blueprint, url_prefix='/users')
+    app.register_blueprint(user_ingredients_blueprint, url_prefix='/user_ingredients')
+    app.register_blueprint(internal_ingredients_blueprint, url_prefix='/internal_ingredients')
+    app.register_blueprint(reports_blueprint, url_prefix='/reports')
+    app.register_blueprint(metrics_blueprint, url_prefix='/metrics')
+    install_deadlines(app)
+    install_request_metrics(app)
+    install_compression(app)
+
+    if warm is None:
+        warm = is_warm_up_enabled()
+    if warm:
+        warm_up()
+
+    return app
+
+
+# Local development only, production runs gunicorn with gunicorn.conf.py
 if __name__ == '__main__':
-    app.run(
+    create_app().run(
         host="0.0.0.0",
         port=5000,
         ssl_context=(
@@ -35,4 +56,3 @@ if __name__ == '__main__':
             os.getenv("SSL_KEY_PATH")
         )
     )
-
@@ -0,0 +1,62 @@
+from dotenv import load_dotenv
+from quart import Quart
+from Config.AsyncDb import AsyncDatabase
+from Config.AsyncRedis import AsyncRedisClient
+from Config.Fb import initialize_firebase
+from Config.Logging import configure_logging
+from Config.Metrics import metrics
+from Config.Resilience import install_async_deadlines
+from Config.RequestMetrics import install_async_request_metrics
+from Cache.IngredientSearchIndex import ingredient_search_index
+
+
+def create_async_app():
+    """
+    ASGI app serving every user_ingredients, recipes, reports, internal_ingredients and metrics route
+    on aiomysql and redis.asyncio. Only the users routes stay on the threaded app.
+    """
+    load_dotenv()
+    configure_logging()
+
+    from Controller.AsyncControllers import (
+        AsyncUserIngredientsController,
+        AsyncRecipeController,
+        AsyncReportsController,
+        AsyncInternalIngredientsController,
+        AsyncMetricsController
+    )
+
+    app = Quart(__name__)
+    install_async_deadlines(app)
+    install_async_request_metrics(app)
+    redis_client = AsyncRedisClient()
+    db = AsyncDatabase(redis_client)
+
+    app.register_blueprint(AsyncRecipeController(db, redis_client).blueprint, url_prefix='/recipes')
+    app.register_blueprint(AsyncUserIngredientsController(db, redis_client).blueprint, url_prefix='/user_ingredients')
+    app.register_blueprint(AsyncInternalIngredientsController(db, redis_client).blueprint, url_prefix='/internal_ingredients')
+    app.register_blueprint(AsyncReportsController(db, redis_client).blueprint, url_prefix='/reports')
+    app.register_blueprint(AsyncMetricsController().blueprint, url_prefix='/metrics')
+
+    @app.before_serving
+    async def startup():
+        # Runs in every Hypercorn worker, each publishes its own snapshot to METRICS_DIR
+        metrics.start_flusher()
+        initialize_firebase()
+        await db.read()
+        await db.write()
+        # Builds on its own thread, /search answers without typo correction until it is ready
+        ingredient_search_index.ensure_fresh()
+
+    @app.after_serving
+    async def shutdown():
+        await db.close()
+        await redis_client.close()
+        metrics.write_snapshot()
+
+    return app
+
+
+# Run with: hypercorn "asgi:create_async_app()" --bind 0.0.0.0:8000 --workers 4
+if __name__ == '__main__':
+    create_async_app().run(host="0.0.0.0", port=8000)
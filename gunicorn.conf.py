@@ -0,0 +1,60 @@
+import os
+import multiprocessing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# App factory, imported once in the master and shared copy-on-write by the workers.
+# The master never warms up, post_fork does that per worker.
+wsgi_app = "app:create_app(warm=False)"
+preload_app = True
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+certfile = os.getenv("SSL_CERT_PATH")
+keyfile = os.getenv("SSL_KEY_PATH")
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+
+
+def post_fork(server, worker):
+    # Sockets opened while preloading belong to the master, each worker opens its own
+    from Config.Lifecycle import reset_after_fork
+    from Config.Startup import warm_up, is_warm_up_enabled
+    reset_after_fork()
+    server.log.info(f"Worker {worker.pid} reset database, Redis and Firebase clients")
+
+    # Publish this worker's metrics for /metrics on any worker to aggregate
+    from Config.Metrics import metrics
+    metrics.start_flusher()
+
+    # Warm each worker rather than the master, whose sockets would be discarded at fork
+    if is_warm_up_enabled():
+        warm_up()
+
+
+def on_starting(server):
+    # Snapshots left by a previous master describe workers that no longer exist
+    from Config.Metrics import clear_snapshots
+    clear_snapshots()
+
+
+def worker_exit(server, worker):
+    # Final snapshot, so requests since the last flush are not lost
+    from Config.Metrics import metrics
+    metrics.write_snapshot()
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters so totals never go backwards
+    from Config.Metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)